@@ -0,0 +1,28 @@
+"""Add covering index for passage tag filters
+
+Revision ID: 3d2e9a1f7b64
+Revises: ddb69be34a72
+Create Date: 2025-09-12 10:24:37.118204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3d2e9a1f7b64"
+down_revision: Union[str, None] = "ddb69be34a72"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # (archive_id, tag) is a prefix of the new index, so the old one becomes redundant
+    op.create_index("ix_passage_tags_archive_tag_passage", "passage_tags", ["archive_id", "tag", "passage_id"], unique=False)
+    op.drop_index("ix_passage_tags_archive_tag", table_name="passage_tags")
+
+
+def downgrade() -> None:
+    op.create_index("ix_passage_tags_archive_tag", "passage_tags", ["archive_id", "tag"], unique=False)
+    op.drop_index("ix_passage_tags_archive_tag_passage", table_name="passage_tags")
@@ -0,0 +1,28 @@
+"""Add line index to file contents
+
+Revision ID: 5e1d7c3a9b42
+Revises: 8c4f1e2b9a07
+Create Date: 2025-09-16 10:12:37.204118
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5e1d7c3a9b42"
+down_revision: Union[str, None] = "8c4f1e2b9a07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # left NULL for existing files: indexes are built (and stored) on first use
+    op.add_column("file_contents", sa.Column("line_index", sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("file_contents", "line_index")
@@ -0,0 +1,30 @@
+"""Add cached message and passage counts
+
+Revision ID: 8c4f1e2b9a07
+Revises: 3d2e9a1f7b64
+Create Date: 2025-09-15 14:02:51.530418
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8c4f1e2b9a07"
+down_revision: Union[str, None] = "3d2e9a1f7b64"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # left NULL on purpose: counters are initialized lazily on first read
+    op.add_column("agents", sa.Column("message_count", sa.Integer(), nullable=True))
+    op.add_column("archives", sa.Column("passage_count", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("archives", "passage_count")
+    op.drop_column("agents", "message_count")
@@ -0,0 +1,86 @@
+"""Add agent_context_messages table
+
+Revision ID: b7e2d94f1c36
+Revises: 5e1d7c3a9b42
+Create Date: 2025-09-18 14:03:51.480271
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e2d94f1c36"
+down_revision: Union[str, None] = "5e1d7c3a9b42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "agent_context_messages",
+        sa.Column("agent_id", sa.String(), nullable=False),
+        sa.Column("position", sa.BigInteger(), nullable=False),
+        sa.Column("message_id", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["agent_id"], ["agents.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("agent_id", "position"),
+    )
+
+    # move agents.message_ids into the new table, keeping the list order as positions 0..n-1
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            """
+            INSERT INTO agent_context_messages (agent_id, position, message_id)
+            SELECT a.id, e.ordinality - 1, e.value
+            FROM agents a
+            CROSS JOIN LATERAL json_array_elements_text(a.message_ids) WITH ORDINALITY AS e(value, ordinality)
+            WHERE json_typeof(a.message_ids) = 'array'
+            """
+        )
+    else:
+        op.execute(
+            """
+            INSERT INTO agent_context_messages (agent_id, position, message_id)
+            SELECT a.id, CAST(e.key AS INTEGER), e.value
+            FROM agents a, json_each(a.message_ids) e
+            WHERE json_type(a.message_ids) = 'array'
+            """
+        )
+
+    with op.batch_alter_table("agents") as batch_op:
+        batch_op.drop_column("message_ids")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("agents") as batch_op:
+        batch_op.add_column(sa.Column("message_ids", sa.JSON(), nullable=True))
+
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            """
+            UPDATE agents a
+            SET message_ids = c.message_ids
+            FROM (
+                SELECT agent_id, json_agg(message_id ORDER BY position) AS message_ids
+                FROM agent_context_messages
+                GROUP BY agent_id
+            ) c
+            WHERE c.agent_id = a.id
+            """
+        )
+    else:
+        op.execute(
+            """
+            UPDATE agents
+            SET message_ids = (
+                SELECT json_group_array(message_id)
+                FROM (SELECT message_id FROM agent_context_messages c WHERE c.agent_id = agents.id ORDER BY position)
+            )
+            WHERE id IN (SELECT agent_id FROM agent_context_messages)
+            """
+        )
+
+    op.drop_table("agent_context_messages")
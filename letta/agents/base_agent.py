@@ -20,6 +20,7 @@ from letta.schemas.user import User
 from letta.services.agent_manager import AgentManager
 from letta.services.message_manager import MessageManager
 from letta.services.passage_manager import PassageManager
+from letta.services.step_context import StepContext
 from letta.utils import united_diff
 
 logger = get_logger(__name__)
@@ -90,34 +91,40 @@ class BaseAgent(ABC):
         tool_rules_solver: Optional[ToolRulesSolver] = None,
         num_messages: Optional[int] = None,  # storing these calculations is specific to the voice agent
         num_archival_memories: Optional[int] = None,
+        step_context: Optional[StepContext] = None,
     ) -> List[Message]:
         """
         Async version of function above. For now before breaking up components, changes should be made in both places.
+
+        When given the request's `step_context`, its archive tags are reused instead of queried (unless a tool
+        inserted into archival memory since), and the blocks loaded with it are used as is on the first rebuild.
         """
         try:
-            # [DB Call] loading blocks (modifies: agent_state.memory.blocks)
-            agent_state = await self.agent_manager.refresh_memory_async(agent_state=agent_state, actor=self.actor)
+            if step_context is not None and step_context.memory_is_current:
+                # blocks were just loaded with the snapshot, tools may change them before the next rebuild
+                step_context.memory_is_current = False
+            else:
+                # [DB Call] loading blocks (modifies: agent_state.memory.blocks)
+                agent_state = await self.agent_manager.refresh_memory_async(agent_state=agent_state, actor=self.actor)
 
             tool_constraint_block = None
             if tool_rules_solver is not None:
                 tool_constraint_block = tool_rules_solver.compile_tool_rule_prompts()
 
             # compile archive tags if there's an attached archive
-            from letta.services.archive_manager import ArchiveManager
-
-            archive_manager = ArchiveManager()
-            archive = await archive_manager.get_default_archive_for_agent_async(
-                agent_id=agent_state.id,
-                actor=self.actor,
-            )
-
-            if archive:
-                archive_tags = await self.passage_manager.get_unique_tags_for_archive_async(
-                    archive_id=archive.id,
-                    actor=self.actor,
-                )
+            if step_context is not None and step_context.archive_tags_are_current:
+                archive_tags = step_context.archive_tags
             else:
-                archive_tags = None
+                from letta.services.archive_manager import ArchiveManager
+
+                archive = await ArchiveManager().get_default_archive_for_agent_async(agent_id=agent_state.id, actor=self.actor)
+                if archive:
+                    archive_tags = await self.passage_manager.get_unique_tags_for_archive_async(archive_id=archive.id, actor=self.actor)
+                else:
+                    archive_tags = None
+                if step_context is not None:
+                    step_context.archive_tags = archive_tags
+                    step_context.archive_tags_are_current = True
 
             # TODO: This is a pretty brittle pattern established all over our code, need to get rid of this
             curr_system_message = in_context_messages[0]
@@ -155,9 +162,9 @@ class BaseAgent(ABC):
 
             # size of messages and archival memories
             if num_messages is None:
-                num_messages = await self.message_manager.size_async(actor=self.actor, agent_id=agent_state.id)
+                num_messages = await self.message_manager.agent_message_count_async(agent_id=agent_state.id, actor=self.actor)
             if num_archival_memories is None:
-                num_archival_memories = await self.passage_manager.agent_passage_size_async(actor=self.actor, agent_id=agent_state.id)
+                num_archival_memories = await self.passage_manager.agent_passage_count_async(agent_id=agent_state.id, actor=self.actor)
 
             new_system_message_str = PromptGenerator.get_system_message_from_compiled_memory(
                 system_prompt=agent_state.system,
@@ -110,8 +110,8 @@ async def _prepare_in_context_messages_async(
         # If autoclear is enabled, only include the most recent system message (usually at index 0)
         current_in_context_messages = [await message_manager.get_message_by_id_async(message_id=agent_state.message_ids[0], actor=actor)]
     else:
-        # Otherwise, include the full list of messages by ID for context
-        current_in_context_messages = await message_manager.get_messages_by_ids_async(message_ids=agent_state.message_ids, actor=actor)
+        # Otherwise, include the full context window (one ordered join on agent_context_messages)
+        current_in_context_messages = await message_manager.get_in_context_messages_async(agent_id=agent_state.id, actor=actor)
 
     # Create a new user message from the input and store it
     new_in_context_messages = await message_manager.create_many_messages_async(
@@ -148,9 +148,31 @@ async def _prepare_in_context_messages_no_persist_async(
         # If autoclear is enabled, only include the most recent system message (usually at index 0)
         current_in_context_messages = [await message_manager.get_message_by_id_async(message_id=agent_state.message_ids[0], actor=actor)]
     else:
-        # Otherwise, include the full list of messages by ID for context
-        current_in_context_messages = await message_manager.get_messages_by_ids_async(message_ids=agent_state.message_ids, actor=actor)
+        # Otherwise, include the full context window (one ordered join on agent_context_messages)
+        current_in_context_messages = await message_manager.get_in_context_messages_async(agent_id=agent_state.id, actor=actor)
+
+    new_in_context_messages = _create_new_in_context_messages(input_messages, agent_state, current_in_context_messages, actor)
+    return current_in_context_messages, new_in_context_messages
+
+
+def _create_new_in_context_messages(
+    input_messages: List[MessageCreateBase],
+    agent_state: AgentState,
+    current_in_context_messages: List[Message],
+    actor: User,
+) -> List[Message]:
+    """
+    Validates a new user input against the agent's current context and creates its (not yet persisted) messages.
 
+    Args:
+        input_messages (List[MessageCreate]): The new user input messages to process.
+        agent_state (AgentState): The current state of the agent.
+        current_in_context_messages (List[Message]): The existing context of the agent.
+        actor (User): The user performing the action, used for access control and attribution.
+
+    Returns:
+        List[Message]: The new in-context messages created from the input.
+    """
     # Check for approval-related message validation
     if len(input_messages) == 1 and input_messages[0].type == "approval":
         # User is trying to send an approval response
@@ -164,21 +186,17 @@ async def _prepare_in_context_messages_no_persist_async(
                 f"Invalid approval request ID. Expected '{current_in_context_messages[-1].id}' "
                 f"but received '{input_messages[0].approval_request_id}'."
             )
-        new_in_context_messages = create_approval_response_message_from_input(agent_state=agent_state, input_message=input_messages[0])
-    else:
-        # User is trying to send a regular message
-        if current_in_context_messages[-1].role == "approval":
-            raise ValueError(
-                "Cannot send a new message: The agent is waiting for approval on a tool call. "
-                "Please approve or deny the pending request before continuing."
-            )
+        return create_approval_response_message_from_input(agent_state=agent_state, input_message=input_messages[0])
 
-        # Create a new user message from the input but dont store it yet
-        new_in_context_messages = create_input_messages(
-            input_messages=input_messages, agent_id=agent_state.id, timezone=agent_state.timezone, actor=actor
+    # User is trying to send a regular message
+    if current_in_context_messages[-1].role == "approval":
+        raise ValueError(
+            "Cannot send a new message: The agent is waiting for approval on a tool call. "
+            "Please approve or deny the pending request before continuing."
         )
 
-    return current_in_context_messages, new_in_context_messages
+    # Create a new user message from the input but dont store it yet
+    return create_input_messages(input_messages=input_messages, agent_id=agent_state.id, timezone=agent_state.timezone, actor=actor)
 
 
 def serialize_message_history(messages: List[str], context: str) -> str:
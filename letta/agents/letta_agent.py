@@ -13,6 +13,7 @@ from letta.agents.ephemeral_summary_agent import EphemeralSummaryAgent
 from letta.agents.helpers import (
     _build_rule_violation_result,
     _create_letta_response,
+    _create_new_in_context_messages,
     _pop_heartbeat,
     _prepare_in_context_messages_no_persist_async,
     _safe_load_tool_call_str,
@@ -55,7 +56,9 @@ from letta.services.helpers.tool_parser_helper import runtime_override_tool_json
 from letta.services.job_manager import JobManager
 from letta.services.message_manager import MessageManager
 from letta.services.passage_manager import PassageManager
+from letta.services.step_context import StepContext
 from letta.services.step_manager import NoopStepManager, StepManager
+from letta.services.step_write_buffer import flush_step_writes
 from letta.services.summarizer.enums import SummarizationMode
 from letta.services.summarizer.summarizer import Summarizer
 from letta.services.telemetry_manager import NoopTelemetryManager, TelemetryManager
@@ -112,6 +115,8 @@ class LettaAgent(BaseAgent):
         # Cached archival memory/message size
         self.num_messages = None
         self.num_archival_memories = None
+        # Snapshot loaded at the start of a request, reused by its inner steps
+        self.step_context: Optional[StepContext] = None
 
         self.summarization_agent = None
         self.summary_block_label = summary_block_label
@@ -161,6 +166,20 @@ class LettaAgent(BaseAgent):
             logger.warning(f"Failed to check job cancellation status for job {self.current_run_id}: {e}")
             return False
 
+    async def _load_step_context(self) -> StepContext:
+        """
+        Load the agent state, in-context messages, counts and archive tags for this request in one session.
+        Inner steps reuse the snapshot instead of querying each of them again.
+        """
+        self.step_context = await self.agent_manager.load_step_context_async(
+            agent_id=self.agent_id,
+            include_relationships=["tools", "memory", "tool_exec_environment_variables", "sources"],
+            actor=self.actor,
+        )
+        self.num_messages = self.step_context.num_messages
+        self.num_archival_memories = self.step_context.num_archival_memories
+        return self.step_context
+
     @trace_method
     async def step(
         self,
@@ -173,13 +192,10 @@ class LettaAgent(BaseAgent):
         dry_run: bool = False,
     ) -> Union[LettaResponse, dict]:
         # TODO (cliandy): pass in run_id and use at send_message endpoints for all step functions
-        agent_state = await self.agent_manager.get_agent_by_id_async(
-            agent_id=self.agent_id,
-            include_relationships=["tools", "memory", "tool_exec_environment_variables", "sources"],
-            actor=self.actor,
-        )
+        step_context = await self._load_step_context()
         result = await self._step(
-            agent_state=agent_state,
+            agent_state=step_context.agent_state,
+            step_context=step_context,
             input_messages=input_messages,
             max_steps=max_steps,
             run_id=run_id,
@@ -209,14 +225,10 @@ class LettaAgent(BaseAgent):
         request_start_timestamp_ns: int | None = None,
         include_return_message_types: list[MessageType] | None = None,
     ):
-        agent_state = await self.agent_manager.get_agent_by_id_async(
-            agent_id=self.agent_id,
-            include_relationships=["tools", "memory", "tool_exec_environment_variables", "sources"],
-            actor=self.actor,
-        )
-        current_in_context_messages, new_in_context_messages = await _prepare_in_context_messages_no_persist_async(
-            input_messages, agent_state, self.message_manager, self.actor
-        )
+        step_context = await self._load_step_context()
+        agent_state = step_context.agent_state
+        current_in_context_messages = step_context.in_context_messages
+        new_in_context_messages = _create_new_in_context_messages(input_messages, agent_state, current_in_context_messages, self.actor)
         initial_messages = new_in_context_messages
         in_context_messages = current_in_context_messages
         tool_rules_solver = ToolRulesSolver(agent_state.tool_rules)
@@ -550,6 +562,7 @@ class LettaAgent(BaseAgent):
         run_id: str | None = None,
         request_start_timestamp_ns: int | None = None,
         dry_run: bool = False,
+        step_context: StepContext | None = None,
     ) -> Union[tuple[list[Message], list[Message], LettaStopReason | None, LettaUsageStatistics], dict]:
         """
         Carries out an invocation of the agent loop. In each step, the agent
@@ -558,9 +571,13 @@ class LettaAgent(BaseAgent):
             3. Fetches a response from the LLM
             4. Processes the response
         """
-        current_in_context_messages, new_in_context_messages = await _prepare_in_context_messages_no_persist_async(
-            input_messages, agent_state, self.message_manager, self.actor
-        )
+        if step_context is not None:
+            current_in_context_messages = step_context.in_context_messages
+            new_in_context_messages = _create_new_in_context_messages(input_messages, agent_state, current_in_context_messages, self.actor)
+        else:
+            current_in_context_messages, new_in_context_messages = await _prepare_in_context_messages_no_persist_async(
+                input_messages, agent_state, self.message_manager, self.actor
+            )
         initial_messages = new_in_context_messages
         in_context_messages = current_in_context_messages
         tool_rules_solver = ToolRulesSolver(agent_state.tool_rules)
@@ -897,14 +914,10 @@ class LettaAgent(BaseAgent):
             3. Fetches a response from the LLM
             4. Processes the response
         """
-        agent_state = await self.agent_manager.get_agent_by_id_async(
-            agent_id=self.agent_id,
-            include_relationships=["tools", "memory", "tool_exec_environment_variables", "sources"],
-            actor=self.actor,
-        )
-        current_in_context_messages, new_in_context_messages = await _prepare_in_context_messages_no_persist_async(
-            input_messages, agent_state, self.message_manager, self.actor
-        )
+        step_context = await self._load_step_context()
+        agent_state = step_context.agent_state
+        current_in_context_messages = step_context.in_context_messages
+        new_in_context_messages = _create_new_in_context_messages(input_messages, agent_state, current_in_context_messages, self.actor)
         initial_messages = new_in_context_messages
         in_context_messages = current_in_context_messages
 
@@ -1323,6 +1336,8 @@ class LettaAgent(BaseAgent):
                 request_span.add_event(name="letta_request_ms", attributes={"duration_ms": ns_to_ms(duration_ns)})
             await self._update_agent_last_run_metrics(now, ns_to_ms(duration_ns))
             if settings.track_agent_run and self.current_run_id:
+                # the run's steps have to be readable once the run is reported as finished
+                await flush_step_writes()
                 await self.job_manager.record_response_duration(self.current_run_id, duration_ns, self.actor)
                 await self.job_manager.safe_update_job_status_async(
                     job_id=self.current_run_id,
@@ -1530,9 +1545,7 @@ class LettaAgent(BaseAgent):
     @trace_method
     async def summarize_conversation_history(self) -> None:
         """Called when the developer explicitly triggers compaction via the API"""
-        agent_state = await self.agent_manager.get_agent_by_id_async(agent_id=self.agent_id, actor=self.actor)
-        message_ids = agent_state.message_ids
-        in_context_messages = await self.message_manager.get_messages_by_ids_async(message_ids=message_ids, actor=self.actor)
+        in_context_messages = await self.message_manager.get_in_context_messages_async(agent_id=self.agent_id, actor=self.actor)
         new_in_context_messages, updated = await self.summarizer.summarize(
             in_context_messages=in_context_messages, new_letta_messages=[], force=True
         )
@@ -1549,12 +1562,12 @@ class LettaAgent(BaseAgent):
         tool_rules_solver: ToolRulesSolver,
     ) -> tuple[dict, list[str]]:
         if not self.num_messages:
-            self.num_messages = await self.message_manager.size_async(
+            self.num_messages = await self.message_manager.agent_message_count_async(
                 agent_id=agent_state.id,
                 actor=self.actor,
             )
         if not self.num_archival_memories:
-            self.num_archival_memories = await self.passage_manager.agent_passage_size_async(
+            self.num_archival_memories = await self.passage_manager.agent_passage_count_async(
                 agent_id=agent_state.id,
                 actor=self.actor,
             )
@@ -1565,6 +1578,7 @@ class LettaAgent(BaseAgent):
             num_messages=self.num_messages,
             num_archival_memories=self.num_archival_memories,
             tool_rules_solver=tool_rules_solver,
+            step_context=self.step_context,
         )
 
         # scrub inner thoughts from messages if reasoning is completely disabled
@@ -1897,6 +1911,9 @@ class LettaAgent(BaseAgent):
                     "tool_id": target_tool.id,
                 },
             )
+        if tool_name == "archival_memory_insert" and self.step_context is not None:
+            # the new passage may carry new tags, which the memory metadata lists
+            self.step_context.archive_tags_are_current = False
         log_event(name=f"finish_{tool_name}_execution", attributes=tool_execution_result.model_dump())
         return tool_execution_result
 
@@ -142,7 +142,7 @@ class VoiceAgent(BaseAgent):
 
         summarizer = self.init_summarizer(agent_state=agent_state)
 
-        in_context_messages = await self.message_manager.get_messages_by_ids_async(message_ids=agent_state.message_ids, actor=self.actor)
+        in_context_messages = await self.message_manager.get_in_context_messages_async(agent_id=agent_state.id, actor=self.actor)
         memory_edit_timestamp = get_utc_time()
         in_context_messages[0].content[0].text = await PromptGenerator.compile_system_message_async(
             system_prompt=agent_state.system,
@@ -308,12 +308,12 @@ class VoiceAgent(BaseAgent):
         agent_state: AgentState,
     ) -> List[Message]:
         if not self.num_messages:
-            self.num_messages = await self.message_manager.size_async(
+            self.num_messages = await self.message_manager.agent_message_count_async(
                 agent_id=agent_state.id,
                 actor=self.actor,
             )
         if not self.num_archival_memories:
-            self.num_archival_memories = await self.passage_manager.agent_passage_size_async(
+            self.num_archival_memories = await self.passage_manager.agent_passage_count_async(
                 agent_id=agent_state.id,
                 actor=self.actor,
             )
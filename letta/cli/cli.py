@@ -43,6 +43,21 @@ def server(
         raise NotImplementedError("WS suppport deprecated")
 
 
+def worker(
+    concurrency: Annotated[Optional[int], typer.Option(help="Background tasks to run at a time (default: task_queue_workers)")] = None,
+):
+    """Launch a worker process running background tasks (sleeptime agents, async agent messages) from Redis"""
+    import asyncio
+
+    from letta.services.task_queue import run_task_worker
+
+    try:
+        asyncio.run(run_task_worker(concurrency))
+    except KeyboardInterrupt:
+        typer.secho("Terminating the worker...")
+        sys.exit(0)
+
+
 def version() -> str:
     import letta
 
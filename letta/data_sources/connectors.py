@@ -76,7 +76,7 @@ async def load_data(connector: DataConnector, source: Source, passage_manager: P
 
             if len(texts) >= EMBEDDING_BATCH_SIZE:
                 # Process the batch
-                embeddings = await client.request_embeddings(texts, embedding_config)
+                embeddings = await client.request_embeddings_cached(texts, embedding_config)
                 passages = []
 
                 for text, embedding, passage_metadata in zip(texts, embeddings, metadatas):
@@ -111,7 +111,7 @@ async def load_data(connector: DataConnector, source: Source, passage_manager: P
 
         # Process final remaining texts for this file
         if len(texts) > 0:
-            embeddings = await client.request_embeddings(texts, embedding_config)
+            embeddings = await client.request_embeddings_cached(texts, embedding_config)
             passages = []
 
             for text, embedding, passage_metadata in zip(texts, embeddings, metadatas):
@@ -1,6 +1,6 @@
 import asyncio
 from functools import wraps
-from typing import Any, Dict, List, Optional, Set, Union
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Union
 
 from letta.constants import REDIS_EXCLUDE, REDIS_INCLUDE, REDIS_SET_DEFAULT_VAL
 from letta.log import get_logger
@@ -177,6 +177,21 @@ class AsyncRedisClient:
         client = await self.get_client()
         return await client.exists(*keys)
 
+    @with_retry()
+    async def mget(self, *keys: str) -> List[Optional[str]]:
+        """Get the values of several keys in one round trip (None for missing keys)."""
+        client = await self.get_client()
+        return await client.mget(keys)
+
+    @with_retry()
+    async def set_many(self, mapping: Dict[str, Union[str, int, float]], ex: Optional[int] = None) -> None:
+        """Set several keys (with the same expiry) in one pipelined round trip."""
+        client = await self.get_client()
+        async with client.pipeline(transaction=False) as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, value, ex=ex)
+            await pipe.execute()
+
     # Set operations
     async def sadd(self, key: str, *members: Union[str, int, float]) -> int:
         """Add members to set."""
@@ -338,6 +353,48 @@ class AsyncRedisClient:
         client = await self.get_client()
         return await client.xtrim(stream, maxlen=maxlen, approximate=approximate)
 
+    # Pub/sub operations
+    @with_retry()
+    async def publish(self, channel: str, message: str) -> int:
+        """Publish a message to a channel.
+
+        Returns:
+            Number of subscribers that received the message
+        """
+        client = await self.get_client()
+        return await client.publish(channel, message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[str]:
+        """Yield messages published to a channel until the caller stops iterating."""
+        client = await self.get_client()
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(channel)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    yield message["data"]
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
+
+    # Lease locks: the value is the owner's token, so only the owner can extend or release its lease
+    _EXTEND_IF_OWNER_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end"
+    )
+    _DELETE_IF_OWNER_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+    @with_retry()
+    async def extend_if_owner(self, key: str, token: str, px: int) -> bool:
+        """Reset the expiry of `key` to `px` milliseconds if it still holds `token`."""
+        client = await self.get_client()
+        return bool(await client.eval(self._EXTEND_IF_OWNER_SCRIPT, 1, key, token, px))
+
+    @with_retry()
+    async def delete_if_owner(self, key: str, token: str) -> bool:
+        """Delete `key` if it still holds `token`."""
+        client = await self.get_client()
+        return bool(await client.eval(self._DELETE_IF_OWNER_SCRIPT, 1, key, token))
+
     async def check_inclusion_and_exclusion(self, member: str, group: str) -> bool:
         exclude_key = self._get_group_exclusion_key(group)
         include_key = self._get_group_inclusion_key(group)
@@ -386,6 +443,12 @@ class NoopAsyncRedisClient(AsyncRedisClient):
     async def exists(self, *keys: str) -> int:
         return 0
 
+    async def mget(self, *keys: str) -> List[Optional[str]]:
+        return [None] * len(keys)
+
+    async def set_many(self, mapping: Dict[str, Union[str, int, float]], ex: Optional[int] = None) -> None:
+        return None
+
     async def sadd(self, key: str, *members: Union[str, int, float]) -> int:
         return 0
 
@@ -435,6 +498,19 @@ class NoopAsyncRedisClient(AsyncRedisClient):
     async def xtrim(self, stream: str, maxlen: int, approximate: bool = True) -> int:
         return 0
 
+    async def publish(self, channel: str, message: str) -> int:
+        return 0
+
+    async def extend_if_owner(self, key: str, token: str, px: int) -> bool:
+        return False
+
+    async def delete_if_owner(self, key: str, token: str) -> bool:
+        return False
+
+    async def subscribe(self, channel: str) -> AsyncIterator[str]:
+        return
+        yield
+
 
 async def get_redis_client() -> AsyncRedisClient:
     global _client_instance
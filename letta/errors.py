@@ -89,6 +89,17 @@ class LettaUnexpectedStreamCancellationError(LettaError):
     """Error raised when a streaming request is terminated unexpectedly."""
 
 
+class AgentLockTimeoutError(LettaError):
+    """Error raised when an agent stays busy with another request for longer than the lock wait timeout."""
+
+    def __init__(self, agent_id: str, timeout: float):
+        super().__init__(
+            message=f"Agent {agent_id} is busy processing another request (waited {timeout:.0f}s)",
+            code=ErrorCode.TIMEOUT,
+            details={"agent_id": agent_id},
+        )
+
+
 class LLMError(LettaError):
     pass
 
@@ -437,15 +437,18 @@ def fire_and_forget_send_to_agent(
 async def _send_message_to_agents_matching_tags_async(
     sender_agent: "Agent", server: "SyncServer", messages: List[MessageCreate], matching_agents: List["AgentState"]
 ) -> List[str]:
+    sem = asyncio.Semaphore(settings.multi_agent_concurrent_sends)
+
     async def _send_single(agent_state):
-        return await _async_send_message_with_retries(
-            server=server,
-            sender_agent=sender_agent,
-            target_agent_id=agent_state.id,
-            messages=messages,
-            max_retries=3,
-            timeout=settings.multi_agent_send_message_timeout,
-        )
+        async with sem:
+            return await _async_send_message_with_retries(
+                server=server,
+                sender_agent=sender_agent,
+                target_agent_id=agent_state.id,
+                messages=messages,
+                max_retries=3,
+                timeout=settings.multi_agent_send_message_timeout,
+            )
 
     tasks = [asyncio.create_task(_send_single(agent_state)) for agent_state in matching_agents]
     results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -22,8 +22,12 @@ from letta.services.group_manager import GroupManager
 from letta.services.job_manager import JobManager
 from letta.services.message_manager import MessageManager
 from letta.services.passage_manager import PassageManager
-from letta.services.step_manager import NoopStepManager, StepManager
+from letta.services.step_manager import NoopStepManager, StepManager, WriteBehindStepManager
+from letta.services.task_queue import TaskPriority, enqueue_task, task_handler
 from letta.services.telemetry_manager import NoopTelemetryManager, TelemetryManager
+from letta.settings import settings
+
+SLEEPTIME_AGENT_STEP_TASK = "sleeptime_agent_step"
 
 
 class SleeptimeMultiAgentV2(BaseAgent):
@@ -236,6 +240,26 @@ class SleeptimeMultiAgentV2(BaseAgent):
         )
         run = await self.job_manager.create_job_async(pydantic_job=run, actor=self.actor)
 
+        if settings.task_queue_enabled:
+            await enqueue_task(
+                SLEEPTIME_AGENT_STEP_TASK,
+                actor=self.actor,
+                payload={
+                    "group_id": self.group.id,
+                    "foreground_agent_id": self.agent_id,
+                    "sleeptime_agent_id": sleeptime_agent_id,
+                    "response_messages": [message.model_dump(mode="json") for message in response_messages],
+                    "last_processed_message_id": last_processed_message_id,
+                    "run_id": run.id,
+                    "current_run_id": self.current_run_id,
+                    # fixed up front so a retried attempt can tell whether an earlier one already delivered the transcript
+                    "transcript_otid": Message.generate_otid(),
+                },
+                priority=TaskPriority.sleeptime,
+                serialize_key=sleeptime_agent_id,
+            )
+            return run.id
+
         asyncio.create_task(
             self._participant_agent_step(
                 foreground_agent_id=self.agent_id,
@@ -256,8 +280,28 @@ class SleeptimeMultiAgentV2(BaseAgent):
         last_processed_message_id: str,
         run_id: str,
         use_assistant_message: bool = True,
+        transcript_otid: str | None = None,
+        queued: bool = False,
     ) -> str:
+        """Send the sleeptime agent a transcript of the latest foreground turn and record the outcome on `run_id`.
+
+        When `queued`, this is one attempt of a task queue task: a failure is re-raised without touching the run,
+        which is only marked failed by `_mark_sleeptime_run_failed` once the queue gives up on the task. Delivery is
+        at-least-once; the transcript is persisted under `transcript_otid` once the sleeptime agent's first step gets
+        a response, so an attempt that finds it already persisted completes the run instead of sending it again.
+        """
         try:
+            if transcript_otid is not None and await self.message_manager.message_exists_by_otid_async(
+                agent_id=sleeptime_agent_id, otid=transcript_otid, actor=self.actor
+            ):
+                job_update = JobUpdate(
+                    status=JobStatus.completed,
+                    completed_at=datetime.now(timezone.utc).replace(tzinfo=None),
+                    metadata={"agent_id": sleeptime_agent_id},
+                )
+                await self.job_manager.update_job_by_id_async(job_id=run_id, job_update=job_update, actor=self.actor)
+                return None
+
             # Update job status
             job_update = JobUpdate(status=JobStatus.running)
             await self.job_manager.update_job_by_id_async(job_id=run_id, job_update=job_update, actor=self.actor)
@@ -284,6 +328,7 @@ class SleeptimeMultiAgentV2(BaseAgent):
                     role="user",
                     content=[TextContent(text=message_text)],
                     id=Message.generate_id(),
+                    otid=transcript_otid,
                     agent_id=sleeptime_agent_id,
                     group_id=self.group.id,
                 )
@@ -325,6 +370,8 @@ class SleeptimeMultiAgentV2(BaseAgent):
             await self.job_manager.update_job_by_id_async(job_id=run_id, job_update=job_update, actor=self.actor)
             return result
         except Exception as e:
+            if queued:
+                raise
             job_update = JobUpdate(
                 status=JobStatus.failed,
                 completed_at=datetime.now(timezone.utc).replace(tzinfo=None),
@@ -332,3 +379,38 @@ class SleeptimeMultiAgentV2(BaseAgent):
             )
             await self.job_manager.update_job_by_id_async(job_id=run_id, job_update=job_update, actor=self.actor)
             raise
+
+
+async def _mark_sleeptime_run_failed(actor: User, payload: dict, error: str) -> None:
+    job_update = JobUpdate(status=JobStatus.failed, completed_at=datetime.now(timezone.utc).replace(tzinfo=None), metadata={"error": error})
+    await JobManager().update_job_by_id_async(job_id=payload["run_id"], job_update=job_update, actor=actor)
+
+
+@task_handler(SLEEPTIME_AGENT_STEP_TASK, on_failure=_mark_sleeptime_run_failed)
+async def _run_sleeptime_agent_step(actor: User, payload: dict) -> None:
+    """Queued `SleeptimeMultiAgentV2._participant_agent_step`."""
+    group_manager = GroupManager()
+    group = await group_manager.retrieve_group_async(group_id=payload["group_id"], actor=actor)
+    multi_agent = SleeptimeMultiAgentV2(
+        agent_id=payload["foreground_agent_id"],
+        message_manager=MessageManager(),
+        agent_manager=AgentManager(),
+        block_manager=BlockManager(),
+        passage_manager=PassageManager(),
+        group_manager=group_manager,
+        job_manager=JobManager(),
+        actor=actor,
+        step_manager=WriteBehindStepManager() if settings.step_write_behind else StepManager(),
+        telemetry_manager=TelemetryManager() if settings.llm_api_logging else NoopTelemetryManager(),
+        group=group,
+        current_run_id=payload["current_run_id"],
+    )
+    await multi_agent._participant_agent_step(
+        foreground_agent_id=payload["foreground_agent_id"],
+        sleeptime_agent_id=payload["sleeptime_agent_id"],
+        response_messages=[Message.model_validate(message) for message in payload["response_messages"]],
+        last_processed_message_id=payload["last_processed_message_id"],
+        run_id=payload["run_id"],
+        transcript_otid=payload.get("transcript_otid"),
+        queued=True,
+    )
@@ -0,0 +1,261 @@
+"""In-process vector index for archival passage search on SQLite.
+
+SQLite has no native vector operator, so the SQL fallback ranks passages with the
+`cosine_distance` Python UDF, which decodes and scores every row one at a time. This
+module keeps each archive's embeddings in a contiguous, unit-normalized float32
+matrix so a query is a single matrix-vector product followed by a top-k partition.
+
+Matrices are loaded lazily on first search. Before every search the archive's version in
+the database, (row count, latest `created_at`, latest `updated_at`), is compared with the
+one the matrix was synced to; on a mismatch deleted rows are dropped and new or updated
+rows are re-read, so writes from any code path (in-place updates and delete-plus-insert
+included) are never served stale.
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from letta.helpers.singleton import singleton
+from letta.log import get_logger
+from letta.orm.passage import ArchivalPassage
+from letta.otel.tracing import trace_method
+
+logger = get_logger(__name__)
+
+# Maximum number of archive matrices kept in memory before the least recently used is evicted
+MAX_CACHED_ARCHIVES = 64
+
+# Above this many rows inserted by other code paths, a matrix is reloaded rather than patched
+MAX_RECONCILED_NEW_ROWS = 500
+
+# (row count, latest created_at, latest updated_at) of an archive's passages
+ArchiveVersion = Tuple[int, Optional[datetime], Optional[datetime]]
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Scale each row to unit length; all-zero rows stay zero so they score a cosine distance of 1.0."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class ArchiveVectorMatrix:
+    """Unit-normalized float32 embedding matrix for the passages of a single archive.
+
+    Rows are kept in (created_at, id) order as loaded, with new passages appended, so ties in
+    distance resolve the same way the SQL `ORDER BY distance, created_at, id` fallback does.
+    """
+
+    def __init__(self, dim: int, ids: Sequence[str] = (), embeddings: Optional[np.ndarray] = None):
+        self.dim = dim
+        # database version the rows were last reconciled with, None if never
+        self.version: Optional[ArchiveVersion] = None
+        self.ids: List[str] = list(ids)
+        self.id_to_row: Dict[str, int] = {passage_id: row for row, passage_id in enumerate(self.ids)}
+        if embeddings is None or len(self.ids) == 0:
+            self.matrix = np.zeros((0, dim), dtype=np.float32)
+        else:
+            self.matrix = _normalize_rows(np.ascontiguousarray(embeddings[:, :dim], dtype=np.float32))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _coerce(self, embedding) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if embedding is not None:
+            values = np.asarray(embedding, dtype=np.float32)[: self.dim]
+            vector[: values.shape[0]] = values
+        return vector
+
+    def add(self, ids: Sequence[str], embeddings: Iterable) -> None:
+        """Append passages, ignoring ids that are already indexed."""
+        new_ids, new_rows = [], []
+        for passage_id, embedding in zip(ids, embeddings):
+            if passage_id in self.id_to_row:
+                continue
+            self.id_to_row[passage_id] = len(self.ids) + len(new_ids)
+            new_ids.append(passage_id)
+            new_rows.append(self._coerce(embedding))
+        if not new_ids:
+            return
+        self.ids.extend(new_ids)
+        self.matrix = np.concatenate([self.matrix, _normalize_rows(np.stack(new_rows))])
+
+    def update(self, passage_id: str, embedding) -> None:
+        row = self.id_to_row.get(passage_id)
+        if row is not None:
+            self.matrix[row] = _normalize_rows(self._coerce(embedding)[None, :])[0]
+
+    def remove(self, ids: Iterable[str]) -> int:
+        """Drop passages from the matrix, returning how many were removed."""
+        rows = [self.id_to_row[passage_id] for passage_id in ids if passage_id in self.id_to_row]
+        if not rows:
+            return 0
+        keep = np.ones(len(self.ids), dtype=bool)
+        keep[rows] = False
+        self.matrix = np.ascontiguousarray(self.matrix[keep])
+        self.ids = [passage_id for passage_id, kept in zip(self.ids, keep) if kept]
+        self.id_to_row = {passage_id: row for row, passage_id in enumerate(self.ids)}
+        return len(rows)
+
+    def search(self, query_embedding, k: Optional[int], candidate_ids: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
+        """Return up to `k` (passage_id, cosine_distance) pairs ordered from nearest to farthest.
+
+        Args:
+            query_embedding: Query vector (may be zero-padded beyond `dim`)
+            k: Number of results to return, or None for every candidate
+            candidate_ids: Optional set of passage ids to restrict the search to
+        """
+        if len(self.ids) == 0:
+            return []
+
+        query = _normalize_rows(self._coerce(query_embedding)[None, :])[0]
+        if candidate_ids is None:
+            rows = None
+            distances = 1.0 - self.matrix @ query
+        else:
+            rows = np.fromiter((self.id_to_row[i] for i in candidate_ids if i in self.id_to_row), dtype=np.int64)
+            if rows.size == 0:
+                return []
+            rows.sort()
+            distances = 1.0 - self.matrix[rows] @ query
+
+        n = distances.shape[0]
+        if k is not None and k < n:
+            top = np.argpartition(distances, k - 1)[:k]
+            # stable sort on the (row-ordered) partition keeps the created_at/id tie-break
+            top = top[np.argsort(distances[top], kind="stable")]
+        else:
+            top = np.argsort(distances, kind="stable")
+
+        source_rows = top if rows is None else rows[top]
+        return [(self.ids[row], float(distances[i])) for row, i in zip(source_rows, top)]
+
+
+@singleton
+class SQLiteVectorIndex:
+    """Process-wide registry of archive embedding matrices used for vector search on SQLite."""
+
+    def __init__(self, max_archives: int = MAX_CACHED_ARCHIVES):
+        self.max_archives = max_archives
+        self._matrices: "OrderedDict[Tuple[str, str], ArchiveVectorMatrix]" = OrderedDict()
+
+    def clear(self) -> None:
+        self._matrices.clear()
+
+    def _get(self, organization_id: str, archive_id: str) -> Optional[ArchiveVectorMatrix]:
+        key = (organization_id, archive_id)
+        matrix = self._matrices.get(key)
+        if matrix is not None:
+            self._matrices.move_to_end(key)
+        return matrix
+
+    def _put(self, organization_id: str, archive_id: str, matrix: ArchiveVectorMatrix) -> None:
+        key = (organization_id, archive_id)
+        self._matrices[key] = matrix
+        self._matrices.move_to_end(key)
+        while len(self._matrices) > self.max_archives:
+            self._matrices.popitem(last=False)
+
+    def invalidate(self, archive_id: str) -> None:
+        for key in [key for key in self._matrices if key[1] == archive_id]:
+            del self._matrices[key]
+
+    @staticmethod
+    def _archive_filter(organization_id: str, archive_id: str):
+        return (ArchivalPassage.archive_id == archive_id, ArchivalPassage.organization_id == organization_id)
+
+    async def _version(self, session: AsyncSession, organization_id: str, archive_id: str) -> ArchiveVersion:
+        result = await session.execute(
+            select(func.count(ArchivalPassage.id), func.max(ArchivalPassage.created_at), func.max(ArchivalPassage.updated_at)).where(
+                *self._archive_filter(organization_id, archive_id)
+            )
+        )
+        count, created_at, updated_at = result.one()
+        return count, created_at, updated_at
+
+    async def _load(
+        self, session: AsyncSession, organization_id: str, archive_id: str, dim: int, version: ArchiveVersion
+    ) -> ArchiveVectorMatrix:
+        result = await session.execute(
+            select(ArchivalPassage.id, ArchivalPassage.embedding)
+            .where(*self._archive_filter(organization_id, archive_id))
+            .order_by(ArchivalPassage.created_at.asc(), ArchivalPassage.id.asc())
+        )
+        rows = result.all()
+        embeddings = np.zeros((len(rows), dim), dtype=np.float32)
+        for i, (_, embedding) in enumerate(rows):
+            if embedding is not None:
+                values = embedding[:dim]
+                embeddings[i, : values.shape[0]] = values
+        matrix = ArchiveVectorMatrix(dim=dim, ids=[row[0] for row in rows], embeddings=embeddings)
+        matrix.version = version
+        self._put(organization_id, archive_id, matrix)
+        return matrix
+
+    async def _reconcile(
+        self, session: AsyncSession, organization_id: str, archive_id: str, matrix: ArchiveVectorMatrix, version: ArchiveVersion
+    ) -> bool:
+        """
+        Bring the matrix to `version`: drop deleted rows, re-read new rows and rows updated since it was last synced.
+
+        Returns False, leaving the matrix as is, if so many rows are new that it should be reloaded instead.
+        """
+        ids = set((await session.execute(select(ArchivalPassage.id).where(*self._archive_filter(organization_id, archive_id)))).scalars())
+        new_ids = ids.difference(matrix.id_to_row)
+        if len(new_ids) > MAX_RECONCILED_NEW_ROWS:
+            return False
+        matrix.remove([passage_id for passage_id in matrix.ids if passage_id not in ids])
+
+        query = select(ArchivalPassage.id, ArchivalPassage.embedding).where(*self._archive_filter(organization_id, archive_id))
+        synced_at = matrix.version[2] if matrix.version else None
+        if synced_at is not None:
+            # server-side defaults store whole seconds next to microsecond ORM timestamps, so compare from the second
+            query = query.where(or_(ArchivalPassage.updated_at >= synced_at.replace(microsecond=0), ArchivalPassage.id.in_(new_ids)))
+        written = (await session.execute(query.order_by(ArchivalPassage.created_at.asc(), ArchivalPassage.id.asc()))).all()
+        for passage_id, embedding in written:
+            if passage_id in matrix.id_to_row:
+                matrix.update(passage_id, embedding)
+        matrix.add([row[0] for row in written], [row[1] for row in written])
+        matrix.version = version
+        return True
+
+    async def _get_or_load(self, session: AsyncSession, organization_id: str, archive_id: str, dim: int) -> ArchiveVectorMatrix:
+        version = await self._version(session, organization_id, archive_id)
+        matrix = self._get(organization_id, archive_id)
+        if matrix is None or matrix.dim != dim:
+            return await self._load(session, organization_id, archive_id, dim, version)
+        if matrix.version != version:
+            # written since the last search
+            logger.debug("Reconciling vector matrix for archive %s (synced=%s, db=%s)", archive_id, matrix.version, version)
+            if not await self._reconcile(session, organization_id, archive_id, matrix, version):
+                return await self._load(session, organization_id, archive_id, dim, version)
+        return matrix
+
+    @trace_method
+    async def search_async(
+        self,
+        session: AsyncSession,
+        organization_id: str,
+        archive_ids: List[str],
+        query_embedding,
+        dim: int,
+        limit: Optional[int],
+        candidate_ids: Optional[Set[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """Rank passages across the given archives by cosine distance to `query_embedding`.
+
+        Returns up to `limit` (passage_id, distance) pairs, nearest first.
+        """
+        results: List[Tuple[str, float]] = []
+        for archive_id in archive_ids:
+            matrix = await self._get_or_load(session, organization_id, archive_id, dim)
+            results.extend(matrix.search(query_embedding, limit, candidate_ids))
+        if len(archive_ids) > 1:
+            results.sort(key=lambda pair: pair[1])
+        return results[:limit] if limit else results
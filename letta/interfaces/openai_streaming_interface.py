@@ -22,7 +22,7 @@ from letta.schemas.letta_message_content import OmittedReasoningContent, TextCon
 from letta.schemas.letta_stop_reason import LettaStopReason, StopReasonType
 from letta.schemas.message import Message
 from letta.schemas.openai.chat_completion_response import FunctionCall, ToolCall
-from letta.server.rest_api.json_parser import OptimisticJSONParser
+from letta.server.rest_api.json_parser import IncrementalJSONParser
 from letta.streaming_utils import JSONInnerThoughtsExtractor
 from letta.utils import count_tokens
 
@@ -49,7 +49,7 @@ class OpenAIStreamingInterface:
         self.assistant_message_tool_kwarg = DEFAULT_MESSAGE_TOOL_KWARG
         self.put_inner_thoughts_in_kwarg = put_inner_thoughts_in_kwarg
 
-        self.optimistic_json_parser: OptimisticJSONParser = OptimisticJSONParser()
+        self.function_args_parser = IncrementalJSONParser()
         self.function_args_reader = JSONInnerThoughtsExtractor(wait_for_first_key=put_inner_thoughts_in_kwarg)
         self.function_name_buffer = None
         self.function_args_buffer = None
@@ -59,7 +59,8 @@ class OpenAIStreamingInterface:
 
         # Buffer to hold function arguments until inner thoughts are complete
         self.current_function_arguments = ""
-        self.current_json_parse_result = {}
+        # Decoded assistant message text parsed out of the arguments but not yet streamed
+        self.pending_assistant_message: list[str] = []
 
         # Premake IDs for database writes
         self.letta_message_id = Message.generate_id()
@@ -230,6 +231,9 @@ class OpenAIStreamingInterface:
                     # updates_main_json, updates_inner_thoughts = self.function_args_reader.process_fragment(tool_call.function.arguments)
                     self.current_function_arguments += tool_call.function.arguments
                     updates_main_json, updates_inner_thoughts = self.function_args_reader.process_fragment(tool_call.function.arguments)
+                    message_delta = self.function_args_parser.feed(tool_call.function.arguments).get(self.assistant_message_tool_kwarg)
+                    if isinstance(message_delta, str) and message_delta:
+                        self.pending_assistant_message.append(message_delta)
 
                     if self.is_openai_proxy:
                         self.fallback_output_tokens += count_tokens(tool_call.function.arguments)
@@ -356,29 +360,11 @@ class OpenAIStreamingInterface:
                                     self.function_id_buffer = None
 
                                 else:
-                                    # If there's no buffer to clear, just output a new chunk with new data
-                                    # TODO: THIS IS HORRIBLE
-                                    # TODO: WE USE THE OLD JSON PARSER EARLIER (WHICH DOES NOTHING) AND NOW THE NEW JSON PARSER
-                                    # TODO: THIS IS TOTALLY WRONG AND BAD, BUT SAVING FOR A LARGER REWRITE IN THE NEAR FUTURE
-                                    parsed_args = self.optimistic_json_parser.parse(self.current_function_arguments)
-
-                                    if parsed_args.get(self.assistant_message_tool_kwarg) and parsed_args.get(
-                                        self.assistant_message_tool_kwarg
-                                    ) != self.current_json_parse_result.get(self.assistant_message_tool_kwarg):
-                                        new_content = parsed_args.get(self.assistant_message_tool_kwarg)
-                                        prev_content = self.current_json_parse_result.get(self.assistant_message_tool_kwarg, "")
-                                        # TODO: Assumes consistent state and that prev_content is subset of new_content
-                                        diff = new_content.replace(prev_content, "", 1)
-
-                                        # quick patch to mitigate double message streaming error
-                                        # TODO: root cause this issue and remove patch
-                                        if diff != "" and "\\n" not in new_content:
-                                            converted_new_content = new_content.replace("\n", "\\n")
-                                            converted_content_diff = converted_new_content.replace(prev_content, "", 1)
-                                            if converted_content_diff == "":
-                                                diff = converted_content_diff
-
-                                        self.current_json_parse_result = parsed_args
+                                    # If there's no buffer to clear, just output the message text parsed since the last chunk
+                                    if self.pending_assistant_message:
+                                        diff = "".join(self.pending_assistant_message)
+                                        self.pending_assistant_message = []
+
                                         if prev_message_type and prev_message_type != "assistant_message":
                                             message_index += 1
                                         assistant_message = AssistantMessage(
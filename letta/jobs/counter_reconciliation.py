@@ -0,0 +1,40 @@
+import datetime
+from typing import Optional
+
+from letta.log import get_logger
+from letta.orm.agent_counters import reconcile_counters_async
+from letta.otel.tracing import trace_method
+from letta.server.db import db_registry
+from letta.settings import settings
+
+logger = get_logger(__name__)
+
+# Position of the reconciliation sweep; each run resumes after the last agent / archive it recomputed
+_agent_cursor: Optional[str] = None
+_archive_cursor: Optional[str] = None
+
+
+@trace_method
+async def reconcile_agent_counters():
+    """Recompute one batch of cached message / passage counters to repair drift.
+
+    Counters are kept exact by the write paths, but concurrent lazy initialization or writes that bypass
+    the tracked paths (e.g. manual SQL) can leave them off; sweeping in batches bounds the cost of each run.
+    """
+    global _agent_cursor, _archive_cursor
+
+    start_time = datetime.datetime.now()
+    try:
+        async with db_registry.async_session() as session:
+            _agent_cursor, _archive_cursor = await reconcile_counters_async(
+                session,
+                batch_size=settings.counter_reconciliation_batch_size,
+                after_agent_id=_agent_cursor,
+                after_archive_id=_archive_cursor,
+            )
+    except Exception as e:
+        logger.exception(f"[Reconcile Counters] Failed to reconcile cached counters: {e}")
+        return
+
+    elapsed = (datetime.datetime.now() - start_time).total_seconds()
+    logger.info(f"[Reconcile Counters] Finished batch in {elapsed:.2f}s (agent cursor={_agent_cursor}, archive cursor={_archive_cursor})")
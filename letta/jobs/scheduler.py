@@ -6,6 +6,7 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy import text
 
+from letta.jobs.counter_reconciliation import reconcile_agent_counters
 from letta.jobs.llm_batch_job_polling import poll_running_llm_batches
 from letta.log import get_logger
 from letta.server.db import db_registry
@@ -57,19 +58,29 @@ async def _try_acquire_lock_and_start_scheduler(server: SyncServer) -> bool:
                 _advisory_lock_session = lock_session
                 lock_session = None
 
-        trigger = IntervalTrigger(
-            seconds=settings.poll_running_llm_batches_interval_seconds,
-            jitter=10,
-        )
-        scheduler.add_job(
-            poll_running_llm_batches,
-            args=[server],
-            trigger=trigger,
-            id="poll_llm_batches",
-            name="Poll LLM API batch jobs",
-            replace_existing=True,
-            next_run_time=datetime.datetime.now(datetime.timezone.utc),
-        )
+        if settings.enable_batch_job_polling:
+            trigger = IntervalTrigger(
+                seconds=settings.poll_running_llm_batches_interval_seconds,
+                jitter=10,
+            )
+            scheduler.add_job(
+                poll_running_llm_batches,
+                args=[server],
+                trigger=trigger,
+                id="poll_llm_batches",
+                name="Poll LLM API batch jobs",
+                replace_existing=True,
+                next_run_time=datetime.datetime.now(datetime.timezone.utc),
+            )
+
+        if settings.enable_counter_reconciliation:
+            scheduler.add_job(
+                reconcile_agent_counters,
+                trigger=IntervalTrigger(seconds=settings.counter_reconciliation_interval_seconds, jitter=30),
+                id="reconcile_agent_counters",
+                name="Reconcile cached message and passage counts",
+                replace_existing=True,
+            )
 
         if not scheduler.running:
             scheduler.start()
@@ -167,8 +178,8 @@ async def start_scheduler_with_leader_election(server: SyncServer):
     """
     global _lock_retry_task, _is_scheduler_leader
 
-    if not settings.enable_batch_job_polling:
-        logger.info("Batch job polling is disabled.")
+    if not (settings.enable_batch_job_polling or settings.enable_counter_reconciliation):
+        logger.info("Batch job polling and counter reconciliation are disabled.")
         return
 
     if _is_scheduler_leader:
@@ -26,6 +26,7 @@ from letta.errors import (
 )
 from letta.helpers.datetime_helpers import get_utc_time_int
 from letta.helpers.decorators import deprecated
+from letta.llm_api.client_registry import LLMClientRegistry
 from letta.llm_api.helpers import add_inner_thoughts_to_functions, unpack_all_inner_thoughts_from_kwargs
 from letta.llm_api.llm_client_base import LLMClientBase
 from letta.local_llm.constants import INNER_THOUGHTS_KWARG, INNER_THOUGHTS_KWARG_DESCRIPTION
@@ -142,17 +143,7 @@ class AnthropicClient(LLMClientBase):
     ) -> Union[anthropic.AsyncAnthropic, anthropic.Anthropic]:
         api_key, _, _ = self.get_byok_overrides(llm_config)
 
-        if async_client:
-            return (
-                anthropic.AsyncAnthropic(api_key=api_key, max_retries=model_settings.anthropic_max_retries)
-                if api_key
-                else anthropic.AsyncAnthropic(max_retries=model_settings.anthropic_max_retries)
-            )
-        return (
-            anthropic.Anthropic(api_key=api_key, max_retries=model_settings.anthropic_max_retries)
-            if api_key
-            else anthropic.Anthropic(max_retries=model_settings.anthropic_max_retries)
-        )
+        return self._cached_anthropic_client(llm_config, api_key, async_client)
 
     @trace_method
     async def _get_anthropic_client_async(
@@ -160,17 +151,18 @@ class AnthropicClient(LLMClientBase):
     ) -> Union[anthropic.AsyncAnthropic, anthropic.Anthropic]:
         api_key, _, _ = await self.get_byok_overrides_async(llm_config)
 
+        return self._cached_anthropic_client(llm_config, api_key, async_client)
+
+    @staticmethod
+    def _cached_anthropic_client(
+        llm_config: LLMConfig, api_key: Optional[str], async_client: bool
+    ) -> Union[anthropic.AsyncAnthropic, anthropic.Anthropic]:
+        kwargs = {"max_retries": model_settings.anthropic_max_retries}
+        if api_key:
+            kwargs["api_key"] = api_key
         if async_client:
-            return (
-                anthropic.AsyncAnthropic(api_key=api_key, max_retries=model_settings.anthropic_max_retries)
-                if api_key
-                else anthropic.AsyncAnthropic(max_retries=model_settings.anthropic_max_retries)
-            )
-        return (
-            anthropic.Anthropic(api_key=api_key, max_retries=model_settings.anthropic_max_retries)
-            if api_key
-            else anthropic.Anthropic(max_retries=model_settings.anthropic_max_retries)
-        )
+            return LLMClientRegistry().get_async_client(anthropic.AsyncAnthropic, llm_config.model_endpoint_type, **kwargs)
+        return LLMClientRegistry().get_sync_client(anthropic.Anthropic, llm_config.model_endpoint_type, **kwargs)
 
     @trace_method
     def build_request_data(
@@ -298,7 +290,7 @@ class AnthropicClient(LLMClientBase):
     async def count_tokens(self, messages: List[dict] = None, model: str = None, tools: List[OpenAITool] = None) -> int:
         logging.getLogger("httpx").setLevel(logging.WARNING)
 
-        client = anthropic.AsyncAnthropic()
+        client = LLMClientRegistry().get_async_client(anthropic.AsyncAnthropic, "anthropic")
         if messages and len(messages) == 0:
             messages = None
         if tools and len(tools) > 0:
@@ -4,6 +4,7 @@ from typing import List, Optional, Tuple
 from openai import AsyncAzureOpenAI, AzureOpenAI
 from openai.types.chat.chat_completion import ChatCompletion
 
+from letta.llm_api.client_registry import LLMClientRegistry
 from letta.llm_api.openai_client import OpenAIClient
 from letta.otel.tracing import trace_method
 from letta.schemas.embedding_config import EmbeddingConfig
@@ -40,7 +41,9 @@ class AzureClient(OpenAIClient):
             base_url = model_settings.azure_base_url or os.environ.get("AZURE_BASE_URL")
             api_version = model_settings.azure_api_version or os.environ.get("AZURE_API_VERSION")
 
-        client = AzureOpenAI(api_key=api_key, azure_endpoint=base_url, api_version=api_version)
+        client = LLMClientRegistry().get_sync_client(
+            AzureOpenAI, llm_config.model_endpoint_type, api_key=api_key, azure_endpoint=base_url, api_version=api_version
+        )
         response: ChatCompletion = client.chat.completions.create(**request_data)
         return response.model_dump()
 
@@ -55,7 +58,9 @@ class AzureClient(OpenAIClient):
             base_url = model_settings.azure_base_url or os.environ.get("AZURE_BASE_URL")
             api_version = model_settings.azure_api_version or os.environ.get("AZURE_API_VERSION")
 
-        client = AsyncAzureOpenAI(api_key=api_key, azure_endpoint=base_url, api_version=api_version)
+        client = LLMClientRegistry().get_async_client(
+            AsyncAzureOpenAI, llm_config.model_endpoint_type, api_key=api_key, azure_endpoint=base_url, api_version=api_version
+        )
         response: ChatCompletion = await client.chat.completions.create(**request_data)
         return response.model_dump()
 
@@ -65,7 +70,9 @@ class AzureClient(OpenAIClient):
         api_key = model_settings.azure_api_key or os.environ.get("AZURE_API_KEY")
         base_url = model_settings.azure_base_url or os.environ.get("AZURE_BASE_URL")
         api_version = model_settings.azure_api_version or os.environ.get("AZURE_API_VERSION")
-        client = AsyncAzureOpenAI(api_key=api_key, api_version=api_version, azure_endpoint=base_url)
+        client = LLMClientRegistry().get_async_client(
+            AsyncAzureOpenAI, embedding_config.embedding_endpoint_type, api_key=api_key, api_version=api_version, azure_endpoint=base_url
+        )
         response = await client.embeddings.create(model=embedding_config.embedding_model, input=inputs)
 
         # TODO: add total usage
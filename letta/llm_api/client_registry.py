@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import json
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple, Type, TypeVar
+
+import httpx
+
+from letta.helpers.singleton import singleton
+from letta.log import get_logger
+from letta.settings import settings
+
+logger = get_logger(__name__)
+
+ClientT = TypeVar("ClientT")
+
+# Evicted clients are closed after this long, so requests still using them can finish (the OpenAI and Anthropic SDKs
+# time requests out after 600s by default)
+EVICTED_CLIENT_CLOSE_DELAY_SECONDS = 600.0
+# How long `aclose` waits for the clients of other event loops to close
+CLOSE_OTHER_LOOPS_TIMEOUT_SECONDS = 5.0
+
+
+def _http2_enabled() -> bool:
+    if not settings.llm_http2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.llm_http_max_connections,
+        max_keepalive_connections=settings.llm_http_max_keepalive_connections,
+        keepalive_expiry=settings.llm_http_keepalive_expiry_seconds,
+    )
+
+
+def _fingerprint(kwargs: Dict[str, Any]) -> str:
+    """Stable digest of the client arguments, so credentials are not kept around as part of cache keys."""
+    return hashlib.sha256(json.dumps(kwargs, sort_keys=True, default=repr).encode()).hexdigest()
+
+
+def _current_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+@singleton
+class LLMClientRegistry:
+    """
+    Process-wide cache of provider SDK clients, keyed by (client class, provider, base URL, credential fingerprint).
+
+    Creating a client per request meant a new connection pool (and usually a new TLS handshake) on every step. Cached
+    clients share long-lived pools with configurable limits/keepalive (HTTP/2 when `h2` is installed). Async connections
+    can't move between event loops, so async clients are cached per running loop. The least recently used clients are
+    dropped beyond `llm_client_cache_size`, and their pools closed (on their own loop) once requests still using them
+    have had `EVICTED_CLIENT_CLOSE_DELAY_SECONDS` to finish.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, OrderedDict]" = weakref.WeakKeyDictionary()
+        self._loopless_clients: OrderedDict = OrderedDict()
+
+    def get_async_client(self, client_cls: Type[ClientT], provider: str, **kwargs) -> ClientT:
+        """An async SDK client (AsyncOpenAI, AsyncAnthropic, ...) backed by a shared `httpx.AsyncClient` pool."""
+        return self._get(client_cls, provider, kwargs, http_client_cls=httpx.AsyncClient)
+
+    def get_sync_client(self, client_cls: Type[ClientT], provider: str, **kwargs) -> ClientT:
+        """A sync SDK client (OpenAI, Anthropic, ...) backed by a shared `httpx.Client` pool."""
+        return self._get(client_cls, provider, kwargs, http_client_cls=httpx.Client)
+
+    def get_client(self, client_cls: Type[ClientT], provider: str, **kwargs) -> ClientT:
+        """A client that manages its own connection pool (e.g. `genai.Client`), reused instead of recreated."""
+        return self._get(client_cls, provider, kwargs, http_client_cls=None)
+
+    def get_http_client(self, provider: str) -> httpx.AsyncClient:
+        """A shared `httpx.AsyncClient` for direct provider API calls (e.g. listing models)."""
+        return self._get(httpx.AsyncClient, provider, {}, http_client_cls=None)
+
+    def _get(self, client_cls: type, provider: str, kwargs: Dict[str, Any], http_client_cls: Optional[type]) -> Any:
+        loop = None if http_client_cls is httpx.Client else _current_loop()
+        base_url = kwargs.get("base_url") or kwargs.get("azure_endpoint")
+        key = (client_cls.__module__, client_cls.__qualname__, provider, str(base_url), _fingerprint(kwargs))
+
+        created = False
+        evicted = []
+        with self._lock:
+            clients = self._loopless_clients if loop is None else self._clients.setdefault(loop, OrderedDict())
+            entry: Optional[Tuple[Any, Any]] = clients.get(key)
+            if entry is not None:
+                clients.move_to_end(key)
+            else:
+                entry = clients[key] = self._create(client_cls, kwargs, http_client_cls)
+                created = True
+                while len(clients) > settings.llm_client_cache_size:
+                    evicted.append(clients.popitem(last=False)[1])
+
+        for _, evicted_http_client in evicted:
+            _close_evicted(loop, evicted_http_client)
+        client, _ = entry
+        if created:
+            self._record_created(provider)
+        return client
+
+    def _create(self, client_cls: type, kwargs: Dict[str, Any], http_client_cls: Optional[type]) -> Tuple[Any, Any]:
+        if client_cls is httpx.AsyncClient:
+            client = httpx.AsyncClient(limits=_limits(), http2=_http2_enabled(), follow_redirects=True, **kwargs)
+            return client, client
+        if http_client_cls is None:
+            return client_cls(**kwargs), None
+        # leave the http client's timeout at its default, so the SDK keeps its own default request timeout
+        http_client = http_client_cls(limits=_limits(), http2=_http2_enabled(), follow_redirects=True)
+        return client_cls(**kwargs, http_client=http_client), http_client
+
+    @staticmethod
+    def _record_created(provider: str) -> None:
+        try:
+            from letta.otel.metric_registry import MetricRegistry
+
+            metric_registry = MetricRegistry()
+            metric_registry.llm_http_client_created_counter.add(1, attributes={"provider": provider})
+            # pool connections are observed at collection time, the gauge is only registered once
+            metric_registry.llm_http_pool_connections_gauge(_observe_pool_connections)
+        except Exception as e:
+            logger.debug(f"Failed to record LLM client creation metric: {e}")
+
+    def _pool_connections(self) -> Dict[Tuple[str, str], int]:
+        """Connections in the pools of every cached client, summed by (provider, state)."""
+        with self._lock:
+            http_clients = [
+                (key[2], http_client)
+                for clients in (self._loopless_clients, *self._clients.values())
+                for key, (_, http_client) in clients.items()
+                if isinstance(http_client, (httpx.AsyncClient, httpx.Client))
+            ]
+
+        counts: Dict[Tuple[str, str], int] = {}
+        for provider, http_client in http_clients:
+            try:
+                connections = http_client._transport._pool.connections
+            except AttributeError:
+                # not backed by an httpcore pool (e.g. a mounted or mock transport)
+                continue
+            idle = sum(1 for connection in connections if connection.is_idle())
+            counts[(provider, "active")] = counts.get((provider, "active"), 0) + len(connections) - idle
+            counts[(provider, "idle")] = counts.get((provider, "idle"), 0) + idle
+        return counts
+
+    async def aclose(self) -> None:
+        """Close the clients of every event loop, and the sync ones (called on app shutdown)."""
+        current_loop = _current_loop()
+        with self._lock:
+            buckets = list(self._clients.items())
+            loopless = list(self._loopless_clients.values())
+            self._clients = weakref.WeakKeyDictionary()
+            self._loopless_clients = OrderedDict()
+
+        closing = []
+        for loop, clients in buckets:
+            http_clients = [http_client for _, http_client in clients.values() if isinstance(http_client, httpx.AsyncClient)]
+            if loop is current_loop:
+                await _aclose_all(http_clients)
+            elif loop.is_running():
+                try:
+                    closing.append(asyncio.wrap_future(asyncio.run_coroutine_threadsafe(_aclose_all(http_clients), loop)))
+                except RuntimeError:
+                    pass
+            # a loop that has stopped took its connections with it
+        if closing:
+            await asyncio.wait(closing, timeout=CLOSE_OTHER_LOOPS_TIMEOUT_SECONDS)
+
+        for _, http_client in loopless:
+            if isinstance(http_client, httpx.Client):
+                http_client.close()
+
+
+def _observe_pool_connections(options) -> Iterable:
+    from opentelemetry.metrics import Observation
+
+    return [
+        Observation(count, attributes={"provider": provider, "state": state})
+        for (provider, state), count in LLMClientRegistry()._pool_connections().items()
+    ]
+
+
+async def _aclose_all(http_clients) -> None:
+    for http_client in http_clients:
+        try:
+            await http_client.aclose()
+        except Exception as e:
+            logger.warning(f"Failed to close LLM HTTP client: {e}")
+
+
+def _close_evicted(loop: Optional[asyncio.AbstractEventLoop], http_client: Any) -> None:
+    """Close the pool of an evicted client after `EVICTED_CLIENT_CLOSE_DELAY_SECONDS`, on the loop that owns it."""
+    if isinstance(http_client, httpx.AsyncClient) and loop is not None:
+        try:
+            loop.call_soon_threadsafe(loop.call_later, EVICTED_CLIENT_CLOSE_DELAY_SECONDS, _schedule_aclose, loop, http_client)
+        except RuntimeError:
+            # the loop is closed, and its connections with it
+            pass
+    elif isinstance(http_client, httpx.Client):
+        timer = threading.Timer(EVICTED_CLIENT_CLOSE_DELAY_SECONDS, http_client.close)
+        timer.daemon = True
+        timer.start()
+
+
+_closing_tasks: Set[asyncio.Task] = set()
+
+
+def _schedule_aclose(loop: asyncio.AbstractEventLoop, http_client: httpx.AsyncClient) -> None:
+    task = loop.create_task(_aclose_all([http_client]))
+    # keep a reference until it is done, the loop only holds tasks weakly
+    _closing_tasks.add(task)
+    task.add_done_callback(_closing_tasks.discard)
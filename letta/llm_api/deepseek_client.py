@@ -8,6 +8,7 @@ from openai import AsyncOpenAI, AsyncStream, OpenAI
 from openai.types.chat.chat_completion import ChatCompletion
 from openai.types.chat.chat_completion_chunk import ChatCompletionChunk
 
+from letta.llm_api.client_registry import LLMClientRegistry
 from letta.llm_api.openai_client import OpenAIClient
 from letta.otel.tracing import trace_method
 from letta.schemas.llm_config import LLMConfig
@@ -366,7 +367,9 @@ class DeepseekClient(OpenAIClient):
         Performs underlying synchronous request to OpenAI API and returns raw response dict.
         """
         api_key = model_settings.deepseek_api_key or os.environ.get("DEEPSEEK_API_KEY")
-        client = OpenAI(api_key=api_key, base_url=llm_config.model_endpoint)
+        client = LLMClientRegistry().get_sync_client(
+            OpenAI, llm_config.model_endpoint_type, api_key=api_key, base_url=llm_config.model_endpoint
+        )
 
         response: ChatCompletion = client.chat.completions.create(**request_data)
         return response.model_dump()
@@ -377,7 +380,9 @@ class DeepseekClient(OpenAIClient):
         Performs underlying asynchronous request to OpenAI API and returns raw response dict.
         """
         api_key = model_settings.deepseek_api_key or os.environ.get("DEEPSEEK_API_KEY")
-        client = AsyncOpenAI(api_key=api_key, base_url=llm_config.model_endpoint)
+        client = LLMClientRegistry().get_async_client(
+            AsyncOpenAI, llm_config.model_endpoint_type, api_key=api_key, base_url=llm_config.model_endpoint
+        )
 
         response: ChatCompletion = await client.chat.completions.create(**request_data)
         return response.model_dump()
@@ -388,7 +393,9 @@ class DeepseekClient(OpenAIClient):
         Performs underlying asynchronous streaming request to OpenAI and returns the async stream iterator.
         """
         api_key = model_settings.deepseek_api_key or os.environ.get("DEEPSEEK_API_KEY")
-        client = AsyncOpenAI(api_key=api_key, base_url=llm_config.model_endpoint)
+        client = LLMClientRegistry().get_async_client(
+            AsyncOpenAI, llm_config.model_endpoint_type, api_key=api_key, base_url=llm_config.model_endpoint
+        )
         response_stream: AsyncStream[ChatCompletionChunk] = await client.chat.completions.create(
             **request_data, stream=True, stream_options={"include_usage": True}
         )
@@ -5,6 +5,7 @@ from google import genai
 from google.genai.types import HttpOptions
 
 from letta.errors import ErrorCode, LLMAuthenticationError, LLMError
+from letta.llm_api.client_registry import LLMClientRegistry
 from letta.llm_api.google_constants import GOOGLE_MODEL_FOR_API_KEY_CHECK
 from letta.llm_api.google_vertex_client import GoogleVertexClient
 from letta.log import get_logger
@@ -16,7 +17,9 @@ logger = get_logger(__name__)
 class GoogleAIClient(GoogleVertexClient):
     def _get_client(self):
         timeout_ms = int(settings.llm_request_timeout_seconds * 1000)
-        return genai.Client(
+        return LLMClientRegistry().get_client(
+            genai.Client,
+            "google_ai",
             api_key=model_settings.gemini_api_key,
             http_options=HttpOptions(timeout=timeout_ms),
         )
@@ -74,11 +77,8 @@ async def google_ai_get_model_list_async(
 
     url, headers = get_gemini_endpoint_and_headers(base_url, None, api_key, key_in_header)
 
-    # Determine if we need to close the client at the end
-    close_client = False
     if client is None:
-        client = httpx.AsyncClient()
-        close_client = True
+        client = LLMClientRegistry().get_http_client("google_ai")
 
     try:
         response = await client.get(url, headers=headers)
@@ -108,11 +108,6 @@ async def google_ai_get_model_list_async(
         printd(f"Got unknown Exception, exception={e}")
         raise e
 
-    finally:
-        # Close the client if we created it
-        if close_client:
-            await client.aclose()
-
 
 def google_ai_get_model_details(base_url: str, api_key: str, model: str, key_in_header: bool = True) -> dict:
     """Synchronous version to get model details from Google AI API using httpx."""
@@ -163,11 +158,8 @@ async def google_ai_get_model_details_async(
 
     url, headers = get_gemini_endpoint_and_headers(base_url, model, api_key, key_in_header)
 
-    # Determine if we need to close the client at the end
-    close_client = False
     if client is None:
-        client = httpx.AsyncClient()
-        close_client = True
+        client = LLMClientRegistry().get_http_client("google_ai")
 
     try:
         response = await client.get(url, headers=headers)
@@ -198,11 +190,6 @@ async def google_ai_get_model_details_async(
         printd(f"Got unknown Exception, exception={e}")
         raise e
 
-    finally:
-        # Close the client if we created it
-        if close_client:
-            await client.aclose()
-
 
 def google_ai_get_model_context_window(base_url: str, api_key: str, model: str, key_in_header: bool = True) -> int:
     model_details = google_ai_get_model_details(base_url=base_url, api_key=api_key, model=model, key_in_header=key_in_header)
@@ -16,6 +16,7 @@ from google.genai.types import (
 from letta.constants import NON_USER_MSG_PREFIX
 from letta.helpers.datetime_helpers import get_utc_time_int
 from letta.helpers.json_helpers import json_dumps, json_loads
+from letta.llm_api.client_registry import LLMClientRegistry
 from letta.llm_api.llm_client_base import LLMClientBase
 from letta.local_llm.json_parser import clean_json_string_extra_backslash
 from letta.local_llm.utils import count_tokens
@@ -36,7 +37,9 @@ class GoogleVertexClient(LLMClientBase):
 
     def _get_client(self):
         timeout_ms = int(settings.llm_request_timeout_seconds * 1000)
-        return genai.Client(
+        return LLMClientRegistry().get_client(
+            genai.Client,
+            "google_vertex",
             vertexai=True,
             project=model_settings.google_cloud_project,
             location=model_settings.google_cloud_location,
@@ -5,6 +5,7 @@ from openai import AsyncOpenAI, AsyncStream, OpenAI
 from openai.types.chat.chat_completion import ChatCompletion
 from openai.types.chat.chat_completion_chunk import ChatCompletionChunk
 
+from letta.llm_api.client_registry import LLMClientRegistry
 from letta.llm_api.openai_client import OpenAIClient
 from letta.otel.tracing import trace_method
 from letta.schemas.embedding_config import EmbeddingConfig
@@ -47,7 +48,9 @@ class GroqClient(OpenAIClient):
         Performs underlying synchronous request to Groq API and returns raw response dict.
         """
         api_key = model_settings.groq_api_key or os.environ.get("GROQ_API_KEY")
-        client = OpenAI(api_key=api_key, base_url=llm_config.model_endpoint)
+        client = LLMClientRegistry().get_sync_client(
+            OpenAI, llm_config.model_endpoint_type, api_key=api_key, base_url=llm_config.model_endpoint
+        )
 
         response: ChatCompletion = client.chat.completions.create(**request_data)
         return response.model_dump()
@@ -58,7 +61,9 @@ class GroqClient(OpenAIClient):
         Performs underlying asynchronous request to Groq API and returns raw response dict.
         """
         api_key = model_settings.groq_api_key or os.environ.get("GROQ_API_KEY")
-        client = AsyncOpenAI(api_key=api_key, base_url=llm_config.model_endpoint)
+        client = LLMClientRegistry().get_async_client(
+            AsyncOpenAI, llm_config.model_endpoint_type, api_key=api_key, base_url=llm_config.model_endpoint
+        )
 
         response: ChatCompletion = await client.chat.completions.create(**request_data)
         return response.model_dump()
@@ -67,7 +72,9 @@ class GroqClient(OpenAIClient):
     async def request_embeddings(self, inputs: List[str], embedding_config: EmbeddingConfig) -> List[List[float]]:
         """Request embeddings given texts and embedding config"""
         api_key = model_settings.groq_api_key or os.environ.get("GROQ_API_KEY")
-        client = AsyncOpenAI(api_key=api_key, base_url=embedding_config.embedding_endpoint)
+        client = LLMClientRegistry().get_async_client(
+            AsyncOpenAI, embedding_config.embedding_endpoint_type, api_key=api_key, base_url=embedding_config.embedding_endpoint
+        )
         response = await client.embeddings.create(model=embedding_config.embedding_model, input=inputs)
 
         # TODO: add total usage
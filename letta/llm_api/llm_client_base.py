@@ -160,6 +160,23 @@ class LLMClientBase:
         """
         raise NotImplementedError
 
+    async def request_embeddings_cached(self, texts: List[str], embedding_config: EmbeddingConfig) -> List[List[float]]:
+        """
+        Same as `request_embeddings`, but texts already embedded with this embedding model are served from the embedding cache,
+        and the rest are batched and rate limited by the shared embedding scheduler.
+        """
+        from letta.services.embedding_cache import EmbeddingCache
+        from letta.services.embedding_scheduler import EmbeddingScheduler
+
+        organization_id = self.actor.organization_id if self.actor else None
+        return await EmbeddingCache().get_or_embed(
+            texts,
+            embedding_config,
+            lambda misses: EmbeddingScheduler().embed(
+                misses, embedding_config, lambda batch: self.request_embeddings(batch, embedding_config), organization_id=organization_id
+            ),
+        )
+
     @abstractmethod
     def convert_response_to_chat_completion(
         self,
@@ -8,6 +8,7 @@ from openai import OpenAI
 from letta.constants import LETTA_MODEL_ENDPOINT
 from letta.errors import ErrorCode, LLMAuthenticationError, LLMError
 from letta.helpers.datetime_helpers import timestamp_to_datetime
+from letta.llm_api.client_registry import LLMClientRegistry
 from letta.llm_api.helpers import add_inner_thoughts_to_functions, convert_to_structured_output, make_post_request
 from letta.llm_api.openai_client import (
     accepts_developer_role,
@@ -142,11 +143,9 @@ async def openai_get_model_list_async(
 
     logger.debug(f"Sending request to {url}")
 
-    # Use provided client or create a new one
-    close_client = False
+    # Use provided client or the shared one
     if client is None:
-        client = httpx.AsyncClient()
-        close_client = True
+        client = LLMClientRegistry().get_http_client("openai")
 
     try:
         response = await client.get(url, headers=headers, params=extra_params)
@@ -170,9 +169,6 @@ async def openai_get_model_list_async(
         # Handle other potential errors
         logger.debug(f"Got unknown Exception, exception={e}")
         raise e
-    finally:
-        if close_client:
-            await client.aclose()
 
 
 def build_openai_chat_completions_request(
@@ -20,6 +20,7 @@ from letta.errors import (
     LLMTimeoutError,
     LLMUnprocessableEntityError,
 )
+from letta.llm_api.client_registry import LLMClientRegistry
 from letta.llm_api.helpers import add_inner_thoughts_to_functions, convert_to_structured_output, unpack_all_inner_thoughts_from_kwargs
 from letta.llm_api.llm_client_base import LLMClientBase
 from letta.local_llm.constants import INNER_THOUGHTS_KWARG, INNER_THOUGHTS_KWARG_DESCRIPTION, INNER_THOUGHTS_KWARG_DESCRIPTION_GO_FIRST
@@ -261,7 +262,7 @@ class OpenAIClient(LLMClientBase):
         """
         Performs underlying synchronous request to OpenAI API and returns raw response dict.
         """
-        client = OpenAI(**self._prepare_client_kwargs(llm_config))
+        client = LLMClientRegistry().get_sync_client(OpenAI, llm_config.model_endpoint_type, **self._prepare_client_kwargs(llm_config))
         response: ChatCompletion = client.chat.completions.create(**request_data)
         return response.model_dump()
 
@@ -271,7 +272,7 @@ class OpenAIClient(LLMClientBase):
         Performs underlying asynchronous request to OpenAI API and returns raw response dict.
         """
         kwargs = await self._prepare_client_kwargs_async(llm_config)
-        client = AsyncOpenAI(**kwargs)
+        client = LLMClientRegistry().get_async_client(AsyncOpenAI, llm_config.model_endpoint_type, **kwargs)
         response: ChatCompletion = await client.chat.completions.create(**request_data)
         return response.model_dump()
 
@@ -311,7 +312,7 @@ class OpenAIClient(LLMClientBase):
         Performs underlying asynchronous streaming request to OpenAI and returns the async stream iterator.
         """
         kwargs = await self._prepare_client_kwargs_async(llm_config)
-        client = AsyncOpenAI(**kwargs)
+        client = LLMClientRegistry().get_async_client(AsyncOpenAI, llm_config.model_endpoint_type, **kwargs)
         response_stream: AsyncStream[ChatCompletionChunk] = await client.chat.completions.create(
             **request_data, stream=True, stream_options={"include_usage": True}
         )
@@ -321,7 +322,7 @@ class OpenAIClient(LLMClientBase):
     async def request_embeddings(self, inputs: List[str], embedding_config: EmbeddingConfig) -> List[List[float]]:
         """Request embeddings given texts and embedding config"""
         kwargs = self._prepare_client_kwargs_embedding(embedding_config)
-        client = AsyncOpenAI(**kwargs)
+        client = LLMClientRegistry().get_async_client(AsyncOpenAI, embedding_config.embedding_endpoint_type, **kwargs)
         response = await client.embeddings.create(model=embedding_config.embedding_model, input=inputs)
 
         # TODO: add total usage
@@ -4,6 +4,7 @@ from typing import List
 from openai import AsyncOpenAI, OpenAI
 from openai.types.chat.chat_completion import ChatCompletion
 
+from letta.llm_api.client_registry import LLMClientRegistry
 from letta.llm_api.openai_client import OpenAIClient
 from letta.otel.tracing import trace_method
 from letta.schemas.embedding_config import EmbeddingConfig
@@ -24,7 +25,9 @@ class TogetherClient(OpenAIClient):
 
         if not api_key:
             api_key = model_settings.together_api_key or os.environ.get("TOGETHER_API_KEY")
-        client = OpenAI(api_key=api_key, base_url=llm_config.model_endpoint)
+        client = LLMClientRegistry().get_sync_client(
+            OpenAI, llm_config.model_endpoint_type, api_key=api_key, base_url=llm_config.model_endpoint
+        )
 
         response: ChatCompletion = client.chat.completions.create(**request_data)
         return response.model_dump()
@@ -38,7 +41,9 @@ class TogetherClient(OpenAIClient):
 
         if not api_key:
             api_key = model_settings.together_api_key or os.environ.get("TOGETHER_API_KEY")
-        client = AsyncOpenAI(api_key=api_key, base_url=llm_config.model_endpoint)
+        client = LLMClientRegistry().get_async_client(
+            AsyncOpenAI, llm_config.model_endpoint_type, api_key=api_key, base_url=llm_config.model_endpoint
+        )
 
         response: ChatCompletion = await client.chat.completions.create(**request_data)
         return response.model_dump()
@@ -47,7 +52,9 @@ class TogetherClient(OpenAIClient):
     async def request_embeddings(self, inputs: List[str], embedding_config: EmbeddingConfig) -> List[List[float]]:
         """Request embeddings given texts and embedding config"""
         api_key = model_settings.together_api_key or os.environ.get("TOGETHER_API_KEY")
-        client = AsyncOpenAI(api_key=api_key, base_url=embedding_config.embedding_endpoint)
+        client = LLMClientRegistry().get_async_client(
+            AsyncOpenAI, embedding_config.embedding_endpoint_type, api_key=api_key, base_url=embedding_config.embedding_endpoint
+        )
         response = await client.embeddings.create(model=embedding_config.embedding_model, input=inputs)
 
         # TODO: add total usage
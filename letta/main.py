@@ -2,7 +2,7 @@ import os
 
 import typer
 
-from letta.cli.cli import server
+from letta.cli.cli import server, worker
 from letta.cli.cli_load import app as load_app
 
 # disable composio print on exit
@@ -10,5 +10,6 @@ os.environ["COMPOSIO_DISABLE_VERSION_CHECK"] = "true"
 
 app = typer.Typer(pretty_exceptions_enable=False)
 app.command(name="server")(server)
+app.command(name="worker")(worker)
 
 app.add_typer(load_app, name="load")
@@ -1,4 +1,6 @@
 from letta.orm.agent import Agent
+from letta.orm.agent_context_message import AgentContextMessage
+from letta.orm.agent_counters import track_counter_deltas
 from letta.orm.agents_tags import AgentsTags
 from letta.orm.archive import Archive
 from letta.orm.archives_agents import ArchivesAgents
@@ -7,6 +7,7 @@ from sqlalchemy import JSON, Boolean, DateTime, Index, Integer, String
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from letta.orm.agent_context_message import AgentContextMessage
 from letta.orm.block import Block
 from letta.orm.custom_columns import EmbeddingConfigColumn, LLMConfigColumn, ResponseFormatColumn, ToolRulesColumn
 from letta.orm.identity import Identity
@@ -49,11 +50,6 @@ class Agent(SqlalchemyBase, OrganizationMixin, ProjectMixin, TemplateEntityMixin
     # System prompt
     system: Mapped[Optional[str]] = mapped_column(String, nullable=True, doc="The system prompt used by the agent.")
 
-    # In context memory
-    # TODO: This should be a separate mapping table
-    # This is dangerously flexible with the JSON type
-    message_ids: Mapped[Optional[List[str]]] = mapped_column(JSON, nullable=True, doc="List of message IDs in in-context memory.")
-
     # Response Format
     response_format: Mapped[Optional[ResponseFormatUnion]] = mapped_column(
         ResponseFormatColumn, nullable=True, doc="The response format for the agent."
@@ -87,6 +83,11 @@ class Agent(SqlalchemyBase, OrganizationMixin, ProjectMixin, TemplateEntityMixin
         Integer, nullable=True, doc="The duration in milliseconds of the agent's last run."
     )
 
+    # cached counters for the memory metadata header, maintained by letta.orm.agent_counters
+    message_count: Mapped[Optional[int]] = mapped_column(
+        Integer, nullable=True, doc="Cached number of messages stored for this agent; NULL until first computed."
+    )
+
     # timezone
     timezone: Mapped[Optional[str]] = mapped_column(String, nullable=True, doc="The timezone of the agent (for the context window).")
 
@@ -155,6 +156,16 @@ class Agent(SqlalchemyBase, OrganizationMixin, ProjectMixin, TemplateEntityMixin
         cascade="all, delete-orphan",
         lazy="selectin",
     )
+    # In context memory, see letta.orm.agent_context_message
+    context_messages: Mapped[List["AgentContextMessage"]] = relationship(
+        "AgentContextMessage",
+        back_populates="agent",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="selectin",
+        order_by="AgentContextMessage.position",
+        doc="Ordered ids of the messages in in-context memory.",
+    )
     archives_agents: Mapped[List["ArchivesAgents"]] = relationship(
         "ArchivesAgents",
         back_populates="agent",
@@ -163,6 +174,17 @@ class Agent(SqlalchemyBase, OrganizationMixin, ProjectMixin, TemplateEntityMixin
         doc="Archives accessible by this agent.",
     )
 
+    @property
+    def message_ids(self) -> List[str]:
+        """List of message IDs in in-context memory."""
+        return [row.message_id for row in self.context_messages]
+
+    @message_ids.setter
+    def message_ids(self, message_ids: Optional[List[str]]) -> None:
+        # Only meant for agents that are being created: existing agents are updated with
+        # set_context_message_ids(_async), which writes only the rows that change
+        self.context_messages = [AgentContextMessage(position=i, message_id=message_id) for i, message_id in enumerate(message_ids or [])]
+
     def _get_per_file_view_window_char_limit(self) -> int:
         """Get the per_file_view_window_char_limit, calculating defaults if None."""
         if self.per_file_view_window_char_limit is not None:
@@ -283,13 +305,14 @@ class Agent(SqlalchemyBase, OrganizationMixin, ProjectMixin, TemplateEntityMixin
         """
 
         # Base fields: always included
+        context_messages = await self.awaitable_attrs.context_messages
         state = {
             "id": self.id,
             "agent_type": self.agent_type,
             "name": self.name,
             "description": self.description,
             "system": self.system,
-            "message_ids": self.message_ids,
+            "message_ids": [row.message_id for row in context_messages],
             "metadata": self.metadata_,  # Exposed as 'metadata' to Pydantic
             "llm_config": self.llm_config,
             "embedding_config": self.embedding_config,
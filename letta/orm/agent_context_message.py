@@ -0,0 +1,150 @@
+"""Ordered in-context message ids of an agent.
+
+Each row places one message in an agent's context window. Rows are ordered by `position`, a sparse signed
+integer key: positions only need to be increasing, not contiguous. That lets the common updates touch only the
+rows that change instead of rewriting the whole list:
+    - appending new messages inserts rows after the last position
+    - trimming old messages (e.g. after summarization) deletes a range of rows
+    - replacing a prefix (a new system message, a summary in front of the kept messages) deletes those rows and
+      inserts the replacements at positions before the first kept row, counting down (positions may go negative)
+
+`message_id` deliberately has no foreign key: in-context ids are written in the same transaction as (and sometimes
+before) the messages they point to, and deleted messages simply drop out of the join in `in_context_messages_query`.
+"""
+
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import BigInteger, ForeignKey, String, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped, Session, mapped_column, relationship
+
+from letta.orm.base import Base
+from letta.orm.message import Message
+
+if TYPE_CHECKING:
+    from letta.orm.agent import Agent
+
+
+class AgentContextMessage(Base):
+    """A message in an agent's context window, at an ordered position."""
+
+    __tablename__ = "agent_context_messages"
+
+    agent_id: Mapped[str] = mapped_column(String, ForeignKey("agents.id", ondelete="CASCADE"), primary_key=True)
+    position: Mapped[int] = mapped_column(BigInteger, primary_key=True, doc="Sort key of the message within the agent's context.")
+    message_id: Mapped[str] = mapped_column(String, nullable=False, doc="ID of the in-context message.")
+
+    # Relationships
+    agent: Mapped["Agent"] = relationship("Agent", back_populates="context_messages")
+
+
+def plan_context_update(current: Sequence[Tuple[int, str]], message_ids: List[str]) -> Tuple[List[int], List[Dict]]:
+    """
+    Rows to delete and insert to turn the current in-context list into `message_ids`.
+
+    The longest run of current rows that appears unchanged (and contiguous) in the new list is kept in place. Every
+    other current row is deleted, and new ids are inserted before and after the kept run.
+
+    Args:
+        current: (position, message_id) of the agent's current rows, ordered by position
+        message_ids: The new in-context message ids, in order
+
+    Returns:
+        The positions to delete, and the rows (position, message_id) to insert after deleting them
+    """
+    first_index: Dict[str, int] = {}
+    for i, message_id in enumerate(message_ids):
+        first_index.setdefault(message_id, i)
+
+    # longest run current[start:start + length] == message_ids[offset:offset + length]
+    start, offset, length = 0, 0, 0
+    i = 0
+    while i < len(current):
+        j = first_index.get(current[i][1])
+        if j is None:
+            i += 1
+            continue
+        run = 1
+        while i + run < len(current) and j + run < len(message_ids) and current[i + run][1] == message_ids[j + run]:
+            run += 1
+        if run > length:
+            start, offset, length = i, j, run
+        i += run
+
+    if length == 0:
+        # nothing kept: rewrite from position 0
+        return [position for position, _ in current], [{"position": i, "message_id": m} for i, m in enumerate(message_ids)]
+
+    first_kept, last_kept = current[start][0], current[start + length - 1][0]
+    deletes = [position for position, _ in current[:start]] + [position for position, _ in current[start + length :]]
+    inserts = [{"position": first_kept - offset + i, "message_id": message_id} for i, message_id in enumerate(message_ids[:offset])]
+    inserts += [{"position": last_kept + 1 + i, "message_id": message_id} for i, message_id in enumerate(message_ids[offset + length :])]
+    return deletes, inserts
+
+
+def _current_rows_query(agent_id: str):
+    return (
+        select(AgentContextMessage.position, AgentContextMessage.message_id)
+        .where(AgentContextMessage.agent_id == agent_id)
+        .order_by(AgentContextMessage.position)
+    )
+
+
+def _update_statements(agent_id: str, current: Sequence[Tuple[int, str]], message_ids: List[str]):
+    deletes, inserts = plan_context_update(current, message_ids)
+    if deletes:
+        yield delete(AgentContextMessage).where(AgentContextMessage.agent_id == agent_id, AgentContextMessage.position.in_(deletes))
+    if inserts:
+        yield insert(AgentContextMessage).values([{"agent_id": agent_id, **row} for row in inserts])
+
+
+def _last_position_query(agent_id: str):
+    return select(func.max(AgentContextMessage.position)).where(AgentContextMessage.agent_id == agent_id)
+
+
+def _append_statement(agent_id: str, last_position: Optional[int], message_ids: List[str]):
+    start = 0 if last_position is None else last_position + 1
+    return insert(AgentContextMessage).values(
+        [{"agent_id": agent_id, "position": start + i, "message_id": message_id} for i, message_id in enumerate(message_ids)]
+    )
+
+
+def set_context_message_ids(session: Session, agent_id: str, message_ids: List[str]) -> None:
+    """Replace the in-context message ids of an existing agent, writing only the rows that change."""
+    current = session.execute(_current_rows_query(agent_id)).all()
+    for statement in _update_statements(agent_id, current, message_ids):
+        session.execute(statement)
+
+
+async def set_context_message_ids_async(session: AsyncSession, agent_id: str, message_ids: List[str]) -> None:
+    """Replace the in-context message ids of an existing agent, writing only the rows that change."""
+    current = (await session.execute(_current_rows_query(agent_id))).all()
+    for statement in _update_statements(agent_id, current, message_ids):
+        await session.execute(statement)
+
+
+def append_context_message_ids(session: Session, agent_id: str, message_ids: List[str]) -> None:
+    """Add `message_ids` to the end of an agent's context without reading the current list."""
+    if message_ids:
+        last_position = session.execute(_last_position_query(agent_id)).scalar()
+        session.execute(_append_statement(agent_id, last_position, message_ids))
+
+
+async def append_context_message_ids_async(session: AsyncSession, agent_id: str, message_ids: List[str]) -> None:
+    """Add `message_ids` to the end of an agent's context without reading the current list."""
+    if message_ids:
+        last_position = (await session.execute(_last_position_query(agent_id))).scalar()
+        await session.execute(_append_statement(agent_id, last_position, message_ids))
+
+
+def in_context_messages_query(agent_id: str, organization_id: str, limit: Optional[int] = None):
+    """Messages in the agent's context window, in order, as a single join."""
+    query = (
+        select(Message)
+        .join(AgentContextMessage, AgentContextMessage.message_id == Message.id)
+        .where(AgentContextMessage.agent_id == agent_id, Message.organization_id == organization_id)
+        .order_by(AgentContextMessage.position)
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return query
@@ -0,0 +1,191 @@
+"""Denormalized message and archival passage counts for the memory metadata header.
+
+`agents.message_count` and `archives.passage_count` mirror `COUNT(*)` over messages and
+archival passages so the system prompt header can be built without scanning either table.
+
+- ORM inserts, hard deletes and soft deletes adjust the counters in a `before_flush` listener,
+  inside the same transaction as the write
+- Core bulk deletes (which bypass the unit of work) call `adjust_message_counts_async` /
+  `adjust_passage_counts_async` before committing
+- A NULL counter means "unknown": it is never adjusted, and is initialized from a real count the
+  first time it is read
+- `reconcile_counters_async` periodically recomputes a batch of counters to repair any drift
+"""
+
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, attributes
+
+from letta.orm.agent import Agent
+from letta.orm.archive import Archive
+from letta.orm.archives_agents import ArchivesAgents
+from letta.orm.message import Message
+from letta.orm.passage import ArchivalPassage
+
+
+def _message_count_subquery(agent_id_column):
+    return select(func.count(Message.id)).where(Message.agent_id == agent_id_column).scalar_subquery()
+
+
+def _passage_count_subquery(archive_id_column):
+    return (
+        select(func.count(ArchivalPassage.id))
+        .where(ArchivalPassage.archive_id == archive_id_column, ArchivalPassage.is_deleted == False)
+        .scalar_subquery()
+    )
+
+
+def removal_deltas(ids: Iterable[Optional[str]]) -> Dict[str, int]:
+    """Turn the owner id of each deleted row (e.g. from `DELETE ... RETURNING`) into negative deltas."""
+    return {owner_id: -count for owner_id, count in Counter(ids).items() if owner_id}
+
+
+def _increment_statements(table, column, deltas: Dict[str, int]):
+    """One UPDATE per distinct delta; counters that are still NULL (unknown) are left alone."""
+    ids_by_delta: Dict[int, List[str]] = {}
+    for row_id, delta in deltas.items():
+        if row_id and delta:
+            ids_by_delta.setdefault(delta, []).append(row_id)
+    for delta, ids in ids_by_delta.items():
+        yield (
+            update(table)
+            .where(table.id.in_(ids), column.is_not(None))
+            .values({column.key: column + delta})
+            .execution_options(synchronize_session=False)
+        )
+
+
+def adjust_message_counts(session: Session, deltas: Dict[str, int]) -> None:
+    """Apply per-agent message count deltas within the caller's transaction (sync session)."""
+    for stmt in _increment_statements(Agent, Agent.message_count, deltas):
+        session.execute(stmt)
+
+
+async def adjust_message_counts_async(session: AsyncSession, deltas: Dict[str, int]) -> None:
+    """Apply per-agent message count deltas within the caller's transaction."""
+    for stmt in _increment_statements(Agent, Agent.message_count, deltas):
+        await session.execute(stmt)
+
+
+async def adjust_passage_counts_async(session: AsyncSession, deltas: Dict[str, int]) -> None:
+    """Apply per-archive passage count deltas within the caller's transaction."""
+    for stmt in _increment_statements(Archive, Archive.passage_count, deltas):
+        await session.execute(stmt)
+
+
+@event.listens_for(Session, "before_flush")
+def track_counter_deltas(session, flush_context, instances):
+    """Keep counters in step with ORM inserts and deletes in the same flush."""
+    message_deltas: Counter = Counter()
+    passage_deltas: Counter = Counter()
+
+    for obj in session.new:
+        if isinstance(obj, Message):
+            message_deltas[obj.agent_id] += 1
+        elif isinstance(obj, ArchivalPassage) and not obj.is_deleted:
+            passage_deltas[obj.archive_id] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Message):
+            message_deltas[obj.agent_id] -= 1
+        elif isinstance(obj, ArchivalPassage) and not obj.is_deleted:
+            passage_deltas[obj.archive_id] -= 1
+
+    for obj in session.dirty:
+        if isinstance(obj, ArchivalPassage):
+            history = attributes.get_history(obj, "is_deleted")
+            if history.has_changes() and history.deleted and bool(history.deleted[0]) != bool(obj.is_deleted):
+                passage_deltas[obj.archive_id] += -1 if obj.is_deleted else 1
+
+    if message_deltas:
+        adjust_message_counts(session, message_deltas)
+    if passage_deltas:
+        for stmt in _increment_statements(Archive, Archive.passage_count, passage_deltas):
+            session.execute(stmt)
+
+
+async def get_agent_message_count_async(session: AsyncSession, agent_id: str) -> int:
+    """Number of messages stored for an agent, initializing the counter from a real count if unknown."""
+    count = await session.scalar(select(Agent.message_count).where(Agent.id == agent_id))
+    if count is not None:
+        return count
+
+    await session.execute(
+        update(Agent)
+        .where(Agent.id == agent_id, Agent.message_count.is_(None))
+        .values(message_count=_message_count_subquery(Agent.id))
+        .execution_options(synchronize_session=False)
+    )
+    count = await session.scalar(select(Agent.message_count).where(Agent.id == agent_id))
+    await session.commit()
+    return count or 0
+
+
+async def get_agent_passage_count_async(session: AsyncSession, agent_id: str) -> int:
+    """Number of archival passages across an agent's archives, initializing unknown archive counters."""
+    archive_counts: List[Tuple[str, Optional[int]]] = (
+        await session.execute(
+            select(Archive.id, Archive.passage_count)
+            .join(ArchivesAgents, ArchivesAgents.archive_id == Archive.id)
+            .where(ArchivesAgents.agent_id == agent_id)
+        )
+    ).all()
+
+    unknown = [archive_id for archive_id, count in archive_counts if count is None]
+    if not unknown:
+        return sum(count for _, count in archive_counts)
+
+    await session.execute(
+        update(Archive)
+        .where(Archive.id.in_(unknown), Archive.passage_count.is_(None))
+        .values(passage_count=_passage_count_subquery(Archive.id))
+        .execution_options(synchronize_session=False)
+    )
+    total = await session.scalar(
+        select(func.coalesce(func.sum(Archive.passage_count), 0))
+        .join(ArchivesAgents, ArchivesAgents.archive_id == Archive.id)
+        .where(ArchivesAgents.agent_id == agent_id)
+    )
+    await session.commit()
+    return total or 0
+
+
+async def reconcile_counters_async(
+    session: AsyncSession, batch_size: int, after_agent_id: Optional[str] = None, after_archive_id: Optional[str] = None
+) -> Tuple[Optional[str], Optional[str]]:
+    """Recompute the next batch of initialized counters from the source tables.
+
+    Walks agents and archives in id order starting after the given cursors, and returns the new
+    cursors (None once the end is reached, so the next run starts over).
+    """
+    agent_query = select(Agent.id).where(Agent.message_count.is_not(None)).order_by(Agent.id).limit(batch_size)
+    if after_agent_id:
+        agent_query = agent_query.where(Agent.id > after_agent_id)
+    agent_ids = list((await session.execute(agent_query)).scalars())
+    if agent_ids:
+        await session.execute(
+            update(Agent)
+            .where(Agent.id.in_(agent_ids))
+            .values(message_count=_message_count_subquery(Agent.id))
+            .execution_options(synchronize_session=False)
+        )
+
+    archive_query = select(Archive.id).where(Archive.passage_count.is_not(None)).order_by(Archive.id).limit(batch_size)
+    if after_archive_id:
+        archive_query = archive_query.where(Archive.id > after_archive_id)
+    archive_ids = list((await session.execute(archive_query)).scalars())
+    if archive_ids:
+        await session.execute(
+            update(Archive)
+            .where(Archive.id.in_(archive_ids))
+            .values(passage_count=_passage_count_subquery(Archive.id))
+            .execution_options(synchronize_session=False)
+        )
+
+    await session.commit()
+    next_agent_cursor = agent_ids[-1] if len(agent_ids) == batch_size else None
+    next_archive_cursor = archive_ids[-1] if len(archive_ids) == batch_size else None
+    return next_agent_cursor, next_archive_cursor
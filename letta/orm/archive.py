@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING, List, Optional
 
-from sqlalchemy import JSON, Enum, Index, String
+from sqlalchemy import JSON, Enum, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from letta.orm.mixins import OrganizationMixin
@@ -47,6 +47,9 @@ class Archive(SqlalchemyBase, OrganizationMixin):
     )
     metadata_: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True, doc="Additional metadata for the archive")
     _vector_db_namespace: Mapped[Optional[str]] = mapped_column(String, nullable=True, doc="Private field for vector database namespace")
+    passage_count: Mapped[Optional[int]] = mapped_column(
+        Integer, nullable=True, doc="Cached number of live passages in this archive; NULL until first computed"
+    )
 
     # relationships
     archives_agents: Mapped[List["ArchivesAgents"]] = relationship(
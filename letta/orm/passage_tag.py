@@ -27,7 +27,8 @@ class PassageTag(SqlalchemyBase, OrganizationMixin):
         # indexes for efficient queries
         Index("ix_passage_tags_archive_id", "archive_id"),
         Index("ix_passage_tags_tag", "tag"),
-        Index("ix_passage_tags_archive_tag", "archive_id", "tag"),
+        # covers tag-filtered archival queries and DISTINCT tag listings per archive without touching the heap
+        Index("ix_passage_tags_archive_tag_passage", "archive_id", "tag", "passage_id"),
         Index("ix_passage_tags_org_archive", "organization_id", "archive_id"),
     )
 
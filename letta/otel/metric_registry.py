@@ -2,7 +2,7 @@ from dataclasses import dataclass, field
 from functools import partial
 
 from opentelemetry import metrics
-from opentelemetry.metrics import Counter, Histogram
+from opentelemetry.metrics import CallbackT, Counter, Histogram, ObservableGauge
 from opentelemetry.metrics._internal import Gauge
 
 from letta.helpers.singleton import singleton
@@ -28,7 +28,7 @@ class MetricRegistry:
         agent_id -1:N -> tool_name
     """
 
-    Instrument = Counter | Histogram | Gauge
+    Instrument = Counter | Histogram | Gauge | ObservableGauge
     _metrics: dict[str, Instrument] = field(default_factory=dict, init=False)
     _meter: metrics.Meter = field(init=False)
 
@@ -273,3 +273,118 @@ class MetricRegistry:
                 unit="1",
             ),
         )
+
+    # (includes provider)
+    @property
+    def llm_http_client_created_counter(self) -> Counter:
+        return self._get_or_create_metric(
+            "count_llm_http_clients_created",
+            partial(
+                self._meter.create_counter,
+                name="count_llm_http_clients_created",
+                description="Counts provider clients (and their connection pools) created by the shared client registry",
+                unit="1",
+            ),
+        )
+
+    # (includes provider, state)
+    def llm_http_pool_connections_gauge(self, callback: CallbackT) -> ObservableGauge:
+        """Observed at collection time through `callback`, which is only registered by the first call."""
+        return self._get_or_create_metric(
+            "gauge_llm_http_pool_connections",
+            partial(
+                self._meter.create_observable_gauge,
+                name="gauge_llm_http_pool_connections",
+                callbacks=[callback],
+                description="Connections in the shared LLM provider HTTP pools, by provider and state (active, idle)",
+                unit="1",
+            ),
+        )
+
+    @property
+    def agent_state_cache_hit_counter(self) -> Counter:
+        return self._get_or_create_metric(
+            "count_agent_state_cache_hits",
+            partial(
+                self._meter.create_counter,
+                name="count_agent_state_cache_hits",
+                description="Counts agent state reads served from the in-process cache",
+                unit="1",
+            ),
+        )
+
+    @property
+    def agent_state_cache_miss_counter(self) -> Counter:
+        return self._get_or_create_metric(
+            "count_agent_state_cache_misses",
+            partial(
+                self._meter.create_counter,
+                name="count_agent_state_cache_misses",
+                description="Counts agent state reads that missed the in-process cache",
+                unit="1",
+            ),
+        )
+
+    # (includes tier: memory or redis)
+    @property
+    def embedding_cache_hit_counter(self) -> Counter:
+        return self._get_or_create_metric(
+            "count_embedding_cache_hits",
+            partial(
+                self._meter.create_counter,
+                name="count_embedding_cache_hits",
+                description="Counts texts whose embedding was served from the embedding cache",
+                unit="1",
+            ),
+        )
+
+    @property
+    def embedding_cache_miss_counter(self) -> Counter:
+        return self._get_or_create_metric(
+            "count_embedding_cache_misses",
+            partial(
+                self._meter.create_counter,
+                name="count_embedding_cache_misses",
+                description="Counts texts sent to the embedding provider after missing the embedding cache",
+                unit="1",
+            ),
+        )
+
+    # (includes model)
+    @property
+    def embedding_rate_limited_counter(self) -> Counter:
+        return self._get_or_create_metric(
+            "count_embedding_rate_limited",
+            partial(
+                self._meter.create_counter,
+                name="count_embedding_rate_limited",
+                description="Counts embedding requests rejected by the provider's rate limit and retried",
+                unit="1",
+            ),
+        )
+
+    # (includes model)
+    @property
+    def embedding_queue_wait_time_ms_histogram(self) -> Histogram:
+        return self._get_or_create_metric(
+            "hist_embedding_queue_wait_time_ms",
+            partial(
+                self._meter.create_histogram,
+                name="hist_embedding_queue_wait_time_ms",
+                description="Histogram for time embedding requests wait for rate limit budget and a concurrency slot (ms)",
+                unit="ms",
+            ),
+        )
+
+    # (includes whether the distributed lock was used)
+    @property
+    def agent_lock_wait_time_ms_histogram(self) -> Histogram:
+        return self._get_or_create_metric(
+            "hist_agent_lock_wait_time_ms",
+            partial(
+                self._meter.create_histogram,
+                name="hist_agent_lock_wait_time_ms",
+                description="Histogram for time spent waiting to acquire a per-agent lock (ms)",
+                unit="ms",
+            ),
+        )
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 from openai.types.chat.chat_completion_message_tool_call import ChatCompletionMessageToolCall as OpenAIToolCall
 from pydantic import BaseModel, Field
@@ -120,9 +120,14 @@ class AgentSchema(CreateAgent):
 
     @classmethod
     async def from_agent_state(
-        cls, agent_state: AgentState, message_manager: MessageManager, files_agents: List[FileAgent], actor: User
+        cls,
+        agent_state: AgentState,
+        message_manager: MessageManager,
+        files_agents: List[FileAgent],
+        actor: User,
+        include_messages: bool = True,
     ) -> "AgentSchema":
-        """Convert AgentState to AgentSchema"""
+        """Convert AgentState to AgentSchema (without messages if `include_messages` is False, e.g. when they are streamed)"""
 
         create_agent = CreateAgent(
             name=agent_state.name,
@@ -168,12 +173,14 @@ class AgentSchema(CreateAgent):
             per_file_view_window_char_limit=agent_state.per_file_view_window_char_limit,
         )
 
-        messages = await message_manager.list_messages_for_agent_async(
-            agent_id=agent_state.id, actor=actor, limit=50
-        )  # TODO: Expand to get more messages
+        message_schemas = []
+        if include_messages:
+            messages = await message_manager.list_messages_for_agent_async(
+                agent_id=agent_state.id, actor=actor, limit=50
+            )  # TODO: Expand to get more messages
 
-        # Convert messages to MessageSchema objects
-        message_schemas = [MessageSchema.from_message(msg) for msg in messages]
+            # Convert messages to MessageSchema objects
+            message_schemas = [MessageSchema.from_message(msg) for msg in messages]
 
         # Create AgentSchema with agent state ID (remapped later)
         return cls(
@@ -343,3 +350,25 @@ class AgentFileSchema(BaseModel):
         default_factory=dict, description="Metadata for this agent file, including revision_id and other export information."
     )
     created_at: Optional[datetime] = Field(default=None, description="The timestamp when the object was created.")
+
+
+AGENT_FILE_STREAM_FORMAT = "agent_file_stream"
+
+
+class AgentFileStreamHeader(BaseModel):
+    """
+    First record of a streamed agent file.
+
+    A streamed agent file is newline-delimited JSON with one `{"type": ..., "data": ...}` record per line: this header,
+    then one record per MCP server, tool, block, source, file, group and agent (typed by their `__id_prefix__`, agents
+    without their messages), then one record per message, in order, referencing its agent by `agent_id`.
+    """
+
+    __record_type__ = "header"
+
+    format: Literal["agent_file_stream"] = Field(AGENT_FILE_STREAM_FORMAT, description="Marks the file as a streamed agent file")
+    version: int = Field(1, description="Version of the streamed agent file layout")
+    metadata: Dict[str, str] = Field(
+        default_factory=dict, description="Metadata for this agent file, including revision_id and other export information."
+    )
+    created_at: Optional[datetime] = Field(default=None, description="The timestamp when the object was created.")
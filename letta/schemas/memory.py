@@ -1,7 +1,10 @@
 import asyncio
 import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import TYPE_CHECKING, List, Optional
+from functools import lru_cache
+from typing import TYPE_CHECKING, Hashable, List, Optional, Tuple
 
 from jinja2 import Template, TemplateSyntaxError
 from pydantic import BaseModel, Field, field_validator
@@ -17,6 +20,42 @@ from letta.otel.tracing import trace_method
 from letta.schemas.block import Block, FileBlock
 from letta.schemas.message import Message
 
+# Maximum number of compiled memory strings kept across all agents in this process
+MAX_COMPILED_MEMORY_CACHE_SIZE = 256
+
+_compiled_memory_cache: "OrderedDict[Tuple[Hashable, ...], str]" = OrderedDict()
+_compiled_memory_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=64)
+def _get_template(prompt_template: str, enable_async: bool = False) -> Template:
+    """Parse a Jinja2 template once; templates are shared by every agent of the same type."""
+    return Template(prompt_template, enable_async=enable_async)
+
+
+_SCALAR_TYPES = (str, int, float, bool, type(None), datetime)
+
+
+def _freeze(value) -> Hashable:
+    if isinstance(value, _SCALAR_TYPES):
+        return value
+    if isinstance(value, BaseModel):
+        return _fingerprint(value)
+    if isinstance(value, dict):
+        return tuple((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _fingerprint(model: BaseModel) -> Tuple[Hashable, ...]:
+    """Every field a memory template could render for a block, source or tool rule prompt.
+
+    Block values are immutable strings whose hash is cached on the string object, so fingerprinting
+    an unchanged block costs O(number of fields) rather than O(len(value)).
+    """
+    return (type(model), *(_freeze(value) for value in model.__dict__.values()))
+
 
 class ContextWindowOverview(BaseModel):
     """
@@ -157,12 +196,53 @@ class Memory(BaseModel, validate_assignment=True):
         except Exception as e:
             raise ValueError(f"Prompt template is not compatible with current memory structure: {str(e)}")
 
+    def _compile_cache_key(self, tool_usage_rules=None, sources=None, max_files_open=None) -> Tuple[Hashable, ...]:
+        """Key identifying everything the template renders, built from per-block fingerprints."""
+        return (
+            self.prompt_template,
+            _freeze(self.blocks),
+            _freeze(self.file_blocks),
+            _freeze(tool_usage_rules),
+            _freeze(sources),
+            max_files_open,
+        )
+
+    @staticmethod
+    def _get_cached_compile(key: Tuple[Hashable, ...]) -> Optional[str]:
+        with _compiled_memory_cache_lock:
+            compiled = _compiled_memory_cache.get(key)
+            if compiled is not None:
+                _compiled_memory_cache.move_to_end(key)
+            return compiled
+
+    @staticmethod
+    def _set_cached_compile(key: Tuple[Hashable, ...], compiled: str) -> None:
+        with _compiled_memory_cache_lock:
+            _compiled_memory_cache[key] = compiled
+            _compiled_memory_cache.move_to_end(key)
+            while len(_compiled_memory_cache) > MAX_COMPILED_MEMORY_CACHE_SIZE:
+                _compiled_memory_cache.popitem(last=False)
+
     @trace_method
     def compile(self, tool_usage_rules=None, sources=None, max_files_open=None) -> str:
-        """Generate a string representation of the memory in-context using the Jinja2 template"""
+        """Generate a string representation of the memory in-context using the Jinja2 template
+
+        The rendered string is memoized on the fingerprints of the blocks, sources and tool rules, so
+        re-compiling unchanged memory (the common case on every step) skips rendering entirely.
+        """
         try:
-            template = Template(self.prompt_template)
-            return template.render(
+            key = self._compile_cache_key(tool_usage_rules=tool_usage_rules, sources=sources, max_files_open=max_files_open)
+        except TypeError:
+            # unhashable values (e.g. custom objects passed as sources) fall back to an uncached render
+            key = None
+        if key is not None:
+            compiled = self._get_cached_compile(key)
+            if compiled is not None:
+                return compiled
+
+        try:
+            template = _get_template(self.prompt_template)
+            compiled = template.render(
                 blocks=self.blocks,
                 file_blocks=self.file_blocks,
                 tool_usage_rules=tool_usage_rules,
@@ -174,11 +254,15 @@ class Memory(BaseModel, validate_assignment=True):
         except Exception as e:
             raise ValueError(f"Prompt template is not compatible with current memory structure: {str(e)}")
 
+        if key is not None:
+            self._set_cached_compile(key, compiled)
+        return compiled
+
     @trace_method
     async def compile_async(self, tool_usage_rules=None, sources=None, max_files_open=None) -> str:
         """Async version of compile that doesn't block the event loop"""
         try:
-            template = Template(self.prompt_template, enable_async=True)
+            template = _get_template(self.prompt_template, enable_async=True)
             return await template.render_async(
                 blocks=self.blocks,
                 file_blocks=self.file_blocks,
@@ -193,7 +277,15 @@ class Memory(BaseModel, validate_assignment=True):
 
     @trace_method
     async def compile_in_thread_async(self, tool_usage_rules=None, sources=None, max_files_open=None) -> str:
-        """Compile the memory in a thread"""
+        """Compile the memory in a thread, skipping the thread hop when the memory is unchanged"""
+        try:
+            compiled = self._get_cached_compile(
+                self._compile_cache_key(tool_usage_rules=tool_usage_rules, sources=sources, max_files_open=max_files_open)
+            )
+        except TypeError:
+            compiled = None
+        if compiled is not None:
+            return compiled
         return await asyncio.to_thread(self.compile, tool_usage_rules=tool_usage_rules, sources=sources, max_files_open=max_files_open)
 
     def list_block_labels(self) -> List[str]:
@@ -37,6 +37,9 @@ class MarshmallowAgentSchema(BaseSchema):
 
     tool_rules = ToolRulesField()
 
+    # stored in agent_context_messages, exposed on the model as a list of ids
+    message_ids = fields.List(fields.String())
+
     core_memory = fields.List(fields.Nested(SerializedBlockSchema))
     tools = fields.List(fields.Nested(SerializedToolSchema))
     tool_exec_environment_variables = fields.List(fields.Nested(SerializedAgentEnvironmentVariableSchema))
@@ -237,4 +240,5 @@ class MarshmallowAgentSchema(BaseSchema):
             "groups",
             "batch_items",
             "organization",
+            "context_messages",
         )
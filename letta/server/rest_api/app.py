@@ -1,3 +1,4 @@
+import asyncio
 import importlib.util
 import json
 import logging
@@ -17,7 +18,7 @@ from starlette.middleware.cors import CORSMiddleware
 from letta.__init__ import __version__ as letta_version
 from letta.agents.exceptions import IncompatibleAgentType
 from letta.constants import ADMIN_PREFIX, API_PREFIX, OPENAI_API_PREFIX
-from letta.errors import BedrockPermissionError, LettaAgentNotFoundError, LettaUserNotFoundError
+from letta.errors import AgentLockTimeoutError, BedrockPermissionError, LettaAgentNotFoundError, LettaUserNotFoundError
 from letta.helpers.pinecone_utils import get_pinecone_indices, should_use_pinecone, upsert_pinecone_indices
 from letta.jobs.scheduler import start_scheduler_with_leader_election
 from letta.log import get_logger
@@ -43,6 +44,7 @@ from letta.server.rest_api.routers.v1.users import router as users_router  # TOD
 from letta.server.rest_api.static_files import mount_static_files
 from letta.server.rest_api.utils import SENTRY_ENABLED
 from letta.server.server import SyncServer
+from letta.services.agent_state_cache import listen_for_agent_state_invalidations
 from letta.settings import settings, telemetry_settings
 
 if SENTRY_ENABLED:
@@ -137,9 +139,25 @@ async def lifespan(app_: FastAPI):
         logger.info(f"[Worker {worker_id}] Scheduler initialization completed")
     except Exception as e:
         logger.error(f"[Worker {worker_id}] Scheduler initialization failed: {e}", exc_info=True)
+    agent_state_cache_listener = None
+    if settings.agent_state_cache_enabled and settings.redis_host:
+        agent_state_cache_listener = asyncio.create_task(listen_for_agent_state_invalidations())
+        logger.info(f"[Worker {worker_id}] Listening for agent state cache invalidations")
+
+    if settings.task_queue_enabled:
+        try:
+            from letta.services.task_queue import start_task_workers
+
+            await start_task_workers()
+        except Exception as e:
+            logger.error(f"[Worker {worker_id}] Starting background task workers failed: {e}", exc_info=True)
+
     logger.info(f"[Worker {worker_id}] Lifespan startup completed")
     yield
 
+    if agent_state_cache_listener is not None:
+        agent_state_cache_listener.cancel()
+
     # Cleanup on shutdown
     logger.info(f"[Worker {worker_id}] Starting lifespan shutdown")
     try:
@@ -150,6 +168,41 @@ async def lifespan(app_: FastAPI):
     except Exception as e:
         logger.error(f"[Worker {worker_id}] Scheduler shutdown failed: {e}", exc_info=True)
 
+    try:
+        from letta.services.task_queue import stop_task_workers
+
+        await stop_task_workers()
+    except Exception as e:
+        logger.warning(f"[Worker {worker_id}] Stopping background task workers failed: {e}")
+
+    try:
+        from letta.services.step_write_buffer import stop_step_write_buffers
+
+        await stop_step_write_buffers()
+    except Exception as e:
+        logger.warning(f"[Worker {worker_id}] Flushing buffered steps failed: {e}")
+
+    try:
+        from letta.server.rest_api.redis_stream_manager import stop_sse_stream_writers
+
+        await stop_sse_stream_writers()
+    except Exception as e:
+        logger.warning(f"[Worker {worker_id}] Flushing background streams failed: {e}")
+
+    try:
+        from letta.llm_api.client_registry import LLMClientRegistry
+
+        await LLMClientRegistry().aclose()
+    except Exception as e:
+        logger.warning(f"[Worker {worker_id}] Closing LLM clients failed: {e}")
+
+    try:
+        from letta.services.mcp.session_pool import close_mcp_session_pools
+
+        await close_mcp_session_pools()
+    except Exception as e:
+        logger.warning(f"[Worker {worker_id}] Closing MCP sessions failed: {e}")
+
     # Cleanup SQLAlchemy instrumentation
     if not settings.disable_tracing and settings.sqlalchemy_tracing:
         try:
@@ -232,6 +285,7 @@ def create_application() -> "FastAPI":
     app.add_exception_handler(LettaUserNotFoundError, _error_handler_404_user)
     app.add_exception_handler(ForeignKeyConstraintViolationError, _error_handler_409)
     app.add_exception_handler(UniqueConstraintViolationError, _error_handler_409)
+    app.add_exception_handler(AgentLockTimeoutError, _error_handler_409)
 
     @app.exception_handler(IncompatibleAgentType)
     async def handle_incompatible_agent_type(request: Request, exc: IncompatibleAgentType):
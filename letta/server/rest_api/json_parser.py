@@ -1,6 +1,7 @@
 import json
+import re
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Dict, List, Optional
 
 from pydantic_core import from_json
 
@@ -226,6 +227,235 @@ class OptimisticJSONParser(JSONParser):
         raise decode_error
 
 
+# Longest run of characters inside a JSON string that can be copied through verbatim
+_STRING_RUN = re.compile(r'[^"\\]+')
+_SIMPLE_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_WHITESPACE = " \t\r\n"
+
+
+def string_run_end(text: str, pos: int) -> int:
+    """Index of the first quote or backslash at or after `pos` (or `len(text)`), i.e. the end of a plain string run."""
+    match = _STRING_RUN.match(text, pos)
+    return match.end() if match else pos
+
+
+class IncrementalJSONParser(JSONParser):
+    """
+    A resumable parser for a JSON object that arrives in fragments, such as streamed tool call arguments.
+
+    Re-parsing the accumulated text at every fragment is quadratic in the argument length. Instead, `feed`
+    consumes only the new fragment, keeps its state between calls and returns what changed:
+
+    - string values are decoded as they stream in, and the delta holds only the newly decoded text
+    - other values (numbers, literals, nested arrays/objects) are buffered and reported once complete
+
+    A key is visible (see `keys`) as soon as its value has started. `parse` is the stateless
+    `JSONParser` interface and re-parses its whole input.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self._state = "start"
+        self._key_chunks: List[str] = []
+        self._key: Optional[str] = None
+        self._strings: Dict[str, List[str]] = {}
+        self._values: Dict[str, Any] = {}
+        self._escape = ""
+        self._high_surrogate = ""
+        self._raw_chunks: List[str] = []
+        self._raw_depth = 0
+        self._raw_in_string = False
+        self._raw_escaped = False
+
+    def keys(self) -> List[str]:
+        """Keys whose values have started, in order."""
+        return list(self._values)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Current (possibly partial) value of `key`."""
+        if key not in self._values:
+            return default
+        if key in self._strings:
+            chunks = self._strings[key]
+            if len(chunks) > 1:
+                chunks[:] = ["".join(chunks)]
+            return chunks[0] if chunks else ""
+        if key == self._key and self._state == "raw":
+            return OptimisticJSONParser(strict=False).parse("".join(self._raw_chunks).strip())
+        return self._values[key]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The object parsed so far, with partial values where a value is still streaming."""
+        return {key: self.get(key) for key in self._values}
+
+    @property
+    def done(self) -> bool:
+        return self._state == "done"
+
+    def parse(self, input_str: str) -> Any:
+        self.reset()
+        self.feed(input_str)
+        return self.snapshot()
+
+    def feed(self, fragment: str) -> Dict[str, Any]:
+        """
+        Consume the next fragment of the document.
+
+        Returns:
+            For each key that changed: the newly decoded text of a string value, or the whole value of a
+            non-string value that completed in this fragment.
+        """
+        deltas: Dict[str, Any] = {}
+        pos = 0
+        end = len(fragment)
+        while pos < end:
+            state = self._state
+            if state in ("key", "string"):
+                pos = self._consume_string(fragment, pos, deltas)
+                continue
+            if state == "raw":
+                pos = self._consume_raw(fragment, pos, deltas)
+                continue
+
+            c = fragment[pos]
+            pos += 1
+            if c in _WHITESPACE or state == "invalid":
+                continue
+            if state == "start" and c == "{":
+                self._state = "key_or_end"
+            elif state == "key_or_end" and c == '"':
+                self._key_chunks = []
+                self._state = "key"
+            elif state in ("key_or_end", "after_value") and c == "}":
+                self._state = "done"
+            elif state == "key_or_end" and c == ",":
+                continue
+            elif state == "colon" and c == ":":
+                self._state = "value_start"
+            elif state == "value_start":
+                if c == '"':
+                    self._strings[self._key] = []
+                    self._values[self._key] = ""
+                    self._state = "string"
+                    deltas.setdefault(self._key, "")
+                else:
+                    self._values[self._key] = None
+                    self._raw_chunks = []
+                    self._raw_depth = 0
+                    self._raw_in_string = False
+                    self._raw_escaped = False
+                    self._state = "raw"
+                    pos -= 1
+            elif state == "after_value" and c == ",":
+                self._state = "key_or_end"
+            elif state != "done":
+                logger.warning(f"IncrementalJSONParser: unexpected {c!r} in state {state}, ignoring the rest of the input")
+                self._state = "invalid"
+        return deltas
+
+    def _emit(self, text: str, deltas: Dict[str, Any]) -> None:
+        if self._high_surrogate:
+            if text and "\udc00" <= text[0] <= "\udfff":
+                text = (self._high_surrogate + text[0]).encode("utf-16", "surrogatepass").decode("utf-16") + text[1:]
+            else:
+                text = self._high_surrogate + text
+            self._high_surrogate = ""
+        if not text:
+            return
+        if self._state == "key":
+            self._key_chunks.append(text)
+        else:
+            self._strings[self._key].append(text)
+            deltas[self._key] = deltas.get(self._key, "") + text
+
+    def _consume_string(self, fragment: str, pos: int, deltas: Dict[str, Any]) -> int:
+        end = len(fragment)
+        while pos < end:
+            if self._escape:
+                needed = 6 if self._escape[1:2] == "u" or (len(self._escape) == 1 and fragment[pos] == "u") else 2
+                take = min(needed - len(self._escape), end - pos)
+                self._escape += fragment[pos : pos + take]
+                pos += take
+                if len(self._escape) < needed:
+                    return pos
+                escape, self._escape = self._escape, ""
+                if escape[1] == "u":
+                    try:
+                        decoded = chr(int(escape[2:], 16))
+                    except ValueError:
+                        decoded = escape
+                    if "\ud800" <= decoded <= "\udbff":
+                        # wait for the low half of a surrogate pair
+                        self._emit("", deltas)
+                        self._high_surrogate = decoded
+                        continue
+                    self._emit(decoded, deltas)
+                else:
+                    self._emit(_SIMPLE_ESCAPES.get(escape[1], escape[1]), deltas)
+                continue
+
+            run_end = string_run_end(fragment, pos)
+            if run_end > pos:
+                self._emit(fragment[pos:run_end], deltas)
+                pos = run_end
+                continue
+
+            c = fragment[pos]
+            pos += 1
+            if c == "\\":
+                self._escape = c
+                continue
+
+            # closing quote
+            self._emit("", deltas)
+            if self._state == "key":
+                self._key = "".join(self._key_chunks)
+                self._state = "colon"
+            else:
+                self._state = "after_value"
+            return pos
+        return pos
+
+    def _consume_raw(self, fragment: str, pos: int, deltas: Dict[str, Any]) -> int:
+        start = pos
+        end = len(fragment)
+        while pos < end:
+            c = fragment[pos]
+            if self._raw_in_string:
+                if self._raw_escaped:
+                    self._raw_escaped = False
+                elif c == "\\":
+                    self._raw_escaped = True
+                elif c == '"':
+                    self._raw_in_string = False
+            elif c == '"':
+                self._raw_in_string = True
+            elif c in "[{":
+                self._raw_depth += 1
+            elif c in "]}" and self._raw_depth > 0:
+                self._raw_depth -= 1
+            elif self._raw_depth == 0 and (c in ",}" or c in _WHITESPACE):
+                self._raw_chunks.append(fragment[start:pos])
+                self._finish_raw(deltas)
+                return pos
+            pos += 1
+        self._raw_chunks.append(fragment[start:pos])
+        return pos
+
+    def _finish_raw(self, deltas: Dict[str, Any]) -> None:
+        raw = "".join(self._raw_chunks).strip()
+        self._raw_chunks = []
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            value = OptimisticJSONParser(strict=False).parse(raw)
+        self._values[self._key] = value
+        deltas[self._key] = value
+        self._state = "after_value"
+
+
 # TODO: Keeping this around for posterity
 # def main():
 #     test_string = '{"inner_thoughts":}'
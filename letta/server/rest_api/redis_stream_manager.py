@@ -3,24 +3,72 @@
 import asyncio
 import json
 import time
-from collections import defaultdict
-from typing import AsyncIterator, Dict, List, Optional
+import uuid
+import weakref
+from bisect import bisect_right
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 from letta.data_sources.redis_client import AsyncRedisClient
 from letta.log import get_logger
 
 logger = get_logger(__name__)
 
+# how long a tail read blocks on Redis, must stay below the client's socket timeout
+XREAD_BLOCK_MS = 1000
+# entries kept in memory per tailed stream for readers that are (nearly) caught up
+TAIL_BUFFER_SIZE = 1000
+# consecutive failed flushes after which the chunks of a run Redis keeps rejecting are dropped
+MAX_RUN_FLUSH_ATTEMPTS = 5
+
+StreamEntry = Tuple[str, Dict[str, str]]
+
+
+def sse_stream_key(run_id: str) -> str:
+    return f"sse:run:{run_id}"
+
+
+def _parse_id(entry_id: str) -> Tuple[int, int]:
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+class _RunBuffer:
+    """Chunks of one run waiting to be flushed, already encoded."""
+
+    __slots__ = ("chunks", "size", "complete")
+
+    def __init__(self):
+        self.chunks: List[Tuple[int, bytes]] = []
+        self.size = 0
+        self.complete = False
+
+    def tail(self, start: int) -> "_RunBuffer":
+        """The chunks from `start` on."""
+        rest = _RunBuffer()
+        rest.chunks = self.chunks[start:]
+        rest.size = sum(len(data) for _, data in rest.chunks)
+        rest.complete = self.complete
+        return rest
+
+    def extend(self, other: "_RunBuffer") -> None:
+        self.chunks.extend(other.chunks)
+        self.size += other.size
+        self.complete = self.complete or other.complete
+
 
 class RedisSSEStreamWriter:
     """
     Efficiently writes SSE chunks to Redis streams with batching and TTL management.
 
     Features:
-    - Batches writes using Redis pipelines for performance
+    - One background task flushes the buffers of every run together in a single Redis pipeline; a run whose
+      commands fail is retried from its first failed chunk without holding back the others
     - Automatically sets/refreshes TTL on streams
     - Tracks sequential IDs for cursor-based recovery
     - Handles flush on size or time thresholds
+    - Buffers are bounded per run and in total: producers wait for a flush when a limit is reached
+
+    Chunks are encoded once when written and buffered as bytes; the stream entry ID carries the timestamp.
     """
 
     def __init__(
@@ -30,29 +78,45 @@ class RedisSSEStreamWriter:
         flush_size: int = 50,
         stream_ttl_seconds: int = 10800,  # 3 hours default
         max_stream_length: int = 10000,  # Max entries per stream
+        max_run_buffer_bytes: int = 1024 * 1024,
+        max_buffer_bytes: int = 64 * 1024 * 1024,
     ):
         """
         Initialize the Redis SSE stream writer.
 
         Args:
             redis_client: Redis client instance
-            flush_interval: Seconds between automatic flushes
-            flush_size: Number of chunks to buffer before flushing
-            stream_ttl_seconds: TTL for streams in seconds (default: 6 hours)
+            flush_interval: Seconds a chunk may wait in the buffer before it is flushed
+            flush_size: Number of chunks buffered for a run that triggers a flush
+            stream_ttl_seconds: TTL for streams in seconds (default: 3 hours)
             max_stream_length: Maximum entries per stream before trimming
+            max_run_buffer_bytes: Buffered bytes per run above which writers of that run wait for a flush
+            max_buffer_bytes: Buffered bytes across all runs above which every writer waits for a flush
         """
         self.redis = redis_client
         self.flush_interval = flush_interval
         self.flush_size = flush_size
         self.stream_ttl = stream_ttl_seconds
         self.max_stream_length = max_stream_length
+        self.max_run_buffer_bytes = max_run_buffer_bytes
+        self.max_buffer_bytes = max_buffer_bytes
 
-        # Buffer for batching: run_id -> list of chunks
-        self.buffer: Dict[str, List[Dict]] = defaultdict(list)
+        # Buffer for batching: run_id -> chunks not yet flushed
+        self.buffer: Dict[str, _RunBuffer] = {}
+        self.buffered_bytes = 0
         # Track sequence IDs per run
-        self.seq_counters: Dict[str, int] = defaultdict(lambda: 1)
-        # Track last flush time per run
-        self.last_flush: Dict[str, float] = defaultdict(float)
+        self.seq_counters: Dict[str, int] = {}
+        # Track last flush time per run (monotonic), so a chunk arriving after a quiet period is flushed right away
+        self.last_flush: Dict[str, float] = {}
+
+        # flush rounds started / finished and the last failed round (and its error) per run, for writers waiting on their chunks
+        self._rounds_started = 0
+        self._rounds_finished = 0
+        self._run_errors: Dict[str, Tuple[int, Exception]] = {}
+        # consecutive failed flushes per run
+        self._run_attempts: Dict[str, int] = {}
+        self._flush_requested = asyncio.Event()
+        self._flushed = asyncio.Condition()
 
         # Background flush task
         self._flush_task = None
@@ -62,21 +126,18 @@ class RedisSSEStreamWriter:
         """Start the background flush task."""
         if not self._running:
             self._running = True
-            self._flush_task = asyncio.create_task(self._periodic_flush())
+            self._flush_task = asyncio.create_task(self._flush_loop())
 
     async def stop(self):
         """Stop the background flush task and flush remaining data."""
+        if not self._running:
+            return
         self._running = False
-        if self._flush_task:
-            self._flush_task.cancel()
-            try:
-                await self._flush_task
-            except asyncio.CancelledError:
-                pass
-
-        for run_id in list(self.buffer.keys()):
-            if self.buffer[run_id]:
-                await self._flush_run(run_id)
+        self._flush_requested.set()
+        try:
+            await self._flush_task
+        except Exception as e:
+            logger.error(f"Failed to flush remaining SSE chunks on shutdown: {e}")
 
     async def write_chunk(
         self,
@@ -87,6 +148,9 @@ class RedisSSEStreamWriter:
         """
         Write an SSE chunk to the buffer for a specific run.
 
+        Returns once the chunk is buffered, unless the buffers are full (then once they were flushed)
+        or this is the final chunk of the run (then once the run was flushed).
+
         Args:
             run_id: The run ID to write to
             data: SSE-formatted chunk data
@@ -95,89 +159,179 @@ class RedisSSEStreamWriter:
         Returns:
             The sequence ID assigned to this chunk
         """
-        seq_id = self.seq_counters[run_id]
-        self.seq_counters[run_id] += 1
-
-        chunk = {
-            "seq_id": seq_id,
-            "data": data,
-            "timestamp": int(time.time() * 1000),
-        }
-
-        if is_complete:
-            chunk["complete"] = "true"
+        if not self._running:
+            await self.start()
 
-        self.buffer[run_id].append(chunk)
+        seq_id = self.seq_counters.get(run_id, 1)
+        self.seq_counters[run_id] = seq_id + 1
 
-        should_flush = (
-            len(self.buffer[run_id]) >= self.flush_size or is_complete or (time.time() - self.last_flush[run_id]) > self.flush_interval
-        )
+        encoded = data.encode("utf-8")
+        run_buffer = self.buffer.get(run_id)
+        if run_buffer is None:
+            run_buffer = self.buffer[run_id] = _RunBuffer()
+        run_buffer.chunks.append((seq_id, encoded))
+        run_buffer.size += len(encoded)
+        run_buffer.complete = is_complete
+        self.buffered_bytes += len(encoded)
 
-        if should_flush:
-            await self._flush_run(run_id)
+        if is_complete:
+            self.seq_counters.pop(run_id, None)
+            await self._flush_and_wait(run_id)
+        elif run_buffer.size > self.max_run_buffer_bytes or self.buffered_bytes > self.max_buffer_bytes:
+            # backpressure: the producer waits for the flush instead of growing the buffer
+            await self._flush_and_wait(run_id)
+        elif len(run_buffer.chunks) >= self.flush_size or time.monotonic() - self.last_flush.get(run_id, 0.0) > self.flush_interval:
+            self._flush_requested.set()
 
         return seq_id
 
-    async def _flush_run(self, run_id: str):
-        """Flush buffered chunks for a specific run to Redis."""
-        if not self.buffer[run_id]:
+    async def _flush_and_wait(self, run_id: str):
+        """Request a flush and wait for a flush round including everything buffered so far, raising if it failed for `run_id`."""
+        target = self._rounds_started + 1
+        self._flush_requested.set()
+        async with self._flushed:
+            await self._flushed.wait_for(lambda: self._rounds_finished >= target)
+        failed = self._run_errors.get(run_id)
+        if failed is not None and failed[0] >= target:
+            del self._run_errors[run_id]
+            raise failed[1]
+
+    async def _flush_loop(self):
+        """Background task flushing every run's buffer together, when requested or every `flush_interval`."""
+        try:
+            while self._running or self.buffer:
+                if self._running:
+                    try:
+                        await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval if self.buffer else None)
+                    except asyncio.TimeoutError:
+                        pass
+                self._flush_requested.clear()
+
+                try:
+                    await self._flush()
+                except Exception as e:
+                    logger.error(f"Error flushing SSE chunks: {e}")
+                    if not self._running:
+                        raise
+                    await asyncio.sleep(self.flush_interval)
+        except asyncio.CancelledError:
+            # the event loop is going away (asyncio.run cancels the tasks left over): flush what is still buffered,
+            # and drop the writer so it doesn't keep the loop alive
+            self._running = False
+            writers = _writers.get(asyncio.get_running_loop(), {})
+            if writers.get(self.redis) is self:
+                del writers[self.redis]
+            try:
+                await self._flush()
+            except Exception as e:
+                logger.error(f"Failed to flush remaining SSE chunks on shutdown: {e}")
+            raise
+
+    async def _flush(self):
+        """Flush buffered chunks of all runs to Redis in one pipeline."""
+        if not self.buffer:
             return
 
-        chunks = self.buffer[run_id]
-        self.buffer[run_id] = []
-        stream_key = f"sse:run:{run_id}"
+        buffers, self.buffer = self.buffer, {}
+        self._rounds_started += 1
+        flush_round = self._rounds_started
 
         try:
             client = await self.redis.get_client()
-
+            # (run_id, chunk index) of every queued command, -1 for the run's EXPIRE
+            commands: List[Tuple[str, int]] = []
             async with client.pipeline(transaction=False) as pipe:
-                for chunk in chunks:
-                    pipe.xadd(stream_key, chunk, maxlen=self.max_stream_length, approximate=True)
-
-                pipe.expire(stream_key, self.stream_ttl)
-
-                await pipe.execute()
-
-            self.last_flush[run_id] = time.time()
-
-            logger.debug(f"Flushed {len(chunks)} chunks to Redis stream {stream_key}, seq_ids {chunks[0]['seq_id']}-{chunks[-1]['seq_id']}")
+                for run_id, run_buffer in buffers.items():
+                    stream_key = sse_stream_key(run_id)
+                    last = len(run_buffer.chunks) - 1
+                    for i, (seq_id, data) in enumerate(run_buffer.chunks):
+                        args = ["XADD", stream_key, "MAXLEN", "~", self.max_stream_length, "*", "seq_id", seq_id, "data", data]
+                        if run_buffer.complete and i == last:
+                            args += ["complete", "true"]
+                        pipe.execute_command(*args)
+                        commands.append((run_id, i))
+                    pipe.expire(stream_key, self.stream_ttl)
+                    commands.append((run_id, -1))
+                results = await pipe.execute(raise_on_error=False)
+        except asyncio.CancelledError:
+            # flushed again once the flush loop handled the cancellation
+            for run_id, run_buffer in buffers.items():
+                self._rebuffer(run_id, run_buffer)
+            raise
+        except Exception as e:
+            logger.error(f"Failed to flush chunks for {len(buffers)} runs: {e}")
+            # Put chunks back in buffer (ahead of anything written since) to retry
+            for run_id, run_buffer in buffers.items():
+                self._requeue(run_id, run_buffer, flush_round, e)
+            await self._finish_round(flush_round)
+            raise
 
-            if chunks[-1].get("complete") == "true":
+        # the pipeline is not a transaction: every other command was applied, so only failed runs are retried,
+        # from their first failed chunk (readers skip the seq_ids they already got if a later one was applied)
+        failed: Dict[str, Tuple[int, Exception]] = {}
+        for (run_id, index), result in zip(commands, results):
+            if not isinstance(result, Exception):
+                continue
+            if index < 0:
+                logger.warning(f"Failed to refresh the TTL of the SSE stream of run {run_id}: {result}")
+            elif run_id not in failed:
+                failed[run_id] = (index, result)
+
+        now = time.monotonic()
+        for run_id, run_buffer in buffers.items():
+            if run_id in failed:
+                index, error = failed[run_id]
+                logger.error(f"Failed to flush {len(run_buffer.chunks) - index} chunks for run {run_id}: {error}")
+                rest = run_buffer.tail(index)
+                self.buffered_bytes -= run_buffer.size - rest.size
+                self._requeue(run_id, rest, flush_round, error, rejected=True)
+                continue
+            self.buffered_bytes -= run_buffer.size
+            self._run_attempts.pop(run_id, None)
+            self._run_errors.pop(run_id, None)
+            if run_buffer.complete:
                 self._cleanup_run(run_id)
+            else:
+                self.last_flush[run_id] = now
+        logger.debug(f"Flushed {sum(len(b.chunks) for b in buffers.values())} chunks of {len(buffers)} runs to Redis")
 
-        except Exception as e:
-            logger.error(f"Failed to flush chunks for run {run_id}: {e}")
-            # Put chunks back in buffer to retry
-            self.buffer[run_id] = chunks + self.buffer[run_id]
-            raise
+        await self._finish_round(flush_round)
 
-    async def _periodic_flush(self):
-        """Background task to periodically flush buffers."""
-        while self._running:
-            try:
-                await asyncio.sleep(self.flush_interval)
+    def _requeue(self, run_id: str, run_buffer: _RunBuffer, flush_round: int, error: Exception, rejected: bool = False):
+        """
+        Put the chunks of a failed flush back ahead of anything written since.
 
-                # Check each run for time-based flush
-                current_time = time.time()
-                runs_to_flush = [
-                    run_id
-                    for run_id, last_flush in self.last_flush.items()
-                    if (current_time - last_flush) > self.flush_interval and self.buffer[run_id]
-                ]
+        Chunks Redis rejected (rather than failing to reach it) are dropped after `MAX_RUN_FLUSH_ATTEMPTS` flushes,
+        so a run that can never be written doesn't stay buffered.
+        """
+        self._run_errors[run_id] = (flush_round, error)
+        attempts = self._run_attempts.get(run_id, 0)
+        if rejected:
+            attempts = self._run_attempts[run_id] = attempts + 1
+        if rejected and attempts >= MAX_RUN_FLUSH_ATTEMPTS:
+            logger.error(f"Dropping {len(run_buffer.chunks)} SSE chunks of run {run_id} after {attempts} failed flushes")
+            self.buffered_bytes -= run_buffer.size
+            if run_buffer.complete:
+                self._cleanup_run(run_id)
+            return
+        self._rebuffer(run_id, run_buffer)
 
-                for run_id in runs_to_flush:
-                    await self._flush_run(run_id)
+    def _rebuffer(self, run_id: str, run_buffer: _RunBuffer):
+        newer = self.buffer.get(run_id)
+        if newer is not None:
+            run_buffer.extend(newer)
+        self.buffer[run_id] = run_buffer
 
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Error in periodic flush: {e}")
+    async def _finish_round(self, flush_round: int):
+        self._rounds_finished = flush_round
+        async with self._flushed:
+            self._flushed.notify_all()
 
     def _cleanup_run(self, run_id: str):
         """Clean up tracking data for a completed run."""
-        self.buffer.pop(run_id, None)
         self.seq_counters.pop(run_id, None)
         self.last_flush.pop(run_id, None)
+        self._run_attempts.pop(run_id, None)
 
     async def mark_complete(self, run_id: str):
         """Mark a stream as complete and flush."""
@@ -185,6 +339,177 @@ class RedisSSEStreamWriter:
         await self.write_chunk(run_id, "data: [DONE]\n\n", is_complete=True)
 
 
+class _TailedStream:
+    """Recent entries of one stream, shared by every local reader of it."""
+
+    __slots__ = ("read_id", "floor_id", "floor", "ids", "entries", "complete", "subscribers", "changed")
+
+    def __init__(self, after_id: str):
+        # the tailer reads entries after this ID
+        self.read_id = after_id
+        # `entries` holds every entry after `floor`
+        self.floor_id = after_id
+        self.floor = _parse_id(after_id)
+        self.ids: List[Tuple[int, int]] = []
+        self.entries: List[StreamEntry] = []
+        self.complete = False
+        self.subscribers = 0
+        self.changed = asyncio.Event()
+
+    def append(self, entries: List[StreamEntry]) -> None:
+        for entry_id, fields in entries:
+            self.ids.append(_parse_id(entry_id))
+            self.entries.append((entry_id, fields))
+            if fields.get("complete") == "true":
+                self.complete = True
+        self.read_id = entries[-1][0]
+
+        if len(self.entries) > 2 * TAIL_BUFFER_SIZE:
+            drop = len(self.entries) - TAIL_BUFFER_SIZE
+            self.floor_id, self.floor = self.entries[drop - 1][0], self.ids[drop - 1]
+            del self.ids[:drop]
+            del self.entries[:drop]
+
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class RedisStreamTailer:
+    """
+    Follows every stream read by this process with a single blocking XREAD and fans new entries out to its readers.
+
+    Readers behind the buffered window of a stream (resuming from an old cursor, or too slow to keep up)
+    read the history with XRANGE until they catch up, so memory stays bounded by `TAIL_BUFFER_SIZE`
+    entries per stream no matter how many clients tail it.
+    """
+
+    def __init__(self, redis_client: AsyncRedisClient, batch_size: int = 500):
+        self.redis = redis_client
+        self.batch_size = batch_size
+        self._streams: Dict[str, _TailedStream] = {}
+        self._task: Optional[asyncio.Task] = None
+        # XADD to this stream interrupts the blocking read when a stream is added
+        self._wake_key = f"sse:tailer:{uuid.uuid4().hex}"
+
+    async def _wake(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._tail())
+            return
+        try:
+            client = await self.redis.get_client()
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.xadd(self._wake_key, {"wake": 1}, maxlen=1, approximate=False)
+                pipe.expire(self._wake_key, 60)
+                await pipe.execute()
+        except Exception as e:
+            # the stream is picked up by the next read anyway
+            logger.warning(f"Failed to wake SSE stream tailer: {e}")
+
+    async def _tail(self) -> None:
+        try:
+            while self._streams:
+                streams = {key: stream.read_id for key, stream in self._streams.items() if not stream.complete}
+                if not streams:
+                    return
+                streams[self._wake_key] = "$"
+                try:
+                    response = await self.redis.xread(streams, count=self.batch_size, block=XREAD_BLOCK_MS)
+                except Exception as e:
+                    logger.error(f"Error tailing SSE streams: {e}")
+                    await asyncio.sleep(XREAD_BLOCK_MS / 1000)
+                    continue
+
+                for key, entries in response.items() if isinstance(response, dict) else response or []:
+                    stream = self._streams.get(key)
+                    if stream is not None and entries:
+                        stream.append(entries)
+        finally:
+            self._task = None
+
+    async def subscribe(
+        self, stream_key: str, after_id: str = "0-0", count: int = 100, retry_interval: float = 0.1
+    ) -> AsyncIterator[StreamEntry]:
+        """
+        Entries of `stream_key` after `after_id`, waiting for new ones until the stream's complete entry.
+
+        Args:
+            stream_key: Stream to read
+            after_id: Stream entry ID to start after
+            count: Entries per XRANGE when catching up on history
+            retry_interval: Seconds to wait before retrying a failed history read
+        """
+        stream = self._streams.get(stream_key)
+        if stream is None:
+            stream = self._streams[stream_key] = _TailedStream(after_id)
+            await self._wake()
+        stream.subscribers += 1
+
+        last_id, last = after_id, _parse_id(after_id)
+        try:
+            while True:
+                if last < stream.floor:
+                    # behind the buffered window, read the history directly
+                    try:
+                        entries = await self.redis.xrange(stream_key, start=last_id, count=count)
+                    except Exception as e:
+                        logger.error(f"Error reading SSE stream {stream_key}: {e}")
+                        await asyncio.sleep(retry_interval)
+                        continue
+                    entries = [entry for entry in entries if entry[0] != last_id]
+                    if not entries:
+                        # the rest of the history was trimmed or expired
+                        last_id, last = stream.floor_id, stream.floor
+                        continue
+                    for entry in entries:
+                        yield entry
+                    last_id, last = entries[-1][0], _parse_id(entries[-1][0])
+                    continue
+
+                changed = stream.changed
+                index = bisect_right(stream.ids, last)
+                if index == len(stream.entries):
+                    if stream.complete:
+                        return
+                    await changed.wait()
+                    continue
+                entry = stream.entries[index]
+                last_id, last = entry[0], stream.ids[index]
+                yield entry
+        finally:
+            stream.subscribers -= 1
+            if stream.subscribers == 0 and self._streams.get(stream_key) is stream:
+                del self._streams[stream_key]
+
+
+# per event loop, by Redis client
+_writers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[AsyncRedisClient, RedisSSEStreamWriter]]" = weakref.WeakKeyDictionary()
+_tailers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[AsyncRedisClient, RedisStreamTailer]]" = weakref.WeakKeyDictionary()
+
+
+def get_sse_stream_writer(redis_client: AsyncRedisClient) -> RedisSSEStreamWriter:
+    """The writer shared by all background streams of this process (and event loop)."""
+    writers = _writers.setdefault(asyncio.get_running_loop(), {})
+    writer = writers.get(redis_client)
+    if writer is None:
+        writer = writers[redis_client] = RedisSSEStreamWriter(redis_client)
+    return writer
+
+
+def get_sse_stream_tailer(redis_client: AsyncRedisClient) -> RedisStreamTailer:
+    """The tailer shared by all stream readers of this process (and event loop)."""
+    tailers = _tailers.setdefault(asyncio.get_running_loop(), {})
+    tailer = tailers.get(redis_client)
+    if tailer is None:
+        tailer = tailers[redis_client] = RedisStreamTailer(redis_client)
+    return tailer
+
+
+async def stop_sse_stream_writers() -> None:
+    """Flush and stop the shared writers of the running event loop."""
+    for writer in _writers.pop(asyncio.get_running_loop(), {}).values():
+        await writer.stop()
+
+
 async def create_background_stream_processor(
     stream_generator,
     redis_client: AsyncRedisClient,
@@ -201,14 +526,10 @@ async def create_background_stream_processor(
         stream_generator: The async generator yielding SSE chunks
         redis_client: Redis client instance
         run_id: The run ID to store chunks under
-        writer: Optional pre-configured writer (creates new if not provided)
+        writer: Optional pre-configured writer (uses the process-wide shared writer if not provided)
     """
     if writer is None:
-        writer = RedisSSEStreamWriter(redis_client)
-        await writer.start()
-        should_stop_writer = True
-    else:
-        should_stop_writer = False
+        writer = get_sse_stream_writer(redis_client)
 
     try:
         async for chunk in stream_generator:
@@ -228,9 +549,6 @@ async def create_background_stream_processor(
         # error_chunk = {"error": {"message": str(e)}}
         error_chunk = {"error": str(e), "code": "INTERNAL_SERVER_ERROR"}
         await writer.write_chunk(run_id=run_id, data=f"event: error\ndata: {json.dumps(error_chunk)}\n\n", is_complete=True)
-    finally:
-        if should_stop_writer:
-            await writer.stop()
 
 
 async def redis_sse_stream_generator(
@@ -245,55 +563,41 @@ async def redis_sse_stream_generator(
 
     This generator reads chunks stored in Redis streams and yields them as SSE events.
     It supports cursor-based recovery by allowing you to start from a specific seq_id.
+    New chunks are received through the process-wide `RedisStreamTailer`, so readers don't poll.
 
     Args:
         redis_client: Redis client instance
         run_id: The run ID to read chunks for
         starting_after: Sequential ID (integer) to start reading from (default: None for beginning)
-        poll_interval: Seconds to wait between polls when no new data (default: 0.1)
-        batch_size: Number of entries to read per batch (default: 100)
+        poll_interval: Seconds to wait before retrying a failed read (default: 0.1)
+        batch_size: Number of entries to read per batch when catching up on history (default: 100)
 
     Yields:
         SSE-formatted chunks from the Redis stream
     """
-    stream_key = f"sse:run:{run_id}"
-    last_redis_id = "-"
+    stream_key = sse_stream_key(run_id)
     cursor_seq_id = starting_after or 0
 
     logger.debug(f"Starting redis_sse_stream_generator for run_id={run_id}, stream_key={stream_key}")
 
-    while True:
-        entries = await redis_client.xrange(stream_key, start=last_redis_id, count=batch_size)
+    tailer = get_sse_stream_tailer(redis_client)
+    async for _, fields in tailer.subscribe(stream_key, count=batch_size, retry_interval=poll_interval):
+        is_complete = fields.get("complete") == "true"
+        chunk_seq_id = int(fields.get("seq_id", 0))
+        if chunk_seq_id > cursor_seq_id:
+            data = fields.get("data", "")
+            if not data:
+                logger.debug(f"No data found for chunk {chunk_seq_id} in run {run_id}")
+            else:
+                if '"run_id":null' in data:
+                    data = data.replace('"run_id":null', f'"run_id":"{run_id}"')
+
+                if '"seq_id":null' in data:
+                    data = data.replace('"seq_id":null', f'"seq_id":{chunk_seq_id}')
+
+                yield data
+            # chunks of a retried flush can be in the stream twice
+            cursor_seq_id = chunk_seq_id
 
-        if entries:
-            yielded_any = False
-            for entry_id, fields in entries:
-                if entry_id == last_redis_id:
-                    continue
-
-                chunk_seq_id = int(fields.get("seq_id", 0))
-                if chunk_seq_id > cursor_seq_id:
-                    data = fields.get("data", "")
-                    if not data:
-                        logger.debug(f"No data found for chunk {chunk_seq_id} in run {run_id}")
-                        continue
-
-                    if '"run_id":null' in data:
-                        data = data.replace('"run_id":null', f'"run_id":"{run_id}"')
-
-                    if '"seq_id":null' in data:
-                        data = data.replace('"seq_id":null', f'"seq_id":{chunk_seq_id}')
-
-                    yield data
-                    yielded_any = True
-
-                    if fields.get("complete") == "true":
-                        return
-
-                last_redis_id = entry_id
-
-            if not yielded_any and len(entries) > 1:
-                continue
-
-        if not entries or (len(entries) == 1 and entries[0][0] == last_redis_id):
-            await asyncio.sleep(poll_interval)
+        if is_complete:
+            return
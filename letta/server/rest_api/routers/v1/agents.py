@@ -1,8 +1,9 @@
 import asyncio
 import json
+import re
 import traceback
 from datetime import datetime, timezone
-from typing import Annotated, Any, Dict, List, Literal, Optional, Union
+from typing import Annotated, Any, AsyncGenerator, Dict, List, Literal, Optional, Union
 
 from fastapi import APIRouter, Body, Depends, File, Form, Header, HTTPException, Query, Request, UploadFile, status
 from fastapi.responses import JSONResponse
@@ -23,7 +24,7 @@ from letta.orm.errors import NoResultFound
 from letta.otel.context import get_ctx_attributes
 from letta.otel.metric_registry import MetricRegistry
 from letta.schemas.agent import AgentState, AgentType, CreateAgent, UpdateAgent
-from letta.schemas.agent_file import AgentFileSchema
+from letta.schemas.agent_file import AgentFileSchema, AgentFileStreamHeader
 from letta.schemas.block import Block, BlockUpdate
 from letta.schemas.enums import JobType
 from letta.schemas.file import AgentFileAttachment, PaginatedAgentFiles
@@ -49,6 +50,7 @@ from letta.serialize_schemas.pydantic_agent_schema import AgentSchema
 from letta.server.rest_api.redis_stream_manager import create_background_stream_processor, redis_sse_stream_generator
 from letta.server.rest_api.utils import get_letta_server
 from letta.server.server import SyncServer
+from letta.services.per_agent_lock_manager import agent_message_lock, serialize_agent_stream
 from letta.services.summarizer.enums import SummarizationMode
 from letta.services.telemetry_manager import NoopTelemetryManager
 from letta.settings import settings
@@ -164,6 +166,10 @@ async def export_agent_serialized(
         False,
         description="If true, exports using the legacy single-agent format (v1). If false, exports using the new multi-entity format (v2).",
     ),
+    stream: bool = Query(
+        False,
+        description="If true, streams the multi-entity format as newline-delimited JSON (one record per entity and message) instead of a single JSON document. Use for agents with long message histories.",
+    ),
     # do not remove, used to autogeneration of spec
     # TODO: Think of a better way to export AgentFileSchema
     spec: AgentFileSchema | None = None,
@@ -175,6 +181,7 @@ async def export_agent_serialized(
     Supports two export formats:
     - Legacy format (use_legacy_format=true): Single agent with inline tools/blocks
     - New format (default): Multi-entity format with separate agents, tools, blocks, files, etc.
+      With stream=true it is written as newline-delimited JSON, paging all messages out of the database.
     """
     actor = server.user_manager.get_user_or_default(user_id=actor_id)
 
@@ -188,6 +195,11 @@ async def export_agent_serialized(
     else:
         # Use the new multi-entity export format
         try:
+            if stream:
+                records = server.agent_serialization_manager.export_stream(agent_ids=[agent_id], actor=actor)
+                # read the header before responding, so export errors still get their status code
+                header = await anext(records)
+                return StreamingResponse(_prepend_record(header, records), media_type="application/x-ndjson")
             agent_file_schema = await server.agent_serialization_manager.export(agent_ids=[agent_id], actor=actor)
             return agent_file_schema.model_dump()
         except AgentNotFoundForExportError:
@@ -200,6 +212,12 @@ async def export_agent_serialized(
             raise HTTPException(status_code=500, detail=f"Export processing failed: {str(e.original_error)}")
 
 
+async def _prepend_record(first: str, records: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
+    yield first
+    async for record in records:
+        yield record
+
+
 class ImportedAgentsResponse(BaseModel):
     """Response model for imported agents"""
 
@@ -305,6 +323,75 @@ async def import_agent(
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred while importing agents: {e!s}")
 
 
+# A streamed agent file starts with its header record, serialized with "type" as its first key
+_AGENT_FILE_STREAM_PREFIX = re.compile(rb'\s*\{\s*"type"\s*:\s*"' + re.escape(AgentFileStreamHeader.__record_type__.encode()) + rb'"')
+# Enough of the file to find the start of its first record
+AGENT_FILE_SNIFF_BYTES = 1024
+
+
+def _is_agent_file_stream(upload: UploadFile) -> bool:
+    """Whether the upload is a streamed agent file, judged from its first bytes (the file is rewound afterwards)."""
+    prefix = upload.file.read(AGENT_FILE_SNIFF_BYTES)
+    upload.file.seek(0)
+    return _AGENT_FILE_STREAM_PREFIX.match(prefix) is not None
+
+
+async def import_agent_stream(
+    upload: UploadFile,
+    server: "SyncServer",
+    actor: User,
+    append_copy_suffix: bool = True,
+    override_existing_tools: bool = True,
+    project_id: str | None = None,
+    env_vars: Optional[dict[str, Any]] = None,
+    override_embedding_handle: Optional[str] = None,
+) -> List[str]:
+    """
+    Import an agent file streamed as newline-delimited JSON, reading it one record at a time.
+    """
+
+    async def read_lines():
+        upload.file.seek(0)
+        for line in upload.file:
+            yield line
+
+    try:
+        if override_embedding_handle:
+            embedding_config_override = await server.get_cached_embedding_config_async(actor=actor, handle=override_embedding_handle)
+        else:
+            embedding_config_override = None
+
+        import_result = await server.agent_serialization_manager.import_file_stream(
+            lines=read_lines(),
+            actor=actor,
+            append_copy_suffix=append_copy_suffix,
+            override_existing_tools=override_existing_tools,
+            env_vars=env_vars,
+            override_embedding_config=embedding_config_override,
+            project_id=project_id,
+        )
+
+        if not import_result.success:
+            raise HTTPException(
+                status_code=500, detail=f"Import failed: {import_result.message}. Errors: {', '.join(import_result.errors)}"
+            )
+
+        return import_result.imported_agent_ids
+
+    except AgentFileImportError as e:
+        raise HTTPException(status_code=400, detail=f"Agent file import error: {str(e)}")
+
+    except IntegrityError as e:
+        raise HTTPException(status_code=409, detail=f"Database integrity error: {e!s}")
+
+    except OperationalError as e:
+        raise HTTPException(status_code=503, detail=f"Database connection error. Please try again later: {e!s}")
+
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred while importing agents: {e!s}")
+
+
 @router.post("/import", response_model=ImportedAgentsResponse, operation_id="import_agent_serialized")
 async def import_agent_serialized(
     file: UploadFile = File(...),
@@ -335,11 +422,15 @@ async def import_agent_serialized(
     """
     actor = server.user_manager.get_user_or_default(user_id=actor_id)
 
-    try:
-        serialized_data = file.file.read()
-        agent_json = json.loads(serialized_data)
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=400, detail="Corrupted agent file format.")
+    # a streamed agent file starts with its header record, anything else is a single JSON document
+    is_stream = _is_agent_file_stream(file)
+
+    if not is_stream:
+        try:
+            serialized_data = file.file.read()
+            agent_json = json.loads(serialized_data)
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="Corrupted agent file format.")
 
     # Parse env_vars_json if provided
     env_vars = None
@@ -355,6 +446,19 @@ async def import_agent_serialized(
     # Prioritize header over form data for override_embedding_handle
     final_override_embedding_handle = x_override_embedding_model or override_embedding_handle
 
+    if is_stream:
+        agent_ids = await import_agent_stream(
+            upload=file,
+            server=server,
+            actor=actor,
+            append_copy_suffix=append_copy_suffix,
+            override_existing_tools=override_existing_tools,
+            project_id=project_id,
+            env_vars=env_vars,
+            override_embedding_handle=final_override_embedding_handle,
+        )
+        return ImportedAgentsResponse(agent_ids=agent_ids)
+
     # Check if the JSON is AgentFileSchema or AgentSchema
     # TODO: This is kind of hacky, but should work as long as dont' change the schema
     if "agents" in agent_json and isinstance(agent_json.get("agents"), list):
@@ -1217,26 +1321,28 @@ async def send_message(
                     ),
                 )
 
-            result = await agent_loop.step(
-                request.messages,
-                max_steps=request.max_steps,
-                use_assistant_message=request.use_assistant_message,
-                request_start_timestamp_ns=request_start_timestamp_ns,
-                include_return_message_types=request.include_return_message_types,
-            )
+            async with agent_message_lock(agent_id):
+                result = await agent_loop.step(
+                    request.messages,
+                    max_steps=request.max_steps,
+                    use_assistant_message=request.use_assistant_message,
+                    request_start_timestamp_ns=request_start_timestamp_ns,
+                    include_return_message_types=request.include_return_message_types,
+                )
         else:
-            result = await server.send_message_to_agent(
-                agent_id=agent_id,
-                actor=actor,
-                input_messages=request.messages,
-                stream_steps=False,
-                stream_tokens=False,
-                # Support for AssistantMessage
-                use_assistant_message=request.use_assistant_message,
-                assistant_message_tool_name=request.assistant_message_tool_name,
-                assistant_message_tool_kwarg=request.assistant_message_tool_kwarg,
-                include_return_message_types=request.include_return_message_types,
-            )
+            async with agent_message_lock(agent_id):
+                result = await server.send_message_to_agent(
+                    agent_id=agent_id,
+                    actor=actor,
+                    input_messages=request.messages,
+                    stream_steps=False,
+                    stream_tokens=False,
+                    # Support for AssistantMessage
+                    use_assistant_message=request.use_assistant_message,
+                    assistant_message_tool_name=request.assistant_message_tool_name,
+                    assistant_message_tool_kwarg=request.assistant_message_tool_kwarg,
+                    include_return_message_types=request.include_return_message_types,
+                )
         job_status = result.stop_reason.stop_reason.run_status
         return result
     except Exception as e:
@@ -1384,19 +1490,22 @@ async def send_message_streaming(
                     include_return_message_types=request.include_return_message_types,
                 )
 
+            if request.background and settings.track_agent_run and isinstance(redis_client, NoopAsyncRedisClient):
+                raise HTTPException(
+                    status_code=503,
+                    detail=(
+                        "Background streaming requires Redis to be running. "
+                        "Please ensure Redis is properly configured. "
+                        f"LETTA_REDIS_HOST: {settings.redis_host}, LETTA_REDIS_PORT: {settings.redis_port}"
+                    ),
+                )
+
+            # taken here rather than inside the response body, so a busy agent is answered with a 409
+            raw_stream = await serialize_agent_stream(agent_id, raw_stream)
+
             from letta.server.rest_api.streaming_response import StreamingResponseWithStatusCode, add_keepalive_to_stream
 
             if request.background and settings.track_agent_run:
-                if isinstance(redis_client, NoopAsyncRedisClient):
-                    raise HTTPException(
-                        status_code=503,
-                        detail=(
-                            "Background streaming requires Redis to be running. "
-                            "Please ensure Redis is properly configured. "
-                            f"LETTA_REDIS_HOST: {settings.redis_host}, LETTA_REDIS_PORT: {settings.redis_port}"
-                        ),
-                    )
-
                 asyncio.create_task(
                     create_background_stream_processor(
                         stream_generator=raw_stream,
@@ -1560,28 +1669,30 @@ async def _process_message_background(
                     ),
                 )
 
-            result = await agent_loop.step(
-                messages,
-                max_steps=max_steps,
-                run_id=run_id,
-                use_assistant_message=use_assistant_message,
-                request_start_timestamp_ns=request_start_timestamp_ns,
-                include_return_message_types=include_return_message_types,
-            )
+            async with agent_message_lock(agent_id):
+                result = await agent_loop.step(
+                    messages,
+                    max_steps=max_steps,
+                    run_id=run_id,
+                    use_assistant_message=use_assistant_message,
+                    request_start_timestamp_ns=request_start_timestamp_ns,
+                    include_return_message_types=include_return_message_types,
+                )
         else:
-            result = await server.send_message_to_agent(
-                agent_id=agent_id,
-                actor=actor,
-                input_messages=messages,
-                stream_steps=False,
-                stream_tokens=False,
-                metadata={"job_id": run_id},
-                # Support for AssistantMessage
-                use_assistant_message=use_assistant_message,
-                assistant_message_tool_name=assistant_message_tool_name,
-                assistant_message_tool_kwarg=assistant_message_tool_kwarg,
-                include_return_message_types=include_return_message_types,
-            )
+            async with agent_message_lock(agent_id):
+                result = await server.send_message_to_agent(
+                    agent_id=agent_id,
+                    actor=actor,
+                    input_messages=messages,
+                    stream_steps=False,
+                    stream_tokens=False,
+                    metadata={"job_id": run_id},
+                    # Support for AssistantMessage
+                    use_assistant_message=use_assistant_message,
+                    assistant_message_tool_name=assistant_message_tool_name,
+                    assistant_message_tool_kwarg=assistant_message_tool_kwarg,
+                    include_return_message_types=include_return_message_types,
+                )
 
         job_update = JobUpdate(
             status=JobStatus.completed,
@@ -97,13 +97,14 @@ from letta.services.mcp.sse_client import MCP_CONFIG_TOPLEVEL_KEY, AsyncSSEMCPCl
 from letta.services.mcp.stdio_client import AsyncStdioMCPClient
 from letta.services.mcp_manager import MCPManager
 from letta.services.message_manager import MessageManager
+from letta.services.model_catalog import ModelCatalog
 from letta.services.organization_manager import OrganizationManager
 from letta.services.passage_manager import PassageManager
 from letta.services.provider_manager import ProviderManager
 from letta.services.sandbox_config_manager import SandboxConfigManager
 from letta.services.source_manager import SourceManager
-from letta.services.step_manager import StepManager
-from letta.services.telemetry_manager import TelemetryManager
+from letta.services.step_manager import StepManager, WriteBehindStepManager
+from letta.services.telemetry_manager import TelemetryManager, WriteBehindTelemetryManager
 from letta.services.tool_executor.tool_execution_manager import ToolExecutionManager
 from letta.services.tool_manager import ToolManager
 from letta.services.user_manager import UserManager
@@ -221,11 +222,11 @@ class SyncServer(Server):
         self.agent_manager = AgentManager()
         self.archive_manager = ArchiveManager()
         self.provider_manager = ProviderManager()
-        self.step_manager = StepManager()
+        self.step_manager = WriteBehindStepManager() if settings.step_write_behind else StepManager()
         self.identity_manager = IdentityManager()
         self.group_manager = GroupManager()
         self.batch_manager = LLMBatchManager()
-        self.telemetry_manager = TelemetryManager()
+        self.telemetry_manager = WriteBehindTelemetryManager() if settings.step_write_behind else TelemetryManager()
         self.file_agent_manager = FileAgentManager()
         self.file_manager = FileManager()
 
@@ -1512,20 +1513,8 @@ class SyncServer(Server):
             actor=actor,
         )
 
-        async def get_provider_models(provider: Provider) -> list[LLMConfig]:
-            try:
-                async with asyncio.timeout(constants.GET_PROVIDERS_TIMEOUT_SECONDS):
-                    return await provider.list_llm_models_async()
-            except asyncio.TimeoutError:
-                warnings.warn(f"Timeout while listing LLM models for provider {provider}")
-                return []
-            except Exception as e:
-                traceback.print_exc()
-                warnings.warn(f"Error while listing LLM models for provider {provider}: {e}")
-                return []
-
         # Execute all provider model listing tasks concurrently
-        provider_results = await asyncio.gather(*[get_provider_models(provider) for provider in providers])
+        provider_results = await asyncio.gather(*[ModelCatalog().list_llm_models(provider) for provider in providers])
 
         # Flatten the results
         llm_models = []
@@ -1564,20 +1553,8 @@ class SyncServer(Server):
         # Get all eligible providers first
         providers = await self.get_enabled_providers_async(actor=actor)
 
-        # Fetch embedding models from each provider concurrently
-        async def get_provider_embedding_models(provider):
-            try:
-                # All providers now have list_embedding_models_async
-                return await provider.list_embedding_models_async()
-            except Exception as e:
-                import traceback
-
-                traceback.print_exc()
-                warnings.warn(f"An error occurred while listing embedding models for provider {provider}: {e}")
-                return []
-
         # Execute all provider model listing tasks concurrently
-        provider_results = await asyncio.gather(*[get_provider_embedding_models(provider) for provider in providers])
+        provider_results = await asyncio.gather(*[ModelCatalog().list_embedding_models(provider) for provider in providers])
 
         # Flatten the results
         embedding_models = []
@@ -1712,7 +1689,7 @@ class SyncServer(Server):
             provider_name, model_name = handle.split("/", 1)
             provider = await self.get_provider_from_name_async(provider_name, actor)
 
-            all_llm_configs = await provider.list_llm_models_async()
+            all_llm_configs = await ModelCatalog().list_llm_models(provider, raise_errors=True)
             llm_configs = [config for config in all_llm_configs if config.handle == handle]
             if not llm_configs:
                 llm_configs = [config for config in all_llm_configs if config.model == model_name]
@@ -1790,7 +1767,7 @@ class SyncServer(Server):
             provider_name, model_name = handle.split("/", 1)
             provider = await self.get_provider_from_name_async(provider_name, actor)
 
-            all_embedding_configs = await provider.list_embedding_models_async()
+            all_embedding_configs = await ModelCatalog().list_embedding_models(provider, raise_errors=True)
             embedding_configs = [config for config in all_embedding_configs if config.handle == handle]
             if not embedding_configs:
                 raise ValueError(f"Embedding model {model_name} is not supported by {provider_name}")
@@ -0,0 +1,91 @@
+"""In-process cache of resolved actors, consulted before every REST request's user lookup.
+
+Routers start with `get_actor_or_default_async`, which used to read the user from the database (or from Redis
+when it is configured) on every request. Actors are now kept in two tiers:
+    - an in-process LRU bounded by `actor_cache_max_size`, entries expiring after `actor_cache_ttl_seconds`
+    - Redis when configured (the `async_redis_cache` of `UserManager`), shared by every worker
+
+`UserManager` and `OrganizationManager` drop the actors they update or delete from both tiers. Other workers only
+drop their in-process copy when it expires, so `actor_cache_ttl_seconds` bounds how long they may serve it.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Tuple
+
+from letta.constants import REDIS_DEFAULT_CACHE_PREFIX
+from letta.helpers.singleton import singleton
+from letta.log import get_logger
+from letta.schemas.user import User as PydanticUser
+from letta.settings import settings
+
+logger = get_logger(__name__)
+
+
+def actor_cache_key(actor_id: str) -> str:
+    """Key of an actor in the Redis tier (without the cache prefix)."""
+    return f"actor_id:{actor_id}"
+
+
+@singleton
+class ActorCache:
+    """Two-tier (in-process LRU, then Redis) cache of actors keyed by user id."""
+
+    def __init__(self):
+        # actor id -> (expires at, actor)
+        self._entries: "OrderedDict[str, Tuple[float, PydanticUser]]" = OrderedDict()
+        # bumped by every invalidation, so a load that raced one isn't cached
+        self._generation = 0
+
+    async def get_or_load(self, actor_id: str, load: Callable[[str], Awaitable[PydanticUser]]) -> PydanticUser:
+        """
+        The actor with `actor_id`, from the cache or from `load` (whose errors, e.g. `NoResultFound`, propagate).
+
+        Args:
+            actor_id: Id of the user
+            load: Reads the actor from Redis or the database
+        """
+        if not settings.actor_cache_enabled:
+            return await load(actor_id)
+
+        entry = self._entries.get(actor_id)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(actor_id)
+                return entry[1].model_copy()
+            del self._entries[actor_id]
+
+        generation = self._generation
+        actor = await load(actor_id)
+        if generation == self._generation:
+            self._entries[actor_id] = (time.monotonic() + settings.actor_cache_ttl_seconds, actor.model_copy())
+            while len(self._entries) > settings.actor_cache_max_size:
+                self._entries.popitem(last=False)
+        return actor
+
+    def invalidate_local(self, *actor_ids: str) -> None:
+        """Drop actors from the in-process tier only."""
+        self._generation += 1
+        for actor_id in actor_ids:
+            self._entries.pop(actor_id, None)
+
+    def invalidate_organization_local(self, organization_id: str) -> None:
+        """Drop the actors of an organization from the in-process tier only."""
+        self.invalidate_local(*[actor_id for actor_id, (_, actor) in self._entries.items() if actor.organization_id == organization_id])
+
+    async def invalidate(self, *actor_ids: str) -> bool:
+        """Drop actors from both tiers, True if Redis had any of them."""
+        self.invalidate_local(*actor_ids)
+        if not actor_ids:
+            return False
+        try:
+            from letta.data_sources.redis_client import get_redis_client
+
+            redis_client = await get_redis_client()
+            return (await redis_client.delete(*[f"{REDIS_DEFAULT_CACHE_PREFIX}:{actor_cache_key(actor_id)}" for actor_id in actor_ids])) > 0
+        except Exception as e:
+            logger.error(f"Failed to invalidate cache: {e}")
+            return False
+
+    def clear(self) -> None:
+        self.invalidate_local(*list(self._entries))
@@ -0,0 +1,118 @@
+"""Bounded fan-out of one message to many agents.
+
+`send_message_to_agents_matching_tags` used to step every matching agent at the same time, so a broadcast to
+thousands of agents opened as many DB sessions and LLM requests at once. `AgentFanOut` steps them with:
+    - at most `multi_agent_concurrent_sends` agents stepping at a time
+    - at most `multi_agent_concurrent_sends_per_provider` of them on the same LLM provider, with agents of every
+      provider started side by side (a busy provider doesn't hold up agents of another one)
+    - a provider that answers with a rate limit error paused for an exponential, jittered backoff, and the agent
+      retried up to `multi_agent_send_message_max_retries` times. Only `LLMRateLimitError` is retried, so `step` must
+      raise it only when nothing of the step was persisted yet (an agent loop persists the messages of every inner step,
+      retrying after the first one would send the message again), see `LettaMultiAgentToolExecutor._step_agent`
+
+Results are yielded as agents finish (`stream`), not when the slowest one does.
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from random import uniform
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from letta.errors import LLMRateLimitError
+from letta.log import get_logger
+from letta.schemas.agent import AgentState
+from letta.settings import settings
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+def provider_key(agent_state: AgentState) -> str:
+    """Agents with the same key share a provider's rate limits."""
+    llm_config = agent_state.llm_config
+    return llm_config.provider_name or llm_config.model_endpoint_type or "unknown"
+
+
+@dataclass
+class FanOutResult(Generic[T]):
+    """Outcome of one agent: `result` if its step succeeded, `error` otherwise."""
+
+    index: int
+    agent_state: AgentState
+    result: Optional[T] = None
+    error: Optional[Exception] = None
+
+
+class AgentFanOut(Generic[T]):
+    """Steps agents with `step`, see the module docstring."""
+
+    def __init__(
+        self,
+        step: Callable[[AgentState], Awaitable[T]],
+        max_concurrency: Optional[int] = None,
+        max_concurrency_per_provider: Optional[int] = None,
+        max_retries: Optional[int] = None,
+    ):
+        self.step = step
+        self.max_concurrency = max_concurrency or settings.multi_agent_concurrent_sends
+        self.max_concurrency_per_provider = max_concurrency_per_provider or settings.multi_agent_concurrent_sends_per_provider
+        self.max_retries = max_retries if max_retries is not None else settings.multi_agent_send_message_max_retries
+
+    async def run(self, agents: List[AgentState]) -> List[FanOutResult[T]]:
+        """Step all agents, results in the order of `agents`."""
+        results: List[Optional[FanOutResult[T]]] = [None] * len(agents)
+        async for result in self.stream(agents):
+            results[result.index] = result
+        return results
+
+    async def stream(self, agents: List[AgentState]) -> AsyncIterator[FanOutResult[T]]:
+        """Step all agents, yielding each result as soon as the agent is done."""
+        if not agents:
+            return
+
+        # provider -> (index, agent, attempt) still to step
+        queues: Dict[str, Deque[Tuple[int, AgentState, int]]] = {}
+        for index, agent_state in enumerate(agents):
+            queues.setdefault(provider_key(agent_state), deque()).append((index, agent_state, 1))
+
+        limit = asyncio.Semaphore(self.max_concurrency)
+        paused_until: Dict[str, float] = {}
+        done: asyncio.Queue = asyncio.Queue()
+
+        async def worker(provider: str, queue: Deque[Tuple[int, AgentState, int]]) -> None:
+            while queue:
+                index, agent_state, attempt = queue.popleft()
+                delay = paused_until.get(provider, 0.0) - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                try:
+                    async with limit:
+                        result = await self.step(agent_state)
+                except LLMRateLimitError as e:
+                    if attempt < self.max_retries:
+                        backoff = uniform(0.5, 2) * (2**attempt)
+                        logger.warning(f"Provider {provider} rate limited agent {agent_state.id}, pausing it for {backoff:.1f}s")
+                        paused_until[provider] = max(paused_until.get(provider, 0.0), time.monotonic() + backoff)
+                        queue.append((index, agent_state, attempt + 1))
+                        continue
+                    done.put_nowait(FanOutResult(index=index, agent_state=agent_state, error=e))
+                except Exception as e:
+                    done.put_nowait(FanOutResult(index=index, agent_state=agent_state, error=e))
+                else:
+                    done.put_nowait(FanOutResult(index=index, agent_state=agent_state, result=result))
+
+        workers = [
+            asyncio.create_task(worker(provider, queue))
+            for provider, queue in queues.items()
+            for _ in range(min(self.max_concurrency_per_provider, len(queue)))
+        ]
+        try:
+            for _ in range(len(agents)):
+                yield await done.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
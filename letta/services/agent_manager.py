@@ -1,11 +1,14 @@
 import asyncio
+import logging
+from collections import OrderedDict
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Literal, Optional, Set, Tuple
 from zoneinfo import ZoneInfo
 
 import sqlalchemy as sa
-from sqlalchemy import delete, func, insert, literal, or_, select, tuple_
+from sqlalchemy import delete, func, insert, literal, or_, select, tuple_, update
 from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import noload
 
 from letta.constants import (
     BASE_MEMORY_TOOLS,
@@ -32,17 +35,28 @@ from letta.orm import (
     Agent as AgentModel,
     AgentsTags,
     ArchivalPassage,
+    Archive as ArchiveModel,
+    ArchivesAgents,
     Block as BlockModel,
     BlocksAgents,
     Group as GroupModel,
     GroupsAgents,
     IdentitiesAgents,
+    PassageTag,
     Source as SourceModel,
     SourcePassage,
     SourcesAgents,
     Tool as ToolModel,
     ToolsAgents,
 )
+from letta.orm.agent_context_message import (
+    append_context_message_ids,
+    append_context_message_ids_async,
+    in_context_messages_query,
+    set_context_message_ids,
+    set_context_message_ids_async,
+)
+from letta.orm.agent_counters import get_agent_message_count_async, get_agent_passage_count_async
 from letta.orm.errors import NoResultFound
 from letta.orm.sandbox_config import AgentEnvironmentVariable, AgentEnvironmentVariable as AgentEnvironmentVariableModel
 from letta.orm.sqlalchemy_base import AccessType
@@ -74,6 +88,7 @@ from letta.serialize_schemas.marshmallow_message import SerializedMessageSchema
 from letta.serialize_schemas.marshmallow_tool import SerializedToolSchema
 from letta.serialize_schemas.pydantic_agent_schema import AgentSchema
 from letta.server.db import db_registry
+from letta.services.agent_state_cache import AgentStateCache, invalidates_agent_state
 from letta.services.archive_manager import ArchiveManager
 from letta.services.block_manager import BlockManager
 from letta.services.context_window_calculator.context_window_calculator import ContextWindowCalculator
@@ -100,18 +115,23 @@ from letta.services.helpers.agent_manager_helper import (
     initialize_message_sequence,
     initialize_message_sequence_async,
     package_initial_message_sequence,
+    search_agent_passages_sqlite_async,
     validate_agent_exists_async,
 )
 from letta.services.identity_manager import IdentityManager
 from letta.services.message_manager import MessageManager
 from letta.services.passage_manager import PassageManager
 from letta.services.source_manager import SourceManager
+from letta.services.step_context import StepContext
 from letta.services.tool_manager import ToolManager
 from letta.settings import DatabaseChoice, settings
 from letta.utils import calculate_file_defaults_based_on_context_window, enforce_types, united_diff
 
 logger = get_logger(__name__)
 
+# Number of system messages whose embedded memory string is remembered to skip rebuild checks
+SYSTEM_MESSAGE_MEMORY_CACHE_SIZE = 1024
+
 
 class AgentManager:
     """Manager class to handle business logic related to Agents."""
@@ -125,6 +145,32 @@ class AgentManager:
         self.identity_manager = IdentityManager()
         self.file_agent_manager = FileAgentManager()
         self.archive_manager = ArchiveManager()
+        # (system message id, updated_at) -> compiled memory string the message is known to contain
+        self._system_message_memory: "OrderedDict[Tuple[str, datetime], str]" = OrderedDict()
+
+    def _system_message_contains_memory(self, system_message: PydanticMessage, system_content: str, memory_str: str) -> bool:
+        """Whether the system message already embeds `memory_str`.
+
+        Compiled memory strings are memoized, so an unchanged memory is the same string object as last
+        step and the comparison against the recorded value is O(1); only unseen messages are scanned.
+        """
+        key = (system_message.id, system_message.updated_at) if system_message.updated_at else None
+        known_memory = self._system_message_memory.get(key) if key else None
+        if known_memory is not None:
+            return known_memory is memory_str or known_memory == memory_str
+        if memory_str not in system_content:
+            return False
+        self._remember_system_message_memory(system_message, memory_str)
+        return True
+
+    def _remember_system_message_memory(self, system_message: PydanticMessage, memory_str: str) -> None:
+        if not system_message.updated_at:
+            return
+        key = (system_message.id, system_message.updated_at)
+        self._system_message_memory[key] = memory_str
+        self._system_message_memory.move_to_end(key)
+        while len(self._system_message_memory) > SYSTEM_MESSAGE_MEMORY_CACHE_SIZE:
+            self._system_message_memory.popitem(last=False)
 
     @staticmethod
     def _should_exclude_model_from_base_tool_rules(model: str) -> bool:
@@ -712,8 +758,7 @@ class AgentManager:
                         supplied_initial_message_sequence=agent_create.initial_message_sequence,
                     )
                     result.message_ids = [msg.id for msg in init_messages]
-                    new_agent.message_ids = [msg.id for msg in init_messages]
-                    await new_agent.update_async(session, no_refresh=True)
+                    await append_context_message_ids_async(session, aid, result.message_ids)
                 else:
                     init_messages = []
 
@@ -798,6 +843,7 @@ class AgentManager:
         init_messages = await self._generate_initial_message_sequence_async(actor, agent_state, initial_message_sequence)
         return await self.append_to_in_context_messages_async(init_messages, agent_id=agent_state.id, actor=actor)
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     def update_agent(
@@ -822,7 +868,6 @@ class AgentManager:
                 "system": agent_update.system,
                 "llm_config": agent_update.llm_config,
                 "embedding_config": agent_update.embedding_config,
-                "message_ids": agent_update.message_ids,
                 "tool_rules": agent_update.tool_rules,
                 "description": agent_update.description,
                 "project_id": agent_update.project_id,
@@ -846,6 +891,10 @@ class AgentManager:
 
             aid = agent.id
 
+            if agent_update.message_ids is not None:
+                set_context_message_ids(session, aid, agent_update.message_ids)
+                session.expire(agent, ["context_messages"])
+
             if agent_update.tool_ids is not None:
                 self._replace_pivot_rows(
                     session,
@@ -921,6 +970,7 @@ class AgentManager:
 
             return agent.to_pydantic()
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def update_agent_async(
@@ -949,7 +999,6 @@ class AgentManager:
                 "system": agent_update.system,
                 "llm_config": agent_update.llm_config,
                 "embedding_config": agent_update.embedding_config,
-                "message_ids": agent_update.message_ids,
                 "tool_rules": agent_update.tool_rules,
                 "description": agent_update.description,
                 "project_id": agent_update.project_id,
@@ -973,6 +1022,10 @@ class AgentManager:
 
             aid = agent.id
 
+            if agent_update.message_ids is not None:
+                await set_context_message_ids_async(session, aid, agent_update.message_ids)
+                session.expire(agent, ["context_messages"])
+
             if agent_update.tool_ids is not None:
                 await self._replace_pivot_rows_async(
                     session,
@@ -1058,17 +1111,22 @@ class AgentManager:
             query = select(AgentModel)
             query = AgentModel.apply_access_predicate(query, actor, ["read"], AccessType.ORGANIZATION)
             query = query.where(AgentModel.id == agent_id)
-            query = _apply_relationship_filters(query, include_relationships=[])
+            query = _apply_relationship_filters(query, include_relationships=[]).options(noload(AgentModel.context_messages))
 
             result = await session.execute(query)
             agent = result.scalar_one_or_none()
 
             agent.updated_at = datetime.now(timezone.utc)
             agent.last_updated_by_id = actor.id
-            agent.message_ids = message_ids
+            await set_context_message_ids_async(session, agent_id, message_ids)
 
-            await agent.update_async(db_session=session, actor=actor, no_commit=True, no_refresh=True)
-            await session.commit()
+            try:
+                await agent.update_async(db_session=session, actor=actor, no_commit=True, no_refresh=True)
+                await session.commit()
+            except Exception:
+                AgentStateCache().invalidate(agent_id)
+                raise
+            AgentStateCache().set_message_ids(agent_id, message_ids, updated_at=agent.updated_at, last_updated_by_id=actor.id)
 
     # TODO: Make this general and think about how to roll this into sqlalchemybase
     @trace_method
@@ -1325,6 +1383,13 @@ class AgentManager:
         include_relationships: Optional[List[str]] = None,
     ) -> PydanticAgentState:
         """Fetch an agent by its ID."""
+        cache = AgentStateCache()
+        if cache.enabled:
+            cached_state = cache.get(agent_id, actor.organization_id, include_relationships)
+            if cached_state is not None:
+                return cached_state
+            cache_token = cache.read_token()
+
         async with db_registry.async_session() as session:
             try:
                 query = select(AgentModel)
@@ -1338,11 +1403,99 @@ class AgentManager:
                 if agent is None:
                     raise NoResultFound(f"Agent with ID {agent_id} not found")
 
-                return await agent.to_pydantic_async(include_relationships=include_relationships)
+                agent_state = await agent.to_pydantic_async(include_relationships=include_relationships)
+                if cache.enabled:
+                    cache.put(agent_state, actor.organization_id, include_relationships, cache_token)
+                return agent_state
             except Exception as e:
                 logger.error(f"Error fetching agent {agent_id}: {str(e)}")
                 raise
 
+    @enforce_types
+    @trace_method
+    async def load_step_context_async(
+        self,
+        agent_id: str,
+        actor: PydanticUser,
+        include_relationships: Optional[List[str]] = None,
+    ) -> StepContext:
+        """
+        Load what the agent loop needs before its first step in one session: the agent state, its in-context
+        messages, the message and archival memory counts, and the archive tags.
+
+        The counts and the agent's archive come back from a single combined query, so a step starts with a
+        handful of round trips instead of one session per lookup.
+        """
+        cache = AgentStateCache()
+        agent_state = cache.get(agent_id, actor.organization_id, include_relationships) if cache.enabled else None
+
+        async with db_registry.async_session() as session:
+            if agent_state is None:
+                cache_token = cache.read_token() if cache.enabled else None
+                query = select(AgentModel)
+                query = AgentModel.apply_access_predicate(query, actor, ["read"], AccessType.ORGANIZATION)
+                query = query.where(AgentModel.id == agent_id)
+                query = _apply_relationship_filters(query, include_relationships)
+                agent = (await session.execute(query)).scalar_one_or_none()
+                if agent is None:
+                    raise NoResultFound(f"Agent with ID {agent_id} not found")
+                agent_state = await agent.to_pydantic_async(include_relationships=include_relationships)
+                if cache.enabled:
+                    cache.put(agent_state, actor.organization_id, include_relationships, cache_token)
+
+            # with autoclear on, only the system message stays in context
+            limit = 1 if agent_state.message_buffer_autoclear else None
+            messages = (await session.execute(in_context_messages_query(agent_id, actor.organization_id, limit=limit))).scalars().all()
+            in_context_messages = [message.to_pydantic() for message in messages]
+
+            counters = (
+                await session.execute(
+                    select(AgentModel.message_count, ArchiveModel.id, ArchiveModel.passage_count)
+                    .select_from(AgentModel)
+                    .outerjoin(ArchivesAgents, ArchivesAgents.agent_id == AgentModel.id)
+                    .outerjoin(ArchiveModel, ArchiveModel.id == ArchivesAgents.archive_id)
+                    .where(AgentModel.id == agent_id)
+                )
+            ).all()
+            archive_ids = [archive_id for _, archive_id, _ in counters if archive_id is not None]
+            # TODO: Remove this check once we support multiple archives per agent
+            if len(archive_ids) > 1:
+                raise ValueError(f"Agent {agent_id} has multiple archives, which is not yet supported")
+
+            # unknown counters are initialized from a real count (see letta.orm.agent_counters)
+            num_messages = counters[0][0] if counters else None
+            if num_messages is None:
+                num_messages = await get_agent_message_count_async(session, agent_id)
+            if any(passage_count is None for _, archive_id, passage_count in counters if archive_id is not None):
+                num_archival_memories = await get_agent_passage_count_async(session, agent_id)
+            else:
+                num_archival_memories = sum(passage_count for _, archive_id, passage_count in counters if archive_id is not None)
+
+            archive_tags = None
+            if archive_ids:
+                archive_tags = list(
+                    (
+                        await session.execute(
+                            select(PassageTag.tag)
+                            .distinct()
+                            .where(
+                                PassageTag.archive_id == archive_ids[0],
+                                PassageTag.organization_id == actor.organization_id,
+                                PassageTag.is_deleted == False,
+                            )
+                            .order_by(PassageTag.tag)
+                        )
+                    ).scalars()
+                )
+
+        return StepContext(
+            agent_state=agent_state,
+            in_context_messages=in_context_messages,
+            num_messages=num_messages,
+            num_archival_memories=num_archival_memories,
+            archive_tags=archive_tags,
+        )
+
     @enforce_types
     @trace_method
     async def get_agents_by_ids_async(
@@ -1383,8 +1536,6 @@ class AgentManager:
     @trace_method
     async def get_agent_archive_ids_async(self, agent_id: str, actor: PydanticUser) -> List[str]:
         """Get all archive IDs associated with an agent."""
-        from letta.orm import ArchivesAgents
-
         async with db_registry.async_session() as session:
             # Direct query to archives_agents table for performance
             query = select(ArchivesAgents.archive_id).where(ArchivesAgents.agent_id == agent_id)
@@ -1392,6 +1543,7 @@ class AgentManager:
             archive_ids = [row[0] for row in result.fetchall()]
             return archive_ids
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     def delete_agent(self, agent_id: str, actor: PydanticUser) -> None:
@@ -1440,6 +1592,7 @@ class AgentManager:
             else:
                 logger.debug(f"Agent with ID {agent_id} successfully hard deleted")
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def delete_agent_async(self, agent_id: str, actor: PydanticUser) -> None:
@@ -1653,16 +1806,15 @@ class AgentManager:
     # ======================================================================================================================
     # In Context Messages Management
     # ======================================================================================================================
-    # TODO: There are several assumptions here that are not explicitly checked
-    # TODO: 1) These message ids are valid
-    # TODO: 2) These messages are ordered from oldest to newest
-    # TODO: This can be fixed by having an actual relationship in the ORM for message_ids
-    # TODO: This can also be made more efficient, instead of getting, setting, we can do it all in one db session for one query.
     @enforce_types
     @trace_method
     def get_in_context_messages(self, agent_id: str, actor: PydanticUser) -> List[PydanticMessage]:
-        message_ids = self.get_agent_by_id(agent_id=agent_id, actor=actor).message_ids
-        return self.message_manager.get_messages_by_ids(message_ids=message_ids, actor=actor)
+        return self.message_manager.get_in_context_messages(agent_id=agent_id, actor=actor)
+
+    @enforce_types
+    @trace_method
+    async def get_in_context_messages_async(self, agent_id: str, actor: PydanticUser) -> List[PydanticMessage]:
+        return await self.message_manager.get_in_context_messages_async(agent_id=agent_id, actor=actor)
 
     @enforce_types
     @trace_method
@@ -1679,6 +1831,7 @@ class AgentManager:
     # TODO: This is duplicated below
     # TODO: This is legacy code and should be cleaned up
     # TODO: A lot of the memory "compilation" should be offset to a separate class
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     def rebuild_system_prompt(self, agent_id: str, actor: PydanticUser, force=False, update_timestamp=True) -> PydanticAgentState:
@@ -1770,8 +1923,8 @@ class AgentManager:
 
         Updates to the memory header should *not* trigger a rebuild, since that will simply flood recall storage with excess messages
         """
-        num_messages = await self.message_manager.size_async(actor=actor, agent_id=agent_id)
-        num_archival_memories = await self.passage_manager.agent_passage_size_async(actor=actor, agent_id=agent_id)
+        num_messages = await self.message_manager.agent_message_count_async(agent_id=agent_id, actor=actor)
+        num_archival_memories = await self.passage_manager.agent_passage_count_async(agent_id=agent_id, actor=actor)
         agent_state = await self.get_agent_by_id_async(agent_id=agent_id, include_relationships=["memory", "sources", "tools"], actor=actor)
 
         tool_rules_solver = ToolRulesSolver(agent_state.tool_rules)
@@ -1791,7 +1944,7 @@ class AgentManager:
             tool_usage_rules=tool_rules_solver.compile_tool_rule_prompts(),
             max_files_open=agent_state.max_files_open,
         )
-        if curr_memory_str in curr_system_message_openai["content"] and not force:
+        if not force and self._system_message_contains_memory(curr_system_message, curr_system_message_openai["content"], curr_memory_str):
             # NOTE: could this cause issues if a block is removed? (substring match would still work)
             logger.debug(
                 f"Memory hasn't changed for agent id={agent_id} and actor=({actor.id}, {actor.name}), skipping system prompt rebuild"
@@ -1817,9 +1970,10 @@ class AgentManager:
             archival_memory_size=num_archival_memories,
         )
 
-        diff = united_diff(curr_system_message_openai["content"], new_system_message_str)
-        if len(diff) > 0:  # there was a diff
-            logger.debug(f"Rebuilding system with new memory...\nDiff:\n{diff}")
+        if new_system_message_str != curr_system_message_openai["content"]:  # there was a diff
+            if logger.isEnabledFor(logging.DEBUG):
+                diff = united_diff(curr_system_message_openai["content"], new_system_message_str)
+                logger.debug(f"Rebuilding system with new memory...\nDiff:\n{diff}")
 
             # Swap the system message out (only if there is a diff)
             temp_message = PydanticMessage.dict_to_message(
@@ -1830,26 +1984,31 @@ class AgentManager:
             temp_message.id = curr_system_message.id
 
             if not dry_run:
-                await self.message_manager.update_message_by_id_async(
+                updated_message = await self.message_manager.update_message_by_id_async(
                     message_id=curr_system_message.id,
                     message_update=MessageUpdate(**temp_message.model_dump()),
                     actor=actor,
                 )
+                self._remember_system_message_memory(updated_message, curr_memory_str)
+                AgentStateCache().invalidate(agent_id)
             else:
                 curr_system_message = temp_message
 
         return agent_state, curr_system_message, num_messages, num_archival_memories
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     def set_in_context_messages(self, agent_id: str, message_ids: List[str], actor: PydanticUser) -> PydanticAgentState:
         return self.update_agent(agent_id=agent_id, agent_update=UpdateAgent(message_ids=message_ids), actor=actor)
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def set_in_context_messages_async(self, agent_id: str, message_ids: List[str], actor: PydanticUser) -> PydanticAgentState:
         return await self.update_agent_async(agent_id=agent_id, agent_update=UpdateAgent(message_ids=message_ids), actor=actor)
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     def trim_older_in_context_messages(self, num: int, agent_id: str, actor: PydanticUser) -> PydanticAgentState:
@@ -1857,6 +2016,7 @@ class AgentManager:
         new_messages = [message_ids[0]] + message_ids[num:]  # 0 is system message
         return self.set_in_context_messages(agent_id=agent_id, message_ids=new_messages, actor=actor)
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     def trim_all_in_context_messages_except_system(self, agent_id: str, actor: PydanticUser) -> PydanticAgentState:
@@ -1865,6 +2025,7 @@ class AgentManager:
         new_messages = [message_ids[0]]  # 0 is system message
         return self.set_in_context_messages(agent_id=agent_id, message_ids=new_messages, actor=actor)
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     def prepend_to_in_context_messages(self, messages: List[PydanticMessage], agent_id: str, actor: PydanticUser) -> PydanticAgentState:
@@ -1873,14 +2034,21 @@ class AgentManager:
         message_ids = [message_ids[0]] + [m.id for m in new_messages] + message_ids[1:]
         return self.set_in_context_messages(agent_id=agent_id, message_ids=message_ids, actor=actor)
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     def append_to_in_context_messages(self, messages: List[PydanticMessage], agent_id: str, actor: PydanticUser) -> PydanticAgentState:
         messages = self.message_manager.create_many_messages(messages, actor=actor)
-        message_ids = self.get_agent_by_id(agent_id=agent_id, actor=actor).message_ids or []
-        message_ids += [m.id for m in messages]
-        return self.set_in_context_messages(agent_id=agent_id, message_ids=message_ids, actor=actor)
+        with db_registry.session() as session, session.begin():
+            agent = AgentModel.read(db_session=session, identifier=agent_id, actor=actor)
+            agent.updated_at = datetime.now(timezone.utc)
+            agent.last_updated_by_id = actor.id
+            append_context_message_ids(session, agent_id, [m.id for m in messages])
+            session.flush()
+            session.refresh(agent)
+            return agent.to_pydantic()
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def append_to_in_context_messages_async(
@@ -1888,10 +2056,20 @@ class AgentManager:
     ) -> PydanticAgentState:
         agent = await self.get_agent_by_id_async(agent_id=agent_id, actor=actor)
         messages = await self.message_manager.create_many_messages_async(messages, actor=actor, embedding_config=agent.embedding_config)
-        message_ids = agent.message_ids or []
-        message_ids += [m.id for m in messages]
-        return await self.set_in_context_messages_async(agent_id=agent_id, message_ids=message_ids, actor=actor)
+        new_message_ids = [m.id for m in messages]
+        updated_at = datetime.now(timezone.utc)
+        async with db_registry.async_session() as session:
+            await append_context_message_ids_async(session, agent_id, new_message_ids)
+            await session.execute(
+                update(AgentModel).where(AgentModel.id == agent_id).values(updated_at=updated_at, _last_updated_by_id=actor.id)
+            )
+            await session.commit()
+        agent.message_ids = (agent.message_ids or []) + new_message_ids
+        agent.updated_at = updated_at
+        agent.last_updated_by_id = actor.id
+        return agent
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def reset_messages_async(
@@ -1934,7 +2112,8 @@ class AgentManager:
             await self.message_manager.delete_all_messages_for_agent_async(agent_id=agent_id, actor=actor, exclude_ids=[system_message_id])
 
             # Update agent to only keep the system message
-            agent.message_ids = [system_message_id]
+            await set_context_message_ids_async(session, agent_id, [system_message_id])
+            session.expire(agent, ["context_messages"])
             await agent.update_async(db_session=session, actor=actor)
             agent_state = await agent.to_pydantic_async(include_relationships=["sources"])
 
@@ -1956,6 +2135,7 @@ class AgentManager:
         else:
             return agent_state
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def update_memory_if_changed_async(self, agent_id: str, new_memory: Memory, actor: PydanticUser) -> PydanticAgentState:
@@ -2064,6 +2244,7 @@ class AgentManager:
     # ======================================================================================================================
     # Source Management
     # ======================================================================================================================
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def attach_source_async(self, agent_id: str, source_id: str, actor: PydanticUser) -> PydanticAgentState:
@@ -2098,6 +2279,7 @@ class AgentManager:
             agent = await agent.update_async(session, actor=actor)
             return await agent.to_pydantic_async()
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     def append_system_message(self, agent_id: str, content: str, actor: PydanticUser):
@@ -2133,6 +2315,7 @@ class AgentManager:
         # update agent in-context message IDs
         self.append_to_in_context_messages(messages=[message], agent_id=agent_id, actor=actor)
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def append_system_message_async(self, agent_id: str, content: str, actor: PydanticUser):
@@ -2193,6 +2376,7 @@ class AgentManager:
 
             return [source.to_pydantic() for source in sources]
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def detach_source_async(self, agent_id: str, source_id: str, actor: PydanticUser) -> PydanticAgentState:
@@ -2263,6 +2447,7 @@ class AgentManager:
                     return block.to_pydantic()
             raise NoResultFound(f"No block with label '{block_label}' found for agent '{agent_id}'")
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def modify_block_by_label_async(
@@ -2291,6 +2476,7 @@ class AgentManager:
             await block.update_async(session, actor=actor)
             return block.to_pydantic()
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     def update_block_with_label(
@@ -2316,6 +2502,7 @@ class AgentManager:
             agent.update(session, actor=actor)
             return agent.to_pydantic()
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     def attach_block(self, agent_id: str, block_id: str, actor: PydanticUser) -> PydanticAgentState:
@@ -2343,9 +2530,12 @@ class AgentManager:
                             # Agent might not exist anymore, skip
                             continue
             session.commit()
+            if agent.multi_agent_group:
+                AgentStateCache().invalidate(*(agent.multi_agent_group.agent_ids or []))
 
             return agent.to_pydantic()
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def attach_block_async(self, agent_id: str, block_id: str, actor: PydanticUser) -> PydanticAgentState:
@@ -2371,6 +2561,7 @@ class AgentManager:
                                 other_agent.core_memory.append(block)
                                 # await other_agent.update_async(session, actor=actor, no_commit=True)
                                 await other_agent.update_async(session, actor=actor)
+                                AgentStateCache().invalidate(other_agent_id)
                         except NoResultFound:
                             # Agent might not exist anymore, skip
                             continue
@@ -2382,6 +2573,7 @@ class AgentManager:
 
             return await agent.to_pydantic_async()
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     def detach_block(
@@ -2403,6 +2595,7 @@ class AgentManager:
             agent.update(session, actor=actor)
             return agent.to_pydantic()
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def detach_block_async(
@@ -2424,6 +2617,7 @@ class AgentManager:
             await agent.update_async(session, actor=actor)
             return await agent.to_pydantic_async()
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     def detach_block_with_label(
@@ -2680,7 +2874,7 @@ class AgentManager:
                         provider_type=embedding_config.embedding_endpoint_type,
                         actor=actor,
                     )
-                    embeddings = await embedding_client.request_embeddings([query_text], embedding_config)
+                    embeddings = await embedding_client.request_embeddings_cached([query_text], embedding_config)
                     query_embedding = embeddings[0]
 
                     # Query Turbopuffer - use hybrid search when text is available
@@ -2705,6 +2899,24 @@ class AgentManager:
 
         # Fall back to SQL-based search for non-vector queries or NATIVE archives
         async with db_registry.async_session() as session:
+            if embed_query and settings.database_engine is DatabaseChoice.SQLITE:
+                # SQLite has no vector operator; rank with the in-process embedding matrix instead of the per-row UDF
+                passages = await search_agent_passages_sqlite_async(
+                    session=session,
+                    actor=actor,
+                    agent_id=agent_id,
+                    query_text=query_text,
+                    embedding_config=embedding_config,
+                    limit=limit,
+                    start_date=start_date,
+                    end_date=end_date,
+                    before=before,
+                    after=after,
+                    tags=tags,
+                    tag_match_mode=tag_match_mode,
+                )
+                return [p.to_pydantic() for p in passages]
+
             main_query = await build_agent_passage_query(
                 actor=actor,
                 agent_id=agent_id,
@@ -2716,6 +2928,8 @@ class AgentManager:
                 embed_query=embed_query,
                 ascending=ascending,
                 embedding_config=embedding_config,
+                tags=tags,
+                tag_match_mode=tag_match_mode,
             )
 
             # Add limit
@@ -2729,30 +2943,7 @@ class AgentManager:
             passages = result.scalars().all()
 
             # Convert to Pydantic models
-            pydantic_passages = [p.to_pydantic() for p in passages]
-
-            # TODO: Integrate tag filtering directly into the SQL query for better performance.
-            # Currently using post-filtering which is less efficient but simpler to implement.
-            # Future optimization: Add JOIN with passage_tags table and WHERE clause for tag filtering.
-            if tags:
-                filtered_passages = []
-                for passage in pydantic_passages:
-                    if passage.tags:
-                        passage_tags = set(passage.tags)
-                        query_tags = set(tags)
-
-                        if tag_match_mode == TagMatchMode.ALL:
-                            # ALL mode: passage must have all query tags
-                            if query_tags.issubset(passage_tags):
-                                filtered_passages.append(passage)
-                        else:
-                            # ANY mode (default): passage must have at least one query tag
-                            if query_tags.intersection(passage_tags):
-                                filtered_passages.append(passage)
-
-                return filtered_passages
-
-            return pydantic_passages
+            return [p.to_pydantic() for p in passages]
 
     @enforce_types
     @trace_method
@@ -2956,6 +3147,7 @@ class AgentManager:
     # ======================================================================================================================
     # Tool Management
     # ======================================================================================================================
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     def attach_tool(self, agent_id: str, tool_id: str, actor: PydanticUser) -> PydanticAgentState:
@@ -2992,6 +3184,7 @@ class AgentManager:
             agent.update(session, actor=actor)
             return agent.to_pydantic()
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def attach_tool_async(self, agent_id: str, tool_id: str, actor: PydanticUser) -> None:
@@ -3060,6 +3253,7 @@ class AgentManager:
 
             await session.commit()
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def bulk_attach_tools_async(self, agent_id: str, tool_ids: List[str], actor: PydanticUser) -> None:
@@ -3132,6 +3326,7 @@ class AgentManager:
 
             await session.commit()
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def attach_missing_files_tools_async(self, agent_state: PydanticAgentState, actor: PydanticUser) -> PydanticAgentState:
@@ -3193,6 +3388,7 @@ class AgentManager:
 
         return PydanticAgentState(**agent_state_dict)
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def detach_all_files_tools_async(self, agent_state: PydanticAgentState, actor: PydanticUser) -> PydanticAgentState:
@@ -3225,6 +3421,7 @@ class AgentManager:
 
         return PydanticAgentState(**agent_state_dict)
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     def detach_tool(self, agent_id: str, tool_id: str, actor: PydanticUser) -> PydanticAgentState:
@@ -3259,6 +3456,7 @@ class AgentManager:
             agent.update(session, actor=actor)
             return agent.to_pydantic()
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def detach_tool_async(self, agent_id: str, tool_id: str, actor: PydanticUser) -> None:
@@ -3288,6 +3486,7 @@ class AgentManager:
 
             await session.commit()
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def bulk_detach_tools_async(self, agent_id: str, tool_ids: List[str], actor: PydanticUser) -> None:
@@ -3324,6 +3523,7 @@ class AgentManager:
 
             await session.commit()
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def modify_approvals_async(self, agent_id: str, tool_name: str, requires_approval: bool, actor: PydanticUser) -> None:
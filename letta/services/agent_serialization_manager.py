@@ -1,7 +1,11 @@
 import asyncio
+import copy
+import json
 import uuid
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncGenerator, AsyncIterable, Dict, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
 
 from letta.constants import MCP_TOOL_TAG_NAME_PREFIX
 from letta.errors import (
@@ -13,9 +17,11 @@ from letta.errors import (
 )
 from letta.helpers.pinecone_utils import should_use_pinecone
 from letta.log import get_logger
+from letta.orm.errors import NoResultFound
 from letta.schemas.agent import AgentState, CreateAgent
 from letta.schemas.agent_file import (
     AgentFileSchema,
+    AgentFileStreamHeader,
     AgentSchema,
     BlockSchema,
     FileAgentSchema,
@@ -56,6 +62,12 @@ from letta.utils import get_latest_alembic_revision
 
 logger = get_logger(__name__)
 
+# record types of a streamed agent file, in the order they are written, and the schemas of their data
+STREAM_RECORD_SCHEMAS = {
+    schema.__id_prefix__: schema
+    for schema in (MCPServerSchema, ToolSchema, BlockSchema, SourceSchema, FileSchema, GroupSchema, AgentSchema, MessageSchema)
+}
+
 
 class AgentSerializationManager:
     """
@@ -114,6 +126,13 @@ class AgentSerializationManager:
         for key in self._id_counters:
             self._id_counters[key] = 0
 
+    def _fork(self) -> "AgentSerializationManager":
+        """Copy with its own ID mapping state, for operations that interleave with others (streamed exports)"""
+        fork = copy.copy(self)
+        fork._db_to_file_ids = {}
+        fork._id_counters = dict.fromkeys(self._id_counters, 0)
+        return fork
+
     def _generate_file_id(self, entity_type: str) -> str:
         """Generate a Stripe-style ID for the given entity type"""
         counter = self._id_counters[entity_type]
@@ -187,7 +206,9 @@ class AgentSerializationManager:
 
         return sources, files
 
-    async def _convert_agent_state_to_schema(self, agent_state: AgentState, actor: User, files_agents_cache: dict = None) -> AgentSchema:
+    async def _convert_agent_state_to_schema(
+        self, agent_state: AgentState, actor: User, files_agents_cache: dict = None, include_messages: bool = True
+    ) -> AgentSchema:
         """Convert AgentState to AgentSchema with ID remapping"""
 
         agent_file_id = self._map_db_to_file_id(agent_state.id, AgentSchema.__id_prefix__)
@@ -204,7 +225,7 @@ class AgentSerializationManager:
                 per_file_view_window_char_limit=agent_state.per_file_view_window_char_limit,
             )
         agent_schema = await AgentSchema.from_agent_state(
-            agent_state, message_manager=self.message_manager, files_agents=files_agents, actor=actor
+            agent_state, message_manager=self.message_manager, files_agents=files_agents, actor=actor, include_messages=include_messages
         )
         agent_schema.id = agent_file_id
 
@@ -215,8 +236,9 @@ class AgentSerializationManager:
                 message.agent_id = agent_file_id
 
         if agent_schema.in_context_message_ids:
+            # without messages, the in-context ones are mapped first and keep their ID when they are streamed
             agent_schema.in_context_message_ids = [
-                self._map_db_to_file_id(message_id, MessageSchema.__id_prefix__, allow_new=False)
+                self._map_db_to_file_id(message_id, MessageSchema.__id_prefix__, allow_new=not include_messages)
                 for message_id in agent_schema.in_context_message_ids
             ]
 
@@ -336,12 +358,13 @@ class AgentSerializationManager:
             logger.error(f"Failed to convert group {group.id}: {e}")
             raise
 
-    async def export(self, agent_ids: List[str], actor: User) -> AgentFileSchema:
+    async def export(self, agent_ids: List[str], actor: User, include_messages: bool = True) -> AgentFileSchema:
         """
         Export agents and their related entities to AgentFileSchema format.
 
         Args:
             agent_ids: List of agent UUIDs to export
+            include_messages: If False, agents are exported without their messages (see `export_stream`)
 
         Returns:
             AgentFileSchema with all related entities
@@ -396,7 +419,9 @@ class AgentSerializationManager:
 
             # Convert to schemas with ID remapping (reusing cached file-agent data)
             agent_schemas = [
-                await self._convert_agent_state_to_schema(agent_state, actor=actor, files_agents_cache=files_agents_cache)
+                await self._convert_agent_state_to_schema(
+                    agent_state, actor=actor, files_agents_cache=files_agents_cache, include_messages=include_messages
+                )
                 for agent_state in agent_states
             ]
             tool_schemas = [self._convert_tool_to_schema(tool) for tool in tool_set]
@@ -425,6 +450,71 @@ class AgentSerializationManager:
             logger.error(f"Failed to export agent file: {e}")
             raise AgentExportProcessingError(str(e), e) from e
 
+    async def export_stream(self, agent_ids: List[str], actor: User, message_batch_size: int = 1000) -> AsyncGenerator[str, None]:
+        """
+        Export agents and their related entities as a streamed agent file (see `AgentFileStreamHeader`).
+
+        Everything but the messages is collected like in `export`. Messages are then paged out of the database
+        `message_batch_size` at a time (keyset on sequence_id) and yielded as they are read, so memory does not grow
+        with the agents' history. Only the IDs of in-context messages are mapped ahead; all other messages are numbered
+        as they go.
+
+        Args:
+            agent_ids: List of agent UUIDs to export
+            message_batch_size: Number of messages read per query
+
+        Yields:
+            Newline-terminated JSON records
+
+        Raises:
+            AgentFileExportError: If export fails
+        """
+        # a stream outlives the request that started it, so it can't share the ID mapping state
+        exporter = self._fork()
+        agent_file = await exporter.export(agent_ids, actor, include_messages=False)
+
+        try:
+            header = AgentFileStreamHeader(metadata=agent_file.metadata, created_at=agent_file.created_at)
+            yield self._stream_record(AgentFileStreamHeader.__record_type__, header)
+            for record_type, entities in (
+                (MCPServerSchema.__id_prefix__, agent_file.mcp_servers),
+                (ToolSchema.__id_prefix__, agent_file.tools),
+                (BlockSchema.__id_prefix__, agent_file.blocks),
+                (SourceSchema.__id_prefix__, agent_file.sources),
+                (FileSchema.__id_prefix__, agent_file.files),
+                (GroupSchema.__id_prefix__, agent_file.groups),
+                (AgentSchema.__id_prefix__, agent_file.agents),
+            ):
+                for entity in entities:
+                    yield self._stream_record(record_type, entity)
+
+            file_to_db_ids = {file_id: db_id for db_id, file_id in exporter._db_to_file_ids.items()}
+            for agent_schema in agent_file.agents:
+                agent_db_id = file_to_db_ids[agent_schema.id]
+                after = None
+                while True:
+                    messages = await self.message_manager.list_messages_for_agent_async(
+                        agent_id=agent_db_id, actor=actor, after=after, limit=message_batch_size, ascending=True
+                    )
+                    for message in messages:
+                        message_schema = MessageSchema.from_message(message)
+                        message_schema.id = exporter._db_to_file_ids.get(message.id) or exporter._generate_file_id(
+                            MessageSchema.__id_prefix__
+                        )
+                        message_schema.agent_id = agent_schema.id
+                        yield self._stream_record(MessageSchema.__id_prefix__, message_schema)
+                    if len(messages) < message_batch_size:
+                        break
+                    after = messages[-1].id
+
+        except Exception as e:
+            logger.error(f"Failed to export agent file: {e}")
+            raise AgentExportProcessingError(str(e), e) from e
+
+    @staticmethod
+    def _stream_record(record_type: str, data: BaseModel) -> str:
+        return json.dumps({"type": record_type, "data": data.model_dump(mode="json")}) + "\n"
+
     async def import_file(
         self,
         schema: AgentFileSchema,
@@ -754,6 +844,184 @@ class AgentSerializationManager:
             logger.exception(f"Failed to import agent file: {e}")
             raise AgentFileImportError(f"Import failed: {e}") from e
 
+    async def import_file_stream(
+        self,
+        lines: AsyncIterable[Union[str, bytes]],
+        actor: User,
+        append_copy_suffix: bool = False,
+        override_existing_tools: bool = True,
+        env_vars: Optional[Dict[str, Any]] = None,
+        override_embedding_config: Optional[EmbeddingConfig] = None,
+        project_id: Optional[str] = None,
+        message_batch_size: int = 1000,
+    ) -> ImportResult:
+        """
+        Import a streamed agent file (see `export_stream`) into the database.
+
+        The records before the first message are imported like `import_file` does, with the agents' in-context
+        messages held back. Messages are then bulk-inserted `message_batch_size` at a time as they are read, and the
+        in-context messages are set once all of them are in. Only the IDs of in-context messages are kept along the
+        way, so memory does not grow with the number of messages. If the file turns out to be invalid (or truncated)
+        after the agents were created, they are deleted again, along with the messages imported so far.
+
+        Args:
+            lines: The lines of the streamed agent file
+
+        Returns:
+            ImportResult with success status and details
+
+        Raises:
+            AgentFileImportError: If import fails
+        """
+        result: Optional[ImportResult] = None
+        try:
+            records = self._read_stream_records(lines)
+            header_record = await anext(records, None)
+            if header_record is None or header_record[0] != AgentFileStreamHeader.__record_type__:
+                raise AgentFileImportError("Streamed agent file does not start with a header record")
+            header = AgentFileStreamHeader.model_validate(header_record[1])
+
+            entities: Dict[str, List[BaseModel]] = {record_type: [] for record_type in STREAM_RECORD_SCHEMAS}
+            # agent file ID -> in-context message file IDs, and in-context message file ID -> database ID
+            in_context_message_ids: Dict[str, List[str]] = {}
+            in_context_db_ids: Dict[str, str] = {}
+            batch: List[Message] = []
+            message_count = 0
+
+            async for record_type, data in records:
+                if record_type != MessageSchema.__id_prefix__:
+                    if result is not None:
+                        raise AgentFileImportError(f"Unexpected {record_type} record after the first message record")
+                    entities[record_type].append(STREAM_RECORD_SCHEMAS[record_type].model_validate(data))
+                    continue
+
+                if result is None:
+                    result = await self._import_stream_entities(
+                        header,
+                        entities,
+                        in_context_message_ids,
+                        actor,
+                        append_copy_suffix=append_copy_suffix,
+                        override_existing_tools=override_existing_tools,
+                        env_vars=env_vars,
+                        override_embedding_config=override_embedding_config,
+                        project_id=project_id,
+                    )
+
+                message_schema = MessageSchema.model_validate(data)
+                if not self._is_valid_file_id(message_schema.id, MessageSchema.__id_prefix__):
+                    raise AgentFileImportError(f"Invalid message ID format: {message_schema.id}")
+                agent_db_id = result.id_mappings.get(message_schema.agent_id)
+                if agent_db_id is None:
+                    raise AgentFileImportError(f"Message {message_schema.id} references non-existent agent {message_schema.agent_id}")
+
+                # a batch is written per agent
+                if batch and (batch[-1].agent_id != agent_db_id or len(batch) >= message_batch_size):
+                    message_count += len(await self.message_manager.create_many_messages_async(pydantic_msgs=batch, actor=actor))
+                    batch = []
+
+                message_data = message_schema.model_dump(exclude={"id", "type"})
+                message_data["agent_id"] = agent_db_id
+                message = Message(**message_data)
+                batch.append(message)
+                if message_schema.id in in_context_message_ids.get(message_schema.agent_id, ()):
+                    in_context_db_ids[message_schema.id] = message.id
+
+            if result is None:
+                # agent file without messages
+                result = await self._import_stream_entities(
+                    header,
+                    entities,
+                    in_context_message_ids,
+                    actor,
+                    append_copy_suffix=append_copy_suffix,
+                    override_existing_tools=override_existing_tools,
+                    env_vars=env_vars,
+                    override_embedding_config=override_embedding_config,
+                    project_id=project_id,
+                )
+            if batch:
+                message_count += len(await self.message_manager.create_many_messages_async(pydantic_msgs=batch, actor=actor))
+
+            for agent_file_id, message_file_ids in in_context_message_ids.items():
+                missing_ids = [message_id for message_id in message_file_ids if message_id not in in_context_db_ids]
+                if missing_ids:
+                    raise AgentFileImportError(f"Agent {agent_file_id} references non-existent in-context messages {missing_ids}")
+                await self.agent_manager.update_message_ids_async(
+                    agent_id=result.id_mappings[agent_file_id],
+                    message_ids=[in_context_db_ids[message_id] for message_id in message_file_ids],
+                    actor=actor,
+                )
+
+            result.imported_count += message_count
+            result.message = f"{result.message} Imported {message_count} messages."
+            return result
+
+        except Exception as e:
+            if result is not None:
+                await self._delete_imported_agents(result.imported_agent_ids, actor)
+            if isinstance(e, AgentFileImportError):
+                raise
+            logger.exception(f"Failed to import streamed agent file: {e}")
+            raise AgentFileImportError(f"Import failed: {e}") from e
+
+    async def _delete_imported_agents(self, agent_ids: List[str], actor: User) -> None:
+        """Delete the agents (and with them their messages) of a streamed import that failed part way"""
+        for agent_id in agent_ids:
+            try:
+                await self.agent_manager.delete_agent_async(agent_id=agent_id, actor=actor)
+            except NoResultFound:
+                # deleted along with the main agent of its sleeptime group
+                pass
+            except Exception as e:
+                logger.error(f"Failed to delete agent {agent_id} of a failed streamed import: {e}")
+
+    async def _import_stream_entities(
+        self,
+        header: AgentFileStreamHeader,
+        entities: Dict[str, List[BaseModel]],
+        in_context_message_ids: Dict[str, List[str]],
+        actor: User,
+        **import_kwargs,
+    ) -> ImportResult:
+        """Import everything but the messages of a streamed agent file, holding back the agents' in-context messages"""
+        for agent_schema in entities[AgentSchema.__id_prefix__]:
+            in_context_message_ids[agent_schema.id] = agent_schema.in_context_message_ids
+            agent_schema.in_context_message_ids = []
+
+        schema = AgentFileSchema(
+            agents=entities[AgentSchema.__id_prefix__],
+            groups=entities[GroupSchema.__id_prefix__],
+            blocks=entities[BlockSchema.__id_prefix__],
+            files=entities[FileSchema.__id_prefix__],
+            sources=entities[SourceSchema.__id_prefix__],
+            tools=entities[ToolSchema.__id_prefix__],
+            mcp_servers=entities[MCPServerSchema.__id_prefix__],
+            metadata=header.metadata,
+            created_at=header.created_at,
+        )
+        return await self.import_file(schema, actor, **import_kwargs)
+
+    @staticmethod
+    async def _read_stream_records(lines: AsyncIterable[Union[str, bytes]]) -> AsyncGenerator[Tuple[str, Dict[str, Any]], None]:
+        """Parse the lines of a streamed agent file into (record type, data) pairs"""
+        async for line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                record_type, data = record["type"], record["data"]
+            except (json.JSONDecodeError, KeyError, TypeError) as e:
+                raise AgentFileImportError(f"Invalid agent file record: {e}") from e
+            if record_type != AgentFileStreamHeader.__record_type__ and record_type not in STREAM_RECORD_SCHEMAS:
+                raise AgentFileImportError(f"Unknown agent file record type: {record_type}")
+            yield record_type, data
+
+    @staticmethod
+    def _is_valid_file_id(file_id: str, expected_prefix: str) -> bool:
+        prefix, _, suffix = file_id.rpartition("-")
+        return prefix == expected_prefix and suffix.isdigit()
+
     def _validate_id_format(self, schema: AgentFileSchema) -> List[str]:
         """Validate that all IDs follow the expected format"""
         errors = []
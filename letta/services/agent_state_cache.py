@@ -0,0 +1,391 @@
+"""In-process cache of hydrated AgentState objects for the agent step hot path.
+
+Every step re-reads the same agent (with memory, tools and sources) and rebuilds the full
+AgentState via `to_pydantic_async`. This cache keeps recently built states keyed by
+(agent_id, organization_id, relationship set) in a bounded LRU with a TTL.
+
+Consistency is kept by write-through invalidation:
+    - AgentManager methods that change an agent are wrapped with `invalidates_agent_state`, except
+      for the per-step write of the in-context message ids, which is applied to the cached states
+      (`set_message_ids`) so stepping doesn't evict the agent it is about to read again
+    - managers for shared rows (blocks, tools, sources, files) call `invalidate_dependencies`
+      with the changed ids, which resolve to the cached agents that reference them
+    - reads take a generation token before querying the database and invalidations record the
+      generation they happened at, so a read that raced with a write is never stored
+
+With Redis configured, invalidations are also published on a pub/sub channel so other
+workers drop their copies (see `listen_for_agent_state_invalidations`).
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from letta.helpers.singleton import singleton
+from letta.log import get_logger
+from letta.otel.metric_registry import MetricRegistry
+from letta.settings import settings
+
+if TYPE_CHECKING:
+    from letta.schemas.agent import AgentState
+
+logger = get_logger(__name__)
+
+AGENT_STATE_INVALIDATION_CHANNEL = "letta:agent_state_cache:invalidate"
+
+CacheKey = Tuple[str, str, Optional[FrozenSet[str]]]
+
+
+def _dependency_ids(agent_state: "AgentState") -> Set[str]:
+    """Ids of shared rows whose modification changes this agent's hydrated state."""
+    ids: Set[str] = set()
+    if agent_state.memory:
+        ids.update(block.id for block in agent_state.memory.blocks if block.id)
+        for file_block in agent_state.memory.file_blocks:
+            ids.update(i for i in (file_block.id, file_block.file_id, file_block.source_id) if i)
+    ids.update(tool.id for tool in agent_state.tools or [] if tool.id)
+    ids.update(source.id for source in agent_state.sources or [] if source.id)
+    ids.update(agent_state.identity_ids or [])
+    if agent_state.multi_agent_group:
+        ids.add(agent_state.multi_agent_group.id)
+    return ids
+
+
+@singleton
+class AgentStateCache:
+    """Bounded LRU of AgentState objects with write-through invalidation."""
+
+    def __init__(self, max_size: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size or settings.agent_state_cache_max_size
+        self.ttl_seconds = ttl_seconds or settings.agent_state_cache_ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, AgentState]]" = OrderedDict()
+        # generation at which each agent or dependency id was last invalidated; bounded, with evictions
+        # folded into a watermark that rejects every older read
+        self._generation = 0
+        self._invalidated_at: "OrderedDict[str, int]" = OrderedDict()
+        self._evicted_generation = 0
+        self._keys_by_agent: Dict[str, Set[CacheKey]] = {}
+        self._agents_by_dependency: Dict[str, Set[str]] = {}
+        self._origin = f"{os.getpid()}:{id(self)}"
+
+    @property
+    def enabled(self) -> bool:
+        return settings.agent_state_cache_enabled
+
+    @staticmethod
+    def make_key(agent_id: str, organization_id: str, include_relationships: Optional[Iterable[str]]) -> CacheKey:
+        return agent_id, organization_id, None if include_relationships is None else frozenset(include_relationships)
+
+    def read_token(self) -> int:
+        """Generation token to capture before reading from the database and pass to `put`."""
+        return self._generation
+
+    def _is_stale(self, ids: Iterable[str], token: int) -> bool:
+        return token < self._evicted_generation or any(self._invalidated_at.get(i, 0) > token for i in ids)
+
+    def get(self, agent_id: str, organization_id: str, include_relationships: Optional[Iterable[str]] = None) -> Optional["AgentState"]:
+        """Return a private copy of the cached state, or None on a miss."""
+        key = self.make_key(agent_id, organization_id, include_relationships)
+        entry = self._entries.get(key)
+        if entry is None:
+            MetricRegistry().agent_state_cache_miss_counter.add(1)
+            return None
+
+        expires_at, agent_state = entry
+        if expires_at < time.monotonic():
+            self._drop_key(key)
+            MetricRegistry().agent_state_cache_miss_counter.add(1)
+            return None
+
+        self._entries.move_to_end(key)
+        MetricRegistry().agent_state_cache_hit_counter.add(1)
+        # callers mutate agent state in place, so never hand out the cached instance
+        return agent_state.model_copy(deep=True)
+
+    def put(
+        self,
+        agent_state: "AgentState",
+        organization_id: str,
+        include_relationships: Optional[Iterable[str]],
+        token: int,
+    ) -> None:
+        """Store a state read after `token` was taken; dropped if the agent was invalidated in the meantime."""
+        dependency_ids = _dependency_ids(agent_state)
+        if self._is_stale([agent_state.id, *dependency_ids], token):
+            return
+
+        key = self.make_key(agent_state.id, organization_id, include_relationships)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, agent_state.model_copy(deep=True))
+        self._entries.move_to_end(key)
+        self._keys_by_agent.setdefault(agent_state.id, set()).add(key)
+        for dependency_id in dependency_ids:
+            self._agents_by_dependency.setdefault(dependency_id, set()).add(agent_state.id)
+
+        while len(self._entries) > self.max_size:
+            oldest_key = next(iter(self._entries))
+            self._drop_key(oldest_key)
+
+    def _drop_key(self, key: CacheKey) -> None:
+        self._entries.pop(key, None)
+        keys = self._keys_by_agent.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_agent[key[0]]
+
+    def _record_write(self, ids: Iterable[str]) -> None:
+        """Record a write to agent or dependency ids, so reads of them already in flight are not stored."""
+        self._generation += 1
+        for i in ids:
+            self._invalidated_at[i] = self._generation
+            self._invalidated_at.move_to_end(i)
+        while len(self._invalidated_at) > 10 * self.max_size:
+            _, generation = self._invalidated_at.popitem(last=False)
+            self._evicted_generation = max(self._evicted_generation, generation)
+
+    def _invalidate_local(self, ids: Iterable[str]) -> None:
+        """Record an invalidation of agent or dependency ids and drop the cached states of the agents."""
+        ids = list(ids)
+        self._record_write(ids)
+        for i in ids:
+            for key in self._keys_by_agent.pop(i, set()):
+                self._entries.pop(key, None)
+
+    def set_message_ids(
+        self,
+        agent_id: str,
+        message_ids: List[str],
+        updated_at: Optional[datetime] = None,
+        last_updated_by_id: Optional[str] = None,
+        publish: bool = True,
+    ) -> None:
+        """Write an agent's new in-context message ids through to its cached states (the step hot path)."""
+        self._record_write([agent_id])
+        for key in self._keys_by_agent.get(agent_id, set()):
+            _, agent_state = self._entries[key]
+            agent_state.message_ids = list(message_ids)
+            if updated_at is not None:
+                agent_state.updated_at = updated_at
+            if last_updated_by_id is not None:
+                agent_state.last_updated_by_id = last_updated_by_id
+        if publish:
+            self._publish(
+                message_ids={
+                    agent_id: {
+                        "message_ids": list(message_ids),
+                        "updated_at": updated_at.isoformat() if updated_at else None,
+                        "last_updated_by_id": last_updated_by_id,
+                    }
+                }
+            )
+
+    def _resolve_dependencies(self, dependency_ids: Iterable[str]) -> Set[str]:
+        agent_ids: Set[str] = set()
+        for dependency_id in dependency_ids:
+            agent_ids.update(self._agents_by_dependency.pop(dependency_id, set()))
+        return agent_ids
+
+    def invalidate(self, *agent_ids: str, publish: bool = True) -> None:
+        """Drop every cached state for the given agents and reject in-flight reads of them."""
+        agent_ids = [agent_id for agent_id in agent_ids if agent_id]
+        if not agent_ids:
+            return
+        self._invalidate_local(agent_ids)
+        if publish:
+            self._publish(agent_ids=agent_ids)
+
+    def invalidate_dependencies(self, *dependency_ids: str, publish: bool = True) -> None:
+        """Invalidate agents that reference the given block, tool, source, file, identity or group ids."""
+        dependency_ids = [dependency_id for dependency_id in dependency_ids if dependency_id]
+        if not dependency_ids:
+            return
+        # dependency ids are recorded too, so reads of agents that were not cached yet are rejected
+        self._invalidate_local([*dependency_ids, *self._resolve_dependencies(dependency_ids)])
+        if publish:
+            self._publish(dependency_ids=dependency_ids)
+
+    def clear(self, publish: bool = True) -> None:
+        """Invalidate everything, e.g. after bulk operations whose affected agents are unknown."""
+        self._generation += 1
+        # reject any read that started before now, whichever agent it was for
+        self._evicted_generation = self._generation
+        self._entries.clear()
+        self._keys_by_agent.clear()
+        self._agents_by_dependency.clear()
+        if publish:
+            self._publish(clear=True)
+
+    def _publish(
+        self,
+        agent_ids: Optional[List[str]] = None,
+        dependency_ids: Optional[List[str]] = None,
+        clear: bool = False,
+        message_ids: Optional[Dict[str, dict]] = None,
+    ) -> None:
+        if not self.enabled or settings.redis_host is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # sync code paths outside the event loop only invalidate locally
+            return
+        message = json.dumps(
+            {
+                "origin": self._origin,
+                "agent_ids": agent_ids or [],
+                "dependency_ids": dependency_ids or [],
+                "clear": clear,
+                "message_ids": message_ids or {},
+            }
+        )
+        loop.create_task(self._publish_async(message))
+
+    @staticmethod
+    async def _publish_async(message: str) -> None:
+        from letta.data_sources.redis_client import get_redis_client
+
+        try:
+            redis_client = await get_redis_client()
+            await redis_client.publish(AGENT_STATE_INVALIDATION_CHANNEL, message)
+        except Exception as e:
+            logger.warning(f"Failed to publish agent state cache invalidation: {e}")
+
+    def apply_remote_invalidation(self, message: str) -> None:
+        """Apply an invalidation published by another worker."""
+        payload = json.loads(message)
+        if payload.get("origin") == self._origin:
+            return
+        if payload.get("clear"):
+            self.clear(publish=False)
+            return
+        self.invalidate(*payload.get("agent_ids", []), publish=False)
+        self.invalidate_dependencies(*payload.get("dependency_ids", []), publish=False)
+        for agent_id, update in payload.get("message_ids", {}).items():
+            self.set_message_ids(
+                agent_id,
+                update["message_ids"],
+                updated_at=datetime.fromisoformat(update["updated_at"]) if update.get("updated_at") else None,
+                last_updated_by_id=update.get("last_updated_by_id"),
+                publish=False,
+            )
+
+
+async def listen_for_agent_state_invalidations() -> None:
+    """Background task that applies invalidations published by other workers until cancelled."""
+    from letta.data_sources.redis_client import NoopAsyncRedisClient, get_redis_client
+
+    redis_client = await get_redis_client()
+    if isinstance(redis_client, NoopAsyncRedisClient):
+        return
+
+    cache = AgentStateCache()
+    while True:
+        try:
+            async for message in redis_client.subscribe(AGENT_STATE_INVALIDATION_CHANNEL):
+                try:
+                    cache.apply_remote_invalidation(message)
+                except Exception as e:
+                    logger.warning(f"Ignoring malformed agent state cache invalidation: {e}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # a dropped subscription may have missed invalidations, so start from a clean cache
+            logger.warning(f"Agent state cache invalidation listener disconnected, retrying: {e}")
+            cache.clear(publish=False)
+            await asyncio.sleep(1)
+
+
+def _resolve_agent_ids(bound: inspect.BoundArguments) -> List[str]:
+    arguments = bound.arguments
+    if arguments.get("agent_id"):
+        return [arguments["agent_id"]]
+    if arguments.get("agent_state") is not None:
+        return [arguments["agent_state"].id]
+    if arguments.get("agent_file_pairs"):
+        return [agent_id for agent_id, _ in arguments["agent_file_pairs"]]
+    return []
+
+
+def _as_ids(value) -> List[str]:
+    """Flatten an id, an object with an `id`, or a collection (dict keys) of either into a list of ids."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        return [key for key in value if isinstance(key, str)]
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [i for item in value for i in _as_ids(item)]
+    item_id = getattr(value, "id", None)
+    return [item_id] if isinstance(item_id, str) else []
+
+
+def _invalidate_after(func, invalidate):
+    """Wrap `func` so `invalidate(bound_arguments, result)` runs once it returns (or raises, with result None)."""
+    signature = inspect.signature(func)
+
+    def _run(args, kwargs, result) -> None:
+        try:
+            bound = signature.bind_partial(*args, **kwargs)
+        except TypeError:
+            AgentStateCache().clear()
+            return
+        invalidate(bound, result)
+
+    # unwrap so coroutines hidden behind sync decorators like `enforce_types` are still awaited
+    if inspect.iscoroutinefunction(inspect.unwrap(func)):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            result = None
+            try:
+                result = await func(*args, **kwargs)
+                return result
+            finally:
+                _run(args, kwargs, result)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        finally:
+            _run(args, kwargs, result)
+
+    return wrapper
+
+
+def invalidates_agent_state(func):
+    """Invalidate the cached state of the agent(s) a manager method modifies, once it returns or raises.
+
+    The agent is resolved from an `agent_id`, `agent_state` or `agent_file_pairs` argument.
+    """
+    return _invalidate_after(func, lambda bound, _: AgentStateCache().invalidate(*_resolve_agent_ids(bound)))
+
+
+def invalidates_agent_state_dependencies(*arg_names: str, include_result: bool = False):
+    """Invalidate cached agents referencing the shared rows a manager method modifies.
+
+    Ids are read from the named arguments (ids, objects with an `id`, or collections of either)
+    and, with `include_result`, from the returned object(s).
+    """
+
+    def decorator(func):
+        def _invalidate(bound: inspect.BoundArguments, result) -> None:
+            ids = [i for name in arg_names for i in _as_ids(bound.arguments.get(name))]
+            if include_result:
+                ids.extend(_as_ids(result))
+            AgentStateCache().invalidate_dependencies(*ids)
+
+        return _invalidate_after(func, _invalidate)
+
+    return decorator
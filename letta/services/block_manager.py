@@ -17,6 +17,7 @@ from letta.schemas.block import Block as PydanticBlock, BlockUpdate
 from letta.schemas.enums import ActorType
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
+from letta.services.agent_state_cache import invalidates_agent_state_dependencies
 from letta.settings import DatabaseChoice, settings
 from letta.utils import enforce_types
 
@@ -107,6 +108,7 @@ class BlockManager:
             await session.commit()
             return result
 
+    @invalidates_agent_state_dependencies("block_id")
     @enforce_types
     @trace_method
     def update_block(self, block_id: str, block_update: BlockUpdate, actor: PydanticUser) -> PydanticBlock:
@@ -123,6 +125,7 @@ class BlockManager:
             block.update(db_session=session, actor=actor)
             return block.to_pydantic()
 
+    @invalidates_agent_state_dependencies("block_id")
     @enforce_types
     @trace_method
     async def update_block_async(self, block_id: str, block_update: BlockUpdate, actor: PydanticUser) -> PydanticBlock:
@@ -141,6 +144,7 @@ class BlockManager:
             await session.commit()
             return pydantic_block
 
+    @invalidates_agent_state_dependencies("block_id")
     @enforce_types
     @trace_method
     def delete_block(self, block_id: str, actor: PydanticUser) -> None:
@@ -154,6 +158,7 @@ class BlockManager:
             block = BlockModel.read(db_session=session, identifier=block_id)
             block.hard_delete(db_session=session, actor=actor)
 
+    @invalidates_agent_state_dependencies("block_id")
     @enforce_types
     @trace_method
     async def delete_block_async(self, block_id: str, actor: PydanticUser) -> None:
@@ -519,6 +524,7 @@ class BlockManager:
 
     # Block History Functions
 
+    @invalidates_agent_state_dependencies("block_id")
     @enforce_types
     @trace_method
     def checkpoint_block(
@@ -623,6 +629,7 @@ class BlockManager:
         updated_block = block.update(db_session=session, actor=actor, no_commit=True)
         return updated_block
 
+    @invalidates_agent_state_dependencies("block_id")
     @enforce_types
     @trace_method
     def undo_checkpoint_block(self, block_id: str, actor: PydanticUser, use_preloaded_block: Optional[BlockModel] = None) -> PydanticBlock:
@@ -666,6 +673,7 @@ class BlockManager:
             session.commit()
             return block.to_pydantic()
 
+    @invalidates_agent_state_dependencies("block_id")
     @enforce_types
     @trace_method
     def redo_checkpoint_block(self, block_id: str, actor: PydanticUser, use_preloaded_block: Optional[BlockModel] = None) -> PydanticBlock:
@@ -705,6 +713,7 @@ class BlockManager:
             session.commit()
             return block.to_pydantic()
 
+    @invalidates_agent_state_dependencies("updates")
     @enforce_types
     @trace_method
     async def bulk_update_block_values_async(
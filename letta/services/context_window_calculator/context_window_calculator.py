@@ -107,12 +107,9 @@ class ContextWindowCalculator:
         num_messages: int,
     ) -> ContextWindowOverview:
         """Calculate context window information using the provided token counter"""
-        messages = await message_manager.get_messages_by_ids_async(message_ids=agent_state.message_ids[1:], actor=actor)
+        messages = (await message_manager.get_in_context_messages_async(agent_id=agent_state.id, actor=actor))[1:]
         in_context_messages = [system_message_compiled] + messages
 
-        # Convert messages to appropriate format
-        converted_messages = token_counter.convert_messages(in_context_messages)
-
         # Extract system components
         system_prompt = ""
         core_memory = ""
@@ -145,11 +142,8 @@ class ContextWindowCalculator:
             token_counter.count_text_tokens(core_memory),
             token_counter.count_text_tokens(external_memory_summary),
             token_counter.count_text_tokens(summary_memory) if summary_memory else asyncio.sleep(0, result=0),
-            (
-                token_counter.count_message_tokens(converted_messages[message_start_index:])
-                if len(converted_messages) > message_start_index
-                else asyncio.sleep(0, result=0)
-            ),
+            # counted incrementally: only messages not seen before for this agent are tokenized
+            token_counter.count_context_message_tokens(in_context_messages[message_start_index:], context_id=agent_state.id),
             (
                 token_counter.count_tool_tokens(available_functions_definitions)
                 if available_functions_definitions
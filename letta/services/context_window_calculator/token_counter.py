@@ -1,7 +1,10 @@
 import hashlib
 import json
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
 
 from letta.helpers.decorators import async_redis_cache
 from letta.llm_api.anthropic_client import AnthropicClient
@@ -10,6 +13,96 @@ from letta.schemas.message import Message
 from letta.schemas.openai.chat_completion_request import Tool as OpenAITool
 from letta.utils import count_tokens
 
+# Entries in the process-local token count cache (per-message counts, text / tool counts and per-context tallies)
+LOCAL_TOKEN_CACHE_SIZE = 10_000
+
+# Tokens num_tokens_from_messages adds once per request ("every reply is primed with <|start|>assistant<|message|>")
+TIKTOKEN_REPLY_PRIMING_TOKENS = 3
+
+# Messages an Anthropic context tally may estimate locally before it is re-anchored with an exact remote count
+ANTHROPIC_MAX_ESTIMATED_MESSAGES = 20
+
+
+class LocalTokenCache:
+    """Process-local LRU of token counts, consulted before the (optional) Redis tier."""
+
+    def __init__(self, max_size: int = LOCAL_TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+local_token_cache = LocalTokenCache()
+
+
+def locally_cached(key_func: Callable[..., Hashable]):
+    """Serve a token count from the process-local LRU, falling through to the wrapped (Redis-cached) count on a miss."""
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = key_func(*args, **kwargs)
+            cached = local_token_cache.get(key)
+            if cached is not None:
+                return cached
+            result = await func(*args, **kwargs)
+            local_token_cache.set(key, result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def _text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def _tools_digest(tools: List[OpenAITool]) -> str:
+    return hashlib.sha256(json.dumps([t.model_dump() for t in tools], sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _message_version(message: Message) -> Tuple:
+    """Identity of a message's content: persisted messages are versioned by `updated_at`, anything else by content."""
+    if message.id and message.updated_at:
+        return (message.id, message.updated_at)
+    return (message.id, hashlib.sha256(message.model_dump_json(include={"role", "content", "tool_calls", "name"}).encode()).hexdigest())
+
+
+def tiktoken_message_tokens(message: Message, model: str) -> int:
+    """Exact tiktoken count of a single message's contribution to `num_tokens_from_messages`, cached per message version.
+
+    `num_tokens_from_messages` is a per-message sum plus a constant reply priming, so a context total is the sum of these
+    counts plus `TIKTOKEN_REPLY_PRIMING_TOKENS`.
+    """
+    key = ("tiktoken_message_tokens", model, _message_version(message))
+    count = local_token_cache.get(key)
+    if count is None:
+        from letta.local_llm.utils import num_tokens_from_messages
+
+        message_dicts = Message.to_openai_dicts_from_list([message])
+        count = num_tokens_from_messages(messages=message_dicts, model=model) - TIKTOKEN_REPLY_PRIMING_TOKENS if message_dicts else 0
+        local_token_cache.set(key, count)
+    return count
+
 
 class TokenCounter(ABC):
     """Abstract base class for token counting strategies"""
@@ -30,6 +123,15 @@ class TokenCounter(ABC):
     def convert_messages(self, messages: List[Any]) -> List[Dict[str, Any]]:
         """Convert messages to the appropriate format for this counter"""
 
+    async def count_context_message_tokens(self, messages: List[Message], context_id: Optional[str] = None) -> int:
+        """Count tokens in an agent's in-context messages, only doing work for messages not counted before.
+
+        Args:
+            messages: The in-context messages, oldest first
+            context_id: Key for the running tally of this context (e.g. the agent id)
+        """
+        return await self.count_message_tokens(self.convert_messages(messages)) if messages else 0
+
 
 class AnthropicTokenCounter(TokenCounter):
     """Token counter using Anthropic's API"""
@@ -39,8 +141,9 @@ class AnthropicTokenCounter(TokenCounter):
         self.model = model
 
     @trace_method
+    @locally_cached(key_func=lambda self, text: ("anthropic_text_tokens", self.model, _text_digest(text)))
     @async_redis_cache(
-        key_func=lambda self, text: f"anthropic_text_tokens:{self.model}:{hashlib.sha256(text.encode()).hexdigest()[:16]}",
+        key_func=lambda self, text: f"anthropic_text_tokens:{self.model}:{_text_digest(text)}",
         prefix="token_counter",
         ttl_s=3600,  # cache for 1 hour
     )
@@ -62,9 +165,9 @@ class AnthropicTokenCounter(TokenCounter):
         return await self.client.count_tokens(model=self.model, messages=messages)
 
     @trace_method
+    @locally_cached(key_func=lambda self, tools: ("anthropic_tool_tokens", self.model, _tools_digest(tools)))
     @async_redis_cache(
-        key_func=lambda self,
-        tools: f"anthropic_tool_tokens:{self.model}:{hashlib.sha256(json.dumps([t.model_dump() for t in tools], sort_keys=True).encode()).hexdigest()[:16]}",
+        key_func=lambda self, tools: f"anthropic_tool_tokens:{self.model}:{_tools_digest(tools)}",
         prefix="token_counter",
         ttl_s=3600,  # cache for 1 hour
     )
@@ -76,6 +179,32 @@ class AnthropicTokenCounter(TokenCounter):
     def convert_messages(self, messages: List[Any]) -> List[Dict[str, Any]]:
         return Message.to_anthropic_dicts_from_list(messages)
 
+    @trace_method
+    async def count_context_message_tokens(self, messages: List[Message], context_id: Optional[str] = None) -> int:
+        """Exact remote count, extended with local estimates while the context only grows.
+
+        The tally for `context_id` is anchored with an exact count from Anthropic's API. As long as later calls only
+        append messages to the anchored ones, the new messages are estimated locally (tiktoken) instead of recounting
+        the whole context remotely. The tally is re-anchored when earlier messages change (e.g. after summarization)
+        or after `ANTHROPIC_MAX_ESTIMATED_MESSAGES` estimated messages, which bounds the drift.
+        """
+        if not messages:
+            return 0
+
+        versions = [_message_version(m) for m in messages]
+        tally_key = ("anthropic_context_tokens", self.model, context_id)
+        tally = local_token_cache.get(tally_key) if context_id else None
+        if tally is not None:
+            anchored_versions, anchored_count = tally
+            num_new = len(versions) - len(anchored_versions)
+            if 0 <= num_new <= ANTHROPIC_MAX_ESTIMATED_MESSAGES and versions[: len(anchored_versions)] == anchored_versions:
+                return anchored_count + sum(tiktoken_message_tokens(m, model="gpt-4") for m in messages[len(anchored_versions) :])
+
+        count = await self.count_message_tokens(self.convert_messages(messages))
+        if context_id:
+            local_token_cache.set(tally_key, (versions, count))
+        return count
+
 
 class TiktokenCounter(TokenCounter):
     """Token counter using tiktoken"""
@@ -84,8 +213,9 @@ class TiktokenCounter(TokenCounter):
         self.model = model
 
     @trace_method
+    @locally_cached(key_func=lambda self, text: ("tiktoken_text_tokens", self.model, _text_digest(text)))
     @async_redis_cache(
-        key_func=lambda self, text: f"tiktoken_text_tokens:{self.model}:{hashlib.sha256(text.encode()).hexdigest()[:16]}",
+        key_func=lambda self, text: f"tiktoken_text_tokens:{self.model}:{_text_digest(text)}",
         prefix="token_counter",
         ttl_s=3600,  # cache for 1 hour
     )
@@ -109,9 +239,9 @@ class TiktokenCounter(TokenCounter):
         return num_tokens_from_messages(messages=messages, model=self.model)
 
     @trace_method
+    @locally_cached(key_func=lambda self, tools: ("tiktoken_tool_tokens", self.model, _tools_digest(tools)))
     @async_redis_cache(
-        key_func=lambda self,
-        tools: f"tiktoken_tool_tokens:{self.model}:{hashlib.sha256(json.dumps([t.model_dump() for t in tools], sort_keys=True).encode()).hexdigest()[:16]}",
+        key_func=lambda self, tools: f"tiktoken_tool_tokens:{self.model}:{_tools_digest(tools)}",
         prefix="token_counter",
         ttl_s=3600,  # cache for 1 hour
     )
@@ -126,3 +256,10 @@ class TiktokenCounter(TokenCounter):
 
     def convert_messages(self, messages: List[Any]) -> List[Dict[str, Any]]:
         return Message.to_openai_dicts_from_list(messages)
+
+    @trace_method
+    async def count_context_message_tokens(self, messages: List[Message], context_id: Optional[str] = None) -> int:
+        """Exact count as the sum of cached per-message counts, so only new or edited messages are tokenized."""
+        if not messages:
+            return 0
+        return TIKTOKEN_REPLY_PRIMING_TOKENS + sum(tiktoken_message_tokens(m, model=self.model) for m in messages)
@@ -0,0 +1,156 @@
+"""Content-addressed cache of embeddings shared by archival inserts, file ingestion and search.
+
+The same text is often embedded again: re-uploaded files, repeated search queries, duplicate
+memories. Embeddings are keyed by (embedding model, endpoint, dimension, sha256(text)), so a
+text is only ever sent to the provider once per embedding model.
+
+Two tiers are consulted in order:
+    - an in-process LRU bounded by `embedding_cache_max_size` (float32 arrays, ~6KB per 1536-dim vector)
+    - Redis when configured, shared by every worker and expiring after `embedding_cache_ttl_seconds`
+
+A batched lookup only sends the misses (deduplicated) to the provider, in their original order.
+"""
+
+import base64
+import hashlib
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from letta.constants import REDIS_DEFAULT_CACHE_PREFIX
+from letta.helpers.singleton import singleton
+from letta.log import get_logger
+from letta.otel.metric_registry import MetricRegistry
+from letta.schemas.embedding_config import EmbeddingConfig
+from letta.settings import settings
+
+logger = get_logger(__name__)
+
+CacheKey = Tuple[str, str]
+
+
+def embedding_config_key(embedding_config: EmbeddingConfig) -> str:
+    """Digest of the fields that determine the vector produced for a text."""
+    config = f"{embedding_config.embedding_model}|{embedding_config.embedding_endpoint}|{embedding_config.embedding_dim}"
+    return hashlib.sha256(config.encode("utf-8")).hexdigest()[:32]
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _encode(embedding: np.ndarray) -> str:
+    return base64.b64encode(embedding.tobytes()).decode("ascii")
+
+
+def _decode(value: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(value), dtype=np.float32)
+
+
+@singleton
+class EmbeddingCache:
+    """Two-tier (in-process LRU, then Redis) cache of embeddings keyed by model and text digest."""
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = max_size or settings.embedding_cache_max_size
+        self._entries: "OrderedDict[CacheKey, np.ndarray]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return settings.embedding_cache_enabled
+
+    @staticmethod
+    def _redis_key(key: CacheKey) -> str:
+        return f"{REDIS_DEFAULT_CACHE_PREFIX}:embedding:{key[0]}:{key[1]}"
+
+    def _put_local(self, key: CacheKey, embedding: np.ndarray) -> None:
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def _get_redis(self, keys: List[CacheKey]) -> Dict[CacheKey, np.ndarray]:
+        from letta.data_sources.redis_client import NoopAsyncRedisClient, get_redis_client
+
+        try:
+            redis_client = await get_redis_client()
+            if isinstance(redis_client, NoopAsyncRedisClient):
+                return {}
+            values = await redis_client.mget(*[self._redis_key(key) for key in keys])
+        except Exception as e:
+            logger.warning(f"Failed to read embeddings from Redis: {e}")
+            return {}
+        return {key: _decode(value) for key, value in zip(keys, values) if value is not None}
+
+    async def _set_redis(self, entries: Dict[CacheKey, np.ndarray]) -> None:
+        from letta.data_sources.redis_client import NoopAsyncRedisClient, get_redis_client
+
+        try:
+            redis_client = await get_redis_client()
+            if isinstance(redis_client, NoopAsyncRedisClient):
+                return
+            await redis_client.set_many(
+                {self._redis_key(key): _encode(embedding) for key, embedding in entries.items()}, ex=settings.embedding_cache_ttl_seconds
+            )
+        except Exception as e:
+            logger.warning(f"Failed to write embeddings to Redis: {e}")
+
+    async def get_or_embed(
+        self,
+        texts: List[str],
+        embedding_config: EmbeddingConfig,
+        embed: Callable[[List[str]], Awaitable[List[List[float]]]],
+    ) -> List[List[float]]:
+        """
+        Embeddings for `texts` in order, calling `embed` only for the distinct texts that are not cached.
+
+        Args:
+            texts: Texts to embed
+            embedding_config: Embedding model the vectors must come from
+            embed: Provider call for a batch of texts (e.g. a client's `request_embeddings`)
+        """
+        if not self.enabled or not texts:
+            return await embed(texts)
+
+        config_key = embedding_config_key(embedding_config)
+        keys = [(config_key, text_key(text)) for text in texts]
+        attributes = {"model": embedding_config.embedding_model}
+
+        found: Dict[CacheKey, np.ndarray] = {}
+        for key in keys:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                found[key] = embedding
+        if found:
+            MetricRegistry().embedding_cache_hit_counter.add(len(found), attributes={**attributes, "tier": "memory"})
+
+        # identical texts in one batch are looked up and embedded once
+        missing = list(dict.fromkeys(key for key in keys if key not in found))
+        if missing:
+            from_redis = await self._get_redis(missing)
+            if from_redis:
+                MetricRegistry().embedding_cache_hit_counter.add(len(from_redis), attributes={**attributes, "tier": "redis"})
+                for key, embedding in from_redis.items():
+                    self._put_local(key, embedding)
+                found.update(from_redis)
+                missing = [key for key in missing if key not in from_redis]
+
+        embedded: Dict[CacheKey, List[float]] = {}
+        if missing:
+            MetricRegistry().embedding_cache_miss_counter.add(len(missing), attributes=attributes)
+            text_by_key = dict(zip(keys, texts))
+            embeddings = await embed([text_by_key[key] for key in missing])
+            new_entries = {}
+            for key, embedding in zip(missing, embeddings):
+                embedded[key] = embedding
+                new_entries[key] = np.asarray(embedding, dtype=np.float32)
+                self._put_local(key, new_entries[key])
+            await self._set_redis(new_entries)
+
+        # provider results are returned as-is, cached ones as float32 (the precision vectors are stored at)
+        return [embedded[key] if key in embedded else found[key].tolist() for key in keys]
+
+    def clear(self) -> None:
+        self._entries.clear()
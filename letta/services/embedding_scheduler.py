@@ -0,0 +1,247 @@
+"""Shared scheduler for embedding requests.
+
+Every embedding request to a provider goes through a lane keyed by (endpoint type, endpoint, model).
+Embedding endpoints are called with the server's own credentials (there are no BYOK embeddings), so a
+lane corresponds to one provider rate limit. A lane applies:
+    - request and token buckets refilled at `embedding_requests_per_minute` / `embedding_tokens_per_minute`,
+      so bursts are smoothed out before they turn into 429s
+    - AIMD concurrency control: the concurrency limit grows by one per round of successful requests and is
+      halved (and the lane paused for the provider's retry-after) when a request is rate limited
+    - round-robin queueing across organizations, so one tenant's large upload doesn't starve everyone else
+
+`plan_batches` sizes batches from an estimated token count, so requests stay under the provider's
+per-request token limit up front instead of being split after failing.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from letta.helpers.singleton import singleton
+from letta.log import get_logger
+from letta.otel.metric_registry import MetricRegistry
+from letta.schemas.embedding_config import EmbeddingConfig
+from letta.settings import settings
+
+logger = get_logger(__name__)
+
+LaneKey = Tuple[str, str, str]
+
+# conservative characters-per-token ratio (english prose is ~4, code and non-latin text are denser)
+CHARS_PER_TOKEN = 3
+# used when a rate limit error doesn't say how long to wait
+DEFAULT_RETRY_AFTER_SECONDS = 1.0
+INITIAL_CONCURRENCY = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def is_rate_limit_error(e: Exception) -> bool:
+    from letta.errors import LLMRateLimitError
+
+    return isinstance(e, LLMRateLimitError) or getattr(e, "status_code", None) == 429
+
+
+def _retry_after(e: Exception) -> float:
+    """Seconds the provider asked us to wait, from the Retry-After header of a rate limit error."""
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return max(float(headers.get("retry-after", DEFAULT_RETRY_AFTER_SECONDS)), 0.0)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER_SECONDS
+
+
+class _TokenBucket:
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (requests larger than the bucket only need a full bucket)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+
+class _Lane:
+    """Rate limits, concurrency limit and per-organization queues of one (endpoint, model)."""
+
+    def __init__(self, key: LaneKey):
+        self.key = key
+        self.requests = _TokenBucket(settings.embedding_requests_per_minute)
+        self.tokens = _TokenBucket(settings.embedding_tokens_per_minute)
+        self.limit = float(min(INITIAL_CONCURRENCY, settings.embedding_max_concurrency))
+        self.active = 0
+        self.paused_until = 0.0
+        self.waiters: "OrderedDict[Optional[str], Deque[Tuple[asyncio.Future, int]]]" = OrderedDict()
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    def on_success(self) -> None:
+        # additive increase: one more slot per `limit` successful requests
+        self.limit = min(float(settings.embedding_max_concurrency), self.limit + 1 / self.limit)
+
+    def on_rate_limited(self, retry_after: float) -> None:
+        # multiplicative decrease
+        self.limit = max(1.0, self.limit / 2)
+        self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+
+@singleton
+class EmbeddingScheduler:
+    """Rate limits, sizes and fairly queues embedding requests per (endpoint, model)."""
+
+    def __init__(self):
+        self._lanes: Dict[LaneKey, _Lane] = {}
+
+    @staticmethod
+    def lane_key(embedding_config: EmbeddingConfig) -> LaneKey:
+        return (str(embedding_config.embedding_endpoint_type), embedding_config.embedding_endpoint or "", embedding_config.embedding_model)
+
+    def _lane(self, embedding_config: EmbeddingConfig) -> _Lane:
+        key = self.lane_key(embedding_config)
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = _Lane(key)
+        return lane
+
+    @staticmethod
+    def plan_batches(texts: List[str], embedding_config: EmbeddingConfig) -> List[List[int]]:
+        """Indices of `texts` grouped into batches of at most `batch_size` texts and `embedding_max_tokens_per_request` tokens."""
+        batches: List[List[int]] = []
+        batch: List[int] = []
+        batch_tokens = 0
+        for i, text in enumerate(texts):
+            tokens = estimate_tokens(text)
+            if batch and (len(batch) >= embedding_config.batch_size or batch_tokens + tokens > settings.embedding_max_tokens_per_request):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(i)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _dispatch(self, lane: _Lane) -> None:
+        """Hand free slots to waiting requests, one organization at a time, as budget allows."""
+        if lane.timer is not None:
+            lane.timer.cancel()
+            lane.timer = None
+
+        while lane.waiters and lane.active < int(lane.limit):
+            organization_id, queue = next(iter(lane.waiters.items()))
+            future, tokens = queue[0]
+            if future.done():
+                # the waiting request was cancelled
+                queue.popleft()
+                if not queue:
+                    del lane.waiters[organization_id]
+                continue
+
+            now = time.monotonic()
+            wait = max(lane.paused_until - now, lane.requests.wait_time(1, now), lane.tokens.wait_time(tokens, now))
+            if wait > 0:
+                lane.timer = asyncio.get_running_loop().call_later(wait, self._dispatch, lane)
+                return
+
+            lane.requests.take(1)
+            lane.tokens.take(tokens)
+            lane.active += 1
+            queue.popleft()
+            if queue:
+                lane.waiters.move_to_end(organization_id)
+            else:
+                del lane.waiters[organization_id]
+            future.set_result(None)
+
+    async def _acquire(self, lane: _Lane, organization_id: Optional[str], tokens: int) -> None:
+        future = asyncio.get_running_loop().create_future()
+        lane.waiters.setdefault(organization_id, deque()).append((future, tokens))
+        self._dispatch(lane)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # the slot was granted just as we were cancelled
+                self._release(lane)
+            raise
+
+    def _release(self, lane: _Lane) -> None:
+        lane.active -= 1
+        self._dispatch(lane)
+
+    async def submit(
+        self,
+        texts: List[str],
+        embedding_config: EmbeddingConfig,
+        request: Callable[[List[str]], Awaitable[List[List[float]]]],
+        organization_id: Optional[str] = None,
+    ) -> List[List[float]]:
+        """
+        Run one embedding request for `texts` once the lane has budget and a free slot, retrying rate limit errors.
+
+        Args:
+            texts: Texts sent in the request (already batched)
+            embedding_config: Embedding model the request goes to
+            request: Provider call for the batch (e.g. a client's `request_embeddings`)
+            organization_id: Organization the request is made for, used for fair queueing
+        """
+        lane = self._lane(embedding_config)
+        tokens = sum(estimate_tokens(text) for text in texts)
+        attributes = {"model": embedding_config.embedding_model}
+
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            await self._acquire(lane, organization_id, tokens)
+            MetricRegistry().embedding_queue_wait_time_ms_histogram.record((time.perf_counter() - start) * 1000, attributes=attributes)
+            try:
+                embeddings = await request(texts)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt >= settings.embedding_rate_limit_retries:
+                    raise
+                attempt += 1
+                retry_after = _retry_after(e)
+                lane.on_rate_limited(retry_after)
+                MetricRegistry().embedding_rate_limited_counter.add(1, attributes=attributes)
+                logger.warning(
+                    f"Embedding request to {embedding_config.embedding_model} rate limited, retrying in {retry_after:.1f}s "
+                    f"(attempt {attempt}, concurrency limit now {int(lane.limit)})"
+                )
+                continue
+            else:
+                lane.on_success()
+                return embeddings
+            finally:
+                self._release(lane)
+
+    async def embed(
+        self,
+        texts: List[str],
+        embedding_config: EmbeddingConfig,
+        request: Callable[[List[str]], Awaitable[List[List[float]]]],
+        organization_id: Optional[str] = None,
+    ) -> List[List[float]]:
+        """Embeddings for `texts` in order, split into token-sized batches that are submitted concurrently."""
+        if not texts:
+            return []
+        batches = self.plan_batches(texts, embedding_config)
+        results = await asyncio.gather(
+            *(self.submit([texts[i] for i in batch], embedding_config, request, organization_id=organization_id) for batch in batches)
+        )
+        return [embedding for result in results for embedding in result]
+
+    def clear(self) -> None:
+        self._lanes.clear()
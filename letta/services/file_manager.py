@@ -1,9 +1,9 @@
 import asyncio
 import os
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from sqlalchemy import func, select, update
+from sqlalchemy import case, func, select, update
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
@@ -21,11 +21,16 @@ from letta.schemas.source import Source as PydanticSource
 from letta.schemas.source_metadata import FileStats, OrganizationSourcesStats, SourceStats
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
+from letta.services.agent_state_cache import invalidates_agent_state_dependencies
+from letta.services.file_processor.line_index import FileLineIndex, FileLineIndexCache
 from letta.settings import settings
 from letta.utils import enforce_types
 
 logger = get_logger(__name__)
 
+# files whose line indexes are loaded per query
+LINE_INDEX_LOAD_BATCH_SIZE = 50
+
 
 class DuplicateFileError(Exception):
     """Raised when a duplicate file is encountered and error handling is specified"""
@@ -41,6 +46,8 @@ class FileManager:
 
     async def _invalidate_file_caches(self, file_id: str, actor: PydanticUser, original_filename: str = None, source_id: str = None):
         """Invalidate all caches related to a file."""
+        FileLineIndexCache().invalidate(file_id)
+
         # TEMPORARILY DISABLED - caching is disabled
         # # invalidate file content cache (all variants)
         # await self.get_file_by_id.cache_invalidate(self, file_id, actor, include_content=True)
@@ -71,7 +78,8 @@ class FileManager:
                 await file_orm.create_async(session, actor=actor, no_commit=True)
 
                 if text is not None:
-                    content_orm = FileContentModel(file_id=file_orm.id, text=text)
+                    line_index = await self._build_line_index(file_metadata, text)
+                    content_orm = FileContentModel(file_id=file_orm.id, text=text, line_index=line_index)
                     await content_orm.create_async(session, actor=actor, no_commit=True)
 
                 await session.commit()
@@ -363,17 +371,20 @@ class FileManager:
         actor: PydanticUser,
     ) -> PydanticFileMetadata:
         async with db_registry.async_session() as session:
-            await FileMetadataModel.read_async(session, file_id, actor)
+            file_orm = await FileMetadataModel.read_async(session, file_id, actor)
+            line_index = await self._build_line_index(await file_orm.to_pydantic_async(), text)
+            # set explicitly, it versions the cached line indexes
+            values = dict(text=text, line_index=line_index, updated_at=datetime.now(timezone.utc))
 
             dialect_name = session.bind.dialect.name
 
             if dialect_name == "postgresql":
                 stmt = (
                     pg_insert(FileContentModel)
-                    .values(file_id=file_id, text=text)
+                    .values(file_id=file_id, **values)
                     .on_conflict_do_update(
                         index_elements=[FileContentModel.file_id],
-                        set_={"text": text},
+                        set_=values,
                     )
                 )
                 await session.execute(stmt)
@@ -384,9 +395,9 @@ class FileManager:
                 existing = result.scalar_one_or_none()
 
                 if existing:
-                    await session.execute(update(FileContentModel).where(FileContentModel.file_id == file_id).values(text=text))
+                    await session.execute(update(FileContentModel).where(FileContentModel.file_id == file_id).values(**values))
                 else:
-                    session.add(FileContentModel(file_id=file_id, text=text))
+                    session.add(FileContentModel(file_id=file_id, **values))
 
             await session.commit()
 
@@ -398,6 +409,122 @@ class FileManager:
             result = await session.execute(query)
             return await result.scalar_one().to_pydantic_async(include_content=True)
 
+    @staticmethod
+    async def _build_line_index(file_metadata: PydanticFileMetadata, text: str) -> Optional[bytes]:
+        """Serialized line index of the file's text, built off the event loop (None if indexing failed)."""
+
+        def _build() -> bytes:
+            return FileLineIndex.build(file_metadata.model_copy(update={"content": text})).to_bytes()
+
+        try:
+            return await asyncio.to_thread(_build)
+        except Exception as e:
+            # the file tools rebuild missing indexes on first use
+            logger.warning(f"Failed to build line index for file {file_metadata.id}: {e}")
+            return None
+
+    @enforce_types
+    @trace_method
+    async def get_file_line_indexes(self, file_ids: List[str], actor: PydanticUser) -> Dict[str, FileLineIndex]:
+        """
+        Line indexes of the given files' content, for the grep_files and open_files tools.
+
+        Indexes are served from the in-process cache when the content has not changed since; the rest are loaded in
+        concurrent batches. Files stored before indexes existed are indexed on the fly and their index is saved.
+
+        Returns:
+            Dict[str, FileLineIndex]: Index per file id (files without content are left out)
+        """
+        if not file_ids:
+            return {}
+
+        async with db_registry.async_session() as session:
+            query = (
+                select(FileContentModel.file_id, FileContentModel.updated_at)
+                .join(FileMetadataModel, FileMetadataModel.id == FileContentModel.file_id)
+                .where(
+                    FileContentModel.file_id.in_(file_ids),
+                    FileMetadataModel.organization_id == actor.organization_id,
+                    FileMetadataModel.is_deleted == False,
+                )
+            )
+            versions = dict((await session.execute(query)).all())
+
+        cache = FileLineIndexCache()
+        indexes: Dict[str, FileLineIndex] = {}
+        missing = []
+        for file_id, version in versions.items():
+            index = cache.get(file_id, version)
+            if index is not None:
+                indexes[file_id] = index
+            else:
+                missing.append(file_id)
+
+        batches = [missing[i : i + LINE_INDEX_LOAD_BATCH_SIZE] for i in range(0, len(missing), LINE_INDEX_LOAD_BATCH_SIZE)]
+        for loaded in await asyncio.gather(*[self._load_line_indexes(batch) for batch in batches]):
+            for file_id, (version, index) in loaded.items():
+                cache.put(file_id, version, index)
+                indexes[file_id] = index
+        return indexes
+
+    async def _load_line_indexes(self, file_ids: List[str]) -> Dict[str, Tuple[datetime, FileLineIndex]]:
+        async with db_registry.async_session() as session:
+            query = select(
+                FileContentModel.file_id,
+                FileContentModel.updated_at,
+                FileContentModel.line_index,
+                # only transfer the text of files that still need to be indexed
+                case((FileContentModel.line_index.is_(None), FileContentModel.text), else_=None),
+                FileMetadataModel.file_name,
+                FileMetadataModel.file_type,
+                FileMetadataModel.source_id,
+            ).join(FileMetadataModel, FileMetadataModel.id == FileContentModel.file_id)
+            rows = (await session.execute(query.where(FileContentModel.file_id.in_(file_ids)))).all()
+
+        decoded = await asyncio.gather(*[asyncio.to_thread(FileLineIndex.from_bytes, row[2]) for row in rows if row[2] is not None])
+        stored = dict(zip([row[0] for row in rows if row[2] is not None], decoded))
+
+        # indexes written by an older index version are rebuilt too, which needs their text
+        stale_ids = [file_id for file_id, index in stored.items() if index is None]
+        texts = {row[0]: row[3] for row in rows if row[2] is None}
+        if stale_ids:
+            async with db_registry.async_session() as session:
+                query = select(FileContentModel.file_id, FileContentModel.text).where(FileContentModel.file_id.in_(stale_ids))
+                texts.update((await session.execute(query)).all())
+
+        def _build(row) -> FileLineIndex:
+            file_id, _, _, _, file_name, file_type, source_id = row
+            file_metadata = PydanticFileMetadata(
+                id=file_id, file_name=file_name, file_type=file_type, source_id=source_id, content=texts.get(file_id) or ""
+            )
+            return FileLineIndex.build(file_metadata)
+
+        to_build = [row for row in rows if stored.get(row[0]) is None]
+        built = dict(zip([row[0] for row in to_build], await asyncio.gather(*[asyncio.to_thread(_build, row) for row in to_build])))
+        if built:
+            await self._save_line_indexes({file_id: (texts[file_id], index) for file_id, index in built.items()})
+
+        return {row[0]: (row[1], stored.get(row[0]) or built[row[0]]) for row in rows}
+
+    async def _save_line_indexes(self, indexes: Dict[str, Tuple[str, FileLineIndex]]) -> None:
+        """
+        Persist indexes built for files stored before indexing existed (best effort).
+
+        Each index is only written while the row still holds the text it was built from, so a concurrent content
+        update, which writes its own index, is never overwritten with an index of the old text.
+        """
+        try:
+            async with db_registry.async_session() as session:
+                for file_id, (text, index) in indexes.items():
+                    await session.execute(
+                        update(FileContentModel)
+                        .where(FileContentModel.file_id == file_id, FileContentModel.text == text)
+                        .values(line_index=index.to_bytes())
+                    )
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Failed to save line indexes: {e}")
+
     @enforce_types
     @trace_method
     async def list_files(
@@ -449,6 +576,7 @@ class FileManager:
 
             return file_metadatas
 
+    @invalidates_agent_state_dependencies("file_id")
     @enforce_types
     @trace_method
     async def delete_file(self, file_id: str, actor: PydanticUser) -> PydanticFileMetadata:
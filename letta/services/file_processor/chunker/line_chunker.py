@@ -1,5 +1,5 @@
 import re
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from letta.log import get_logger
 from letta.schemas.file import FileMetadata
@@ -110,6 +110,22 @@ class LineChunker:
 
         return [line for line in lines if line.strip()]
 
+    def split_lines(self, file_metadata: FileMetadata) -> Tuple[List[str], str]:
+        """Split the file content into unnumbered lines (or sentences), returning them with their chunk type"""
+        strategy = self._determine_chunking_strategy(file_metadata)
+        text = file_metadata.content
+
+        # Apply the appropriate chunking strategy
+        if strategy == ChunkingStrategy.DOCUMENTATION:
+            content_lines = self._chunk_by_sentences(text)
+        elif strategy == ChunkingStrategy.CODE:
+            content_lines = self._chunk_by_lines(text, preserve_indentation=True)
+        else:  # STRUCTURED_DATA or LINE_BASED
+            content_lines = self._chunk_by_lines(text, preserve_indentation=False)
+
+        chunk_type = "sentences" if strategy == ChunkingStrategy.DOCUMENTATION else "lines"
+        return content_lines, chunk_type
+
     def chunk_text(
         self,
         file_metadata: FileMetadata,
@@ -119,24 +135,34 @@ class LineChunker:
         validate_range: bool = False,
     ) -> List[str]:
         """Content-aware text chunking based on file type"""
-        strategy = self._determine_chunking_strategy(file_metadata)
-        text = file_metadata.content
-
         # early stop, can happen if the there's nothing on a specific file
-        if not text:
+        if not file_metadata.content:
             logger.warning(f"File ({file_metadata}) has no content")
             return []
 
-        # Apply the appropriate chunking strategy
-        if strategy == ChunkingStrategy.DOCUMENTATION:
-            content_lines = self._chunk_by_sentences(text)
-        elif strategy == ChunkingStrategy.CODE:
-            content_lines = self._chunk_by_lines(text, preserve_indentation=True)
-        else:  # STRUCTURED_DATA or LINE_BASED
-            content_lines = self._chunk_by_lines(text, preserve_indentation=False)
-
+        content_lines, chunk_type = self.split_lines(file_metadata)
+        return self.format_lines(
+            content_lines,
+            chunk_type,
+            file_name=file_metadata.file_name,
+            start=start,
+            end=end,
+            add_metadata=add_metadata,
+            validate_range=validate_range,
+        )
+
+    @staticmethod
+    def format_lines(
+        content_lines: List[str],
+        chunk_type: str,
+        file_name: Optional[str],
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        add_metadata: bool = True,
+        validate_range: bool = False,
+    ) -> List[str]:
+        """Number a range of already split lines (0-indexed start, exclusive end) for display"""
         total_chunks = len(content_lines)
-        chunk_type = "sentences" if strategy == ChunkingStrategy.DOCUMENTATION else "lines"
 
         # Handle range validation and clamping
         if start is not None or end is not None:
@@ -149,9 +175,7 @@ class LineChunker:
 
             # Always check that start is within bounds - this should error regardless of validation flag
             if start is not None and start >= total_chunks:
-                raise ValueError(
-                    f"File {file_metadata.file_name} has only {total_chunks} {chunk_type}, but requested offset {start + 1} is out of range"
-                )
+                raise ValueError(f"File {file_name} has only {total_chunks} {chunk_type}, but requested offset {start + 1} is out of range")
 
             # Apply bounds checking
             if start is not None:
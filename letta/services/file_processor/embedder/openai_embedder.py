@@ -9,6 +9,8 @@ from letta.schemas.embedding_config import EmbeddingConfig
 from letta.schemas.enums import ProviderType
 from letta.schemas.passage import Passage
 from letta.schemas.user import User
+from letta.services.embedding_cache import EmbeddingCache
+from letta.services.embedding_scheduler import EmbeddingScheduler
 from letta.services.file_processor.embedder.base_embedder import BaseEmbedder
 from letta.settings import model_settings
 
@@ -37,7 +39,9 @@ class OpenAIEmbedder(BaseEmbedder):
         )
 
     @trace_method
-    async def _embed_batch(self, batch: List[str], batch_indices: List[int]) -> List[Tuple[int, List[float]]]:
+    async def _embed_batch(
+        self, batch: List[str], batch_indices: List[int], organization_id: Optional[str] = None
+    ) -> List[Tuple[int, List[float]]]:
         """Embed a single batch and return embeddings with their original indices"""
         log_event(
             "embedder.batch_started",
@@ -49,7 +53,16 @@ class OpenAIEmbedder(BaseEmbedder):
         )
 
         try:
-            embeddings = await self.client.request_embeddings(inputs=batch, embedding_config=self.embedding_config)
+            embeddings = await EmbeddingCache().get_or_embed(
+                batch,
+                self.embedding_config,
+                lambda misses: EmbeddingScheduler().submit(
+                    misses,
+                    self.embedding_config,
+                    lambda texts: self.client.request_embeddings(inputs=texts, embedding_config=self.embedding_config),
+                    organization_id=organization_id,
+                ),
+            )
             log_event("embedder.batch_completed", {"batch_size": len(batch), "embeddings_generated": len(embeddings)})
             return [(idx, e) for idx, e in zip(batch_indices, embeddings)]
         except Exception as e:
@@ -73,8 +86,8 @@ class OpenAIEmbedder(BaseEmbedder):
                 batch2_indices = batch_indices[mid:]
 
                 # retry with smaller batches
-                result1 = await self._embed_batch(batch1, batch1_indices)
-                result2 = await self._embed_batch(batch2, batch2_indices)
+                result1 = await self._embed_batch(batch1, batch1_indices, organization_id)
+                result2 = await self._embed_batch(batch2, batch2_indices, organization_id)
 
                 return result1 + result2
             else:
@@ -116,15 +129,9 @@ class OpenAIEmbedder(BaseEmbedder):
             },
         )
 
-        # Create batches with their original indices
-        batches = []
-        batch_indices = []
-
-        for i in range(0, len(chunks), self.embedding_config.batch_size):
-            batch = chunks[i : i + self.embedding_config.batch_size]
-            indices = list(range(i, min(i + self.embedding_config.batch_size, len(chunks))))
-            batches.append(batch)
-            batch_indices.append(indices)
+        # Create batches with their original indices, sized by their estimated token count
+        batch_indices = EmbeddingScheduler.plan_batches(chunks, self.embedding_config)
+        batches = [[chunks[i] for i in indices] for indices in batch_indices]
 
         logger.info(f"Processing {len(batches)} batches")
         log_event(
@@ -134,13 +141,13 @@ class OpenAIEmbedder(BaseEmbedder):
 
         async def process(batch: List[str], indices: List[int]):
             try:
-                return await self._embed_batch(batch, indices)
+                return await self._embed_batch(batch, indices, actor.organization_id)
             except Exception as e:
                 logger.error("Failed to embed batch of size %s: %s", len(batch), e)
                 log_event("embedder.batch_failed", {"batch_size": len(batch), "error": str(e), "error_type": type(e).__name__})
                 raise
 
-        # Execute all batches concurrently with semaphore control
+        # Execute all batches concurrently, the embedding scheduler paces the requests
         tasks = [process(batch, indices) for batch, indices in zip(batches, batch_indices)]
 
         log_event(
@@ -1,7 +1,9 @@
+import asyncio
 from typing import List
 
 from mistralai import OCRPageObject, OCRResponse, OCRUsageInfo
 
+from letta.helpers.pinecone_utils import delete_file_records_from_pinecone_index
 from letta.log import get_logger
 from letta.otel.context import get_ctx_attributes
 from letta.otel.tracing import log_event, trace_method
@@ -14,6 +16,7 @@ from letta.services.agent_manager import AgentManager
 from letta.services.file_manager import FileManager
 from letta.services.file_processor.chunker.llama_index_chunker import LlamaIndexChunker
 from letta.services.file_processor.embedder.base_embedder import BaseEmbedder
+from letta.services.file_processor.ingestion_pipeline import IngestionPipeline
 from letta.services.file_processor.parser.base_parser import FileParser
 from letta.services.job_manager import JobManager
 from letta.services.passage_manager import PassageManager
@@ -44,45 +47,29 @@ class FileProcessor:
         self.actor = actor
         self.using_pinecone = using_pinecone
 
-    async def _chunk_and_embed_with_fallback(self, file_metadata: FileMetadata, ocr_response, source_id: str) -> List:
-        """Chunk text and generate embeddings with fallback to default chunker if needed"""
+    def _create_pipeline(self, file_metadata: FileMetadata, source_id: str, chunk) -> IngestionPipeline:
+        return IngestionPipeline(
+            file_metadata=file_metadata,
+            source_id=source_id,
+            chunk=chunk,
+            embedder=self.embedder,
+            actor=self.actor,
+            file_manager=self.file_manager,
+            passage_manager=self.passage_manager,
+            store_passages=not self.using_pinecone,
+        )
+
+    async def _ingest_with_fallback(self, file_metadata: FileMetadata, ocr_response, source_id: str) -> List[Passage]:
+        """Chunk, embed and store the pages, retrying with the default chunker if the file-specific one fails"""
         filename = file_metadata.file_name
 
         # Create file-type-specific chunker
         text_chunker = LlamaIndexChunker(file_type=file_metadata.file_type, chunk_size=self.embedder.embedding_config.embedding_chunk_size)
 
         # First attempt with file-specific chunker
+        pipeline = self._create_pipeline(file_metadata, source_id, text_chunker.chunk_text)
         try:
-            all_chunks = []
-            for page in ocr_response.pages:
-                chunks = text_chunker.chunk_text(page)
-                if not chunks:
-                    log_event(
-                        "file_processor.chunking_failed",
-                        {
-                            "filename": filename,
-                            "page_index": ocr_response.pages.index(page),
-                        },
-                    )
-                    raise ValueError("No chunks created from text")
-                all_chunks.extend(chunks)
-
-            # Update with chunks length
-            file_metadata = await self.file_manager.update_file_status(
-                file_id=file_metadata.id,
-                actor=self.actor,
-                processing_status=FileProcessingStatus.EMBEDDING,
-                total_chunks=len(all_chunks),
-                chunks_embedded=0,
-            )
-
-            all_passages = await self.embedder.generate_embedded_passages(
-                file_id=file_metadata.id,
-                source_id=source_id,
-                chunks=all_chunks,
-                actor=self.actor,
-            )
-            return all_passages
+            return await pipeline.run(ocr_response.pages)
 
         except Exception as e:
             logger.warning(f"Failed to chunk/embed with file-specific chunker for {filename}: {str(e)}. Retrying with default chunker.")
@@ -93,32 +80,16 @@ class FileProcessor:
 
             # Retry with default chunker
             try:
+                # passages of the failed attempt were already written, drop them so the retry doesn't duplicate them
+                await self._delete_ingested(file_metadata, pipeline.passages)
+
                 logger.info(f"Retrying chunking with default SentenceSplitter for {filename}")
-                all_chunks = []
-
-                for page in ocr_response.pages:
-                    chunks = text_chunker.default_chunk_text(page)
-                    if not chunks:
-                        log_event(
-                            "file_processor.default_chunking_failed",
-                            {
-                                "filename": filename,
-                                "page_index": ocr_response.pages.index(page),
-                            },
-                        )
-                        raise ValueError("No chunks created from text with default chunker")
-                    all_chunks.extend(chunks)
-
-                all_passages = await self.embedder.generate_embedded_passages(
-                    file_id=file_metadata.id,
-                    source_id=source_id,
-                    chunks=all_chunks,
-                    actor=self.actor,
-                )
+                pipeline = self._create_pipeline(file_metadata, source_id, text_chunker.default_chunk_text)
+                all_passages = await pipeline.run(ocr_response.pages)
                 logger.info(f"Successfully generated passages with default chunker for {filename}")
                 log_event(
                     "file_processor.default_chunking_success",
-                    {"filename": filename, "total_chunks": len(all_chunks)},
+                    {"filename": filename, "total_chunks": pipeline.total_chunks},
                 )
                 return all_passages
 
@@ -134,6 +105,27 @@ class FileProcessor:
                 )
                 raise fallback_error
 
+    async def _delete_ingested(self, file_metadata: FileMetadata, passages: List[Passage]) -> None:
+        """Drop what an ingestion attempt wrote: its passages, or the file's records in Pinecone"""
+        if self.using_pinecone:
+            await delete_file_records_from_pinecone_index(file_id=file_metadata.id, actor=self.actor)
+        elif passages:
+            await self.passage_manager.delete_source_passages_async(actor=self.actor, passages=passages)
+
+    async def _store_file_content(
+        self, file_metadata: FileMetadata, text: str, source_id: str, agent_states: list[AgentState]
+    ) -> FileMetadata:
+        """Save the parsed text and open the file in the agents' context windows"""
+        file_metadata = await self.file_manager.upsert_file_content(file_id=file_metadata.id, text=text, actor=self.actor)
+
+        await self.agent_manager.insert_file_into_context_windows(
+            source_id=source_id,
+            file_metadata_with_content=file_metadata,
+            actor=self.actor,
+            agent_states=agent_states,
+        )
+        return file_metadata
+
     # TODO: Factor this function out of SyncServer
     @trace_method
     async def process(
@@ -185,16 +177,8 @@ class FileProcessor:
                 {"filename": filename, "pages_extracted": len(ocr_response.pages), "text_length": len(raw_markdown_text)},
             )
 
-            file_metadata = await self.file_manager.upsert_file_content(file_id=file_metadata.id, text=raw_markdown_text, actor=self.actor)
-
-            await self.agent_manager.insert_file_into_context_windows(
-                source_id=source_id,
-                file_metadata_with_content=file_metadata,
-                actor=self.actor,
-                agent_states=agent_states,
-            )
-
             if not ocr_response or len(ocr_response.pages) == 0:
+                await self._store_file_content(file_metadata, raw_markdown_text, source_id=source_id, agent_states=agent_states)
                 log_event(
                     "file_processor.ocr_no_text",
                     {
@@ -211,19 +195,30 @@ class FileProcessor:
                 {"filename": filename, "pages_to_process": len(ocr_response.pages)},
             )
 
-            # Chunk and embed with fallback logic
-            all_passages = await self._chunk_and_embed_with_fallback(
-                file_metadata=file_metadata,
-                ocr_response=ocr_response,
-                source_id=source_id,
+            await self.file_manager.update_file_status(
+                file_id=file_metadata.id, actor=self.actor, processing_status=FileProcessingStatus.EMBEDDING, chunks_embedded=0
+            )
+
+            # Chunk, embed and store with fallback logic. Storing the text (and its line index) doesn't depend on the
+            # passages, so it overlaps with chunking/embedding; both are awaited even if one fails.
+            ingested, stored = await asyncio.gather(
+                self._ingest_with_fallback(file_metadata=file_metadata, ocr_response=ocr_response, source_id=source_id),
+                self._store_file_content(file_metadata, raw_markdown_text, source_id=source_id, agent_states=agent_states),
+                return_exceptions=True,
             )
+            if isinstance(stored, BaseException):
+                if not isinstance(ingested, BaseException):
+                    # the file is marked as failed, don't leave its passages behind
+                    try:
+                        await self._delete_ingested(file_metadata, ingested)
+                    except Exception as cleanup_error:
+                        logger.warning(f"Failed to delete the passages of {filename} after storing its content failed: {cleanup_error}")
+                raise stored
+            if isinstance(ingested, BaseException):
+                raise ingested
+            all_passages, file_metadata = ingested, stored
 
             if not self.using_pinecone:
-                all_passages = await self.passage_manager.create_many_source_passages_async(
-                    passages=all_passages,
-                    file_metadata=file_metadata,
-                    actor=self.actor,
-                )
                 log_event(
                     "file_processor.passages_created",
                     {"filename": filename, "total_passages": len(all_passages)},
@@ -311,16 +306,10 @@ class FileProcessor:
             logger.info(f"Chunking imported file content for {filename}")
             log_event("file_processor.import_chunking_started", {"filename": filename, "content_length": len(content)})
 
-            # Chunk and embed using existing logic
-            all_passages = await self._chunk_and_embed_with_fallback(
-                file_metadata=file_metadata, ocr_response=ocr_response, source_id=source_id
-            )
+            # Chunk, embed and store passages using existing logic
+            all_passages = await self._ingest_with_fallback(file_metadata=file_metadata, ocr_response=ocr_response, source_id=source_id)
 
-            # Create passages in database (unless using Pinecone)
             if not self.using_pinecone:
-                all_passages = await self.passage_manager.create_many_source_passages_async(
-                    passages=all_passages, file_metadata=file_metadata, actor=self.actor
-                )
                 log_event("file_processor.import_passages_created", {"filename": filename, "total_passages": len(all_passages)})
 
             # Update file status to completed (valid transition from EMBEDDING)
@@ -0,0 +1,165 @@
+import asyncio
+from typing import Callable, List, Optional, Sequence
+
+from letta.log import get_logger
+from letta.otel.tracing import log_event, trace_method
+from letta.schemas.file import FileMetadata
+from letta.schemas.passage import Passage
+from letta.schemas.user import User
+from letta.services.file_manager import FileManager
+from letta.services.file_processor.embedder.base_embedder import BaseEmbedder
+from letta.services.passage_manager import PassageManager
+from letta.settings import settings
+
+logger = get_logger(__name__)
+
+_DONE = object()
+
+
+class IngestionPipeline:
+    """Chunks, embeds and stores a file's pages as concurrent stages connected by bounded queues.
+
+    The chunker runs in a worker thread and hands batches of `batch_size` chunks to a pool of embedding
+    workers, whose passages are written in chunk order as soon as they are ready. A batch holds one of
+    `max_batches_in_flight` slots from the moment it is chunked until it is written, so a slow embedding
+    endpoint or database stalls the chunker instead of letting chunks and embeddings pile up in memory.
+
+    Progress (`total_chunks` chunked so far, `chunks_embedded` written so far) is reported on the file
+    after every batch.
+    """
+
+    def __init__(
+        self,
+        file_metadata: FileMetadata,
+        source_id: str,
+        chunk: Callable[[object], List[str]],
+        embedder: BaseEmbedder,
+        actor: User,
+        file_manager: FileManager,
+        passage_manager: PassageManager,
+        store_passages: bool = True,
+        batch_size: Optional[int] = None,
+        embed_concurrency: Optional[int] = None,
+        max_batches_in_flight: Optional[int] = None,
+    ):
+        self.file_metadata = file_metadata
+        self.source_id = source_id
+        self.chunk = chunk
+        self.embedder = embedder
+        self.actor = actor
+        self.file_manager = file_manager
+        self.passage_manager = passage_manager
+        # pinecone embeds and stores the records itself and tracks progress on its own
+        self.store_passages = store_passages
+        self.batch_size = batch_size or embedder.embedding_config.batch_size
+        self.embed_concurrency = embed_concurrency or settings.file_ingestion_embed_concurrency
+        self.max_batches_in_flight = max(max_batches_in_flight or settings.file_ingestion_max_batches_in_flight, self.embed_concurrency)
+
+        self.total_chunks = 0
+        self.chunks_embedded = 0
+        # passages written so far (without their embeddings), kept so a failed run can be rolled back
+        self.passages: List[Passage] = []
+        self._in_flight = asyncio.Semaphore(self.max_batches_in_flight)
+        self._progress_lock = asyncio.Lock()
+
+    @trace_method
+    async def run(self, pages: Sequence) -> List[Passage]:
+        """Ingest `pages` and return the passages created, in chunk order."""
+        chunk_queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_batches_in_flight)
+        passage_queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_batches_in_flight)
+
+        tasks = [asyncio.create_task(self._chunk_pages(pages, chunk_queue))]
+        tasks += [asyncio.create_task(self._embed_batches(chunk_queue, passage_queue)) for _ in range(self.embed_concurrency)]
+        tasks.append(asyncio.create_task(self._write_batches(passage_queue)))
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        log_event(
+            "file_processor.ingestion_completed",
+            {"filename": self.file_metadata.file_name, "total_chunks": self.total_chunks, "total_passages": len(self.passages)},
+        )
+        return self.passages
+
+    async def _chunk_pages(self, pages: Sequence, chunk_queue: asyncio.Queue) -> None:
+        seq = 0
+        batch: List[str] = []
+        for page_index, page in enumerate(pages):
+            # chunking is CPU bound, keep it off the event loop so the other stages keep going
+            chunks = await asyncio.to_thread(self.chunk, page)
+            if not chunks:
+                log_event("file_processor.chunking_failed", {"filename": self.file_metadata.file_name, "page_index": page_index})
+                raise ValueError("No chunks created from text")
+
+            for chunk in chunks:
+                batch.append(chunk)
+                if len(batch) == self.batch_size:
+                    await self._in_flight.acquire()
+                    await chunk_queue.put((seq, batch))
+                    seq += 1
+                    batch = []
+            self.total_chunks += len(chunks)
+
+        if batch:
+            await self._in_flight.acquire()
+            await chunk_queue.put((seq, batch))
+        await self._report_progress()
+        for _ in range(self.embed_concurrency):
+            await chunk_queue.put(_DONE)
+
+    async def _embed_batches(self, chunk_queue: asyncio.Queue, passage_queue: asyncio.Queue) -> None:
+        while (item := await chunk_queue.get()) is not _DONE:
+            seq, chunks = item
+            passages = await self.embedder.generate_embedded_passages(
+                file_id=self.file_metadata.id,
+                source_id=self.source_id,
+                chunks=chunks,
+                actor=self.actor,
+            )
+            await passage_queue.put((seq, passages))
+        await passage_queue.put(_DONE)
+
+    async def _write_batches(self, passage_queue: asyncio.Queue) -> None:
+        # batches finish embedding out of order; hold on to early ones until their predecessors are written
+        pending = {}
+        next_seq = 0
+        workers_done = 0
+        while workers_done < self.embed_concurrency:
+            item = await passage_queue.get()
+            if item is _DONE:
+                workers_done += 1
+                continue
+            seq, passages = item
+            pending[seq] = passages
+            while next_seq in pending:
+                await self._write(pending.pop(next_seq))
+                next_seq += 1
+                self._in_flight.release()
+
+    async def _write(self, passages: List[Passage]) -> None:
+        if self.store_passages:
+            passages = await self.passage_manager.create_many_source_passages_async(
+                passages=passages,
+                file_metadata=self.file_metadata,
+                actor=self.actor,
+            )
+            self.chunks_embedded += len(passages)
+            # the vectors are in the database now, don't keep every one of them alive until the file is done
+            for passage in passages:
+                passage.embedding = None
+        self.passages.extend(passages)
+        await self._report_progress()
+
+    async def _report_progress(self) -> None:
+        # chunking and writing both report; serialize them so an older count never overwrites a newer one
+        async with self._progress_lock:
+            await self.file_manager.update_file_status(
+                file_id=self.file_metadata.id,
+                actor=self.actor,
+                total_chunks=self.total_chunks,
+                chunks_embedded=self.chunks_embedded,
+            )
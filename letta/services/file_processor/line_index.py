@@ -0,0 +1,231 @@
+"""Pre-computed line store for the grep_files and open_files tools.
+
+A `FileLineIndex` holds a file's content split into lines exactly as `LineChunker` presents them, plus
+a trigram index mapping every (case-folded) 3-character substring to the lines that contain it. It is
+built once when the file content is written and stored next to it (`file_contents.line_index`), and
+`FileLineIndexCache` keeps recently used indexes in memory.
+
+To grep, the literal runs that any match must contain are extracted from the regex; a file without one
+of their trigrams can't match, and within a file only lines containing all of them are run through the
+regex. Patterns without usable literals (e.g. `\\d+`) fall back to running the regex over every line.
+"""
+
+import json
+import re
+import struct
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from letta.helpers.singleton import singleton
+from letta.schemas.file import FileMetadata
+from letta.services.file_processor.chunker.line_chunker import LineChunker
+from letta.settings import settings
+
+try:
+    import re._parser as sre_parse
+    from re._constants import LITERAL, MAX_REPEAT, MIN_REPEAT, SUBPATTERN
+except ImportError:  # python < 3.11
+    import sre_parse
+    from sre_constants import LITERAL, MAX_REPEAT, MIN_REPEAT, SUBPATTERN
+
+LINE_INDEX_VERSION = 1
+
+_HEADER = struct.Struct(">III")
+
+# re.IGNORECASE also matches these with ASCII letters, so they are folded to them before indexing
+_CASE_FOLD = str.maketrans({"ſ": "s", "K": "k", "İ": "i", "ı": "i"})
+
+
+def _fold(text: str) -> str:
+    return text.translate(_CASE_FOLD).lower()
+
+
+def _line_trigrams(line: str) -> Set[str]:
+    folded = _fold(line)
+    return {folded[i : i + 3] for i in range(len(folded) - 2)}
+
+
+def _required_literals(parsed) -> List[str]:
+    """ASCII literal runs that every match of a parsed pattern must contain."""
+    literals: List[str] = []
+    run: List[str] = []
+
+    def flush():
+        if run:
+            literals.append("".join(run))
+            run.clear()
+
+    for op, arg in parsed:
+        if op is LITERAL and arg < 128:
+            run.append(chr(arg))
+            continue
+        flush()
+        if op is SUBPATTERN:
+            literals.extend(_required_literals(arg[-1]))
+        elif op in (MAX_REPEAT, MIN_REPEAT) and arg[0] >= 1:
+            literals.extend(_required_literals(arg[2]))
+    flush()
+    return literals
+
+
+def required_trigrams(pattern: str, flags: int = 0) -> Set[str]:
+    """Case-folded trigrams every match of `pattern` contains (empty if none can be derived)."""
+    try:
+        literals = _required_literals(sre_parse.parse(pattern, flags))
+    except Exception:
+        return set()
+    return {gram for literal in literals for gram in _line_trigrams(literal)}
+
+
+class FileLineIndex:
+    """A file's display lines plus a trigram -> line postings index."""
+
+    def __init__(self, lines: List[str], chunk_type: str, content_size: int, keys: List[str], counts: np.ndarray, ids: np.ndarray):
+        self.lines = lines
+        self.chunk_type = chunk_type
+        # size of the original content in bytes, for the grep size limits
+        self.content_size = content_size
+        self._keys = {key: i for i, key in enumerate(keys)}
+        self._key_list = keys
+        self._counts = counts
+        self._offsets = np.concatenate(([0], np.cumsum(counts, dtype=np.int64)))
+        self._ids = ids
+
+    @classmethod
+    def build(cls, file_metadata: FileMetadata) -> "FileLineIndex":
+        """Index the content of a file (CPU bound, run it in a thread for large files)."""
+        content = file_metadata.content or ""
+        lines, chunk_type = LineChunker().split_lines(file_metadata) if content else ([], "lines")
+
+        postings: Dict[str, List[int]] = {}
+        for i, line in enumerate(lines):
+            for gram in _line_trigrams(line):
+                postings.setdefault(gram, []).append(i)
+
+        keys = list(postings)
+        counts = np.fromiter((len(postings[key]) for key in keys), dtype=np.uint32, count=len(keys))
+        ids = np.fromiter((i for key in keys for i in postings[key]), dtype=np.uint32, count=int(counts.sum()))
+        return cls(lines, chunk_type, len(content.encode("utf-8")), keys, counts, ids)
+
+    def to_bytes(self) -> bytes:
+        header = json.dumps(
+            {
+                "version": LINE_INDEX_VERSION,
+                "chunk_type": self.chunk_type,
+                "content_size": self.content_size,
+                "lines": self.lines,
+                "keys": self._key_list,
+            }
+        ).encode("utf-8")
+        # postings are sorted, so storing them as deltas compresses much better
+        deltas = self._ids.copy()
+        if len(deltas):
+            deltas[1:] -= self._ids[:-1]
+            starts = self._offsets[:-1]
+            deltas[starts] = self._ids[starts]
+        body = _HEADER.pack(len(header), len(self._counts), len(deltas)) + header + self._counts.tobytes() + deltas.tobytes()
+        return zlib.compress(body)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Optional["FileLineIndex"]:
+        """Decode a stored index, or None if it was written by an incompatible version."""
+        body = zlib.decompress(data)
+        header_size, num_keys, num_ids = _HEADER.unpack_from(body)
+        position = _HEADER.size
+        header = json.loads(body[position : position + header_size])
+        if header.get("version") != LINE_INDEX_VERSION:
+            return None
+        position += header_size
+        counts = np.frombuffer(body, dtype=np.uint32, count=num_keys, offset=position)
+        position += 4 * num_keys
+        deltas = np.frombuffer(body, dtype=np.uint32, count=num_ids, offset=position)
+
+        ids = np.cumsum(deltas, dtype=np.int64)
+        if num_ids:
+            starts = np.concatenate(([0], np.cumsum(counts, dtype=np.int64)[:-1]))
+            bases = ids[starts] - deltas[starts]
+            ids -= np.repeat(bases, counts)
+        return cls(header["lines"], header["chunk_type"], header["content_size"], header["keys"], counts, ids.astype(np.uint32))
+
+    @property
+    def size_bytes(self) -> int:
+        """Approximate memory used by the index."""
+        return self.content_size + 4 * len(self._ids) + 100 * len(self._key_list) + 60 * len(self.lines)
+
+    def might_match(self, trigrams: Iterable[str]) -> bool:
+        return all(gram in self._keys for gram in trigrams)
+
+    def _postings(self, gram: str) -> np.ndarray:
+        i = self._keys[gram]
+        return self._ids[self._offsets[i] : self._offsets[i + 1]]
+
+    def candidate_lines(self, trigrams: Set[str]) -> Iterable[int]:
+        """0-based numbers of the lines that contain every trigram, in order."""
+        if not trigrams:
+            return range(len(self.lines))
+        if not self.might_match(trigrams):
+            return []
+        postings = sorted((self._postings(gram) for gram in trigrams), key=len)
+        candidates = postings[0]
+        for other in postings[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, other, assume_unique=True)
+        return candidates.tolist()
+
+    def search(self, pattern: re.Pattern, trigrams: Set[str], limit: Optional[int] = None) -> List[int]:
+        """0-based numbers of the lines whose (stripped) content matches `pattern`."""
+        matches = []
+        for i in self.candidate_lines(trigrams):
+            if pattern.search(self.lines[i].strip()):
+                matches.append(i)
+                if limit is not None and len(matches) >= limit:
+                    break
+        return matches
+
+    def format_lines(
+        self, file_name: Optional[str], start: Optional[int] = None, end: Optional[int] = None, validate_range: bool = False
+    ) -> List[str]:
+        """Numbered lines as `LineChunker.chunk_text` returns them."""
+        return LineChunker.format_lines(self.lines, self.chunk_type, file_name, start=start, end=end, validate_range=validate_range)
+
+
+@singleton
+class FileLineIndexCache:
+    """In-process LRU of file line indexes, bounded by their approximate size.
+
+    Entries are tagged with the content version they were built from (the `file_contents.updated_at`
+    stamp), so content rewritten by another worker is reloaded instead of served stale.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes or settings.file_line_index_cache_mb * 1024 * 1024
+        self._entries: "OrderedDict[str, Tuple[object, FileLineIndex]]" = OrderedDict()
+        self._size = 0
+
+    def get(self, file_id: str, version: object) -> Optional[FileLineIndex]:
+        entry = self._entries.get(file_id)
+        if entry is None or entry[0] != version:
+            return None
+        self._entries.move_to_end(file_id)
+        return entry[1]
+
+    def put(self, file_id: str, version: object, index: FileLineIndex) -> None:
+        self.invalidate(file_id)
+        self._entries[file_id] = (version, index)
+        self._size += index.size_bytes
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._size -= evicted.size_bytes
+
+    def invalidate(self, file_id: str) -> None:
+        entry = self._entries.pop(file_id, None)
+        if entry is not None:
+            self._size -= entry[1].size_bytes
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
@@ -11,6 +11,7 @@ from letta.schemas.block import Block as PydanticBlock, FileBlock as PydanticFil
 from letta.schemas.file import FileAgent as PydanticFileAgent, FileMetadata
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
+from letta.services.agent_state_cache import invalidates_agent_state
 from letta.utils import enforce_types
 
 logger = get_logger(__name__)
@@ -19,6 +20,7 @@ logger = get_logger(__name__)
 class FileAgentManager:
     """High-level helpers for CRUD / listing on the `files_agents` join table."""
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def attach_file(
@@ -108,6 +110,7 @@ class FileAgentManager:
                 await assoc.create_async(session, actor=actor)
                 return assoc.to_pydantic(), []
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def update_file_agent_by_id(
@@ -140,6 +143,7 @@ class FileAgentManager:
             await assoc.update_async(session, actor=actor)
             return assoc.to_pydantic()
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def update_file_agent_by_name(
@@ -166,6 +170,7 @@ class FileAgentManager:
             await assoc.update_async(session, actor=actor)
             return assoc.to_pydantic()
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def detach_file(self, *, agent_id: str, file_id: str, actor: PydanticUser) -> None:
@@ -174,6 +179,7 @@ class FileAgentManager:
             assoc = await self._get_association_by_file_id(session, agent_id, file_id, actor)
             await assoc.hard_delete_async(session, actor=actor)
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def detach_file_bulk(self, *, agent_file_pairs: List, actor: PydanticUser) -> int:  # List of (agent_id, file_id) tuples
@@ -371,6 +377,7 @@ class FileAgentManager:
             rows = (await session.execute(select(FileAgentModel).where(and_(*conditions)))).scalars().all()
             return [r.to_pydantic() for r in rows]
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def mark_access(self, *, agent_id: str, file_id: str, actor: PydanticUser) -> None:
@@ -388,6 +395,7 @@ class FileAgentManager:
             await session.execute(stmt)
             await session.commit()
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def mark_access_bulk(self, *, agent_id: str, file_names: List[str], actor: PydanticUser) -> None:
@@ -408,6 +416,7 @@ class FileAgentManager:
             await session.execute(stmt)
             await session.commit()
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def close_all_other_files(self, *, agent_id: str, keep_file_names: List[str], actor: PydanticUser) -> List[str]:
@@ -442,6 +451,7 @@ class FileAgentManager:
             await session.commit()
             return closed_file_names
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def enforce_max_open_files_and_open(
@@ -573,6 +583,7 @@ class FileAgentManager:
 
             return closed_file_names, file_was_already_open, previous_ranges
 
+    @invalidates_agent_state
     @enforce_types
     @trace_method
     async def attach_files_bulk(
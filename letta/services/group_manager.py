@@ -4,6 +4,7 @@ from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
 
 from letta.orm.agent import Agent as AgentModel
+from letta.orm.agent_counters import adjust_message_counts, adjust_message_counts_async, removal_deltas
 from letta.orm.errors import NoResultFound
 from letta.orm.group import Group as GroupModel
 from letta.orm.message import Message as MessageModel
@@ -13,6 +14,7 @@ from letta.schemas.letta_message import LettaMessage
 from letta.schemas.message import Message as PydanticMessage
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
+from letta.services.agent_state_cache import AgentStateCache, invalidates_agent_state_dependencies
 from letta.utils import enforce_types
 
 
@@ -106,6 +108,7 @@ class GroupManager:
                 self._process_shared_block_relationship(session=session, group=new_group, block_ids=group.shared_block_ids)
 
             new_group.create(session, actor=actor)
+            AgentStateCache().invalidate(*group.agent_ids, new_group.manager_agent_id)
             return new_group.to_pydantic()
 
     @enforce_types
@@ -156,8 +159,10 @@ class GroupManager:
                 await self._process_shared_block_relationship_async(session=session, group=new_group, block_ids=group.shared_block_ids)
 
             await new_group.create_async(session, actor=actor)
+            AgentStateCache().invalidate(*group.agent_ids, new_group.manager_agent_id)
             return new_group.to_pydantic()
 
+    @invalidates_agent_state_dependencies("group_id")
     @enforce_types
     @trace_method
     async def modify_group_async(self, group_id: str, group_update: GroupUpdate, actor: PydanticUser) -> PydanticGroup:
@@ -219,8 +224,11 @@ class GroupManager:
                 )
 
             await group.update_async(session, actor=actor)
+            # agents joining the group are not cached under the group id yet
+            AgentStateCache().invalidate(*(group_update.agent_ids or []), manager_agent_id)
             return group.to_pydantic()
 
+    @invalidates_agent_state_dependencies("group_id")
     @enforce_types
     @trace_method
     def delete_group(self, group_id: str, actor: PydanticUser) -> None:
@@ -229,6 +237,7 @@ class GroupManager:
             group = GroupModel.read(db_session=session, identifier=group_id, actor=actor)
             group.hard_delete(session)
 
+    @invalidates_agent_state_dependencies("group_id")
     @enforce_types
     @trace_method
     async def delete_group_async(self, group_id: str, actor: PydanticUser) -> None:
@@ -318,9 +327,13 @@ class GroupManager:
             group = GroupModel.read(db_session=session, identifier=group_id, actor=actor)
 
             # Delete all messages in the group
-            session.query(MessageModel).filter(
-                MessageModel.organization_id == actor.organization_id, MessageModel.group_id == group_id
-            ).delete(synchronize_session=False)
+            delete_stmt = (
+                delete(MessageModel)
+                .where(MessageModel.organization_id == actor.organization_id, MessageModel.group_id == group_id)
+                .returning(MessageModel.agent_id)
+            )
+            deleted_agent_ids = session.execute(delete_stmt).scalars().all()
+            adjust_message_counts(session, removal_deltas(deleted_agent_ids))
 
             session.commit()
 
@@ -332,13 +345,17 @@ class GroupManager:
             group = await GroupModel.read_async(db_session=session, identifier=group_id, actor=actor)
 
             # Delete all messages in the group
-            delete_stmt = delete(MessageModel).where(
-                MessageModel.organization_id == actor.organization_id, MessageModel.group_id == group_id
+            delete_stmt = (
+                delete(MessageModel)
+                .where(MessageModel.organization_id == actor.organization_id, MessageModel.group_id == group_id)
+                .returning(MessageModel.agent_id)
             )
-            await session.execute(delete_stmt)
+            deleted_agent_ids = (await session.execute(delete_stmt)).scalars().all()
+            await adjust_message_counts_async(session, removal_deltas(deleted_agent_ids))
 
             await session.commit()
 
+    @invalidates_agent_state_dependencies("group_id")
     @enforce_types
     @trace_method
     def bump_turns_counter(self, group_id: str, actor: PydanticUser) -> int:
@@ -351,6 +368,7 @@ class GroupManager:
             group.update(session, actor=actor)
             return group.turns_counter
 
+    @invalidates_agent_state_dependencies("group_id")
     @enforce_types
     @trace_method
     async def bump_turns_counter_async(self, group_id: str, actor: PydanticUser) -> int:
@@ -363,6 +381,7 @@ class GroupManager:
             await group.update_async(session, actor=actor)
             return group.turns_counter
 
+    @invalidates_agent_state_dependencies("group_id")
     @enforce_types
     def get_last_processed_message_id_and_update(self, group_id: str, last_processed_message_id: str, actor: PydanticUser) -> str:
         with db_registry.session() as session:
@@ -376,6 +395,7 @@ class GroupManager:
 
             return prev_last_processed_message_id
 
+    @invalidates_agent_state_dependencies("group_id")
     @enforce_types
     @trace_method
     async def get_last_processed_message_id_and_update_async(
@@ -21,6 +21,7 @@ from letta.constants import (
 )
 from letta.helpers import ToolRulesSolver
 from letta.helpers.datetime_helpers import get_local_time
+from letta.helpers.sqlite_vector_index import SQLiteVectorIndex
 from letta.llm_api.llm_client import LLMClient
 from letta.orm.agent import Agent as AgentModel
 from letta.orm.agents_tags import AgentsTags
@@ -28,6 +29,7 @@ from letta.orm.archives_agents import ArchivesAgents
 from letta.orm.errors import NoResultFound
 from letta.orm.identity import Identity
 from letta.orm.passage import ArchivalPassage, SourcePassage
+from letta.orm.passage_tag import PassageTag
 from letta.orm.sources_agents import SourcesAgents
 from letta.orm.sqlite_functions import adapt_array
 from letta.otel.tracing import trace_method
@@ -35,7 +37,7 @@ from letta.prompts import gpt_system
 from letta.prompts.prompt_generator import PromptGenerator
 from letta.schemas.agent import AgentState, AgentType
 from letta.schemas.embedding_config import EmbeddingConfig
-from letta.schemas.enums import MessageRole
+from letta.schemas.enums import MessageRole, TagMatchMode
 from letta.schemas.letta_message_content import TextContent
 from letta.schemas.memory import Memory
 from letta.schemas.message import Message, MessageCreate
@@ -691,6 +693,30 @@ def _apply_tag_filter(query, tags: Optional[List[str]], match_all_tags: bool):
     return query
 
 
+def _apply_passage_tag_filter(query, tags: Optional[List[str]], tag_match_mode: Optional[TagMatchMode]):
+    """
+    Apply tag-based filtering to an archival passage query using the passage_tags junction table.
+
+    Each check is a correlated EXISTS probe on the (passage_id, tag) unique index, so the database
+    filters before ranking and LIMIT, instead of the caller discarding rows afterwards.
+
+    Args:
+        query: The SQLAlchemy query object to be modified.
+        tags (Optional[List[str]]): A list of tags to filter passages.
+        tag_match_mode (Optional[TagMatchMode]): ALL requires every tag, ANY (default) requires at least one.
+
+    Returns:
+        The modified query with tag filters applied.
+    """
+    if tags:
+        if tag_match_mode == TagMatchMode.ALL:
+            for tag in set(tags):
+                query = query.where(exists().where((PassageTag.passage_id == ArchivalPassage.id) & (PassageTag.tag == tag)))
+        else:
+            query = query.where(exists().where((PassageTag.passage_id == ArchivalPassage.id) & (PassageTag.tag.in_(tags))))
+    return query
+
+
 def _apply_identity_filters(query, identity_id: Optional[str], identifier_keys: Optional[List[str]]):
     """
     Apply identity-related filters to the agent query.
@@ -811,7 +837,7 @@ async def build_passage_query(
             provider_type=embedding_config.embedding_endpoint_type,
             actor=actor,
         )
-        embeddings = await embedding_client.request_embeddings([query_text], embedding_config)
+        embeddings = await embedding_client.request_embeddings_cached([query_text], embedding_config)
         embedded_text = np.array(embeddings[0])
         embedded_text = np.pad(embedded_text, (0, MAX_EMBEDDING_DIM - embedded_text.shape[0]), mode="constant").tolist()
 
@@ -1025,7 +1051,7 @@ async def build_source_passage_query(
             provider_type=embedding_config.embedding_endpoint_type,
             actor=actor,
         )
-        embeddings = await embedding_client.request_embeddings([query_text], embedding_config)
+        embeddings = await embedding_client.request_embeddings_cached([query_text], embedding_config)
         embedded_text = np.array(embeddings[0])
         embedded_text = np.pad(embedded_text, (0, MAX_EMBEDDING_DIM - embedded_text.shape[0]), mode="constant").tolist()
 
@@ -1113,6 +1139,8 @@ async def build_agent_passage_query(
     embed_query: bool = False,
     ascending: bool = True,
     embedding_config: Optional[EmbeddingConfig] = None,
+    tags: Optional[List[str]] = None,
+    tag_match_mode: Optional[TagMatchMode] = None,
 ) -> Select:
     """Build query for agent passages with all filters applied."""
 
@@ -1127,7 +1155,7 @@ async def build_agent_passage_query(
             provider_type=embedding_config.embedding_endpoint_type,
             actor=actor,
         )
-        embeddings = await embedding_client.request_embeddings([query_text], embedding_config)
+        embeddings = await embedding_client.request_embeddings_cached([query_text], embedding_config)
         embedded_text = np.array(embeddings[0])
         embedded_text = np.pad(embedded_text, (0, MAX_EMBEDDING_DIM - embedded_text.shape[0]), mode="constant").tolist()
 
@@ -1143,6 +1171,7 @@ async def build_agent_passage_query(
         query = query.where(ArchivalPassage.created_at >= start_date)
     if end_date:
         query = query.where(ArchivalPassage.created_at <= end_date)
+    query = _apply_passage_tag_filter(query, tags, tag_match_mode)
 
     # Handle text search or vector search
     if embedded_text:
@@ -1199,6 +1228,72 @@ async def build_agent_passage_query(
     return query
 
 
+@trace_method
+async def search_agent_passages_sqlite_async(
+    session,
+    actor: User,
+    agent_id: str,
+    query_text: str,
+    embedding_config: EmbeddingConfig,
+    limit: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    tag_match_mode: Optional[TagMatchMode] = None,
+) -> List[ArchivalPassage]:
+    """Vector search over agent passages on SQLite using the in-process embedding matrix.
+
+    Replaces ordering by the per-row `cosine_distance` UDF with one batched top-k per archive.
+    Non-vector filters (dates, cursors, tags) are still evaluated in SQL, but only as an id lookup.
+    """
+    embedding_client = LLMClient.create(
+        provider_type=embedding_config.embedding_endpoint_type,
+        actor=actor,
+    )
+    embeddings = await embedding_client.request_embeddings_cached([query_text], embedding_config)
+    query_embedding = np.array(embeddings[0], dtype=np.float32)
+
+    archive_ids = (await session.execute(select(ArchivesAgents.archive_id).where(ArchivesAgents.agent_id == agent_id))).scalars().all()
+    if not archive_ids:
+        return []
+
+    candidate_ids = None
+    if start_date or end_date or before or after or tags:
+        filter_query = await build_agent_passage_query(
+            actor=actor,
+            agent_id=agent_id,
+            start_date=start_date,
+            end_date=end_date,
+            before=before,
+            after=after,
+            tags=tags,
+            tag_match_mode=tag_match_mode,
+        )
+        filter_query = filter_query.with_only_columns(ArchivalPassage.id).order_by(None)
+        candidate_ids = set((await session.execute(filter_query)).scalars().all())
+        if not candidate_ids:
+            return []
+
+    ranked = await SQLiteVectorIndex().search_async(
+        session=session,
+        organization_id=actor.organization_id,
+        archive_ids=list(archive_ids),
+        query_embedding=query_embedding,
+        dim=embedding_config.embedding_dim or query_embedding.shape[0],
+        limit=limit,
+        candidate_ids=candidate_ids,
+    )
+    if not ranked:
+        return []
+
+    ranked_ids = [passage_id for passage_id, _ in ranked]
+    result = await session.execute(select(ArchivalPassage).where(ArchivalPassage.id.in_(ranked_ids)))
+    passages_by_id = {passage.id: passage for passage in result.scalars().all()}
+    return [passages_by_id[passage_id] for passage_id in ranked_ids if passage_id in passages_by_id]
+
+
 def calculate_base_tools(is_v2: bool) -> Set[str]:
     if is_v2:
         return (set(BASE_TOOLS) - set(DEPRECATED_LETTA_TOOLS)) | set(BASE_MEMORY_TOOLS_V2)
@@ -19,6 +19,7 @@ from letta.schemas.identity import (
 )
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
+from letta.services.agent_state_cache import AgentStateCache, invalidates_agent_state_dependencies
 from letta.settings import DatabaseChoice, settings
 from letta.utils import enforce_types
 
@@ -110,6 +111,7 @@ class IdentityManager:
         await new_identity.create_async(db_session=db_session, actor=actor)
         return new_identity.to_pydantic()
 
+    @invalidates_agent_state_dependencies(include_result=True)
     @enforce_types
     @trace_method
     async def upsert_identity_async(self, identity: IdentityUpsert, actor: PydanticUser) -> PydanticIdentity:
@@ -136,6 +138,7 @@ class IdentityManager:
                     db_session=session, existing_identity=existing_identity, identity=identity_update, actor=actor, replace=True
                 )
 
+    @invalidates_agent_state_dependencies("identity_id")
     @enforce_types
     @trace_method
     async def update_identity_async(
@@ -197,8 +200,11 @@ class IdentityManager:
                 replace=replace,
             )
         await existing_identity.update_async(db_session=db_session, actor=actor)
+        # agents linked by this update are not cached under the identity id yet
+        AgentStateCache().invalidate(*(identity.agent_ids or []))
         return existing_identity.to_pydantic()
 
+    @invalidates_agent_state_dependencies("identity_id")
     @enforce_types
     @trace_method
     async def upsert_identity_properties_async(
@@ -216,6 +222,7 @@ class IdentityManager:
                 replace=True,
             )
 
+    @invalidates_agent_state_dependencies("identity_id")
     @enforce_types
     @trace_method
     async def delete_identity_async(self, identity_id: str, actor: PydanticUser) -> None:
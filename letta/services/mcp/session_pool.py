@@ -0,0 +1,269 @@
+"""Warm MCP client sessions shared across tool calls.
+
+Connecting an MCP client starts a process (stdio) or opens a connection and runs the `initialize` handshake (SSE,
+streamable HTTP), so doing it for every tool call dominates the call's latency. `MCPSessionPool` keeps connected
+clients keyed by server config and caller, and hands them out to concurrent calls (a `ClientSession` multiplexes
+requests):
+    - a session that died (its transport failed) or that fails a ping after `mcp_session_health_check_interval`
+      seconds idle is replaced by a new connection on checkout
+    - a session whose transport fails during a call (see `TRANSPORT_ERRORS`) is dropped, so the next call reconnects;
+      other errors, timeouts and cancellations only fail their own call
+    - a dropped session is closed once the last call still using it is done
+    - sessions idle for `mcp_session_idle_timeout` seconds are closed in the background
+    - at most `mcp_max_concurrent_calls_per_server` calls run against one server config at a time
+    - tool lists are cached for `mcp_tool_list_cache_ttl` seconds
+
+Each session is opened and closed by its own task: the transports are anyio context managers, which have to be exited
+by the task that entered them.
+"""
+
+import asyncio
+import hashlib
+import time
+import weakref
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import anyio
+import httpx
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+from letta.functions.mcp_client.types import BaseServerConfig
+from letta.log import get_logger
+from letta.services.mcp.base_client import AsyncBaseMCPClient
+from letta.settings import tool_settings
+
+logger = get_logger(__name__)
+
+# Raised by a call whose session can't be used anymore (the server process exited, the connection dropped)
+TRANSPORT_ERRORS = (
+    ConnectionError,
+    EOFError,
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    httpx.TransportError,
+)
+
+
+def server_config_hash(server_config: BaseServerConfig) -> str:
+    """Digest of everything that determines the connection, credentials and environment included."""
+    return hashlib.sha256(server_config.model_dump_json().encode("utf-8")).hexdigest()
+
+
+def is_transport_error(error: BaseException) -> bool:
+    """Whether `error` means the session is broken, rather than that one call failed."""
+    if isinstance(error, McpError):
+        return error.error.code == CONNECTION_CLOSED
+    return isinstance(error, TRANSPORT_ERRORS)
+
+
+class PooledMCPSession:
+    """A connected client and the task that owns its transport."""
+
+    def __init__(self, client: AsyncBaseMCPClient):
+        self.client = client
+        self.active_calls = 0
+        # dropped from the pool, closed once `active_calls` reaches 0
+        self.retired = False
+        self.last_used = time.monotonic()
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._error: Optional[BaseException] = None
+
+    @property
+    def alive(self) -> bool:
+        return self._task is not None and not self._task.done() and not self._closing.is_set()
+
+    async def open(self) -> None:
+        """Connect the client, raising what `connect_to_server` raised."""
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=tool_settings.mcp_connect_to_server_timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            raise ConnectionError(f"Timed out connecting to MCP server '{self.client.server_config.server_name}'")
+        if self._error is not None:
+            await self._task
+            raise self._error
+
+    async def _run(self) -> None:
+        try:
+            await self.client.connect_to_server()
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._ready.set()
+        try:
+            if self._error is None:
+                await self._closing.wait()
+        finally:
+            try:
+                await self.client.cleanup()
+            except Exception as e:
+                logger.debug(f"Error closing MCP session: {e}")
+
+    async def ping(self) -> bool:
+        try:
+            await asyncio.wait_for(self.client.session.send_ping(), timeout=tool_settings.mcp_connect_to_server_timeout)
+            return True
+        except Exception as e:
+            logger.info(f"MCP session failed its health check, reconnecting: {e}")
+            return False
+
+    async def close(self) -> None:
+        self._closing.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, timeout=tool_settings.mcp_connect_to_server_timeout)
+            except Exception as e:
+                logger.debug(f"MCP session did not close cleanly: {e}")
+
+
+class MCPSessionPool:
+    """Connected MCP clients of one event loop, see the module docstring."""
+
+    def __init__(self):
+        self._sessions: Dict[Tuple, PooledMCPSession] = {}
+        # one connect at a time per key, so concurrent first calls share the new session; like the per-server
+        # semaphores, an entry only lives while a call holds or waits for it
+        self._connect_locks: Dict[Tuple, List] = {}
+        self._server_limits: Dict[str, List] = {}
+        self._tool_lists: Dict[Tuple, Tuple[float, List[Any]]] = {}
+        self._reaper: Optional[asyncio.Task] = None
+        # sessions opened, for monitoring and tests
+        self.connects = 0
+
+    @property
+    def size(self) -> int:
+        return len(self._sessions)
+
+    @asynccontextmanager
+    async def session(
+        self, key: Tuple, server_key: str, connect: Callable[[], Awaitable[AsyncBaseMCPClient]]
+    ) -> AsyncIterator[AsyncBaseMCPClient]:
+        """
+        Check out the connected client for `key`, connecting it with `connect` if there is no usable one.
+
+        Args:
+            key: Identifies the session, e.g. (server config hash, actor, agent)
+            server_key: Calls with the same server key share one concurrency limit
+            connect: Creates the (not yet connected) client
+        """
+        async with _hold(self._server_limits, server_key, partial(asyncio.Semaphore, tool_settings.mcp_max_concurrent_calls_per_server)):
+            pooled = await self._checkout(key, connect)
+            pooled.active_calls += 1
+            try:
+                yield pooled.client
+            except Exception as e:
+                if is_transport_error(e) or not pooled.alive:
+                    await self._evict(key, pooled)
+                raise
+            finally:
+                pooled.active_calls -= 1
+                pooled.last_used = time.monotonic()
+                if pooled.retired and not pooled.active_calls:
+                    await pooled.close()
+
+    async def _checkout(self, key: Tuple, connect: Callable[[], Awaitable[AsyncBaseMCPClient]]) -> PooledMCPSession:
+        async with _hold(self._connect_locks, key, asyncio.Lock):
+            pooled = self._sessions.get(key)
+            if pooled is not None:
+                idle = time.monotonic() - pooled.last_used
+                if pooled.alive and (pooled.active_calls or idle < tool_settings.mcp_session_health_check_interval or await pooled.ping()):
+                    return pooled
+                await self._evict(key, pooled)
+
+            pooled = PooledMCPSession(await connect())
+            await pooled.open()
+            self.connects += 1
+            self._sessions[key] = pooled
+            self._start_reaper()
+            return pooled
+
+    async def _evict(self, key: Tuple, pooled: PooledMCPSession) -> None:
+        """Drop the session from the pool, closing it now or when the last call using it is done."""
+        if self._sessions.get(key) is pooled:
+            del self._sessions[key]
+        pooled.retired = True
+        if not pooled.active_calls:
+            await pooled.close()
+
+    async def list_tools(self, key: Tuple, list_tools: Callable[[], Awaitable[List[Any]]]) -> List[Any]:
+        """Tool list for `key` from the cache, or from `list_tools` (which is cached if it succeeds)."""
+        cached = self._tool_lists.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            return list(cached[1])
+        tools = await list_tools()
+        self._tool_lists[key] = (time.monotonic() + tool_settings.mcp_tool_list_cache_ttl, tools)
+        return list(tools)
+
+    def invalidate_tool_lists(self) -> None:
+        self._tool_lists.clear()
+
+    def _start_reaper(self) -> None:
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap())
+
+    async def _reap(self) -> None:
+        """Close idle and dead sessions until there are none left."""
+        while self._sessions:
+            await asyncio.sleep(min(tool_settings.mcp_session_idle_timeout, tool_settings.mcp_session_health_check_interval))
+            now = time.monotonic()
+            for key, pooled in list(self._sessions.items()):
+                if not pooled.alive or (not pooled.active_calls and now - pooled.last_used >= tool_settings.mcp_session_idle_timeout):
+                    await self._evict(key, pooled)
+            self._tool_lists = {key: entry for key, entry in self._tool_lists.items() if entry[0] > now}
+
+    async def close(self) -> None:
+        """Close all sessions."""
+        if self._reaper is not None:
+            self._reaper.cancel()
+        sessions, self._sessions = self._sessions, {}
+        await asyncio.gather(*(pooled.close() for pooled in sessions.values()))
+        self._tool_lists.clear()
+
+
+@asynccontextmanager
+async def _hold(table: Dict, key: Any, create: Callable[[], Any]) -> AsyncIterator[None]:
+    """Hold the lock or semaphore of `key` in `table`, dropping the entry once nobody holds or waits for it."""
+    entry = table.get(key)
+    if entry is None:
+        entry = table[key] = [create(), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del table[key]
+
+
+# keyed by the loop itself rather than its id, so the pool of a closed loop is never handed to a new one
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, MCPSessionPool]" = weakref.WeakKeyDictionary()
+
+
+def get_mcp_session_pool() -> MCPSessionPool:
+    """The pool of the running event loop (sessions can't move between loops)."""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = MCPSessionPool()
+    return pool
+
+
+def invalidate_mcp_tool_lists() -> None:
+    """Drop the cached tool lists of every event loop's pool, e.g. when an MCP server was updated or deleted."""
+    for pool in list(_pools.values()):
+        pool.invalidate_tool_lists()
+
+
+async def close_mcp_session_pools() -> None:
+    """Close the sessions of the running event loop's pool."""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.close()
@@ -3,7 +3,7 @@ import os
 import secrets
 import uuid
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, AsyncContextManager, Dict, List, Optional, Tuple, Union
 
 from fastapi import HTTPException
 from sqlalchemy import delete, null
@@ -36,6 +36,7 @@ from letta.schemas.mcp import (
 from letta.schemas.tool import Tool as PydanticTool, ToolCreate
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
+from letta.services.mcp.session_pool import get_mcp_session_pool, invalidate_mcp_tool_lists, server_config_hash
 from letta.services.mcp.sse_client import MCP_CONFIG_TOPLEVEL_KEY, AsyncSSEMCPClient
 from letta.services.mcp.stdio_client import AsyncStdioMCPClient
 from letta.services.mcp.streamable_http_client import AsyncStreamableHTTPMCPClient
@@ -62,11 +63,16 @@ class MCPManager:
             mcp_server_id = await self.get_mcp_server_id_by_name(mcp_server_name, actor=actor)
             mcp_config = await self.get_mcp_server_by_id_async(mcp_server_id, actor=actor)
             server_config = mcp_config.to_config()
-            mcp_client = await self.get_mcp_client(server_config, actor, agent_id=agent_id)
-            await mcp_client.connect_to_server()
+            if tool_settings.mcp_session_pool:
+                tools = await get_mcp_session_pool().list_tools(
+                    self._session_key(server_config, actor, agent_id), lambda: self._list_tools_pooled(server_config, actor, agent_id)
+                )
+            else:
+                mcp_client = await self.get_mcp_client(server_config, actor, agent_id=agent_id)
+                await mcp_client.connect_to_server()
 
-            # list tools
-            tools = await mcp_client.list_tools()
+                # list tools
+                tools = await mcp_client.list_tools()
             # Add health information to each tool
             for tool in tools:
                 if tool.inputSchema:
@@ -108,11 +114,15 @@ class MCPManager:
                     raise ValueError(f"MCP server {mcp_server_name} not found in config.")
                 server_config = mcp_config[mcp_server_name]
 
-            mcp_client = await self.get_mcp_client(server_config, actor, agent_id=agent_id)
-            await mcp_client.connect_to_server()
+            if tool_settings.mcp_session_pool:
+                async with self._pooled_session(server_config, actor, agent_id) as client:
+                    result, success = await client.execute_tool(tool_name, tool_args)
+            else:
+                mcp_client = await self.get_mcp_client(server_config, actor, agent_id=agent_id)
+                await mcp_client.connect_to_server()
 
-            # call tool
-            result, success = await mcp_client.execute_tool(tool_name, tool_args)
+                # call tool
+                result, success = await mcp_client.execute_tool(tool_name, tool_args)
             logger.info(f"MCP Result: {result}, Success: {success}")
             # TODO: change to pydantic tool
             return result, success
@@ -257,6 +267,7 @@ class MCPManager:
                 setattr(mcp_server, key, value)
 
             mcp_server = await mcp_server.update_async(db_session=session, actor=actor)
+            invalidate_mcp_tool_lists()
 
             # Save the updated tool to the database mcp_server = await mcp_server.update_async(db_session=session, actor=actor)
             return mcp_server.to_pydantic()
@@ -380,6 +391,7 @@ class MCPManager:
                 )
 
                 await session.commit()
+                invalidate_mcp_tool_lists()
             except NoResultFound:
                 await session.rollback()
                 raise ValueError(f"MCP server with id {mcp_server_id} not found.")
@@ -444,6 +456,36 @@ class MCPManager:
                                 continue
         return mcp_server_list
 
+    @staticmethod
+    def _session_key(
+        server_config: Union[SSEServerConfig, StdioServerConfig, StreamableHTTPServerConfig], actor: PydanticUser, agent_id: Optional[str]
+    ) -> Tuple[str, str, Optional[str]]:
+        """
+        Pooled session key. Sessions are never shared between agents: remote servers are sent the agent's ID as a
+        header, and a stdio server is a process that keeps whatever state one agent's calls left in it.
+        """
+        return server_config_hash(server_config), actor.id, agent_id
+
+    def _pooled_session(
+        self,
+        server_config: Union[SSEServerConfig, StdioServerConfig, StreamableHTTPServerConfig],
+        actor: PydanticUser,
+        agent_id: Optional[str] = None,
+    ) -> AsyncContextManager[Union[AsyncSSEMCPClient, AsyncStdioMCPClient, AsyncStreamableHTTPMCPClient]]:
+        """Check out a connected client from the session pool, see `letta/services/mcp/session_pool.py`."""
+        key = self._session_key(server_config, actor, agent_id)
+        # calls to one server config share its concurrency limit, whoever makes them
+        return get_mcp_session_pool().session(key, key[0], lambda: self.get_mcp_client(server_config, actor, agent_id=agent_id))
+
+    async def _list_tools_pooled(
+        self,
+        server_config: Union[SSEServerConfig, StdioServerConfig, StreamableHTTPServerConfig],
+        actor: PydanticUser,
+        agent_id: Optional[str] = None,
+    ) -> List[MCPTool]:
+        async with self._pooled_session(server_config, actor, agent_id) as client:
+            return await client.list_tools()
+
     async def get_mcp_client(
         self,
         server_config: Union[SSEServerConfig, StdioServerConfig, StreamableHTTPServerConfig],
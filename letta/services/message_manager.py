@@ -8,6 +8,8 @@ from sqlalchemy import delete, exists, func, select, text
 from letta.constants import CONVERSATION_SEARCH_TOOL_NAME, DEFAULT_MESSAGE_TOOL, DEFAULT_MESSAGE_TOOL_KWARG
 from letta.log import get_logger
 from letta.orm.agent import Agent as AgentModel
+from letta.orm.agent_context_message import in_context_messages_query
+from letta.orm.agent_counters import adjust_message_counts_async, get_agent_message_count_async, removal_deltas
 from letta.orm.errors import NoResultFound
 from letta.orm.message import Message as MessageModel
 from letta.otel.tracing import trace_method
@@ -20,6 +22,7 @@ from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
 from letta.services.file_manager import FileManager
 from letta.services.helpers.agent_manager_helper import validate_agent_exists_async
+from letta.services.step_write_buffer import ensure_steps_written
 from letta.settings import DatabaseChoice, settings
 from letta.utils import enforce_types
 
@@ -253,6 +256,22 @@ class MessageManager:
             results = await MessageModel.read_multiple_async(db_session=session, identifiers=message_ids, actor=actor)
             return self._get_messages_by_id_postprocess(results, message_ids)
 
+    @enforce_types
+    @trace_method
+    def get_in_context_messages(self, agent_id: str, actor: PydanticUser) -> List[PydanticMessage]:
+        """Fetch the messages in the agent's context window, in order."""
+        with db_registry.session() as session:
+            results = session.execute(in_context_messages_query(agent_id, actor.organization_id)).scalars().all()
+            return [msg.to_pydantic() for msg in results]
+
+    @enforce_types
+    @trace_method
+    async def get_in_context_messages_async(self, agent_id: str, actor: PydanticUser) -> List[PydanticMessage]:
+        """Fetch the messages in the agent's context window, in order. Async version of above function."""
+        async with db_registry.async_session() as session:
+            results = (await session.execute(in_context_messages_query(agent_id, actor.organization_id))).scalars().all()
+            return [msg.to_pydantic() for msg in results]
+
     def _get_messages_by_id_postprocess(
         self,
         results: List[MessageModel],
@@ -356,6 +375,9 @@ class MessageManager:
                             media_type=content.source.media_type,
                             detail=content.source.detail,
                         )
+        # messages reference their step, which may still be in the write-behind buffer
+        await ensure_steps_written({message.step_id for message in pydantic_msgs if message.step_id})
+
         orm_messages = self._create_many_preprocess(pydantic_msgs, actor)
         async with db_registry.async_session() as session:
             created_messages = await MessageModel.batch_create_async(orm_messages, session, actor=actor, no_commit=True, no_refresh=True)
@@ -691,6 +713,33 @@ class MessageManager:
         async with db_registry.async_session() as session:
             return await MessageModel.size_async(db_session=session, actor=actor, role=role, agent_id=agent_id)
 
+    @enforce_types
+    @trace_method
+    async def message_exists_by_otid_async(self, agent_id: str, otid: str, actor: PydanticUser) -> bool:
+        """Check whether the agent has a message with this offline threading ID that was not persisted as errored."""
+        async with db_registry.async_session() as session:
+            query = select(
+                exists().where(
+                    MessageModel.agent_id == agent_id,
+                    MessageModel.otid == otid,
+                    MessageModel.organization_id == actor.organization_id,
+                    MessageModel.is_err.isnot(True),
+                )
+            )
+            result = await session.execute(query)
+            return bool(result.scalar())
+
+    @enforce_types
+    @trace_method
+    async def agent_message_count_async(self, agent_id: str, actor: PydanticUser) -> int:
+        """Get the number of messages stored for an agent from its cached counter.
+
+        Cheaper than `size_async` (no scan of the messages table), intended for the memory metadata header.
+        """
+        async with db_registry.async_session() as session:
+            await validate_agent_exists_async(session, agent_id, actor)
+            return await get_agent_message_count_async(session, agent_id)
+
     @enforce_types
     @trace_method
     def list_user_messages_for_agent(
@@ -977,6 +1026,7 @@ class MessageManager:
                 stmt = stmt.where(~MessageModel.id.in_(exclude_ids))
 
             result = await session.execute(stmt)
+            await adjust_message_counts_async(session, {agent_id: -result.rowcount})
 
             # 4) commit once
             await session.commit()
@@ -1029,8 +1079,14 @@ class MessageManager:
                 agent_ids = [row[0] for row in agent_result.fetchall() if row[0]]
 
             # issue a CORE DELETE against the mapped class for specific message IDs
-            stmt = delete(MessageModel).where(MessageModel.id.in_(message_ids)).where(MessageModel.organization_id == actor.organization_id)
-            result = await session.execute(stmt)
+            stmt = (
+                delete(MessageModel)
+                .where(MessageModel.id.in_(message_ids))
+                .where(MessageModel.organization_id == actor.organization_id)
+                .returning(MessageModel.agent_id)
+            )
+            deleted_agent_ids = (await session.execute(stmt)).scalars().all()
+            await adjust_message_counts_async(session, removal_deltas(deleted_agent_ids))
 
             # commit once
             await session.commit()
@@ -1049,7 +1105,7 @@ class MessageManager:
                         raise  # Re-raise the exception in strict mode
 
             # return the number of rows deleted
-            return result.rowcount
+            return len(deleted_agent_ids)
 
     @enforce_types
     @trace_method
@@ -1110,7 +1166,7 @@ class MessageManager:
                         provider_type=embedding_config.embedding_endpoint_type,
                         actor=actor,
                     )
-                    embeddings = await embedding_client.request_embeddings([query_text], embedding_config)
+                    embeddings = await embedding_client.request_embeddings_cached([query_text], embedding_config)
                     query_embedding = embeddings[0]
 
                 # use turbopuffer for search
@@ -0,0 +1,145 @@
+"""In-process catalog of the LLM and embedding models each provider offers.
+
+Listing models used to call every enabled provider's API on every request, so `/v1/models` was as slow as the
+slowest provider. The catalog keeps the last model list of each provider (keyed by provider, and by a digest of its
+configuration so an updated BYOK provider is never served its old list):
+    - lists younger than `model_catalog_ttl_seconds` are served as is
+    - older lists are served as well (stale-while-revalidate) while one background task per provider refreshes them
+    - a refresh that fails or times out keeps the last good list
+    - a provider without a list yet is fetched on the spot, waiting at most `GET_PROVIDERS_TIMEOUT_SECONDS`; the
+      fetch keeps running in the background if it takes longer
+
+`ProviderManager` drops the lists of BYOK providers it updates or deletes (new ones have a new id) (`invalidate_provider_models`).
+Callers get copies of the cached configs, which they are free to modify.
+"""
+
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from letta.constants import GET_PROVIDERS_TIMEOUT_SECONDS
+from letta.helpers.singleton import singleton
+from letta.log import get_logger
+from letta.schemas.embedding_config import EmbeddingConfig
+from letta.schemas.llm_config import LLMConfig
+from letta.schemas.providers import Provider
+from letta.settings import settings
+
+logger = get_logger(__name__)
+
+ModelConfig = Union[LLMConfig, EmbeddingConfig]
+# (provider key, "llm" or "embedding")
+CatalogKey = Tuple[str, str]
+
+
+def _provider_key(provider: Provider) -> str:
+    return provider.id or f"{provider.provider_type.value}:{provider.name}"
+
+
+def _provider_digest(provider: Provider) -> str:
+    return hashlib.sha256(provider.model_dump_json().encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Entry:
+    digest: str
+    models: List[ModelConfig]
+    fetched_at: float
+
+
+@singleton
+class ModelCatalog:
+    """Model lists of providers, see the module docstring."""
+
+    def __init__(self):
+        self._entries: Dict[CatalogKey, _Entry] = {}
+        # (key, digest) -> running fetch
+        self._fetches: Dict[Tuple[CatalogKey, str], asyncio.Task] = {}
+
+    async def list_llm_models(self, provider: Provider, raise_errors: bool = False) -> List[LLMConfig]:
+        return await self._list(provider, "llm", provider.list_llm_models_async, raise_errors)
+
+    async def list_embedding_models(self, provider: Provider, raise_errors: bool = False) -> List[EmbeddingConfig]:
+        return await self._list(provider, "embedding", provider.list_embedding_models_async, raise_errors)
+
+    async def _list(
+        self, provider: Provider, kind: str, fetch: Callable[[], Awaitable[List[ModelConfig]]], raise_errors: bool
+    ) -> List[ModelConfig]:
+        """
+        Models of `provider`, from the catalog if it has them.
+
+        Args:
+            raise_errors: Wait for a provider without a list yet and raise its error, instead of giving up after
+                `GET_PROVIDERS_TIMEOUT_SECONDS` and returning an empty list
+        """
+        if not settings.model_catalog_enabled:
+            return await self._wait(fetch(), provider, kind, raise_errors, shield=False)
+
+        key = (_provider_key(provider), kind)
+        digest = _provider_digest(provider)
+        entry = self._entries.get(key)
+        if entry is not None and entry.digest == digest:
+            if time.monotonic() - entry.fetched_at >= settings.model_catalog_ttl_seconds:
+                self._fetch(key, digest, fetch)
+            return [model.model_copy(deep=True) for model in entry.models]
+
+        models = await self._wait(self._fetch(key, digest, fetch), provider, kind, raise_errors, shield=True)
+        return [model.model_copy(deep=True) for model in models]
+
+    @staticmethod
+    async def _wait(
+        fetch: Awaitable[List[ModelConfig]], provider: Provider, kind: str, raise_errors: bool, shield: bool
+    ) -> List[ModelConfig]:
+        """Wait for a fetch (shielded ones keep running after a timeout), an empty list if it fails."""
+        try:
+            if raise_errors:
+                return await (asyncio.shield(fetch) if shield else fetch)
+            return await asyncio.wait_for(asyncio.shield(fetch) if shield else fetch, timeout=GET_PROVIDERS_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timeout while listing {kind} models for provider {provider.name}")
+            return []
+        except Exception as e:
+            if raise_errors:
+                raise
+            logger.warning(f"Error while listing {kind} models for provider {provider.name}: {e}")
+            return []
+
+    def _fetch(self, key: CatalogKey, digest: str, fetch: Callable[[], Awaitable[List[ModelConfig]]]) -> asyncio.Task:
+        """The running fetch of this provider configuration, started if there is none (in this event loop)."""
+        task = self._fetches.get((key, digest))
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.create_task(self._refresh(key, digest, fetch))
+            # refreshes nobody waits for log their own errors
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._fetches[(key, digest)] = task
+        return task
+
+    async def _refresh(self, key: CatalogKey, digest: str, fetch: Callable[[], Awaitable[List[ModelConfig]]]) -> List[ModelConfig]:
+        try:
+            models = await asyncio.wait_for(fetch(), timeout=settings.model_catalog_refresh_timeout_seconds)
+        except Exception as e:
+            entry = self._entries.get(key)
+            if entry is not None and entry.digest == digest:
+                # try again once the list is stale again rather than on every request
+                entry.fetched_at = time.monotonic()
+                logger.warning(f"Refreshing {key[1]} models of provider {key[0]} failed, keeping the last list: {e}")
+            raise
+        finally:
+            if self._fetches.get((key, digest)) is asyncio.current_task():
+                del self._fetches[(key, digest)]
+        self._entries[key] = _Entry(digest=digest, models=list(models), fetched_at=time.monotonic())
+        return models
+
+    def invalidate(self, provider_id: Optional[str] = None) -> None:
+        """Drop the lists of one provider, or of all providers."""
+        if provider_id is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if key[0] == provider_id]:
+            del self._entries[key]
+
+
+def invalidate_provider_models(provider_id: Optional[str] = None) -> None:
+    ModelCatalog().invalidate(provider_id)
@@ -1,11 +1,15 @@
 from typing import List, Optional
 
+from sqlalchemy import select
+
 from letta.constants import DEFAULT_ORG_ID, DEFAULT_ORG_NAME
 from letta.orm.errors import NoResultFound
 from letta.orm.organization import Organization as OrganizationModel
+from letta.orm.user import User as UserModel
 from letta.otel.tracing import trace_method
 from letta.schemas.organization import Organization as PydanticOrganization, OrganizationUpdate
 from letta.server.db import db_registry
+from letta.services.actor_cache import ActorCache
 from letta.utils import enforce_types
 
 
@@ -109,6 +113,7 @@ class OrganizationManager:
         with db_registry.session() as session:
             organization = OrganizationModel.read(db_session=session, identifier=org_id)
             organization.hard_delete(session)
+            ActorCache().invalidate_organization_local(org_id)
 
     @enforce_types
     @trace_method
@@ -116,7 +121,10 @@ class OrganizationManager:
         """Delete an organization by marking it as deleted."""
         async with db_registry.async_session() as session:
             organization = await OrganizationModel.read_async(db_session=session, identifier=org_id)
+            # its users are deleted with it
+            user_ids = (await session.execute(select(UserModel.id).where(UserModel.organization_id == org_id))).scalars().all()
             await organization.hard_delete_async(session)
+            await ActorCache().invalidate(*user_ids)
 
     @enforce_types
     @trace_method
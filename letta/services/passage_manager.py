@@ -1,3 +1,4 @@
+import asyncio
 import uuid
 from datetime import datetime, timezone
 from functools import lru_cache
@@ -10,9 +11,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from letta.constants import MAX_EMBEDDING_DIM
 from letta.embeddings import parse_and_chunk_text
 from letta.helpers.decorators import async_redis_cache
+from letta.llm_api.client_registry import LLMClientRegistry
 from letta.llm_api.llm_client import LLMClient
 from letta.log import get_logger
 from letta.orm import ArchivesAgents
+from letta.orm.agent_counters import adjust_passage_counts_async, get_agent_passage_count_async, removal_deltas
 from letta.orm.errors import NoResultFound
 from letta.orm.passage import ArchivalPassage, SourcePassage
 from letta.orm.passage_tag import PassageTag
@@ -24,6 +27,7 @@ from letta.schemas.passage import Passage as PydanticPassage
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
 from letta.services.archive_manager import ArchiveManager
+from letta.services.helpers.agent_manager_helper import validate_agent_exists_async
 from letta.utils import enforce_types
 
 logger = get_logger(__name__)
@@ -34,7 +38,7 @@ logger = get_logger(__name__)
 def get_openai_embedding(text: str, model: str, endpoint: str) -> List[float]:
     from letta.settings import model_settings
 
-    client = OpenAI(api_key=model_settings.openai_api_key, base_url=endpoint, max_retries=0)
+    client = LLMClientRegistry().get_sync_client(OpenAI, "openai", api_key=model_settings.openai_api_key, base_url=endpoint, max_retries=0)
     response = client.embeddings.create(input=text, model=model)
     return response.data[0].embedding
 
@@ -43,7 +47,9 @@ def get_openai_embedding(text: str, model: str, endpoint: str) -> List[float]:
 async def get_openai_embedding_async(text: str, model: str, endpoint: str) -> list[float]:
     from letta.settings import model_settings
 
-    client = AsyncOpenAI(api_key=model_settings.openai_api_key, base_url=endpoint, max_retries=0)
+    client = LLMClientRegistry().get_async_client(
+        AsyncOpenAI, "openai", api_key=model_settings.openai_api_key, base_url=endpoint, max_retries=0
+    )
     response = await client.embeddings.create(input=text, model=model)
     return response.data[0].embedding
 
@@ -426,8 +432,9 @@ class PassageManager:
     @enforce_types
     @trace_method
     async def create_many_archival_passages_async(self, passages: List[PydanticPassage], actor: PydanticUser) -> List[PydanticPassage]:
-        """Create multiple archival passages."""
+        """Create multiple archival passages (and their tag junction rows) in a single transaction."""
         archival_passages = []
+        passage_tags = []
         for p in passages:
             if not p.archive_id:
                 raise ValueError("Archival passage must have archive_id")
@@ -435,6 +442,12 @@ class PassageManager:
                 raise ValueError("Archival passage cannot have source_id")
 
             data = p.model_dump(to_orm=True)
+
+            # Deduplicate tags if provided (for dual storage consistency), keeping their order
+            tags = data.get("tags")
+            if tags:
+                tags = list(dict.fromkeys(tags))
+
             common_fields = {
                 "id": data.get("id"),
                 "text": data["text"],
@@ -442,16 +455,37 @@ class PassageManager:
                 "embedding_config": data["embedding_config"],
                 "organization_id": data["organization_id"],
                 "metadata_": data.get("metadata", {}),
-                "tags": data.get("tags"),
+                "tags": tags,
                 "is_deleted": data.get("is_deleted", False),
                 "created_at": data.get("created_at", datetime.now(timezone.utc)),
             }
             archival_fields = {"archive_id": data["archive_id"]}
             archival_passages.append(ArchivalPassage(**common_fields, **archival_fields))
 
+            # dual storage: tags also go to the junction table for efficient queries
+            for tag in tags or []:
+                passage_tags.append(
+                    PassageTag(
+                        id=f"passage-tag-{uuid.uuid4()}",
+                        tag=tag,
+                        passage_id=common_fields["id"],
+                        archive_id=data["archive_id"],
+                        organization_id=data["organization_id"],
+                    )
+                )
+
+        if not archival_passages:
+            return []
+
         async with db_registry.async_session() as session:
-            archival_created = await ArchivalPassage.batch_create_async(items=archival_passages, db_session=session, actor=actor)
-            return [p.to_pydantic() for p in archival_created]
+            # the tags are only staged, so the commit's single flush writes both tables: the unit of work
+            # emits a multi-row INSERT per table, passages before their tags
+            for passage_tag in passage_tags:
+                passage_tag._set_created_and_updated_by_fields(actor.id)
+            session.add_all(passage_tags)
+            await ArchivalPassage.batch_create_async(items=archival_passages, db_session=session, actor=actor, no_refresh=True)
+
+            return [p.to_pydantic() for p in archival_passages]
 
     @enforce_types
     @trace_method
@@ -585,62 +619,60 @@ class PassageManager:
         if not text_chunks:
             return []
 
-        try:
-            # Generate embeddings for all chunks using the new async API
-            embeddings = await embedding_client.request_embeddings(text_chunks, agent_state.embedding_config)
-
-            passages = []
-
-            # Always write to SQL database first
-            for chunk_text, embedding in zip(text_chunks, embeddings):
-                passage_data = {
-                    "organization_id": actor.organization_id,
-                    "archive_id": archive.id,
-                    "text": chunk_text,
-                    "embedding": embedding,
-                    "embedding_config": agent_state.embedding_config,
-                    "tags": tags,
-                }
-                # only include created_at if provided
-                if created_at is not None:
-                    passage_data["created_at"] = created_at
-
-                passage = await self.create_agent_passage_async(
-                    PydanticPassage(**passage_data),
-                    actor=actor,
-                )
-                passages.append(passage)
+        # Generate embeddings for all chunks using the new async API
+        embeddings = await embedding_client.request_embeddings_cached(text_chunks, agent_state.embedding_config)
+
+        passages = []
+        for chunk_text, embedding in zip(text_chunks, embeddings):
+            passage_data = {
+                "organization_id": actor.organization_id,
+                "archive_id": archive.id,
+                "text": chunk_text,
+                "embedding": embedding,
+                "embedding_config": agent_state.embedding_config,
+                "tags": tags,
+                # stamped per chunk so archival ordering keeps the chunk order
+                "created_at": created_at or datetime.now(timezone.utc),
+            }
+            passages.append(PydanticPassage(**passage_data))
+
+        if archive.vector_db_provider != VectorDBProvider.TPUF:
+            return await self.create_many_archival_passages_async(passages, actor=actor)
+
+        # If archive uses Turbopuffer, dual-write to SQL and Turbopuffer concurrently; ids are assigned up front so both
+        # stores agree on them
+        from letta.helpers.tpuf_client import TurbopufferClient
+
+        tpuf_client = TurbopufferClient()
+        sql_result, tpuf_result = await asyncio.gather(
+            self.create_many_archival_passages_async(passages, actor=actor),
+            tpuf_client.insert_archival_memories(
+                archive_id=archive.id,
+                text_chunks=[p.text for p in passages],
+                embeddings=embeddings,
+                passage_ids=[p.id for p in passages],  # Use same IDs as SQL
+                organization_id=actor.organization_id,
+                tags=tags,
+                created_at=passages[0].created_at,
+            ),
+            return_exceptions=True,
+        )
 
-            # If archive uses Turbopuffer, also write to Turbopuffer (dual-write)
-            if archive.vector_db_provider == VectorDBProvider.TPUF:
+        if isinstance(sql_result, BaseException):
+            # SQL is the source of truth: undo the Turbopuffer write so it does not hold orphaned passages
+            if not isinstance(tpuf_result, BaseException):
                 try:
-                    from letta.helpers.tpuf_client import TurbopufferClient
-
-                    tpuf_client = TurbopufferClient()
-
-                    # Extract IDs and texts from the created passages
-                    passage_ids = [p.id for p in passages]
-                    passage_texts = [p.text for p in passages]
-
-                    # Insert to Turbopuffer with the same IDs as SQL
-                    await tpuf_client.insert_archival_memories(
-                        archive_id=archive.id,
-                        text_chunks=passage_texts,
-                        embeddings=embeddings,
-                        passage_ids=passage_ids,  # Use same IDs as SQL
-                        organization_id=actor.organization_id,
-                        tags=tags,
-                        created_at=passages[0].created_at if passages else None,
-                    )
+                    await tpuf_client.delete_passages(archive_id=archive.id, passage_ids=[p.id for p in passages])
                 except Exception as e:
-                    logger.error(f"Failed to insert passages to Turbopuffer: {e}")
-                    if strict_mode:
-                        raise  # Re-raise the exception in strict mode
+                    logger.error(f"Failed to roll back Turbopuffer passages after SQL insert failure: {e}")
+            raise sql_result
 
-            return passages
+        if isinstance(tpuf_result, BaseException):
+            logger.error(f"Failed to insert passages to Turbopuffer: {tpuf_result}")
+            if strict_mode:
+                raise tpuf_result
 
-        except Exception as e:
-            raise e
+        return sql_result
 
     async def _generate_embeddings_concurrent(self, text_chunks: List[str], embedding_config, actor: PydanticUser) -> List[List[float]]:
         """Generate embeddings for all text chunks concurrently using LLMClient"""
@@ -650,7 +682,7 @@ class PassageManager:
             actor=actor,
         )
 
-        embeddings = await embedding_client.request_embeddings(text_chunks, embedding_config)
+        embeddings = await embedding_client.request_embeddings_cached(text_chunks, embedding_config)
         return embeddings
 
     @enforce_types
@@ -1002,7 +1034,14 @@ class PassageManager:
             return True
 
         async with db_registry.async_session() as session:
-            # Delete from SQL first
+            # Delete from SQL first; the bulk delete bypasses the ORM flush, so adjust the archive counters explicitly
+            # (they commit together with the delete)
+            live_archive_ids = await session.scalars(
+                select(ArchivalPassage.archive_id).where(
+                    ArchivalPassage.id.in_([p.id for p in passages]), ArchivalPassage.is_deleted == False
+                )
+            )
+            await adjust_passage_counts_async(session, removal_deltas(live_archive_ids.all()))
             await ArchivalPassage.bulk_hard_delete_async(db_session=session, identifiers=[p.id for p in passages], actor=actor)
 
             # Group passages by archive_id for efficient Turbopuffer deletion
@@ -1151,6 +1190,17 @@ class PassageManager:
                 # Count all archival passages in the organization
                 return await ArchivalPassage.size_async(db_session=session, actor=actor)
 
+    @enforce_types
+    @trace_method
+    async def agent_passage_count_async(self, agent_id: str, actor: PydanticUser) -> int:
+        """Get the number of archival passages for an agent from the cached archive counters.
+
+        Cheaper than `agent_passage_size_async` (no scan of the passages table), intended for the memory metadata header.
+        """
+        async with db_registry.async_session() as session:
+            await validate_agent_exists_async(session, agent_id, actor)
+            return await get_agent_passage_count_async(session, agent_id)
+
     @enforce_types
     @trace_method
     def source_passage_size(
@@ -1,22 +1,225 @@
+import asyncio
+import random
 import threading
-from collections import defaultdict
+import time
+import uuid
+from collections import deque
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, nullcontext
+from typing import AsyncIterator, Deque, Dict, Optional
 
-from letta.otel.tracing import trace_method
+from letta.data_sources.redis_client import NoopAsyncRedisClient, get_redis_client
+from letta.errors import AgentLockTimeoutError
+from letta.helpers.singleton import singleton
+from letta.log import get_logger
+from letta.otel.metric_registry import MetricRegistry
+from letta.settings import settings
 
+logger = get_logger(__name__)
 
+AGENT_LOCK_KEY_PREFIX = "letta:agent_lock"
+
+# Backoff bounds (seconds) while polling for a lease held by another worker
+DISTRIBUTED_POLL_MIN_SECONDS = 0.05
+DISTRIBUTED_POLL_MAX_SECONDS = 1.0
+
+
+class _Waiter:
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future = loop.create_future()
+        # set (under the manager's mutex) when ownership is handed to this waiter, even if it has not woken up yet
+        self.granted = False
+
+
+class _LocalLock:
+    __slots__ = ("locked", "waiters")
+
+    def __init__(self):
+        self.locked = False
+        self.waiters: Deque[_Waiter] = deque()
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+@singleton
 class PerAgentLockManager:
-    """Manages per-agent locks."""
+    """Serializes work on one agent without blocking the event loop or other agents.
+
+    - Local tier: FIFO lock per agent that can be awaited from any event loop or thread. Locks exist only while held
+      or waited on, so idle agents cost nothing.
+    - Distributed tier (when Redis is configured): a lease in Redis taken after the local lock, so only one task per
+      worker competes for it. The lease is renewed while held and expires after `agent_lock_lease_ttl_seconds` if the
+      holder dies. Across workers the lease is polled with jittered backoff, so ordering there is not strictly FIFO.
+    """
 
     def __init__(self):
-        self.locks = defaultdict(threading.Lock)
-
-    @trace_method
-    def get_lock(self, agent_id: str) -> threading.Lock:
-        """Retrieve the lock for a specific agent_id."""
-        return self.locks[agent_id]
-
-    @trace_method
-    def clear_lock(self, agent_id: str):
-        """Optionally remove a lock if no longer needed (to prevent unbounded growth)."""
-        if agent_id in self.locks:
-            del self.locks[agent_id]
+        self._mutex = threading.Lock()
+        self._locks: Dict[str, _LocalLock] = {}
+
+    def locked(self, agent_id: str) -> bool:
+        """Whether the agent's lock is held in this process."""
+        with self._mutex:
+            entry = self._locks.get(agent_id)
+            return entry is not None and entry.locked
+
+    def active_lock_count(self) -> int:
+        """Number of agents whose lock is currently held or waited on in this process."""
+        with self._mutex:
+            return len(self._locks)
+
+    @asynccontextmanager
+    async def lock(self, agent_id: str, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        """Hold the agent's lock for the duration of the block.
+
+        Args:
+            agent_id: The agent to serialize on
+            timeout: Maximum seconds to wait for the lock (None waits indefinitely)
+
+        Raises:
+            AgentLockTimeoutError: If the lock could not be acquired within `timeout`
+        """
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+
+        await self._acquire_local(agent_id, timeout=timeout, deadline=deadline)
+        lease = None
+        try:
+            lease = await self._acquire_distributed(agent_id, timeout=timeout, deadline=deadline)
+        except BaseException:
+            self._release_local(agent_id)
+            raise
+
+        MetricRegistry().agent_lock_wait_time_ms_histogram.record((time.monotonic() - start) * 1000, dict(distributed=lease is not None))
+        try:
+            yield
+        finally:
+            try:
+                if lease is not None:
+                    await self._release_distributed(*lease)
+            finally:
+                self._release_local(agent_id)
+
+    # local tier
+
+    async def _acquire_local(self, agent_id: str, timeout: Optional[float], deadline: Optional[float]) -> None:
+        loop = asyncio.get_running_loop()
+        with self._mutex:
+            entry = self._locks.get(agent_id)
+            if entry is None:
+                entry = self._locks[agent_id] = _LocalLock()
+            if not entry.locked:
+                entry.locked = True
+                return
+            waiter = _Waiter(loop)
+            entry.waiters.append(waiter)
+
+        try:
+            if deadline is None:
+                await waiter.future
+            else:
+                await asyncio.wait_for(waiter.future, max(deadline - time.monotonic(), 0))
+        except BaseException as e:
+            with self._mutex:
+                granted = waiter.granted
+                if not granted:
+                    entry.waiters.remove(waiter)
+            if granted:
+                # ownership arrived while we were giving up: pass it on
+                self._release_local(agent_id)
+            if isinstance(e, asyncio.TimeoutError):
+                raise AgentLockTimeoutError(agent_id, timeout) from None
+            raise
+
+    def _release_local(self, agent_id: str) -> None:
+        with self._mutex:
+            entry = self._locks[agent_id]
+            while entry.waiters:
+                waiter = entry.waiters.popleft()
+                waiter.granted = True
+                try:
+                    waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+                    return
+                except RuntimeError:
+                    # the waiter's event loop is closed, so it can never take the lock
+                    continue
+            entry.locked = False
+            del self._locks[agent_id]
+
+    # distributed tier
+
+    async def _acquire_distributed(self, agent_id: str, timeout: Optional[float], deadline: Optional[float]):
+        redis_client = await get_redis_client()
+        if isinstance(redis_client, NoopAsyncRedisClient):
+            return None
+
+        key = f"{AGENT_LOCK_KEY_PREFIX}:{agent_id}"
+        token = uuid.uuid4().hex
+        ttl_ms = int(settings.agent_lock_lease_ttl_seconds * 1000)
+        delay = DISTRIBUTED_POLL_MIN_SECONDS
+        try:
+            while not await redis_client.set(key, token, px=ttl_ms, nx=True):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise AgentLockTimeoutError(agent_id, timeout)
+                sleep_for = delay * random.uniform(0.5, 1.0)
+                await asyncio.sleep(sleep_for if remaining is None else min(sleep_for, remaining))
+                delay = min(delay * 2, DISTRIBUTED_POLL_MAX_SECONDS)
+        except AgentLockTimeoutError:
+            raise
+        except Exception as e:
+            # availability over strictness: keep the local serialization if Redis is unreachable
+            logger.warning(f"Failed to acquire distributed lock for agent {agent_id}, continuing with the local lock only: {e}")
+            return None
+
+        renewal = asyncio.create_task(self._renew_lease(redis_client, key, token, ttl_ms))
+        return redis_client, key, token, renewal
+
+    @staticmethod
+    async def _renew_lease(redis_client, key: str, token: str, ttl_ms: int) -> None:
+        while True:
+            await asyncio.sleep(ttl_ms / 3000)
+            try:
+                if not await redis_client.extend_if_owner(key, token, ttl_ms):
+                    logger.warning(f"Lost distributed lock lease {key}; another worker may now process this agent")
+                    return
+            except Exception as e:
+                logger.warning(f"Failed to renew distributed lock lease {key}: {e}")
+
+    @staticmethod
+    async def _release_distributed(redis_client, key: str, token: str, renewal: asyncio.Task) -> None:
+        renewal.cancel()
+        try:
+            await redis_client.delete_if_owner(key, token)
+        except Exception as e:
+            logger.warning(f"Failed to release distributed lock lease {key}, it will expire on its own: {e}")
+
+
+def agent_message_lock(agent_id: str) -> AbstractAsyncContextManager:
+    """Lock held while a message is processed for an agent (a no-op when `serialize_agent_messages` is off)."""
+    if not settings.serialize_agent_messages:
+        return nullcontext()
+    return PerAgentLockManager().lock(agent_id, timeout=settings.agent_lock_timeout_seconds)
+
+
+async def serialize_agent_stream(agent_id: str, stream: AsyncIterator) -> AsyncIterator:
+    """Take the agent's message lock and return `stream` wrapped to hold it until the stream is consumed or closed.
+
+    The lock is acquired before this returns, so a busy agent raises `AgentLockTimeoutError` (a 409) before the
+    streaming response starts, instead of inside the response body.
+    """
+    locked_stream = _hold_agent_message_lock(agent_id, stream)
+    # runs up to the first yield, i.e. until the lock is held; from then on closing the generator releases it
+    await locked_stream.__anext__()
+    return locked_stream
+
+
+async def _hold_agent_message_lock(agent_id: str, stream: AsyncIterator) -> AsyncIterator:
+    async with agent_message_lock(agent_id):
+        yield None
+        async for chunk in stream:
+            yield chunk
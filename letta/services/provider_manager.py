@@ -6,6 +6,7 @@ from letta.schemas.enums import ProviderCategory, ProviderType
 from letta.schemas.providers import Provider as PydanticProvider, ProviderCheck, ProviderCreate, ProviderUpdate
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
+from letta.services.model_catalog import invalidate_provider_models
 from letta.utils import enforce_types
 
 
@@ -67,6 +68,7 @@ class ProviderManager:
 
             # Commit the updated provider
             existing_provider.update(session, actor=actor)
+            invalidate_provider_models(provider_id)
             return existing_provider.to_pydantic()
 
     @enforce_types
@@ -86,6 +88,7 @@ class ProviderManager:
 
             # Commit the updated provider
             await existing_provider.update_async(session, actor=actor)
+            invalidate_provider_models(provider_id)
             return existing_provider.to_pydantic()
 
     @enforce_types
@@ -102,6 +105,7 @@ class ProviderManager:
             existing_provider.delete(session, actor=actor)
 
             session.commit()
+            invalidate_provider_models(provider_id)
 
     @enforce_types
     @trace_method
@@ -119,6 +123,7 @@ class ProviderManager:
             await existing_provider.delete_async(session, actor=actor)
 
             await session.commit()
+            invalidate_provider_models(provider_id)
 
     @enforce_types
     @trace_method
@@ -12,6 +12,7 @@ from letta.schemas.agent import AgentState as PydanticAgentState
 from letta.schemas.source import Source as PydanticSource, SourceUpdate
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
+from letta.services.agent_state_cache import invalidates_agent_state_dependencies
 from letta.utils import enforce_types, printd
 
 
@@ -57,6 +58,7 @@ class SourceManager:
                 await source.create_async(session, actor=actor)
                 return source.to_pydantic()
 
+    @invalidates_agent_state_dependencies(include_result=True)
     @enforce_types
     @trace_method
     async def bulk_upsert_sources_async(self, pydantic_sources: List[PydanticSource], actor: PydanticUser) -> List[PydanticSource]:
@@ -173,6 +175,7 @@ class SourceManager:
                 sources.append(created_source)
         return sources
 
+    @invalidates_agent_state_dependencies("source_id")
     @enforce_types
     @trace_method
     async def update_source(self, source_id: str, source_update: SourceUpdate, actor: PydanticUser) -> PydanticSource:
@@ -196,6 +199,7 @@ class SourceManager:
 
             return source.to_pydantic()
 
+    @invalidates_agent_state_dependencies("source_id")
     @enforce_types
     @trace_method
     async def delete_source(self, source_id: str, actor: PydanticUser) -> PydanticSource:
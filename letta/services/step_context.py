@@ -0,0 +1,31 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+from letta.schemas.agent import AgentState
+from letta.schemas.message import Message
+
+
+@dataclass
+class StepContext:
+    """
+    Everything the agent loop reads from the database before its first step, loaded together by
+    `AgentManager.load_step_context_async`.
+
+    One snapshot is loaded per request and reused by every inner step of that request. The message and
+    archival memory counts only feed the memory metadata header, so they are allowed to lag behind writes made
+    during the request (the next request loads fresh values). The archive tags are read again after an
+    archival_memory_insert, since the agent is told which tags it can search by.
+    """
+
+    agent_state: AgentState
+    # The agent's current context window, in order (only the system message when `message_buffer_autoclear` is set)
+    in_context_messages: List[Message]
+    num_messages: int
+    num_archival_memories: int
+    # Unique passage tags of the agent's archive, or None if the agent has no archive
+    archive_tags: Optional[List[str]] = None
+    # Cleared when a tool inserts into archival memory, so the next memory rebuild reads the tags again
+    archive_tags_are_current: bool = True
+    # Memory blocks in `agent_state` were read with the snapshot and are still current; cleared after the
+    # first memory rebuild, since tools may edit blocks between steps
+    memory_is_current: bool = True
@@ -1,4 +1,5 @@
-from datetime import datetime
+import uuid
+from datetime import datetime, timezone
 from enum import Enum
 from typing import Dict, List, Literal, Optional
 
@@ -20,6 +21,7 @@ from letta.schemas.step import Step as PydanticStep
 from letta.schemas.step_metrics import StepMetrics as PydanticStepMetrics
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
+from letta.services.step_write_buffer import ensure_steps_written, flush_step_writes, get_step_write_buffer
 from letta.utils import enforce_types
 
 
@@ -73,10 +75,8 @@ class StepManager:
             )
             return [step.to_pydantic() for step in steps]
 
-    @enforce_types
-    @trace_method
-    def log_step(
-        self,
+    @staticmethod
+    def _step_data(
         actor: PydanticUser,
         agent_id: str,
         provider_name: str,
@@ -93,7 +93,8 @@ class StepManager:
         status: Optional[StepStatus] = None,
         error_type: Optional[str] = None,
         error_data: Optional[Dict] = None,
-    ) -> PydanticStep:
+    ) -> Dict:
+        """Column values of a new step."""
         step_data = {
             "origin": None,
             "organization_id": actor.organization_id,
@@ -120,6 +121,47 @@ class StepManager:
             step_data["id"] = step_id
         if stop_reason:
             step_data["stop_reason"] = stop_reason.stop_reason
+        return step_data
+
+    @enforce_types
+    @trace_method
+    def log_step(
+        self,
+        actor: PydanticUser,
+        agent_id: str,
+        provider_name: str,
+        provider_category: str,
+        model: str,
+        model_endpoint: Optional[str],
+        context_window_limit: int,
+        usage: UsageStatistics,
+        provider_id: Optional[str] = None,
+        job_id: Optional[str] = None,
+        step_id: Optional[str] = None,
+        project_id: Optional[str] = None,
+        stop_reason: Optional[LettaStopReason] = None,
+        status: Optional[StepStatus] = None,
+        error_type: Optional[str] = None,
+        error_data: Optional[Dict] = None,
+    ) -> PydanticStep:
+        step_data = self._step_data(
+            actor=actor,
+            agent_id=agent_id,
+            provider_name=provider_name,
+            provider_category=provider_category,
+            model=model,
+            model_endpoint=model_endpoint,
+            context_window_limit=context_window_limit,
+            usage=usage,
+            provider_id=provider_id,
+            job_id=job_id,
+            step_id=step_id,
+            project_id=project_id,
+            stop_reason=stop_reason,
+            status=status,
+            error_type=error_type,
+            error_data=error_data,
+        )
         with db_registry.session() as session:
             if job_id:
                 self._verify_job_access(session, job_id, actor, access=["write"])
@@ -148,32 +190,24 @@ class StepManager:
         error_type: Optional[str] = None,
         error_data: Optional[Dict] = None,
     ) -> PydanticStep:
-        step_data = {
-            "origin": None,
-            "organization_id": actor.organization_id,
-            "agent_id": agent_id,
-            "provider_id": provider_id,
-            "provider_name": provider_name,
-            "provider_category": provider_category,
-            "model": model,
-            "model_endpoint": model_endpoint,
-            "context_window_limit": context_window_limit,
-            "completion_tokens": usage.completion_tokens,
-            "prompt_tokens": usage.prompt_tokens,
-            "total_tokens": usage.total_tokens,
-            "job_id": job_id,
-            "tags": [],
-            "tid": None,
-            "trace_id": get_trace_id(),  # Get the current trace ID
-            "project_id": project_id,
-            "status": status if status else StepStatus.PENDING,
-            "error_type": error_type,
-            "error_data": error_data,
-        }
-        if step_id:
-            step_data["id"] = step_id
-        if stop_reason:
-            step_data["stop_reason"] = stop_reason.stop_reason
+        step_data = self._step_data(
+            actor=actor,
+            agent_id=agent_id,
+            provider_name=provider_name,
+            provider_category=provider_category,
+            model=model,
+            model_endpoint=model_endpoint,
+            context_window_limit=context_window_limit,
+            usage=usage,
+            provider_id=provider_id,
+            job_id=job_id,
+            step_id=step_id,
+            project_id=project_id,
+            stop_reason=stop_reason,
+            status=status,
+            error_type=error_type,
+            error_data=error_data,
+        )
         async with db_registry.async_session() as session:
             new_step = StepModel(**step_data)
             await new_step.create_async(session, no_commit=True, no_refresh=True)
@@ -497,6 +531,189 @@ class StepManager:
         return job
 
 
+@singleton
+class WriteBehindStepManager(StepManager):
+    """
+    StepManager that hands step writes to the write-behind buffer of the running event loop
+    (see `letta.services.step_write_buffer`) instead of writing them inline.
+
+    Writes return what was buffered: `log_step_async` and `record_step_metrics_async` the new records, step updates
+    the updated step while it is still buffered (None once it was written). Reads first wait for the buffered records
+    of the steps they read, so they see every write made through this manager.
+    """
+
+    @enforce_types
+    @trace_method
+    async def list_steps_async(self, actor: PydanticUser, **kwargs) -> List[PydanticStep]:
+        await flush_step_writes()
+        return await super().list_steps_async(actor=actor, **kwargs)
+
+    @enforce_types
+    @trace_method
+    async def log_step_async(
+        self,
+        actor: PydanticUser,
+        agent_id: str,
+        provider_name: str,
+        provider_category: str,
+        model: str,
+        model_endpoint: Optional[str],
+        context_window_limit: int,
+        usage: UsageStatistics,
+        provider_id: Optional[str] = None,
+        job_id: Optional[str] = None,
+        step_id: Optional[str] = None,
+        project_id: Optional[str] = None,
+        stop_reason: Optional[LettaStopReason] = None,
+        status: Optional[StepStatus] = None,
+        error_type: Optional[str] = None,
+        error_data: Optional[Dict] = None,
+    ) -> PydanticStep:
+        step_data = self._step_data(
+            actor=actor,
+            agent_id=agent_id,
+            provider_name=provider_name,
+            provider_category=provider_category,
+            model=model,
+            model_endpoint=model_endpoint,
+            context_window_limit=context_window_limit,
+            usage=usage,
+            provider_id=provider_id,
+            job_id=job_id,
+            step_id=step_id,
+            project_id=project_id,
+            stop_reason=stop_reason,
+            status=status,
+            error_type=error_type,
+            error_data=error_data,
+        )
+        step_data.setdefault("id", f"step-{uuid.uuid4()}")
+        # timestamps of when the step was logged, not when it was written
+        step_data["created_at"] = step_data["updated_at"] = datetime.now(timezone.utc)
+        await get_step_write_buffer().add_step(step_data)
+        return StepModel(**step_data).to_pydantic()
+
+    @enforce_types
+    @trace_method
+    async def get_step_async(self, step_id: str, actor: PydanticUser) -> PydanticStep:
+        await ensure_steps_written([step_id])
+        return await super().get_step_async(step_id=step_id, actor=actor)
+
+    @enforce_types
+    @trace_method
+    async def get_step_metrics_async(self, step_id: str, actor: PydanticUser) -> PydanticStepMetrics:
+        await ensure_steps_written([step_id])
+        return await super().get_step_metrics_async(step_id=step_id, actor=actor)
+
+    @enforce_types
+    @trace_method
+    async def add_feedback_async(self, step_id: str, feedback: Optional[FeedbackType], actor: PydanticUser) -> PydanticStep:
+        await ensure_steps_written([step_id])
+        return await super().add_feedback_async(step_id=step_id, feedback=feedback, actor=actor)
+
+    @enforce_types
+    @trace_method
+    async def update_step_transaction_id(self, actor: PydanticUser, step_id: str, transaction_id: str) -> PydanticStep:
+        await ensure_steps_written([step_id])
+        return await super().update_step_transaction_id(actor=actor, step_id=step_id, transaction_id=transaction_id)
+
+    async def _update_step(self, actor: PydanticUser, step_id: str, values: Dict) -> Optional[PydanticStep]:
+        row = await get_step_write_buffer().update_step(step_id, actor.organization_id, values)
+        return StepModel(**row).to_pydantic() if row else None
+
+    @enforce_types
+    @trace_method
+    async def update_step_stop_reason(self, actor: PydanticUser, step_id: str, stop_reason: StopReasonType) -> Optional[PydanticStep]:
+        return await self._update_step(actor, step_id, {"stop_reason": stop_reason})
+
+    @enforce_types
+    @trace_method
+    async def update_step_error_async(
+        self,
+        actor: PydanticUser,
+        step_id: str,
+        error_type: str,
+        error_message: str,
+        error_traceback: str,
+        error_details: Optional[Dict] = None,
+        stop_reason: Optional[LettaStopReason] = None,
+    ) -> Optional[PydanticStep]:
+        values = {
+            "status": StepStatus.FAILED,
+            "error_type": error_type,
+            "error_data": {"message": error_message, "traceback": error_traceback, "details": error_details},
+        }
+        if stop_reason:
+            values["stop_reason"] = stop_reason.stop_reason
+        return await self._update_step(actor, step_id, values)
+
+    @enforce_types
+    @trace_method
+    async def update_step_success_async(
+        self,
+        actor: PydanticUser,
+        step_id: str,
+        usage: UsageStatistics,
+        stop_reason: Optional[LettaStopReason] = None,
+    ) -> Optional[PydanticStep]:
+        values = {
+            "status": StepStatus.SUCCESS,
+            "completion_tokens": usage.completion_tokens,
+            "prompt_tokens": usage.prompt_tokens,
+            "total_tokens": usage.total_tokens,
+        }
+        if stop_reason:
+            values["stop_reason"] = stop_reason.stop_reason
+        return await self._update_step(actor, step_id, values)
+
+    @enforce_types
+    @trace_method
+    async def update_step_cancelled_async(
+        self,
+        actor: PydanticUser,
+        step_id: str,
+        stop_reason: Optional[LettaStopReason] = None,
+    ) -> Optional[PydanticStep]:
+        values = {"status": StepStatus.CANCELLED}
+        if stop_reason:
+            values["stop_reason"] = stop_reason.stop_reason
+        return await self._update_step(actor, step_id, values)
+
+    @enforce_types
+    @trace_method
+    async def record_step_metrics_async(
+        self,
+        actor: PydanticUser,
+        step_id: str,
+        llm_request_ns: Optional[int] = None,
+        tool_execution_ns: Optional[int] = None,
+        step_ns: Optional[int] = None,
+        agent_id: Optional[str] = None,
+        job_id: Optional[str] = None,
+        project_id: Optional[str] = None,
+        template_id: Optional[str] = None,
+        base_template_id: Optional[str] = None,
+    ) -> PydanticStepMetrics:
+        now = datetime.now(timezone.utc)
+        metrics_data = {
+            "id": step_id,
+            "organization_id": actor.organization_id,
+            # missing agent, job and project ids are taken from the step when the metrics are written
+            "agent_id": agent_id,
+            "job_id": job_id,
+            "project_id": project_id,
+            "llm_request_ns": llm_request_ns,
+            "tool_execution_ns": tool_execution_ns,
+            "step_ns": step_ns,
+            "template_id": template_id,
+            "base_template_id": base_template_id,
+            "created_at": now,
+            "updated_at": now,
+        }
+        await get_step_write_buffer().add_metrics(metrics_data)
+        return StepMetricsModel(**metrics_data).to_pydantic()
+
+
 # noinspection PyTypeChecker
 @singleton
 class NoopStepManager(StepManager):
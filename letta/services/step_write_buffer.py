@@ -0,0 +1,299 @@
+"""Write-behind buffer for step, step metric and provider trace records.
+
+The agent loop records a step before calling the LLM, updates it afterwards, and writes its metrics and provider
+trace; each of those used to be its own transaction on the request path. With `settings.step_write_behind` the
+`WriteBehindStepManager` / `WriteBehindTelemetryManager` hand them to this buffer instead, and one background task
+per event loop writes everything buffered together:
+    - new steps, step metrics and provider traces as multi-row inserts
+    - updates of steps that were already written as one executemany per set of updated columns
+    - updates of steps that are still buffered are merged into the pending row, so a step that finishes between two
+      flushes is written once
+
+A flush runs every `step_write_behind_flush_interval_seconds`, as soon as `step_write_behind_max_pending` records are
+buffered, and on shutdown (`stop_step_write_buffers`, or when the event loop cancels the flush task as it goes away).
+Records are written in dependency order (steps before their metrics) in one transaction; if that fails, they are
+retried one at a time so a single bad record (e.g. a step of an agent deleted in the meantime) is dropped alone.
+
+Anything that depends on a buffered record being in the database waits for it with `ensure_written`: the step read
+APIs, and message writes (messages reference their step).
+"""
+
+import asyncio
+import weakref
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, insert, select, update
+
+from letta.log import get_logger
+from letta.orm.provider_trace import ProviderTrace as ProviderTraceModel
+from letta.orm.step import Step as StepModel
+from letta.orm.step_metrics import StepMetrics as StepMetricsModel
+from letta.server.db import db_registry
+from letta.settings import settings
+
+logger = get_logger(__name__)
+
+
+class _Batch:
+    """Records taken out of the buffer for one flush."""
+
+    __slots__ = ("steps", "step_updates", "metrics", "traces")
+
+    def __init__(self, steps=None, step_updates=None, metrics=None, traces=None):
+        self.steps: Dict[str, Dict] = steps or {}
+        self.step_updates: Dict[Tuple[str, str], Dict] = step_updates or {}
+        self.metrics: Dict[str, Dict] = metrics or {}
+        self.traces: List[Dict] = traces or []
+
+    def __len__(self) -> int:
+        return len(self.steps) + len(self.step_updates) + len(self.metrics) + len(self.traces)
+
+    def split(self) -> Iterable["_Batch"]:
+        """Single-record batches, in the order they have to be written."""
+        for step_id, row in self.steps.items():
+            yield _Batch(steps={step_id: row})
+        for key, values in self.step_updates.items():
+            yield _Batch(step_updates={key: values})
+        for step_id, row in self.metrics.items():
+            yield _Batch(metrics={step_id: row})
+        for row in self.traces:
+            yield _Batch(traces=[row])
+
+
+def _group_by_columns(updates: Dict[Tuple[str, str], Dict]) -> Iterable[Tuple[Tuple[str, ...], List[Dict]]]:
+    """Executemany parameters of step updates, grouped by the columns they set."""
+    groups: Dict[Tuple[str, ...], List[Dict]] = {}
+    for (step_id, organization_id), values in updates.items():
+        params = {"b_id": step_id, "b_organization_id": organization_id}
+        params.update({f"v_{column}": value for column, value in values.items()})
+        groups.setdefault(tuple(sorted(values)), []).append(params)
+    return groups.items()
+
+
+class StepWriteBuffer:
+    """Buffers step, step metric and provider trace writes and flushes them in batches."""
+
+    def __init__(self, flush_interval: Optional[float] = None, max_pending: Optional[int] = None):
+        self.flush_interval = flush_interval if flush_interval is not None else settings.step_write_behind_flush_interval_seconds
+        self.max_pending = max_pending if max_pending is not None else settings.step_write_behind_max_pending
+
+        # step_id -> row of a step not written yet (later updates are merged in)
+        self._steps: Dict[str, Dict] = {}
+        # (step_id, organization_id) -> columns to set on a step that was already written
+        self._step_updates: Dict[Tuple[str, str], Dict] = {}
+        # step_id -> step metrics row
+        self._metrics: Dict[str, Dict] = {}
+        self._traces: List[Dict] = []
+
+        self._flush_lock = asyncio.Lock()
+        self._flush_requested = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._running = False
+        # records written / dropped after failing on their own, for monitoring and tests
+        self.written = 0
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._steps) + len(self._step_updates) + len(self._metrics) + len(self._traces)
+
+    async def start(self) -> None:
+        """Start the background flush task."""
+        if not self._running:
+            self._running = True
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the background flush task and write everything still buffered."""
+        if not self._running:
+            return
+        self._running = False
+        self._flush_requested.set()
+        try:
+            await self._flush_task
+        except Exception as e:
+            logger.error(f"Failed to flush buffered steps on shutdown: {e}")
+
+    async def add_step(self, row: Dict) -> None:
+        self._steps[row["id"]] = row
+        await self._added()
+
+    async def update_step(self, step_id: str, organization_id: str, values: Dict) -> Optional[Dict]:
+        """
+        Buffer an update of a step. Returns the updated row if the step itself is still buffered, None otherwise.
+        Updates of written steps only apply to steps of `organization_id`.
+        """
+        row = self._steps.get(step_id)
+        if row is not None and row["organization_id"] == organization_id:
+            row.update(values)
+            return row
+
+        self._step_updates.setdefault((step_id, organization_id), {}).update(values, updated_at=datetime.now(timezone.utc))
+        await self._added()
+        return None
+
+    def pending_step(self, step_id: str) -> Optional[Dict]:
+        return self._steps.get(step_id)
+
+    async def add_metrics(self, row: Dict) -> None:
+        self._metrics[row["id"]] = row
+        await self._added()
+
+    async def add_trace(self, row: Dict) -> None:
+        self._traces.append(row)
+        await self._added()
+
+    def has_pending(self, step_ids: Set[str]) -> bool:
+        for step_id in step_ids:
+            if step_id in self._steps or step_id in self._metrics:
+                return True
+        return any(step_id in step_ids for step_id, _ in self._step_updates) or any(row["step_id"] in step_ids for row in self._traces)
+
+    async def ensure_written(self, step_ids: Iterable[str]) -> None:
+        """Wait until buffered records of these steps (including any being flushed right now) are in the database."""
+        step_ids = set(step_ids)
+        if self._flush_lock.locked() or self.has_pending(step_ids):
+            await self.flush()
+
+    async def _added(self) -> None:
+        if self.pending >= self.max_pending:
+            # backpressure: the writer waits for the flush instead of growing the buffer
+            await self.flush()
+        elif not self._running:
+            await self.start()
+
+    def _take(self) -> _Batch:
+        batch = _Batch(self._steps, self._step_updates, self._metrics, self._traces)
+        self._steps, self._step_updates, self._metrics, self._traces = {}, {}, {}, []
+        return batch
+
+    def _put_back(self, batch: _Batch) -> None:
+        """Return a batch that was not written to the buffer, ahead of anything buffered since."""
+        self._steps = {**batch.steps, **self._steps}
+        for key, values in self._step_updates.items():
+            batch.step_updates.setdefault(key, {}).update(values)
+        self._step_updates = batch.step_updates
+        self._metrics = {**batch.metrics, **self._metrics}
+        self._traces = batch.traces + self._traces
+
+    async def flush(self) -> None:
+        """Write everything buffered so far."""
+        async with self._flush_lock:
+            batch = self._take()
+            if not batch:
+                return
+            try:
+                await self._write(batch)
+                self.written += len(batch)
+            except asyncio.CancelledError:
+                self._put_back(batch)
+                raise
+            except Exception as e:
+                logger.warning(f"Writing {len(batch)} buffered step records failed ({e}), retrying them one at a time")
+                for single in batch.split():
+                    try:
+                        await self._write(single)
+                        self.written += 1
+                    except Exception as single_error:
+                        self.dropped += 1
+                        logger.error(f"Dropping buffered step record that could not be written: {single_error}")
+
+    async def _flush_loop(self) -> None:
+        """Background task flushing when requested or every `flush_interval`."""
+        try:
+            while self._running or self.pending:
+                if self._running:
+                    try:
+                        await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                self._flush_requested.clear()
+                try:
+                    await self.flush()
+                except Exception as e:
+                    logger.error(f"Error flushing buffered steps: {e}")
+        except asyncio.CancelledError:
+            # the event loop is going away (asyncio.run cancels the tasks left over): write what is still buffered,
+            # and drop the buffer so it doesn't keep the loop alive
+            self._running = False
+            loop = asyncio.get_running_loop()
+            if _buffers.get(loop) is self:
+                del _buffers[loop]
+            await self.flush()
+            raise
+
+    @staticmethod
+    async def _write(batch: _Batch) -> None:
+        async with db_registry.async_session() as session:
+            if batch.steps:
+                await session.execute(insert(StepModel), list(batch.steps.values()))
+
+            for columns, rows in _group_by_columns(batch.step_updates):
+                statement = (
+                    update(StepModel.__table__)
+                    .where(StepModel.id == bindparam("b_id"), StepModel.organization_id == bindparam("b_organization_id"))
+                    .values({column: bindparam(f"v_{column}") for column in columns})
+                )
+                await session.execute(statement, rows)
+
+            if batch.metrics:
+                # like `record_step_metrics_async`: metrics need an existing step of the same organization, and inherit
+                # its agent, job and project unless given
+                steps = {
+                    step.id: step
+                    for step in await session.execute(
+                        select(StepModel.id, StepModel.organization_id, StepModel.agent_id, StepModel.job_id, StepModel.project_id).where(
+                            StepModel.id.in_(batch.metrics)
+                        )
+                    )
+                }
+                rows = []
+                for step_id, row in batch.metrics.items():
+                    step = steps.get(step_id)
+                    if step is None or step.organization_id != row["organization_id"]:
+                        logger.warning(f"Dropping metrics of step {step_id}: step does not exist")
+                        continue
+                    for column in ("agent_id", "job_id", "project_id"):
+                        row[column] = row[column] or getattr(step, column)
+                    rows.append(row)
+                if rows:
+                    await session.execute(insert(StepMetricsModel), rows)
+
+            if batch.traces:
+                await session.execute(insert(ProviderTraceModel), batch.traces)
+
+            await session.commit()
+
+
+_buffers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, StepWriteBuffer]" = weakref.WeakKeyDictionary()
+
+
+def get_step_write_buffer() -> StepWriteBuffer:
+    """The buffer shared by all requests of this process (and event loop)."""
+    loop = asyncio.get_running_loop()
+    buffer = _buffers.get(loop)
+    if buffer is None:
+        buffer = _buffers[loop] = StepWriteBuffer()
+    return buffer
+
+
+async def ensure_steps_written(step_ids: Iterable[str]) -> None:
+    """Wait for buffered records of these steps to be written, if the running event loop has a buffer."""
+    buffer = _buffers.get(asyncio.get_running_loop())
+    if buffer is not None:
+        await buffer.ensure_written(step_ids)
+
+
+async def flush_step_writes() -> None:
+    """Write everything buffered, if the running event loop has a buffer."""
+    buffer = _buffers.get(asyncio.get_running_loop())
+    if buffer is not None:
+        await buffer.flush()
+
+
+async def stop_step_write_buffers() -> None:
+    """Flush and stop the buffer of the running event loop."""
+    buffer = _buffers.pop(asyncio.get_running_loop(), None)
+    if buffer is not None:
+        await buffer.stop()
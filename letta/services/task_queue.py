@@ -0,0 +1,554 @@
+"""Durable queue for background agent work.
+
+Sleeptime agent steps and async agent-to-agent messages used to run as fire-and-forget `asyncio.create_task`s in the
+request worker: lost on restart, stuck on the worker that accepted the request, and competing with foreground
+requests for its event loop. They are now `Task`s, run by workers that claim them from a backend:
+    - `RedisTaskBackend` when Redis is configured: tasks survive restarts and are shared by all server processes and
+      any `letta worker` processes
+    - `InMemoryTaskBackend` otherwise (and in tests), run by the workers of the process that enqueued them
+
+Workers claim the ready task with the lowest priority value first (foreground work ahead of sleeptime work), oldest
+first within a priority, skipping tasks whose `serialize_key` (e.g. an agent ID) is held by a task that is running.
+A claim is a lease of `task_queue_visibility_timeout_seconds` that the worker renews while the task runs; a task
+whose lease expired (its worker died) is put back and claimed again. A failed task is retried with exponential,
+jittered backoff until it has been attempted `task_queue_max_attempts` times.
+
+Each server process runs `task_queue_workers` workers; set it to 0 to leave Redis backed tasks to `letta worker`
+processes, so background work scales separately from request handling.
+"""
+
+import asyncio
+import heapq
+import importlib
+import itertools
+import time
+import uuid
+import weakref
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from enum import IntEnum
+from random import uniform
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from letta.log import get_logger
+from letta.schemas.user import User
+from letta.settings import settings
+
+logger = get_logger(__name__)
+
+TASK_QUEUE_KEY_PREFIX = "letta:task_queue"
+
+# modules registering task handlers, imported by workers so they can run tasks enqueued by other processes
+TASK_HANDLER_MODULES = [
+    "letta.groups.sleeptime_multi_agent_v2",
+    "letta.services.tool_executor.multi_agent_tool_executor",
+]
+
+
+class TaskPriority(IntEnum):
+    """Lower values are claimed first."""
+
+    foreground = 0
+    default = 5
+    sleeptime = 10
+
+
+class Task(BaseModel):
+    id: str = Field(default_factory=lambda: f"task-{uuid.uuid4()}")
+    name: str = Field(..., description="Name of the registered handler that runs the task.")
+    actor_id: str = Field(..., description="The user the task runs as.")
+    payload: Dict[str, Any] = Field(default_factory=dict, description="JSON arguments of the handler.")
+    priority: int = Field(default=TaskPriority.default, description="Tasks with lower values are claimed first.")
+    serialize_key: Optional[str] = Field(default=None, description="Tasks with the same key never run at the same time.")
+    attempts: int = Field(default=0, description="Number of times the task has been claimed.")
+    max_attempts: int = Field(default_factory=lambda: settings.task_queue_max_attempts)
+    not_before: float = Field(default=0.0, description="Epoch seconds before which the task is not claimed (retry backoff).")
+
+
+@dataclass
+class _Handler:
+    run: Callable[[User, Dict[str, Any]], Awaitable[Any]]
+    on_failure: Optional[Callable[[User, Dict[str, Any], str], Awaitable[Any]]] = None
+
+
+_handlers: Dict[str, _Handler] = {}
+
+
+def task_handler(name: str, on_failure: Optional[Callable[[User, Dict[str, Any], str], Awaitable[Any]]] = None):
+    """
+    Register the decorated coroutine `(actor, payload)` as the handler of tasks named `name`.
+
+    Args:
+        name: Task name passed to `enqueue_task`
+        on_failure: Called with `(actor, payload, error)` when the task is given up on
+    """
+
+    def decorator(func):
+        _handlers[name] = _Handler(run=func, on_failure=on_failure)
+        return func
+
+    return decorator
+
+
+class TaskBackend(ABC):
+    """Storage of queued and leased tasks."""
+
+    @abstractmethod
+    async def enqueue(self, task: Task) -> None:
+        """Add a task, ready once `task.not_before` has passed."""
+
+    @abstractmethod
+    async def claim(self, lease_seconds: float) -> Optional[Task]:
+        """Lease the next claimable task, counting the attempt. None if there is none."""
+
+    @abstractmethod
+    async def extend(self, task: Task, lease_seconds: float) -> bool:
+        """Renew the lease of a claimed task. False if the lease was lost."""
+
+    @abstractmethod
+    async def complete(self, task: Task) -> None:
+        """Remove a claimed task for good."""
+
+    @abstractmethod
+    async def retry(self, task: Task, delay: float) -> None:
+        """Release a claimed task, ready again after `delay` seconds."""
+
+    @abstractmethod
+    async def requeue_expired(self) -> int:
+        """Release tasks whose lease expired. Returns how many."""
+
+    async def wait(self, timeout: float) -> None:
+        """Wait up to `timeout` seconds for a task to become claimable."""
+        await asyncio.sleep(timeout)
+
+
+class InMemoryTaskBackend(TaskBackend):
+    """Tasks of this process only, lost when it exits."""
+
+    def __init__(self):
+        # (priority, sequence, task_id)
+        self._ready: List[Tuple[int, int, str]] = []
+        self._sequence = itertools.count()
+        self._tasks: Dict[str, Task] = {}
+        # task_id -> lease deadline
+        self._leases: Dict[str, float] = {}
+        # serialize_key -> task_id
+        self._busy: Dict[str, str] = {}
+        self._changed = asyncio.Event()
+
+    @property
+    def size(self) -> int:
+        return len(self._tasks)
+
+    async def enqueue(self, task: Task) -> None:
+        self._tasks[task.id] = task
+        self._push(task)
+
+    def _push(self, task: Task) -> None:
+        heapq.heappush(self._ready, (task.priority, next(self._sequence), task.id))
+        self._changed.set()
+
+    async def claim(self, lease_seconds: float) -> Optional[Task]:
+        now = time.time()
+        skipped = []
+        claimed = None
+        while self._ready:
+            entry = heapq.heappop(self._ready)
+            task = self._tasks.get(entry[2])
+            if task is None:
+                continue
+            if task.not_before > now or (task.serialize_key is not None and task.serialize_key in self._busy):
+                skipped.append(entry)
+                continue
+            claimed = task
+            break
+        for entry in skipped:
+            heapq.heappush(self._ready, entry)
+
+        if claimed is not None:
+            claimed.attempts += 1
+            self._leases[claimed.id] = time.monotonic() + lease_seconds
+            if claimed.serialize_key is not None:
+                self._busy[claimed.serialize_key] = claimed.id
+        return claimed
+
+    async def extend(self, task: Task, lease_seconds: float) -> bool:
+        if task.id not in self._leases:
+            return False
+        self._leases[task.id] = time.monotonic() + lease_seconds
+        return True
+
+    def _release(self, task_id: str) -> Optional[Task]:
+        if self._leases.pop(task_id, None) is None:
+            return None
+        task = self._tasks[task_id]
+        if task.serialize_key is not None and self._busy.get(task.serialize_key) == task_id:
+            del self._busy[task.serialize_key]
+            self._changed.set()
+        return task
+
+    async def complete(self, task: Task) -> None:
+        if self._release(task.id) is not None:
+            del self._tasks[task.id]
+
+    async def retry(self, task: Task, delay: float) -> None:
+        task = self._release(task.id)
+        if task is not None:
+            task.not_before = time.time() + delay
+            self._push(task)
+
+    async def requeue_expired(self) -> int:
+        now = time.monotonic()
+        expired = [task_id for task_id, deadline in self._leases.items() if deadline <= now]
+        for task_id in expired:
+            self._push(self._release(task_id))
+        return len(expired)
+
+    async def wait(self, timeout: float) -> None:
+        self._changed.clear()
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+# Ready tasks are a sorted set scored by priority, then by the time they become ready (milliseconds), so one range
+# query walks them in claim order. Each task is a hash (data, key, priority, attempts); the lock of a serialize key
+# holds the ID of the task running with it and expires with its lease.
+_SCORE_PRIORITY_FACTOR = 10**13
+_CLAIM_SCAN_LIMIT = 500
+
+_CLAIM_SCRIPT = """
+local now = tonumber(ARGV[1])
+local entries = redis.call('zrange', KEYS[1], 0, tonumber(ARGV[3]) - 1, 'WITHSCORES')
+for i = 1, #entries, 2 do
+    local id = entries[i]
+    if tonumber(entries[i + 1]) % tonumber(ARGV[5]) <= now then
+        local task_key = ARGV[4] .. ':task:' .. id
+        local serialize_key = redis.call('hget', task_key, 'key')
+        if not serialize_key then
+            redis.call('zrem', KEYS[1], id)
+        elseif serialize_key == '' or redis.call('set', ARGV[4] .. ':busy:' .. serialize_key, id, 'NX', 'PX', ARGV[2]) then
+            redis.call('zrem', KEYS[1], id)
+            redis.call('zadd', KEYS[2], now + tonumber(ARGV[2]), id)
+            local attempts = redis.call('hincrby', task_key, 'attempts', 1)
+            return {redis.call('hget', task_key, 'data'), attempts}
+        end
+    end
+end
+return false
+"""
+
+_EXTEND_SCRIPT = """
+if not redis.call('zscore', KEYS[1], ARGV[1]) then
+    return 0
+end
+redis.call('zadd', KEYS[1], tonumber(ARGV[2]) + tonumber(ARGV[3]), ARGV[1])
+local serialize_key = redis.call('hget', ARGV[4] .. ':task:' .. ARGV[1], 'key')
+if serialize_key and serialize_key ~= '' then
+    local busy_key = ARGV[4] .. ':busy:' .. serialize_key
+    if redis.call('get', busy_key) == ARGV[1] then
+        redis.call('pexpire', busy_key, ARGV[3])
+    end
+end
+return 1
+"""
+
+# releases a leased task: back to the ready set with the given score (and data), or deleted if there is no score
+_RELEASE_SCRIPT = """
+if redis.call('zrem', KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+local task_key = ARGV[3] .. ':task:' .. ARGV[1]
+if ARGV[4] ~= '' then
+    redis.call('hset', task_key, 'data', ARGV[4])
+end
+local serialize_key = redis.call('hget', task_key, 'key')
+if serialize_key and serialize_key ~= '' then
+    local busy_key = ARGV[3] .. ':busy:' .. serialize_key
+    if redis.call('get', busy_key) == ARGV[1] then
+        redis.call('del', busy_key)
+    end
+end
+if ARGV[2] == '' then
+    redis.call('del', task_key)
+else
+    redis.call('zadd', KEYS[2], tonumber(ARGV[2]), ARGV[1])
+end
+return 1
+"""
+
+_REQUEUE_EXPIRED_SCRIPT = """
+local expired = redis.call('zrangebyscore', KEYS[1], '-inf', ARGV[1])
+for _, id in ipairs(expired) do
+    redis.call('zrem', KEYS[1], id)
+    local task_key = ARGV[2] .. ':task:' .. id
+    local serialize_key = redis.call('hget', task_key, 'key')
+    if serialize_key and serialize_key ~= '' then
+        local busy_key = ARGV[2] .. ':busy:' .. serialize_key
+        if redis.call('get', busy_key) == id then
+            redis.call('del', busy_key)
+        end
+    end
+    local priority = redis.call('hget', task_key, 'priority')
+    if priority then
+        redis.call('zadd', KEYS[2], tonumber(priority) * tonumber(ARGV[3]) + tonumber(ARGV[1]), id)
+    end
+end
+return #expired
+"""
+
+
+def _ms(seconds: float) -> int:
+    return int(seconds * 1000)
+
+
+class RedisTaskBackend(TaskBackend):
+    """Tasks shared by every process using the same Redis."""
+
+    def __init__(self, redis_client, prefix: str = TASK_QUEUE_KEY_PREFIX):
+        self.redis_client = redis_client
+        self.prefix = prefix
+        self.ready_key = f"{prefix}:ready"
+        self.leased_key = f"{prefix}:leased"
+
+    def _score(self, task: Task) -> int:
+        return task.priority * _SCORE_PRIORITY_FACTOR + _ms(max(task.not_before, time.time()))
+
+    async def enqueue(self, task: Task) -> None:
+        client = await self.redis_client.get_client()
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                f"{self.prefix}:task:{task.id}",
+                mapping={
+                    "data": task.model_dump_json(exclude={"attempts"}),
+                    "key": task.serialize_key or "",
+                    "priority": task.priority,
+                    "attempts": task.attempts,
+                },
+            )
+            pipe.zadd(self.ready_key, {task.id: self._score(task)})
+            await pipe.execute()
+
+    async def claim(self, lease_seconds: float) -> Optional[Task]:
+        client = await self.redis_client.get_client()
+        result = await client.eval(
+            _CLAIM_SCRIPT,
+            2,
+            self.ready_key,
+            self.leased_key,
+            _ms(time.time()),
+            _ms(lease_seconds),
+            _CLAIM_SCAN_LIMIT,
+            self.prefix,
+            _SCORE_PRIORITY_FACTOR,
+        )
+        if not result:
+            return None
+        data, attempts = result
+        task = Task.model_validate_json(data)
+        task.attempts = int(attempts)
+        return task
+
+    async def extend(self, task: Task, lease_seconds: float) -> bool:
+        client = await self.redis_client.get_client()
+        return bool(await client.eval(_EXTEND_SCRIPT, 1, self.leased_key, task.id, _ms(time.time()), _ms(lease_seconds), self.prefix))
+
+    async def complete(self, task: Task) -> None:
+        client = await self.redis_client.get_client()
+        await client.eval(_RELEASE_SCRIPT, 2, self.leased_key, self.ready_key, task.id, "", self.prefix, "")
+
+    async def retry(self, task: Task, delay: float) -> None:
+        task.not_before = time.time() + delay
+        client = await self.redis_client.get_client()
+        # the stored data carries the backoff, so a task requeued after its lease expires keeps it
+        data = task.model_dump_json(exclude={"attempts"})
+        await client.eval(_RELEASE_SCRIPT, 2, self.leased_key, self.ready_key, task.id, self._score(task), self.prefix, data)
+
+    async def requeue_expired(self) -> int:
+        client = await self.redis_client.get_client()
+        return int(
+            await client.eval(
+                _REQUEUE_EXPIRED_SCRIPT, 2, self.leased_key, self.ready_key, _ms(time.time()), self.prefix, _SCORE_PRIORITY_FACTOR
+            )
+        )
+
+
+class TaskQueue:
+    """Enqueues tasks and runs workers claiming them from a backend."""
+
+    def __init__(self, backend: TaskBackend):
+        self.backend = backend
+        self._workers: List[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+        self._last_requeue = 0.0
+        # tasks given up on after their last attempt, for monitoring and tests
+        self.failed = 0
+
+    async def enqueue(
+        self,
+        name: str,
+        actor: User,
+        payload: Dict[str, Any],
+        priority: int = TaskPriority.default,
+        serialize_key: Optional[str] = None,
+    ) -> Task:
+        """Queue a task for the handler registered as `name`, see `task_handler`."""
+        task = Task(name=name, actor_id=actor.id, payload=payload, priority=priority, serialize_key=serialize_key)
+        await self.backend.enqueue(task)
+        # tasks in memory can only be run by this process
+        self.start(max(settings.task_queue_workers, 1) if isinstance(self.backend, InMemoryTaskBackend) else settings.task_queue_workers)
+        return task
+
+    def start(self, num_workers: int) -> None:
+        """Start `num_workers` workers, unless they are running already."""
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        if self._workers or num_workers <= 0:
+            return
+        load_task_handlers()
+        for _ in range(num_workers):
+            self._workers.append(asyncio.create_task(self._work()))
+
+    async def stop(self) -> None:
+        """Stop the workers. Tasks they were running are released for other workers to pick up."""
+        self._stopping.set()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                if time.monotonic() - self._last_requeue >= settings.task_queue_visibility_timeout_seconds / 2:
+                    self._last_requeue = time.monotonic()
+                    if requeued := await self.backend.requeue_expired():
+                        logger.warning(f"Requeued {requeued} background tasks whose worker stopped renewing their lease")
+
+                task = await self.backend.claim(settings.task_queue_visibility_timeout_seconds)
+                if task is None:
+                    await self.backend.wait(settings.task_queue_poll_interval_seconds)
+                    continue
+                await self.run_task(task)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Background task worker error: {e}")
+                await asyncio.sleep(settings.task_queue_poll_interval_seconds)
+
+    async def run_task(self, task: Task) -> None:
+        """Run a claimed task, then complete, retry or give up on it."""
+        from letta.services.user_manager import UserManager
+
+        handler = _handlers.get(task.name)
+        if handler is None:
+            logger.error(f"Dropping background task {task.id}: no handler registered for '{task.name}'")
+            await self.backend.complete(task)
+            return
+
+        heartbeat = asyncio.create_task(self._renew_lease(task))
+        actor = None
+        try:
+            actor = await UserManager().get_actor_by_id_async(task.actor_id)
+            if task.attempts > task.max_attempts:
+                # its last attempt ended without the worker reporting back, e.g. the worker died
+                await self._give_up(task, handler, actor, "worker stopped while running the task")
+                return
+            await handler.run(actor, task.payload)
+        except asyncio.CancelledError:
+            # stopping: hand the task back right away instead of waiting for its lease to expire
+            await asyncio.shield(self.backend.retry(task, 0))
+            raise
+        except Exception as e:
+            if task.attempts < task.max_attempts:
+                backoff = uniform(0.5, 2) * (2**task.attempts)
+                logger.warning(
+                    f"Background task {task.name} ({task.id}) failed on attempt {task.attempts}, retrying in {backoff:.1f}s: {e}"
+                )
+                await self.backend.retry(task, backoff)
+            else:
+                await self._give_up(task, handler, actor, str(e))
+        else:
+            await self.backend.complete(task)
+        finally:
+            heartbeat.cancel()
+
+    async def _give_up(self, task: Task, handler: _Handler, actor: Optional[User], error: str) -> None:
+        self.failed += 1
+        logger.error(f"Giving up on background task {task.name} ({task.id}) after {task.attempts} attempts: {error}")
+        try:
+            if handler.on_failure is not None and actor is not None:
+                await handler.on_failure(actor, task.payload, error)
+        finally:
+            await self.backend.complete(task)
+
+    async def _renew_lease(self, task: Task) -> None:
+        while True:
+            await asyncio.sleep(settings.task_queue_visibility_timeout_seconds / 3)
+            try:
+                if not await self.backend.extend(task, settings.task_queue_visibility_timeout_seconds):
+                    logger.warning(f"Background task {task.id} lost its lease, another worker may run it again")
+                    return
+            except Exception as e:
+                logger.warning(f"Failed to renew the lease of background task {task.id}: {e}")
+
+
+_queues: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, TaskQueue]" = weakref.WeakKeyDictionary()
+
+
+async def get_task_queue() -> TaskQueue:
+    """The queue of the running event loop, backed by Redis when it is configured."""
+    from letta.data_sources.redis_client import NoopAsyncRedisClient, get_redis_client
+
+    loop = asyncio.get_running_loop()
+    queue = _queues.get(loop)
+    if queue is None:
+        redis_client = await get_redis_client()
+        backend = InMemoryTaskBackend() if isinstance(redis_client, NoopAsyncRedisClient) else RedisTaskBackend(redis_client)
+        queue = _queues.setdefault(loop, TaskQueue(backend))
+    return queue
+
+
+async def enqueue_task(
+    name: str, actor: User, payload: Dict[str, Any], priority: int = TaskPriority.default, serialize_key: Optional[str] = None
+) -> Task:
+    """Queue a background task, see `TaskQueue.enqueue`."""
+    queue = await get_task_queue()
+    return await queue.enqueue(name, actor, payload, priority=priority, serialize_key=serialize_key)
+
+
+def load_task_handlers() -> None:
+    for module in TASK_HANDLER_MODULES:
+        importlib.import_module(module)
+
+
+async def start_task_workers(num_workers: Optional[int] = None) -> TaskQueue:
+    """Start workers for the running event loop's queue (e.g. to resume tasks left in Redis by a previous run)."""
+    queue = await get_task_queue()
+    queue.start(settings.task_queue_workers if num_workers is None else num_workers)
+    return queue
+
+
+async def stop_task_workers() -> None:
+    """Stop the workers of the running event loop's queue."""
+    queue = _queues.pop(asyncio.get_running_loop(), None)
+    if queue is not None:
+        await queue.stop()
+
+
+async def run_task_worker(num_workers: Optional[int] = None) -> None:
+    """Run Redis backed tasks until cancelled, see `letta worker`."""
+    from letta.server.db import db_registry
+
+    db_registry.initialize_async()
+    queue = await get_task_queue()
+    if not isinstance(queue.backend, RedisTaskBackend):
+        raise RuntimeError("A standalone task worker needs Redis (LETTA_REDIS_HOST / LETTA_REDIS_PORT) to share tasks with the server")
+    queue.start(num_workers or max(settings.task_queue_workers, 1))
+    logger.info(f"Task worker running {len(queue._workers)} tasks at a time")
+    try:
+        await asyncio.gather(*queue._workers)
+    finally:
+        await stop_task_workers()
@@ -1,3 +1,6 @@
+import uuid
+from datetime import datetime, timezone
+
 from letta.helpers.json_helpers import json_dumps, json_loads
 from letta.helpers.singleton import singleton
 from letta.orm.provider_trace import ProviderTrace as ProviderTraceModel
@@ -6,6 +9,7 @@ from letta.schemas.provider_trace import ProviderTrace as PydanticProviderTrace,
 from letta.schemas.step import Step as PydanticStep
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
+from letta.services.step_write_buffer import ensure_steps_written, get_step_write_buffer
 from letta.utils import enforce_types
 
 
@@ -54,6 +58,43 @@ class TelemetryManager:
             return provider_trace.to_pydantic()
 
 
+@singleton
+class WriteBehindTelemetryManager(TelemetryManager):
+    """
+    TelemetryManager that hands provider traces to the write-behind buffer of the running event loop
+    (see `letta.services.step_write_buffer`) instead of writing them inline.
+    """
+
+    @enforce_types
+    @trace_method
+    async def get_provider_trace_by_step_id_async(
+        self,
+        step_id: str,
+        actor: PydanticUser,
+    ) -> PydanticProviderTrace:
+        await ensure_steps_written([step_id])
+        return await super().get_provider_trace_by_step_id_async(step_id=step_id, actor=actor)
+
+    @enforce_types
+    @trace_method
+    async def create_provider_trace_async(self, actor: PydanticUser, provider_trace_create: ProviderTraceCreate) -> PydanticProviderTrace:
+        now = datetime.now(timezone.utc)
+        provider_trace_data = {
+            "id": f"provider_trace-{uuid.uuid4()}",
+            "organization_id": provider_trace_create.organization_id,
+            "step_id": provider_trace_create.step_id,
+            # round-trip through json like `create_provider_trace_async`, so the buffered trace is plain JSON
+            "request_json": json_loads(json_dumps(provider_trace_create.request_json)),
+            "response_json": json_loads(json_dumps(provider_trace_create.response_json)),
+            "_created_by_id": actor.id,
+            "_last_updated_by_id": actor.id,
+            "created_at": now,
+            "updated_at": now,
+        }
+        await get_step_write_buffer().add_trace(provider_trace_data)
+        return ProviderTraceModel(**provider_trace_data).to_pydantic()
+
+
 @singleton
 class NoopTelemetryManager(TelemetryManager):
     """
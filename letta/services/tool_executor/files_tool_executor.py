@@ -15,7 +15,7 @@ from letta.schemas.user import User
 from letta.services.agent_manager import AgentManager
 from letta.services.block_manager import BlockManager
 from letta.services.file_manager import FileManager
-from letta.services.file_processor.chunker.line_chunker import LineChunker
+from letta.services.file_processor.line_index import required_trigrams
 from letta.services.files_agents_manager import FileAgentManager
 from letta.services.job_manager import JobManager
 from letta.services.message_manager import MessageManager
@@ -177,10 +177,12 @@ class LettaFileToolExecutor(ToolExecutor):
                 )
 
             file_id = file_agent.file_id
-            file = await self.file_manager.get_file_by_id(file_id=file_id, actor=self.actor, include_content=True)
+            line_index = (await self.file_manager.get_file_line_indexes([file_id], actor=self.actor)).get(file_id)
 
-            # Process file content
-            content_lines = LineChunker().chunk_text(file_metadata=file, start=start, end=end, validate_range=True)
+            # Process file content (already split into lines, numbered as LineChunker does)
+            content_lines = []
+            if line_index is not None and line_index.content_size:
+                content_lines = line_index.format_lines(file_agent.file_name, start=start, end=end, validate_range=True)
             visible_content = "\n".join(content_lines)
 
             # Handle LRU eviction and file opening
@@ -188,7 +190,7 @@ class LettaFileToolExecutor(ToolExecutor):
                 agent_id=agent_state.id,
                 file_id=file_id,
                 file_name=file_name,
-                source_id=file.source_id,
+                source_id=file_agent.source_id,
                 actor=self.actor,
                 visible_content=visible_content,
                 max_files_open=agent_state.max_files_open,
@@ -260,45 +262,29 @@ class LettaFileToolExecutor(ToolExecutor):
 
     def _get_context_lines(
         self,
-        formatted_lines: List[str],
-        match_line_num: int,
+        lines: List[str],
+        match_idx: int,
         context_lines: int,
     ) -> List[str]:
-        """Get context lines around a match from already-chunked lines.
+        """Get numbered context lines around a match.
 
         Args:
-            formatted_lines: Already chunked lines from LineChunker (format: "line_num: content")
-            match_line_num: The 1-based line number of the match
+            lines: All lines of the file, as split by LineChunker (unnumbered)
+            match_idx: The 0-based index of the matching line
             context_lines: Number of context lines before and after
         """
-        if not formatted_lines or context_lines < 0:
-            return []
-
-        # Find the index of the matching line in the formatted_lines list
-        match_formatted_idx = None
-        for i, line in enumerate(formatted_lines):
-            if line and ":" in line:
-                try:
-                    line_num = int(line.split(":", 1)[0].strip())
-                    if line_num == match_line_num:
-                        match_formatted_idx = i
-                        break
-                except ValueError:
-                    continue
-
-        if match_formatted_idx is None:
+        if not lines or context_lines < 0 or not 0 <= match_idx < len(lines):
             return []
 
         # Calculate context range with bounds checking
-        start_idx = max(0, match_formatted_idx - context_lines)
-        end_idx = min(len(formatted_lines), match_formatted_idx + context_lines + 1)
+        start_idx = max(0, match_idx - context_lines)
+        end_idx = min(len(lines), match_idx + context_lines + 1)
 
-        # Extract context lines and add match indicator
+        # Extract context lines (1-indexed like LineChunker) and add match indicator
         context_lines_with_indicator = []
         for i in range(start_idx, end_idx):
-            line = formatted_lines[i]
-            prefix = ">" if i == match_formatted_idx else " "
-            context_lines_with_indicator.append(f"{prefix} {line}")
+            prefix = ">" if i == match_idx else " "
+            context_lines_with_indicator.append(f"{prefix} {i + 1}: {lines[i]}")
 
         return context_lines_with_indicator
 
@@ -373,6 +359,9 @@ class LettaFileToolExecutor(ToolExecutor):
 
         pattern_regex = re.compile(pattern, regex_flags)
 
+        # Only lines containing every trigram of the pattern's literal parts can match
+        pattern_trigrams = required_trigrams(pattern, regex_flags)
+
         # Collect all matches first (up to a reasonable limit)
         all_matches = []  # List of tuples: (file_name, line_num, context_lines)
         total_content_size = 0
@@ -384,21 +373,23 @@ class LettaFileToolExecutor(ToolExecutor):
         async def _search_files():
             nonlocal all_matches, total_content_size, files_processed, files_skipped, files_with_matches
 
+            # Load the line indexes of all files at once (cached, or fetched in concurrent batches)
+            line_indexes = await self.file_manager.get_file_line_indexes([fa.file_id for fa in file_agents], actor=self.actor)
+
             for file_agent in file_agents:
-                # Load file content
-                file = await self.file_manager.get_file_by_id(file_id=file_agent.file_id, actor=self.actor, include_content=True)
+                line_index = line_indexes.get(file_agent.file_id)
 
-                if not file or not file.content:
+                if line_index is None or not line_index.content_size:
                     files_skipped += 1
                     self.logger.warning(f"Grep: Skipping file {file_agent.file_name} - no content available")
                     continue
 
                 # Check individual file size
-                content_size = len(file.content.encode("utf-8"))
+                content_size = line_index.content_size
                 if content_size > self.MAX_FILE_SIZE_BYTES:
                     files_skipped += 1
                     self.logger.warning(
-                        f"Grep: Skipping file {file.file_name} - too large ({content_size:,} bytes > {self.MAX_FILE_SIZE_BYTES:,} limit)"
+                        f"Grep: Skipping file {file_agent.file_name} - too large ({content_size:,} bytes > {self.MAX_FILE_SIZE_BYTES:,} limit)"
                     )
                     continue
 
@@ -407,42 +398,21 @@ class LettaFileToolExecutor(ToolExecutor):
                 if total_content_size > self.MAX_TOTAL_CONTENT_SIZE:
                     files_skipped += 1
                     self.logger.warning(
-                        f"Grep: Skipping file {file.file_name} - total content size limit exceeded ({total_content_size:,} bytes > {self.MAX_TOTAL_CONTENT_SIZE:,} limit)"
+                        f"Grep: Skipping file {file_agent.file_name} - total content size limit exceeded ({total_content_size:,} bytes > {self.MAX_TOTAL_CONTENT_SIZE:,} limit)"
                     )
                     break
 
                 files_processed += 1
 
-                # Use LineChunker to get all lines with proper formatting
-                chunker = LineChunker()
-                formatted_lines = chunker.chunk_text(file_metadata=file)
-
-                # Remove metadata header
-                if formatted_lines and formatted_lines[0].startswith("[Viewing"):
-                    formatted_lines = formatted_lines[1:]
-
-                # Search for matches in formatted lines
-                for formatted_line in formatted_lines:
-                    if len(all_matches) >= self.MAX_TOTAL_COLLECTED:
-                        # Stop collecting if we hit the upper limit
-                        break
-
-                    # Extract line number and content from formatted line
-                    if ":" in formatted_line:
-                        try:
-                            line_parts = formatted_line.split(":", 1)
-                            line_num = int(line_parts[0].strip())
-                            line_content = line_parts[1].strip() if len(line_parts) > 1 else ""
-                        except (ValueError, IndexError):
-                            continue
-
-                        if pattern_regex.search(line_content):
-                            # Mark this file as having matches for LRU tracking
-                            files_with_matches.add(file.file_name)
-                            context = self._get_context_lines(formatted_lines, match_line_num=line_num, context_lines=context_lines or 0)
-
-                            # Store match data for later pagination
-                            all_matches.append((file.file_name, line_num, context))
+                # Run the regex over the candidate lines only
+                match_indices = line_index.search(pattern_regex, pattern_trigrams, limit=self.MAX_TOTAL_COLLECTED - len(all_matches))
+                if match_indices:
+                    # Mark this file as having matches for LRU tracking
+                    files_with_matches.add(file_agent.file_name)
+                for match_idx in match_indices:
+                    context = self._get_context_lines(line_index.lines, match_idx, context_lines=context_lines or 0)
+                    # Store match data for later pagination (1-indexed line numbers)
+                    all_matches.append((file_agent.file_name, match_idx + 1, context))
 
                 # Break if we've collected enough matches
                 if len(all_matches) >= self.MAX_TOTAL_COLLECTED:
@@ -1,21 +1,35 @@
 import asyncio
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+from letta.errors import LLMError, LLMRateLimitError
 from letta.log import get_logger
 from letta.schemas.agent import AgentState
-from letta.schemas.enums import MessageRole
+from letta.schemas.enums import JobStatus, MessageRole, ProviderType
+from letta.schemas.job import BatchJob, JobUpdate
 from letta.schemas.letta_message import AssistantMessage
 from letta.schemas.letta_message_content import TextContent
+from letta.schemas.letta_request import LettaBatchRequest
 from letta.schemas.message import MessageCreate
 from letta.schemas.sandbox_config import SandboxConfig
 from letta.schemas.tool import Tool
 from letta.schemas.tool_execution_result import ToolExecutionResult
 from letta.schemas.user import User
+from letta.services.agent_fan_out import AgentFanOut
+from letta.services.agent_manager import AgentManager
+from letta.services.block_manager import BlockManager
+from letta.services.job_manager import JobManager
+from letta.services.llm_batch_manager import LLMBatchManager
+from letta.services.message_manager import MessageManager
+from letta.services.passage_manager import PassageManager
+from letta.services.sandbox_config_manager import SandboxConfigManager
+from letta.services.task_queue import TaskPriority, enqueue_task, task_handler
 from letta.services.tool_executor.tool_executor_base import ToolExecutor
 from letta.settings import settings
 
 logger = get_logger(__name__)
 
+AGENT_MESSAGE_TASK = "agent_message"
+
 
 class LettaMultiAgentToolExecutor(ToolExecutor):
     """Executor for LETTA multi-agent core tools."""
@@ -74,42 +88,116 @@ class LettaMultiAgentToolExecutor(ToolExecutor):
             f"{message}"
         )
 
-        tasks = [
-            asyncio.create_task(self._process_agent(agent_id=agent_state.id, message=augmented_message)) for agent_state in matching_agents
-        ]
-        results = await asyncio.gather(*tasks)
+        results = []
+        batched_agents, matching_agents = self._split_for_batch_api(matching_agents)
+        if batched_agents:
+            try:
+                batch_job = await self._send_message_batch(batched_agents, augmented_message)
+                results.extend({"agent_id": agent.id, "batch_id": batch_job.id, "status": "queued"} for agent in batched_agents)
+            except Exception as e:
+                logger.warning(f"Submitting broadcast to {len(batched_agents)} agents as a batch failed, sending it directly: {e}")
+                matching_agents = batched_agents + matching_agents
+
+        fan_out = AgentFanOut(lambda agent: self._step_agent(agent_id=agent.id, message=augmented_message))
+        async for outcome in fan_out.stream(matching_agents):
+            if outcome.error is not None:
+                results.append(self._error_result(outcome.agent_state.id, outcome.error))
+            else:
+                results.append(outcome.result)
+            logger.debug(f"Broadcast from agent {agent_state.id}: {len(results)} agents done")
         return str(results)
 
-    async def _process_agent(self, agent_id: str, message: str) -> Dict[str, Any]:
-        from letta.agents.letta_agent import LettaAgent
-
+    @staticmethod
+    def _split_for_batch_api(agents: List[AgentState]) -> Tuple[List[AgentState], List[AgentState]]:
+        """Agents whose broadcast goes through the LLM batch API, and the rest."""
+        threshold = settings.multi_agent_broadcast_batch_threshold
+        if not threshold or not settings.enable_batch_job_polling:
+            return [], agents
+        # TODO: the batch API is only implemented for Anthropic
+        batchable = [agent for agent in agents if agent.llm_config.model_endpoint_type == ProviderType.anthropic]
+        if len(batchable) < threshold:
+            return [], agents
+        return batchable, [agent for agent in agents if agent.llm_config.model_endpoint_type != ProviderType.anthropic]
+
+    async def _send_message_batch(self, agents: List[AgentState], message: str) -> BatchJob:
+        """Submit the message to `agents` as one LLM batch, which the batch job poller resumes once it completes."""
+        from letta.agents.letta_agent_batch import LettaAgentBatch
+
+        batch_job = await self.job_manager.create_job_async(
+            pydantic_job=BatchJob(user_id=self.actor.id, status=JobStatus.running, metadata={"job_type": "batch_messages"}),
+            actor=self.actor,
+        )
         try:
-            letta_agent = LettaAgent(
-                agent_id=agent_id,
+            batch_runner = LettaAgentBatch(
                 message_manager=self.message_manager,
                 agent_manager=self.agent_manager,
                 block_manager=self.block_manager,
-                job_manager=self.job_manager,
                 passage_manager=self.passage_manager,
+                batch_manager=LLMBatchManager(),
+                sandbox_config_manager=SandboxConfigManager(),
+                job_manager=self.job_manager,
                 actor=self.actor,
             )
+            await batch_runner.step_until_request(
+                batch_requests=[
+                    LettaBatchRequest(
+                        agent_id=agent.id, messages=[MessageCreate(role=MessageRole.system, content=[TextContent(text=message)])]
+                    )
+                    for agent in agents
+                ],
+                letta_batch_job_id=batch_job.id,
+            )
+        except Exception:
+            await self.job_manager.update_job_by_id_async(
+                job_id=batch_job.id, job_update=JobUpdate(status=JobStatus.failed), actor=self.actor
+            )
+            raise
+        return batch_job
+
+    async def _process_agent(self, agent_id: str, message: str) -> Dict[str, Any]:
+        try:
+            return await self._step_agent(agent_id=agent_id, message=message)
+        except Exception as e:
+            return self._error_result(agent_id, e)
 
+    async def _step_agent(self, agent_id: str, message: str) -> Dict[str, Any]:
+        from letta.agents.letta_agent import LettaAgent
+
+        letta_agent = LettaAgent(
+            agent_id=agent_id,
+            message_manager=self.message_manager,
+            agent_manager=self.agent_manager,
+            block_manager=self.block_manager,
+            job_manager=self.job_manager,
+            passage_manager=self.passage_manager,
+            actor=self.actor,
+        )
+
+        # the agent loop persists messages after every inner step, so a rate limit is only retried (by `AgentFanOut`)
+        # if it hit before anything was persisted
+        persisted_before = await self.message_manager.size_async(actor=self.actor, agent_id=agent_id)
+        try:
             letta_response = await letta_agent.step([MessageCreate(role=MessageRole.system, content=[TextContent(text=message)])])
-            messages = letta_response.messages
+        except LLMRateLimitError as e:
+            if await self.message_manager.size_async(actor=self.actor, agent_id=agent_id) != persisted_before:
+                raise LLMError(f"{e} (not retried, part of the step was already saved)") from e
+            raise
+        messages = letta_response.messages
 
-            send_message_content = [message.content for message in messages if isinstance(message, AssistantMessage)]
+        send_message_content = [message.content for message in messages if isinstance(message, AssistantMessage)]
 
-            return {
-                "agent_id": agent_id,
-                "response": send_message_content if send_message_content else ["<no response>"],
-            }
+        return {
+            "agent_id": agent_id,
+            "response": send_message_content if send_message_content else ["<no response>"],
+        }
 
-        except Exception as e:
-            return {
-                "agent_id": agent_id,
-                "error": str(e),
-                "type": type(e).__name__,
-            }
+    @staticmethod
+    def _error_result(agent_id: str, error: Exception) -> Dict[str, Any]:
+        return {
+            "agent_id": agent_id,
+            "error": str(error),
+            "type": type(error).__name__,
+        }
 
     async def send_message_to_agent_async(self, agent_state: AgentState, message: str, other_agent_id: str) -> str:
         if settings.environment == "PRODUCTION":
@@ -123,8 +211,32 @@ class LettaMultiAgentToolExecutor(ToolExecutor):
             f"{message}"
         )
 
+        if settings.task_queue_enabled:
+            await enqueue_task(
+                AGENT_MESSAGE_TASK,
+                actor=self.actor,
+                payload={"agent_id": other_agent_id, "message": prefixed},
+                priority=TaskPriority.foreground,
+                serialize_key=other_agent_id,
+            )
+            return "Successfully sent message"
+
         task = asyncio.create_task(self._process_agent(agent_id=other_agent_id, message=prefixed))
 
         task.add_done_callback(lambda t: (logger.error(f"Async send_message task failed: {t.exception()}") if t.exception() else None))
 
         return "Successfully sent message"
+
+
+@task_handler(AGENT_MESSAGE_TASK)
+async def _run_agent_message(actor: User, payload: dict) -> None:
+    """Queued message of `send_message_to_agent_async`."""
+    executor = LettaMultiAgentToolExecutor(
+        message_manager=MessageManager(),
+        agent_manager=AgentManager(),
+        block_manager=BlockManager(),
+        job_manager=JobManager(),
+        passage_manager=PassageManager(),
+        actor=actor,
+    )
+    await executor._step_agent(agent_id=payload["agent_id"], message=payload["message"])
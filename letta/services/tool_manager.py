@@ -30,6 +30,7 @@ from letta.schemas.enums import ToolType
 from letta.schemas.tool import Tool as PydanticTool, ToolCreate, ToolUpdate
 from letta.schemas.user import User as PydanticUser
 from letta.server.db import db_registry
+from letta.services.agent_state_cache import invalidates_agent_state_dependencies
 from letta.services.helpers.agent_manager_helper import calculate_multi_agent_tools
 from letta.services.mcp.types import SSEServerConfig, StdioServerConfig
 from letta.settings import settings
@@ -42,6 +43,7 @@ class ToolManager:
     """Manager class to handle business logic related to Tools."""
 
     # TODO: Refactor this across the codebase to use CreateTool instead of passing in a Tool object
+    @invalidates_agent_state_dependencies(include_result=True)
     @enforce_types
     @trace_method
     def create_or_update_tool(self, pydantic_tool: PydanticTool, actor: PydanticUser, bypass_name_check: bool = False) -> PydanticTool:
@@ -71,6 +73,7 @@ class ToolManager:
 
         return tool
 
+    @invalidates_agent_state_dependencies(include_result=True)
     @enforce_types
     @trace_method
     async def create_or_update_tool_async(
@@ -180,6 +183,7 @@ class ToolManager:
             await tool.create_async(session, actor=actor)  # Re-raise other database-related errors
             return tool.to_pydantic()
 
+    @invalidates_agent_state_dependencies(include_result=True)
     @enforce_types
     @trace_method
     async def bulk_upsert_tools_async(
@@ -531,6 +535,7 @@ class ToolManager:
                 return await ToolModel.size_async(db_session=session, actor=actor)
             return await ToolModel.size_async(db_session=session, actor=actor, name=LETTA_TOOL_SET)
 
+    @invalidates_agent_state_dependencies("tool_id")
     @enforce_types
     @trace_method
     def update_tool_by_id(
@@ -639,6 +644,7 @@ class ToolManager:
             # Save the updated tool to the database
             return tool.update(db_session=session, actor=actor).to_pydantic()
 
+    @invalidates_agent_state_dependencies("tool_id")
     @enforce_types
     @trace_method
     async def update_tool_by_id_async(
@@ -710,6 +716,7 @@ class ToolManager:
             tool = await tool.update_async(db_session=session, actor=actor)
             return tool.to_pydantic()
 
+    @invalidates_agent_state_dependencies("tool_id")
     @enforce_types
     @trace_method
     def delete_tool_by_id(self, tool_id: str, actor: PydanticUser) -> None:
@@ -721,6 +728,7 @@ class ToolManager:
             except NoResultFound:
                 raise ValueError(f"Tool with id {tool_id} not found.")
 
+    @invalidates_agent_state_dependencies("tool_id")
     @enforce_types
     @trace_method
     async def delete_tool_by_id_async(self, tool_id: str, actor: PydanticUser) -> None:
@@ -732,6 +740,7 @@ class ToolManager:
             except NoResultFound:
                 raise ValueError(f"Tool with id {tool_id} not found.")
 
+    @invalidates_agent_state_dependencies(include_result=True)
     @enforce_types
     @trace_method
     def upsert_base_tools(self, actor: PydanticUser) -> List[PydanticTool]:
@@ -829,6 +838,7 @@ class ToolManager:
         # TODO: Delete any base tools that are stale
         return tools
 
+    @invalidates_agent_state_dependencies(include_result=True)
     @enforce_types
     @trace_method
     async def upsert_base_tools_async(
@@ -22,6 +22,7 @@ from letta.services.helpers.tool_execution_helper import (
 )
 from letta.services.helpers.tool_parser_helper import parse_stdout_best_effort
 from letta.services.tool_sandbox.base import AsyncToolSandboxBase
+from letta.services.tool_sandbox.local_worker_pool import close_local_sandbox_worker_pools, get_local_sandbox_worker_pool
 from letta.settings import tool_settings
 from letta.utils import get_friendly_error_msg, parse_stderr_error_msg
 
@@ -31,6 +32,8 @@ logger = get_logger(__name__)
 class AsyncToolSandboxLocal(AsyncToolSandboxBase):
     METADATA_CONFIG_STATE_KEY = "config_state"
     REQUIREMENT_TXT_NAME = "requirements.txt"
+    # Environment that shapes the interpreter itself, which pooled workers must start with
+    WORKER_ENV_KEYS = ("PATH", "VIRTUAL_ENV", "PYTHONPATH", "PYTHONWARNINGS", "NO_COLOR", "TERM", "PYTHONUNBUFFERED")
 
     def __init__(
         self,
@@ -170,6 +173,8 @@ class AsyncToolSandboxLocal(AsyncToolSandboxBase):
                 force_recreate=self.force_recreate_venv,
             )
             log_event(name="finish create_venv_for_local_sandbox")
+            # warm workers still have modules from the old venv imported
+            await asyncio.to_thread(close_local_sandbox_worker_pools)
 
         if local_configs.pip_requirements or (self.tool and self.tool.pip_requirements):
             log_event(name="start install_pip_requirements_for_sandbox", attributes={"local_configs": local_configs.model_dump_json()})
@@ -189,22 +194,28 @@ class AsyncToolSandboxLocal(AsyncToolSandboxBase):
         try:
             log_event(name="start subprocess")
 
-            process = await asyncio.create_subprocess_exec(
-                python_executable, temp_file_path, env=env, cwd=cwd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-            )
+            if tool_settings.tool_sandbox_worker_pool and os.name == "posix":
+                returncode, stdout_bytes, stderr_bytes = await self._execute_in_worker_pool(
+                    sbx_config=sbx_config, python_executable=python_executable, temp_file_path=temp_file_path, env=env, cwd=cwd
+                )
+            else:
+                process = await asyncio.create_subprocess_exec(
+                    python_executable, temp_file_path, env=env, cwd=cwd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+                )
 
-            try:
-                stdout_bytes, stderr_bytes = await asyncio.wait_for(process.communicate(), timeout=tool_settings.tool_sandbox_timeout)
-            except asyncio.TimeoutError:
-                # Terminate the process on timeout
-                if process.returncode is None:
-                    process.terminate()
-                    try:
-                        await asyncio.wait_for(process.wait(), timeout=5)
-                    except asyncio.TimeoutError:
-                        process.kill()
+                try:
+                    stdout_bytes, stderr_bytes = await asyncio.wait_for(process.communicate(), timeout=tool_settings.tool_sandbox_timeout)
+                except asyncio.TimeoutError:
+                    # Terminate the process on timeout
+                    if process.returncode is None:
+                        process.terminate()
+                        try:
+                            await asyncio.wait_for(process.wait(), timeout=5)
+                        except asyncio.TimeoutError:
+                            process.kill()
 
-                raise TimeoutError(f"Executing tool {self.tool_name} timed out after {tool_settings.tool_sandbox_timeout} seconds.")
+                    raise TimeoutError(f"Executing tool {self.tool_name} timed out after {tool_settings.tool_sandbox_timeout} seconds.")
+                returncode = process.returncode
 
             stderr = stderr_bytes.decode("utf-8") if stderr_bytes else ""
             log_event(name="finish subprocess")
@@ -213,7 +224,7 @@ class AsyncToolSandboxLocal(AsyncToolSandboxBase):
             func_result_bytes, stdout_text = self.parse_out_function_results_markers(stdout_bytes)
             func_return, agent_state = parse_stdout_best_effort(func_result_bytes)
 
-            if process.returncode != 0 and func_return is None:
+            if returncode != 0 and func_return is None:
                 exception_name, msg = parse_stderr_error_msg(stderr)
                 func_return = get_friendly_error_msg(
                     function_name=self.tool_name,
@@ -226,7 +237,7 @@ class AsyncToolSandboxLocal(AsyncToolSandboxBase):
                 agent_state=agent_state,
                 stdout=[stdout_text] if stdout_text else [],
                 stderr=[stderr] if stderr else [],
-                status="success" if process.returncode == 0 else "error",
+                status="success" if returncode == 0 else "error",
                 sandbox_config_fingerprint=sbx_config.fingerprint(),
             )
 
@@ -252,6 +263,30 @@ class AsyncToolSandboxLocal(AsyncToolSandboxBase):
                 sandbox_config_fingerprint=sbx_config.fingerprint(),
             )
 
+    async def _execute_in_worker_pool(
+        self, sbx_config, python_executable: str, temp_file_path: str, env: Dict[str, str], cwd: str
+    ) -> tuple[int, bytes, bytes]:
+        """
+        Execute the script in a warm worker from the pool for this sandbox config and python environment.
+        Returns (exit code, stdout, stderr) like running it in a fresh subprocess would.
+        """
+        # workers start with the interpreter-level environment only; the full env is applied per call
+        worker_env = os.environ.copy()
+        worker_env.update({key: env[key] for key in self.WORKER_ENV_KEYS if key in env})
+        pool = get_local_sandbox_worker_pool(
+            key=(sbx_config.fingerprint(), python_executable, cwd), python_executable=python_executable, env=worker_env, cwd=cwd
+        )
+        try:
+            return await pool.run_async(
+                script_path=temp_file_path,
+                env=env,
+                cwd=cwd,
+                timeout=tool_settings.tool_sandbox_timeout,
+                preload=("letta",) if self.inject_agent_state else (),
+            )
+        except TimeoutError:
+            raise TimeoutError(f"Executing tool {self.tool_name} timed out after {tool_settings.tool_sandbox_timeout} seconds.")
+
     def parse_out_function_results_markers(self, data: bytes) -> tuple[bytes, str]:
         """
         Parse the function results out of the stdout using special markers.
@@ -0,0 +1,137 @@
+"""
+Long-lived worker process for the local tool sandbox.
+
+Runs under the sandbox's python (possibly a venv without letta installed), so it only uses the standard library.
+Requests and responses are length-prefixed JSON over the worker's original stdin/stdout, which are moved to private
+file descriptors at startup so tool code (and any processes it spawns) can't read or corrupt the protocol.
+
+Each request runs one generated tool script as `__main__` in a fresh namespace, as `python <script>` would, with the
+request's environment and working directory. File descriptors 1 and 2 are pointed at the request's capture files for
+the duration of the call, so everything the tool writes (including from subprocesses) is captured as before.
+
+Only the environment, working directory, sys.path and argv are restored after a call. Modules a tool imports, and
+whatever it stores in them, stay loaded for later calls, so a pool should only serve tools that trust each other.
+Each response reports the threads the call left running, and the pool retires such workers.
+"""
+
+import json
+import os
+import runpy
+import struct
+import sys
+import threading
+import traceback
+
+_HEADER = struct.Struct(">I")
+
+
+def _read_exact(fd: int, n: int) -> bytes:
+    chunks = []
+    while n:
+        chunk = os.read(fd, n)
+        if not chunk:
+            raise EOFError
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+
+def _send(fd: int, message: dict) -> None:
+    payload = json.dumps(message).encode("utf-8")
+    os.write(fd, _HEADER.pack(len(payload)) + payload)
+
+
+def _rss_kb() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _exit_code(e: SystemExit) -> int:
+    if e.code is None:
+        return 0
+    if isinstance(e.code, int):
+        return e.code
+    print(e.code, file=sys.stderr)
+    return 1
+
+
+def _run(request: dict) -> int:
+    saved_env = dict(os.environ)
+    saved_cwd = os.getcwd()
+    saved_path = list(sys.path)
+    saved_argv = list(sys.argv)
+    saved_fds = (os.dup(1), os.dup(2))
+    stdout_fd = os.open(request["stdout_path"], os.O_WRONLY | os.O_TRUNC)
+    stderr_fd = os.open(request["stderr_path"], os.O_WRONLY | os.O_TRUNC)
+    try:
+        os.environ.clear()
+        os.environ.update(request["env"])
+        os.chdir(request["cwd"])
+        script_path = request["script_path"]
+        sys.argv = [script_path]
+        sys.path.insert(0, os.path.dirname(script_path))
+        os.dup2(stdout_fd, 1)
+        os.dup2(stderr_fd, 2)
+        try:
+            runpy.run_path(script_path, run_name="__main__")
+            return 0
+        except SystemExit as e:
+            return _exit_code(e)
+        except BaseException:
+            traceback.print_exc()
+            return 1
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+        os.dup2(saved_fds[0], 1)
+        os.dup2(saved_fds[1], 2)
+        for fd in (*saved_fds, stdout_fd, stderr_fd):
+            os.close(fd)
+        os.environ.clear()
+        os.environ.update(saved_env)
+        os.chdir(saved_cwd)
+        sys.path[:] = saved_path
+        sys.argv = saved_argv
+
+
+def main() -> None:
+    # Don't let the worker's own directory shadow modules imported by tools
+    del sys.path[0]
+
+    # Move the protocol pipes off fds 0/1 (dup'd fds are not inherited by child processes)
+    request_fd = os.dup(0)
+    response_fd = os.dup(1)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+
+    # Warm up the imports that every generated script (and most tools) pay for
+    for module in sys.argv[1:]:
+        try:
+            __import__(module)
+        except Exception:
+            pass
+    baseline_threads = threading.active_count()
+
+    while True:
+        try:
+            (length,) = _HEADER.unpack(_read_exact(request_fd, _HEADER.size))
+            request = json.loads(_read_exact(request_fd, length))
+        except EOFError:
+            return
+        exit_code = _run(request)
+        leftover_threads = threading.active_count() - baseline_threads
+        _send(response_fd, {"exit_code": exit_code, "rss_kb": _rss_kb(), "leftover_threads": leftover_threads})
+
+
+if __name__ == "__main__":
+    main()
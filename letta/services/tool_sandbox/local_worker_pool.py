@@ -0,0 +1,242 @@
+import asyncio
+import functools
+import json
+import os
+import select
+import signal
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from letta.log import get_logger
+from letta.settings import tool_settings
+
+logger = get_logger(__name__)
+
+WORKER_SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "local_sandbox_worker.py")
+# Imported by the generated scripts, so every worker warms them up (pydantic's BaseModel is imported lazily)
+DEFAULT_PRELOAD_MODULES = ("asyncio", "pydantic.main")
+
+# Threads that wait on worker pipes, kept apart from the event loop's default executor since a call blocks one
+# for up to the tool timeout
+MAX_CONCURRENT_CALLS = 32
+
+_HEADER = struct.Struct(">I")
+
+
+class SandboxWorkerDiedError(Exception):
+    """The worker exited before answering a call (it crashed, or the tool exited the interpreter)."""
+
+    def __init__(self, exit_code: int):
+        super().__init__(f"Sandbox worker exited with code {exit_code}")
+        self.exit_code = exit_code
+
+
+class SandboxWorker:
+    """A warm python process that runs generated tool scripts one at a time, see `local_sandbox_worker.py`."""
+
+    def __init__(self, python_executable: str, env: Dict[str, str], cwd: str, preload: Iterable[str]):
+        self.process = subprocess.Popen(
+            [python_executable, WORKER_SCRIPT_PATH, *preload],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=env,
+            cwd=cwd,
+            # own process group, so a timeout also kills anything the tool spawned
+            start_new_session=True,
+        )
+        self.calls = 0
+        self.rss_kb = 0
+        # threads the last call left running in the worker
+        self.leftover_threads = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def call(self, request: dict, timeout: float) -> int:
+        """Run one script and return its exit code. Blocks, so call it from a thread."""
+        self.calls += 1
+        payload = json.dumps(request).encode("utf-8")
+        try:
+            self.process.stdin.write(_HEADER.pack(len(payload)) + payload)
+            self.process.stdin.flush()
+            response = json.loads(self._read(_HEADER.unpack(self._read(_HEADER.size, timeout))[0], timeout))
+        except (BrokenPipeError, EOFError):
+            raise SandboxWorkerDiedError(self.process.wait())
+        self.rss_kb = response["rss_kb"]
+        self.leftover_threads = response["leftover_threads"]
+        return response["exit_code"]
+
+    def _read(self, n: int, timeout: float) -> bytes:
+        deadline = time.monotonic() + timeout
+        fd = self.process.stdout.fileno()
+        chunks = []
+        while n:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                self.kill()
+                raise TimeoutError
+            chunk = os.read(fd, n)
+            if not chunk:
+                raise EOFError
+            chunks.append(chunk)
+            n -= len(chunk)
+        return b"".join(chunks)
+
+    def kill(self) -> None:
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        self.process.wait()
+
+    def close(self) -> None:
+        """Ask the worker to exit (EOF on its request pipe), killing it if it doesn't."""
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=1)
+        except Exception:
+            self.kill()
+
+
+class LocalSandboxWorkerPool:
+    """
+    Warm workers for one sandbox config and python environment.
+
+    A spare worker is started whenever the last idle one is handed out, so the interpreter start and imports are paid
+    ahead of the next call. Workers are retired after `tool_sandbox_worker_max_calls` calls or once they grow beyond
+    `tool_sandbox_worker_max_memory_mb`, and killed if a call times out or leaves threads running.
+    """
+
+    def __init__(self, python_executable: str, env: Dict[str, str], cwd: str):
+        self.python_executable = python_executable
+        self.env = env
+        self.cwd = cwd
+        self.preload: List[str] = list(DEFAULT_PRELOAD_MODULES)
+        self._lock = threading.Lock()
+        self._idle: List[SandboxWorker] = []
+        self._closed = False
+
+    def run(self, script_path: str, env: Dict[str, str], cwd: str, timeout: float, preload: Iterable[str] = ()) -> Tuple[int, bytes, bytes]:
+        """
+        Run a generated tool script in a warm worker. Blocks, so call it from a thread.
+
+        Returns:
+            (exit code, stdout, stderr) as running `python <script_path>` would
+
+        Raises:
+            TimeoutError: If the script did not finish within `timeout` (the worker is killed)
+        """
+        with self._lock:
+            for module in preload:
+                if module not in self.preload:
+                    self.preload.append(module)
+        worker = self._checkout()
+
+        stdout_fd, stdout_path = tempfile.mkstemp(prefix="letta-tool-stdout-")
+        stderr_fd, stderr_path = tempfile.mkstemp(prefix="letta-tool-stderr-")
+        os.close(stdout_fd)
+        os.close(stderr_fd)
+        try:
+            request = dict(script_path=script_path, env=env, cwd=cwd, stdout_path=stdout_path, stderr_path=stderr_path)
+            try:
+                exit_code = worker.call(request, timeout)
+            except SandboxWorkerDiedError as e:
+                exit_code = e.exit_code
+            with open(stdout_path, "rb") as f:
+                stdout = f.read()
+            with open(stderr_path, "rb") as f:
+                stderr = f.read()
+            return exit_code, stdout, stderr
+        finally:
+            os.remove(stdout_path)
+            os.remove(stderr_path)
+            self._checkin(worker)
+
+    async def run_async(
+        self, script_path: str, env: Dict[str, str], cwd: str, timeout: float, preload: Iterable[str] = ()
+    ) -> Tuple[int, bytes, bytes]:
+        """`run` on the pool's own threads, see `MAX_CONCURRENT_CALLS`."""
+        return await asyncio.get_running_loop().run_in_executor(
+            _get_call_executor(), functools.partial(self.run, script_path, env, cwd, timeout, preload)
+        )
+
+    def _spawn(self) -> SandboxWorker:
+        return SandboxWorker(self.python_executable, self.env, self.cwd, self.preload)
+
+    def _checkout(self) -> SandboxWorker:
+        with self._lock:
+            worker = None
+            while self._idle and worker is None:
+                candidate = self._idle.pop()
+                if candidate.alive:
+                    worker = candidate
+            if worker is None:
+                worker = self._spawn()
+            if not self._idle and not self._closed:
+                self._idle.append(self._spawn())
+            return worker
+
+    def _checkin(self, worker: SandboxWorker) -> None:
+        retire = (
+            not worker.alive
+            or worker.calls >= tool_settings.tool_sandbox_worker_max_calls
+            or worker.rss_kb > tool_settings.tool_sandbox_worker_max_memory_mb * 1024
+        )
+        if worker.leftover_threads:
+            # the threads may still be using the tool's state, and a non-daemon thread would keep the worker from exiting
+            worker.kill()
+            return
+        with self._lock:
+            if not retire and not self._closed and len(self._idle) < tool_settings.tool_sandbox_worker_pool_size:
+                self._idle.append(worker)
+                return
+        worker.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.close()
+
+
+_pools: Dict[tuple, LocalSandboxWorkerPool] = {}
+_pools_lock = threading.Lock()
+_call_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_call_executor() -> ThreadPoolExecutor:
+    global _call_executor
+    with _pools_lock:
+        if _call_executor is None:
+            _call_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_CALLS, thread_name_prefix="letta-sandbox-worker")
+        return _call_executor
+
+
+def get_local_sandbox_worker_pool(key: tuple, python_executable: str, env: Dict[str, str], cwd: str) -> LocalSandboxWorkerPool:
+    """Get the worker pool for a sandbox config/python environment, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = LocalSandboxWorkerPool(python_executable, env, cwd)
+        return pool
+
+
+def close_local_sandbox_worker_pools(key: Optional[tuple] = None) -> None:
+    """Stop the warm workers of one pool (e.g. after its venv was rebuilt), or of all pools."""
+    with _pools_lock:
+        if key is None:
+            pools = list(_pools.values())
+            _pools.clear()
+        else:
+            pool = _pools.pop(key, None)
+            pools = [pool] if pool else []
+    for pool in pools:
+        pool.close()
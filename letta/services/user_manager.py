@@ -3,7 +3,6 @@ from typing import List, Optional
 from sqlalchemy import select
 
 from letta.constants import DEFAULT_ORG_ID
-from letta.data_sources.redis_client import get_redis_client
 from letta.helpers.decorators import async_redis_cache
 from letta.log import get_logger
 from letta.orm.errors import NoResultFound
@@ -12,6 +11,7 @@ from letta.orm.user import User as UserModel
 from letta.otel.tracing import trace_method
 from letta.schemas.user import User as PydanticUser, UserUpdate
 from letta.server.db import db_registry
+from letta.services.actor_cache import ActorCache, actor_cache_key
 from letta.utils import enforce_types
 
 logger = get_logger(__name__)
@@ -100,6 +100,7 @@ class UserManager:
 
             # Commit the updated user
             existing_user.update(session)
+            ActorCache().invalidate_local(user_update.id)
             return existing_user.to_pydantic()
 
     @enforce_types
@@ -130,6 +131,7 @@ class UserManager:
             user.hard_delete(session)
 
             session.commit()
+            ActorCache().invalidate_local(user_id)
 
     @enforce_types
     @trace_method
@@ -151,9 +153,12 @@ class UserManager:
 
     @enforce_types
     @trace_method
-    @async_redis_cache(key_func=lambda self, actor_id: f"actor_id:{actor_id}", model_class=PydanticUser)
     async def get_actor_by_id_async(self, actor_id: str) -> PydanticUser:
-        """Fetch a user by ID asynchronously."""
+        """Fetch a user by ID asynchronously (from the actor cache when possible)."""
+        return await ActorCache().get_or_load(actor_id, self._read_actor_by_id_async)
+
+    @async_redis_cache(key_func=lambda self, actor_id: actor_cache_key(actor_id), model_class=PydanticUser)
+    async def _read_actor_by_id_async(self, actor_id: str) -> PydanticUser:
         async with db_registry.async_session() as session:
             stmt = select(UserModel).where(UserModel.id == actor_id)
             result = await session.execute(stmt)
@@ -234,10 +239,4 @@ class UserManager:
         """Invalidates the actor cache on CRUD operations.
         TODO (cliandy): see notes on redis cache decorator
         """
-        try:
-            redis_client = await get_redis_client()
-            cache_key = self.get_actor_by_id_async.cache_key_func(self, actor_id)
-            return (await redis_client.delete(cache_key)) > 0
-        except Exception as e:
-            logger.error(f"Failed to invalidate cache: {e}")
-            return False
+        return await ActorCache().invalidate(actor_id)
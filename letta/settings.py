@@ -30,6 +30,16 @@ class ToolSettings(BaseSettings):
     tool_sandbox_timeout: float = 180
     tool_exec_venv_name: Optional[str] = None
     tool_exec_autoreload_venv: bool = True
+    tool_sandbox_worker_pool: bool = Field(
+        default=False,
+        description=(
+            "Run local sandbox tools in warm, reused worker processes. Modules a tool imports stay loaded for later calls "
+            "of the same sandbox config, so only enable it when those tools trust each other."
+        ),
+    )
+    tool_sandbox_worker_pool_size: int = Field(default=4, description="Maximum idle workers kept per local sandbox config")
+    tool_sandbox_worker_max_calls: int = Field(default=100, description="Tool calls a local sandbox worker serves before it is replaced")
+    tool_sandbox_worker_max_memory_mb: int = Field(default=1024, description="Replace a local sandbox worker once it grows beyond this")
 
     # MCP settings
     mcp_connect_to_server_timeout: float = 30.0
@@ -37,6 +47,13 @@ class ToolSettings(BaseSettings):
     mcp_execute_tool_timeout: float = 60.0
     mcp_read_from_config: bool = False  # if False, will throw if attempting to read/write from file
     mcp_disable_stdio: bool = False
+    mcp_session_pool: bool = Field(default=True, description="Keep MCP client sessions connected and reuse them across calls")
+    mcp_session_idle_timeout: float = Field(default=300.0, description="Seconds a pooled MCP session may stay unused before it is closed")
+    mcp_session_health_check_interval: float = Field(
+        default=30.0, description="Pooled MCP sessions unused for longer than this are pinged before they are reused"
+    )
+    mcp_max_concurrent_calls_per_server: int = Field(default=16, description="Maximum concurrent calls to one MCP server config")
+    mcp_tool_list_cache_ttl: float = Field(default=60.0, description="Seconds MCP server tool lists are cached for")
 
     @property
     def sandbox_type(self) -> SandboxType:
@@ -235,12 +252,57 @@ class Settings(BaseSettings):
     redis_host: Optional[str] = Field(default=None, description="Host for Redis instance")
     redis_port: Optional[int] = Field(default=6379, description="Port for Redis instance")
 
+    # in-process cache of hydrated agent states (invalidations are broadcast over Redis when configured)
+    agent_state_cache_enabled: bool = Field(default=False, description="Cache hydrated agent states between steps")
+    agent_state_cache_max_size: int = Field(default=1000, description="Maximum number of cached agent states per process")
+    agent_state_cache_ttl_seconds: float = Field(default=300.0, description="Seconds before a cached agent state is re-read")
+
+    # per-agent message serialization
+    serialize_agent_messages: bool = Field(default=True, description="Process messages sent to the same agent one at a time")
+    agent_lock_timeout_seconds: float = Field(default=600.0, description="Maximum seconds a request waits for its agent to become free")
+    agent_lock_lease_ttl_seconds: float = Field(
+        default=30.0, description="Lease of the cross-worker agent lock in Redis; renewed while held, expires if the holder dies"
+    )
+
     plugin_register: Optional[str] = None
 
     # multi agent settings
     multi_agent_send_message_max_retries: int = 3
     multi_agent_send_message_timeout: int = 20 * 60
     multi_agent_concurrent_sends: int = 50
+    multi_agent_concurrent_sends_per_provider: int = Field(
+        default=10, description="Maximum agents of one broadcast stepping against the same LLM provider at a time"
+    )
+    multi_agent_broadcast_batch_threshold: Optional[int] = Field(
+        default=None,
+        description="Broadcasts to at least this many agents on providers with a batch API go through the LLM batch API "
+        "(requires enable_batch_job_polling); None disables it",
+    )
+
+    # actor cache (in-process tier in front of the Redis actor cache, see letta/services/actor_cache.py)
+    actor_cache_enabled: bool = Field(default=True, description="Keep actors resolved for REST requests in an in-process cache")
+    actor_cache_ttl_seconds: float = Field(default=30.0, description="Seconds an actor is kept in the in-process cache")
+    actor_cache_max_size: int = Field(default=10000, description="Maximum actors kept in the in-process cache")
+
+    # provider model catalog (stale-while-revalidate cache of each provider's model list)
+    model_catalog_enabled: bool = Field(default=True, description="Serve provider model lists from the in-process model catalog")
+    model_catalog_ttl_seconds: float = Field(default=300.0, description="Seconds after which a provider's model list is refreshed")
+    model_catalog_refresh_timeout_seconds: float = Field(
+        default=60.0, description="Maximum seconds a background model list refresh may take"
+    )
+
+    # durable background task queue (sleeptime agents, async agent-to-agent messages)
+    task_queue_enabled: bool = Field(
+        default=True, description="Run sleeptime agents and async agent-to-agent messages as queued tasks instead of fire-and-forget"
+    )
+    task_queue_workers: int = Field(
+        default=4, description="Background tasks each server process runs at a time; 0 leaves Redis backed tasks to `letta worker`"
+    )
+    task_queue_visibility_timeout_seconds: float = Field(
+        default=60.0, description="Lease of a running task; renewed while it runs, requeued if its worker stops renewing it"
+    )
+    task_queue_max_attempts: int = Field(default=3, description="Times a background task is attempted before it is given up on")
+    task_queue_poll_interval_seconds: float = Field(default=1.0, description="Seconds an idle worker waits before looking for tasks again")
 
     # telemetry logging
     otel_exporter_otlp_endpoint: str | None = None  # otel default: "http://localhost:4317"
@@ -282,6 +344,9 @@ class Settings(BaseSettings):
     poll_lock_retry_interval_seconds: int = 8 * 60
     batch_job_polling_lookback_weeks: int = 2
     batch_job_polling_batch_size: Optional[int] = None
+    enable_counter_reconciliation: bool = True  # periodically recompute cached message / passage counts
+    counter_reconciliation_interval_seconds: int = 10 * 60
+    counter_reconciliation_batch_size: int = 500
 
     # for OCR
     mistral_api_key: Optional[str] = None
@@ -290,6 +355,41 @@ class Settings(BaseSettings):
     llm_request_timeout_seconds: float = Field(default=60.0, ge=10.0, le=1800.0, description="Timeout for LLM requests in seconds")
     llm_stream_timeout_seconds: float = Field(default=60.0, ge=10.0, le=1800.0, description="Timeout for LLM streaming requests in seconds")
 
+    # Shared HTTP connection pools for LLM and embedding provider clients
+    llm_http_max_connections: int = Field(default=200, description="Maximum open connections per provider client")
+    llm_http_max_keepalive_connections: int = Field(default=50, description="Maximum idle connections kept alive per provider client")
+    llm_http_keepalive_expiry_seconds: float = Field(default=60.0, description="Seconds an idle provider connection is kept open")
+    llm_http2: bool = Field(default=True, description="Use HTTP/2 for provider clients when the h2 package is installed")
+    llm_client_cache_size: int = Field(default=256, description="Maximum provider clients (distinct endpoint/credential pairs) kept open")
+
+    # content-addressed embedding cache (in-process LRU, shared through Redis when configured)
+    embedding_cache_enabled: bool = Field(default=True, description="Reuse embeddings of identical text for the same embedding model")
+    embedding_cache_max_size: int = Field(default=20000, description="Maximum embeddings kept in the in-process cache")
+    embedding_cache_ttl_seconds: int = Field(default=7 * 24 * 60 * 60, description="Seconds embeddings are kept in Redis")
+
+    # embedding request scheduling per (endpoint, model): rate limits, batch sizing and adaptive concurrency
+    embedding_requests_per_minute: int = Field(default=3000, description="Embedding requests allowed per minute per endpoint and model")
+    embedding_tokens_per_minute: int = Field(
+        default=1_000_000, description="Embedding input tokens allowed per minute per endpoint and model"
+    )
+    embedding_max_tokens_per_request: int = Field(default=250_000, description="Estimated input tokens packed into one embedding request")
+    embedding_max_concurrency: int = Field(default=16, description="Upper bound for concurrent embedding requests per endpoint and model")
+    embedding_rate_limit_retries: int = Field(default=5, description="Times an embedding request is retried after a rate limit error")
+
+    # in-process cache of file line/trigram indexes used by grep_files and open_files
+    file_line_index_cache_mb: int = Field(default=256, description="Approximate memory budget for cached file line indexes")
+
+    # file ingestion pipeline (chunk -> embed -> write passages)
+    file_ingestion_embed_concurrency: int = Field(default=8, description="Embedding batches requested concurrently per file")
+    file_ingestion_max_batches_in_flight: int = Field(
+        default=32, description="Chunk batches a file may have chunked but not yet written, bounding ingestion memory"
+    )
+
+    # write-behind persistence of step, step metric and provider trace records
+    step_write_behind: bool = Field(default=False, description="Buffer step bookkeeping writes of the agent loop and write them in batches")
+    step_write_behind_flush_interval_seconds: float = Field(default=1.0, description="Seconds buffered step records may wait to be written")
+    step_write_behind_max_pending: int = Field(default=1000, description="Buffered step records that trigger a flush (writers wait for it)")
+
     # For embeddings
     enable_pinecone: bool = False
     pinecone_api_key: Optional[str] = None
@@ -2,6 +2,7 @@ from typing import Optional, Tuple
 
 from letta.constants import DEFAULT_MESSAGE_TOOL_KWARG
 from letta.local_llm.constants import INNER_THOUGHTS_KWARG
+from letta.server.rest_api.json_parser import string_run_end
 
 
 class JSONInnerThoughtsExtractor:
@@ -38,8 +39,8 @@ class JSONInnerThoughtsExtractor:
     def __init__(self, inner_thoughts_key=INNER_THOUGHTS_KWARG, wait_for_first_key=False):
         self.inner_thoughts_key = inner_thoughts_key
         self.wait_for_first_key = wait_for_first_key
-        self.main_buffer = ""
-        self.inner_thoughts_buffer = ""
+        self.main_buffer: list[str] = []
+        self.inner_thoughts_buffer: list[str] = []
         self.state = "start"  # Possible states: start, key, colon, value, comma_or_end, end
         self.in_string = False
         self.escaped = False
@@ -54,6 +55,24 @@ class JSONInnerThoughtsExtractor:
         updates_inner_thoughts = ""
         i = 0
         while i < len(fragment):
+            if self.in_string and not self.escaped and self.state in ("key", "value"):
+                # Copy plain string content through in one slice instead of character by character
+                run_end = string_run_end(fragment, i)
+                if run_end > i:
+                    run = fragment[i:run_end]
+                    if self.state == "key":
+                        self.current_key += run
+                    elif self.is_inner_thoughts_value:
+                        updates_inner_thoughts += run
+                        self.inner_thoughts_buffer.append(run)
+                    elif self.hold_main_json:
+                        self.main_json_held_buffer += run
+                    else:
+                        updates_main_json += run
+                        self.main_buffer.append(run)
+                    i = run_end
+                    continue
+
             c = fragment[i]
             if self.escaped:
                 self.escaped = False
@@ -63,20 +82,20 @@ class JSONInnerThoughtsExtractor:
                     elif self.state == "value":
                         if self.is_inner_thoughts_value:
                             updates_inner_thoughts += c
-                            self.inner_thoughts_buffer += c
+                            self.inner_thoughts_buffer.append(c)
                         else:
                             if self.hold_main_json:
                                 self.main_json_held_buffer += c
                             else:
                                 updates_main_json += c
-                                self.main_buffer += c
+                                self.main_buffer.append(c)
                 else:
                     if not self.is_inner_thoughts_value:
                         if self.hold_main_json:
                             self.main_json_held_buffer += c
                         else:
                             updates_main_json += c
-                            self.main_buffer += c
+                            self.main_buffer.append(c)
             elif c == "\\":
                 self.escaped = True
                 if self.in_string:
@@ -85,20 +104,20 @@ class JSONInnerThoughtsExtractor:
                     elif self.state == "value":
                         if self.is_inner_thoughts_value:
                             updates_inner_thoughts += c
-                            self.inner_thoughts_buffer += c
+                            self.inner_thoughts_buffer.append(c)
                         else:
                             if self.hold_main_json:
                                 self.main_json_held_buffer += c
                             else:
                                 updates_main_json += c
-                                self.main_buffer += c
+                                self.main_buffer.append(c)
                 else:
                     if not self.is_inner_thoughts_value:
                         if self.hold_main_json:
                             self.main_json_held_buffer += c
                         else:
                             updates_main_json += c
-                            self.main_buffer += c
+                            self.main_buffer.append(c)
             elif c == '"':
                 if not self.escaped:
                     self.in_string = not self.in_string
@@ -109,7 +128,7 @@ class JSONInnerThoughtsExtractor:
                             # Release held main_json when starting to process the next key
                             if self.wait_for_first_key and self.hold_main_json and self.inner_thoughts_processed:
                                 updates_main_json += self.main_json_held_buffer
-                                self.main_buffer += self.main_json_held_buffer
+                                self.main_buffer.append(self.main_json_held_buffer)
                                 self.main_json_held_buffer = ""
                                 self.hold_main_json = False
                     else:
@@ -125,7 +144,7 @@ class JSONInnerThoughtsExtractor:
                                     self.main_json_held_buffer += '"'
                                 else:
                                     updates_main_json += '"'
-                                    self.main_buffer += '"'
+                                    self.main_buffer.append('"')
                             self.state = "comma_or_end"
                 else:
                     self.escaped = False
@@ -135,26 +154,26 @@ class JSONInnerThoughtsExtractor:
                         elif self.state == "value":
                             if self.is_inner_thoughts_value:
                                 updates_inner_thoughts += '"'
-                                self.inner_thoughts_buffer += '"'
+                                self.inner_thoughts_buffer.append('"')
                             else:
                                 if self.hold_main_json:
                                     self.main_json_held_buffer += '"'
                                 else:
                                     updates_main_json += '"'
-                                    self.main_buffer += '"'
+                                    self.main_buffer.append('"')
             elif self.in_string:
                 if self.state == "key":
                     self.current_key += c
                 elif self.state == "value":
                     if self.is_inner_thoughts_value:
                         updates_inner_thoughts += c
-                        self.inner_thoughts_buffer += c
+                        self.inner_thoughts_buffer.append(c)
                     else:
                         if self.hold_main_json:
                             self.main_json_held_buffer += c
                         else:
                             updates_main_json += c
-                            self.main_buffer += c
+                            self.main_buffer.append(c)
             else:
                 if c == ":" and self.state == "colon":
                     self.state = "value"
@@ -167,7 +186,7 @@ class JSONInnerThoughtsExtractor:
                             self.main_json_held_buffer += key_colon + '"'
                         else:
                             updates_main_json += key_colon + '"'
-                            self.main_buffer += key_colon + '"'
+                            self.main_buffer.append(key_colon + '"')
                 elif c == "," and self.state == "comma_or_end":
                     if self.is_inner_thoughts_value:
                         # Inner thoughts value ended
@@ -179,7 +198,7 @@ class JSONInnerThoughtsExtractor:
                             self.main_json_held_buffer += c
                         else:
                             updates_main_json += c
-                            self.main_buffer += c
+                            self.main_buffer.append(c)
                         self.state = "start"
                 elif c == "{":
                     if not self.is_inner_thoughts_value:
@@ -187,25 +206,25 @@ class JSONInnerThoughtsExtractor:
                             self.main_json_held_buffer += c
                         else:
                             updates_main_json += c
-                            self.main_buffer += c
+                            self.main_buffer.append(c)
                 elif c == "}":
                     self.state = "end"
                     if self.hold_main_json:
                         self.main_json_held_buffer += c
                     else:
                         updates_main_json += c
-                        self.main_buffer += c
+                        self.main_buffer.append(c)
                 else:
                     if self.state == "value":
                         if self.is_inner_thoughts_value:
                             updates_inner_thoughts += c
-                            self.inner_thoughts_buffer += c
+                            self.inner_thoughts_buffer.append(c)
                         else:
                             if self.hold_main_json:
                                 self.main_json_held_buffer += c
                             else:
                                 updates_main_json += c
-                                self.main_buffer += c
+                                self.main_buffer.append(c)
             i += 1
 
         return updates_main_json, updates_inner_thoughts
@@ -217,11 +236,11 @@ class JSONInnerThoughtsExtractor:
 
     @property
     def main_json(self):
-        return self.main_buffer
+        return "".join(self.main_buffer)
 
     @property
     def inner_thoughts(self):
-        return self.inner_thoughts_buffer
+        return "".join(self.inner_thoughts_buffer)
 
 
 class FunctionArgumentsStreamHandler:
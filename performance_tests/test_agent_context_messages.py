@@ -0,0 +1,153 @@
+import time
+
+import pytest
+from sqlalchemy import JSON, Column, MetaData, String, Table, insert, select, update
+
+from letta.config import LettaConfig
+from letta.orm.agent_context_message import (
+    AgentContextMessage,
+    append_context_message_ids_async,
+    in_context_messages_query,
+    set_context_message_ids_async,
+)
+from letta.orm.message import Message as MessageModel
+from letta.schemas.agent import CreateAgent
+from letta.schemas.embedding_config import EmbeddingConfig
+from letta.schemas.enums import MessageRole
+from letta.schemas.letta_message_content import TextContent
+from letta.schemas.llm_config import LLMConfig
+from letta.schemas.message import Message as PydanticMessage
+from letta.server.db import db_registry
+from letta.server.server import SyncServer
+
+CONTEXT_SIZES = [100, 1000]
+STEPS = 50
+# messages added per step (user message + assistant reply), and how often the context is summarized
+MESSAGES_PER_STEP = 2
+SUMMARIZE_EVERY = 10
+
+# the old layout: every in-context id in one JSON column on the agent row
+legacy_table = Table("bench_legacy_message_ids", MetaData(), Column("agent_id", String, primary_key=True), Column("message_ids", JSON))
+
+
+@pytest.fixture
+def server():
+    LettaConfig.load().save()
+    return SyncServer(init_with_default_org_and_user=False)
+
+
+@pytest.fixture
+async def agent_and_actor(server):
+    org = server.organization_manager.create_default_organization()
+    actor = server.user_manager.create_default_user(org_id=org.id)
+    agent = await server.agent_manager.create_agent_async(
+        agent_create=CreateAgent(
+            name="context_messages_benchmark",
+            memory_blocks=[],
+            llm_config=LLMConfig.default_config("gpt-4o-mini"),
+            embedding_config=EmbeddingConfig.default_config(provider="openai"),
+            include_base_tools=False,
+        ),
+        actor=actor,
+    )
+    async with db_registry.async_session() as session:
+        await session.run_sync(lambda sync_session: legacy_table.create(sync_session.connection(), checkfirst=True))
+        await session.commit()
+    yield agent, actor
+    await server.agent_manager.delete_agent_async(agent.id, actor=actor)
+    async with db_registry.async_session() as session:
+        await session.run_sync(lambda sync_session: legacy_table.drop(sync_session.connection()))
+        await session.commit()
+
+
+async def _create_messages(server, agent, actor, count: int) -> list[str]:
+    messages = [
+        PydanticMessage(agent_id=agent.id, role=MessageRole.user, content=[TextContent(text=f"message {i} " + "lorem ipsum " * 20)])
+        for i in range(count)
+    ]
+    return [m.id for m in await server.message_manager.create_many_messages_async(messages, actor=actor)]
+
+
+async def _legacy_ids(agent_id: str):
+    """What every agent read used to load: the whole JSON list."""
+    async with db_registry.async_session() as session:
+        return (await session.execute(select(legacy_table.c.message_ids).where(legacy_table.c.agent_id == agent_id))).scalar()
+
+
+async def _legacy_read(agent_id: str, organization_id: str):
+    async with db_registry.async_session() as session:
+        message_ids = (await session.execute(select(legacy_table.c.message_ids).where(legacy_table.c.agent_id == agent_id))).scalar()
+        rows = (
+            await session.execute(
+                select(MessageModel).where(MessageModel.id.in_(message_ids), MessageModel.organization_id == organization_id)
+            )
+        ).scalars()
+        by_id = {m.id: m for m in rows}
+        return message_ids, [by_id[message_id] for message_id in message_ids]
+
+
+async def _legacy_write(agent_id: str, message_ids: list[str]):
+    async with db_registry.async_session() as session:
+        await session.execute(update(legacy_table).where(legacy_table.c.agent_id == agent_id).values(message_ids=message_ids))
+        await session.commit()
+
+
+async def _table_ids(agent_id: str):
+    async with db_registry.async_session() as session:
+        query = (
+            select(AgentContextMessage.message_id).where(AgentContextMessage.agent_id == agent_id).order_by(AgentContextMessage.position)
+        )
+        return (await session.execute(query)).scalars().all()
+
+
+async def _table_read(agent_id: str, organization_id: str):
+    async with db_registry.async_session() as session:
+        return (await session.execute(in_context_messages_query(agent_id, organization_id))).scalars().all()
+
+
+async def _table_write(agent_id: str, message_ids: list[str]):
+    async with db_registry.async_session() as session:
+        await set_context_message_ids_async(session, agent_id, message_ids)
+        await session.commit()
+
+
+async def _timed(fn, *args) -> float:
+    start = time.perf_counter()
+    await fn(*args)
+    return time.perf_counter() - start
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("context_size", CONTEXT_SIZES)
+async def test_agent_context_messages_benchmark(server, agent_and_actor, context_size):
+    agent, actor = agent_and_actor
+    org_id = actor.organization_id
+    context_ids = [agent.message_ids[0]] + await _create_messages(server, agent, actor, context_size - 1)
+    step_ids = await _create_messages(server, agent, actor, STEPS * MESSAGES_PER_STEP)
+
+    async with db_registry.async_session() as session:
+        await session.execute(insert(legacy_table).values(agent_id=agent.id, message_ids=context_ids))
+        await set_context_message_ids_async(session, agent.id, context_ids)
+        await session.commit()
+
+    layouts = {"json column": (_legacy_ids, _legacy_read, _legacy_write), "ordered table": (_table_ids, _table_read, _table_write)}
+    totals = {name: [0.0, 0.0, 0.0] for name in layouts}
+    message_ids = context_ids
+    for i in range(STEPS):
+        # what a step writes back: the new messages appended, and every few steps a summary of the older half
+        message_ids = message_ids + step_ids[i * MESSAGES_PER_STEP : (i + 1) * MESSAGES_PER_STEP]
+        if (i + 1) % SUMMARIZE_EVERY == 0:
+            message_ids = [message_ids[0]] + message_ids[len(message_ids) // 2 :]
+        # alternate which layout goes first so neither benefits from a warmer cache
+        for name in sorted(layouts, reverse=i % 2 == 1):
+            ids, read, write = layouts[name]
+            totals[name][0] += await _timed(ids, agent.id)
+            totals[name][1] += await _timed(read, agent.id, org_id)
+            totals[name][2] += await _timed(write, agent.id, message_ids)
+
+    # both layouts went through the same sequence of appends and summarizations
+    assert await _legacy_ids(agent.id) == list(await _table_ids(agent.id)) == message_ids
+
+    print(f"\n{context_size:>5} in-context messages (ms per operation):")
+    for name, (ids_s, read_s, write_s) in totals.items():
+        print(f"  {name:<14} ids {ids_s / STEPS * 1000:7.2f} | messages {read_s / STEPS * 1000:7.2f} | write {write_s / STEPS * 1000:7.2f}")
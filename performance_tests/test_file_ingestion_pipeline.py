@@ -0,0 +1,117 @@
+import asyncio
+import time
+import tracemalloc
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from letta.schemas.embedding_config import EmbeddingConfig
+from letta.schemas.file import FileMetadata
+from letta.schemas.passage import Passage
+from letta.services.file_processor.chunker.llama_index_chunker import LlamaIndexChunker
+from letta.services.file_processor.embedder.base_embedder import BaseEmbedder
+from letta.services.file_processor.ingestion_pipeline import IngestionPipeline
+
+# The text files bundled with the tests, concatenated and cut into PDF-sized pages
+CORPUS_DIR = Path(__file__).parent.parent / "tests" / "data"
+CORPUS_FILES = ["long_test.txt", "data_analysis.py", "api_server.go", "data_structures.cpp", "task_manager.java", "test.md", "test.csv"]
+PAGE_SIZE = 3_000
+COPIES = [1, 4]
+
+# Simulated embedding endpoint and database: per-request latency, and how many requests the endpoint serves at once
+EMBED_LATENCY_S = 0.1
+ENDPOINT_CONCURRENCY = 8
+WRITE_LATENCY_S = 0.005
+
+
+def _pages(copies: int) -> list[str]:
+    text = "\n\n".join((CORPUS_DIR / name).read_text() for name in CORPUS_FILES) * copies
+    return [text[i : i + PAGE_SIZE] for i in range(0, len(text), PAGE_SIZE)]
+
+
+class SimulatedEmbedder(BaseEmbedder):
+    def __init__(self, embedding_config: EmbeddingConfig):
+        self.embedding_config = embedding_config
+        self._endpoint = asyncio.Semaphore(ENDPOINT_CONCURRENCY)
+
+    async def generate_embedded_passages(self, file_id, source_id, chunks, actor):
+        async with self._endpoint:
+            await asyncio.sleep(EMBED_LATENCY_S)
+        return [
+            Passage(text=chunk, file_id=file_id, source_id=source_id, embedding=[0.0] * 8, embedding_config=None, organization_id="org")
+            for chunk in chunks
+        ]
+
+
+async def _write(passages, file_metadata, actor):
+    await asyncio.sleep(WRITE_LATENCY_S)
+    return passages
+
+
+async def _measure(run, *args) -> tuple[float, int, int]:
+    """Wall time, passages created and peak traced memory of an ingestion run (tracing slows chunking, so it is timed untraced)."""
+    start = time.perf_counter()
+    num_passages = await run(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    await run(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, num_passages, peak
+
+
+async def _run_sequential(pages, chunker, embedder, file_metadata) -> int:
+    """What FileProcessor used to do: chunk everything, embed every batch, then write all passages."""
+    chunks = [chunk for page in pages for chunk in chunker.chunk_text(page)]
+    batch_size = embedder.embedding_config.batch_size
+    batches = [chunks[i : i + batch_size] for i in range(0, len(chunks), batch_size)]
+    results = await asyncio.gather(
+        *(embedder.generate_embedded_passages(file_metadata.id, file_metadata.source_id, batch, None) for batch in batches)
+    )
+    passages = [passage for result in results for passage in result]
+    await _write(passages, file_metadata, None)
+    return len(passages)
+
+
+async def _run_pipeline(pages, chunker, embedder, file_metadata) -> int:
+    file_manager = Mock()
+    file_manager.update_file_status = AsyncMock()
+    passage_manager = Mock()
+    passage_manager.create_many_source_passages_async = _write
+
+    pipeline = IngestionPipeline(
+        file_metadata=file_metadata,
+        source_id=file_metadata.source_id,
+        chunk=chunker.chunk_text,
+        embedder=embedder,
+        actor=Mock(organization_id="org"),
+        file_manager=file_manager,
+        passage_manager=passage_manager,
+        embed_concurrency=ENDPOINT_CONCURRENCY,
+    )
+    return len(await pipeline.run(pages))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("copies", COPIES)
+async def test_file_ingestion_pipeline_benchmark(copies):
+    pages = _pages(copies)
+    embedding_config = EmbeddingConfig.default_config(model_name="letta")
+    chunker = LlamaIndexChunker(file_type="text/plain", chunk_size=embedding_config.embedding_chunk_size)
+    embedder = SimulatedEmbedder(embedding_config)
+    file_metadata = FileMetadata(file_name="corpus.txt", source_id="source-12345678")
+    # warm up the splitter (tokenizer and nltk data loading) outside the timings
+    chunker.chunk_text(pages[0])
+
+    sequential_s, sequential_passages, sequential_peak = await _measure(_run_sequential, pages, chunker, embedder, file_metadata)
+    pipeline_s, pipeline_passages, pipeline_peak = await _measure(_run_pipeline, pages, chunker, embedder, file_metadata)
+
+    print(
+        f"\n{len(pages):>4} pages / {pipeline_passages:>5} chunks: "
+        f"sequential {sequential_s * 1000:8.1f} ms ({sequential_passages / sequential_s:6.1f} chunks/s, "
+        f"peak {sequential_peak / 2**20:6.1f} MB) | "
+        f"pipeline {pipeline_s * 1000:8.1f} ms ({pipeline_passages / pipeline_s:6.1f} chunks/s, peak {pipeline_peak / 2**20:6.1f} MB)"
+    )
+    assert pipeline_passages == sequential_passages
@@ -183,3 +183,59 @@ async def test_insert_large_archival_memory(client):
     t1 = time.perf_counter()
 
     print(f"Total time: {t1 - t0}")
+
+
+# --- Write Path Throughput --- #
+
+# Chunk counts per insert; a large archival_memory_insert of a paper is a few hundred chunks
+CHUNK_COUNTS = [10, 100, 1000]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("num_chunks", CHUNK_COUNTS)
+async def test_archival_insert_rows_per_second(num_chunks):
+    """Rows/sec for the per-row and bulk archival write paths, with synthetic embeddings so only the database is measured."""
+    from letta.schemas.passage import Passage
+    from letta.services.archive_manager import ArchiveManager
+    from letta.services.organization_manager import OrganizationManager
+    from letta.services.passage_manager import PassageManager
+    from letta.services.user_manager import UserManager
+
+    org = await OrganizationManager().create_default_organization_async()
+    actor = await UserManager().create_default_actor_async(org_id=org.id)
+    passage_manager = PassageManager()
+    embedding_config = EmbeddingConfig.default_config(provider="openai")
+    rng = np.random.default_rng(0)
+
+    def make_passages(archive_id):
+        return [
+            Passage(
+                text=f"chunk {i}",
+                archive_id=archive_id,
+                organization_id=org.id,
+                embedding=rng.standard_normal(embedding_config.embedding_dim).tolist(),
+                embedding_config=embedding_config,
+                tags=["benchmark", f"chunk-{i % 10}"],
+            )
+            for i in range(num_chunks)
+        ]
+
+    # one session, commit and tag write per row (the previous insert_passage behaviour)
+    archive = await ArchiveManager().create_archive_async(name=f"per_row_{uuid.uuid4().hex[:6]}", actor=actor)
+    passages = make_passages(archive.id)
+    t0 = time.perf_counter()
+    for passage in passages:
+        await passage_manager.create_agent_passage_async(passage, actor=actor)
+    per_row_s = time.perf_counter() - t0
+
+    # multi-row INSERT for passages and tags in one flush and one commit
+    archive = await ArchiveManager().create_archive_async(name=f"bulk_{uuid.uuid4().hex[:6]}", actor=actor)
+    passages = make_passages(archive.id)
+    t0 = time.perf_counter()
+    await passage_manager.create_many_archival_passages_async(passages, actor=actor)
+    bulk_s = time.perf_counter() - t0
+
+    print(
+        f"\n[{num_chunks:>5} chunks] per-row={num_chunks / per_row_s:9.0f} rows/s  "
+        f"bulk={num_chunks / bulk_s:9.0f} rows/s  speedup={per_row_s / bulk_s:5.1f}x"
+    )
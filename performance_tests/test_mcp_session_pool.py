@@ -0,0 +1,95 @@
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from letta.functions.mcp_client.types import StdioServerConfig, StreamableHTTPServerConfig
+from letta.services.mcp.session_pool import MCPSessionPool, server_config_hash
+from letta.services.mcp.stdio_client import AsyncStdioMCPClient
+from letta.services.mcp.streamable_http_client import AsyncStreamableHTTPMCPClient
+
+ECHO_SERVER = Path(__file__).parent.parent / "tests" / "mcp_tests" / "echo" / "echo.py"
+CALLS = 10
+# (concurrent callers, calls per caller)
+SCENARIOS = [(1, CALLS), (10, CALLS)]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def http_server_url():
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, str(ECHO_SERVER), "--transport", "streamable-http", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(0.2)
+    yield f"http://127.0.0.1:{port}/mcp"
+    process.terminate()
+    process.wait()
+
+
+def _client(server_config):
+    if isinstance(server_config, StdioServerConfig):
+        return AsyncStdioMCPClient(server_config)
+    return AsyncStreamableHTTPMCPClient(server_config)
+
+
+async def _connect_per_call(server_config, calls: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        client = _client(server_config)
+        try:
+            await client.connect_to_server()
+            await client.execute_tool("echo", {"text": str(i)})
+        finally:
+            await client.cleanup()
+    return time.perf_counter() - start
+
+
+async def _pooled(pool: MCPSessionPool, server_config, calls: int) -> float:
+    async def connect():
+        return _client(server_config)
+
+    start = time.perf_counter()
+    for i in range(calls):
+        async with pool.session(("benchmark",), server_config_hash(server_config), connect) as client:
+            await client.execute_tool("echo", {"text": str(i)})
+    return time.perf_counter() - start
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("transport", ["stdio", "streamable-http"])
+@pytest.mark.parametrize("num_callers,calls_per_caller", SCENARIOS)
+async def test_mcp_session_pool_benchmark(request, transport, num_callers, calls_per_caller):
+    if transport == "stdio":
+        server_config = StdioServerConfig(server_name="echo", command=sys.executable, args=[str(ECHO_SERVER)])
+    else:
+        server_config = StreamableHTTPServerConfig(server_name="echo", server_url=request.getfixturevalue("http_server_url"))
+
+    print(f"\n{transport}, {num_callers:>2} callers x {calls_per_caller} calls (ms per call):")
+    spent = await asyncio.gather(*(_connect_per_call(server_config, calls_per_caller) for _ in range(num_callers)))
+    print(f"  {'connect per call':<17} {sum(spent) / (num_callers * calls_per_caller) * 1000:8.2f}")
+
+    pool = MCPSessionPool()
+    try:
+        spent = await asyncio.gather(*(_pooled(pool, server_config, calls_per_caller) for _ in range(num_callers)))
+        print(f"  {'pooled':<17} {sum(spent) / (num_callers * calls_per_caller) * 1000:8.2f}")
+        assert pool.connects == 1
+    finally:
+        await pool.close()
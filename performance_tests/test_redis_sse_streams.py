@@ -0,0 +1,71 @@
+import asyncio
+import os
+import time
+import uuid
+
+import pytest
+
+from letta.data_sources.redis_client import AsyncRedisClient
+from letta.server.rest_api.redis_stream_manager import RedisSSEStreamWriter, redis_sse_stream_generator, sse_stream_key
+
+# Needs a local Redis (LETTA_BENCH_REDIS_HOST/PORT, default localhost:6379)
+REDIS_HOST = os.getenv("LETTA_BENCH_REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("LETTA_BENCH_REDIS_PORT", "6379"))
+
+CHUNKS_PER_RUN = 50
+CHUNK = 'data: {"message_type":"assistant_message","content":"' + "x" * 200 + '","run_id":null}\n\n'
+# (concurrent runs, readers tailing each run)
+SCENARIOS = [(1000, 1), (2000, 1), (50, 40)]
+
+
+@pytest.fixture
+async def redis_client():
+    client = AsyncRedisClient(host=REDIS_HOST, port=REDIS_PORT, max_connections=200)
+    try:
+        await (await client.get_client()).ping()
+    except Exception:
+        pytest.skip(f"No Redis at {REDIS_HOST}:{REDIS_PORT}")
+    yield client
+    await client.close()
+
+
+async def _produce(writer: RedisSSEStreamWriter, run_id: str) -> None:
+    for _ in range(CHUNKS_PER_RUN):
+        await writer.write_chunk(run_id, CHUNK)
+        # token streaming: chunks trickle in rather than arriving all at once
+        await asyncio.sleep(0.005)
+    await writer.mark_complete(run_id)
+
+
+async def _consume(redis_client: AsyncRedisClient, run_id: str) -> int:
+    """Number of chunks a client tailing the run receives."""
+    received = 0
+    async for _ in redis_sse_stream_generator(redis_client, run_id):
+        received += 1
+    return received
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("num_runs,readers_per_run", SCENARIOS)
+async def test_redis_sse_stream_load(redis_client, num_runs, readers_per_run):
+    writer = RedisSSEStreamWriter(redis_client)
+    run_ids = [f"run-{uuid.uuid4()}" for _ in range(num_runs)]
+
+    start = time.perf_counter()
+    readers = [asyncio.create_task(_consume(redis_client, run_id)) for run_id in run_ids for _ in range(readers_per_run)]
+    await asyncio.gather(*(_produce(writer, run_id) for run_id in run_ids))
+    produced_s = time.perf_counter() - start
+    received = await asyncio.wait_for(asyncio.gather(*readers), timeout=120)
+    elapsed = time.perf_counter() - start
+
+    try:
+        total_chunks = num_runs * (CHUNKS_PER_RUN + 1)
+        print(
+            f"\n{num_runs:>5} runs x {readers_per_run:>3} readers: wrote {total_chunks} chunks in {produced_s:6.2f}s "
+            f"({total_chunks / produced_s:9.0f} chunks/s, {writer._rounds_completed} flushes) | "
+            f"delivered {sum(received)} chunks in {elapsed:6.2f}s ({sum(received) / elapsed:9.0f} chunks/s)"
+        )
+        assert all(count == CHUNKS_PER_RUN + 1 for count in received)
+    finally:
+        await writer.stop()
+        await redis_client.delete(*[sse_stream_key(run_id) for run_id in run_ids])
@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import time
+from functools import partial
+
+import numpy as np
+import pytest
+
+from letta.helpers.sqlite_vector_index import ArchiveVectorMatrix
+from letta.orm.sqlite_functions import cosine_distance
+
+# Embedding width used for the synthetic archive. Real archives store MAX_EMBEDDING_DIM-padded vectors,
+# which only changes the constant factor, so a smaller width keeps the 1M case within laptop memory.
+DIM = int(os.getenv("LETTA_BENCH_EMBEDDING_DIM", "256"))
+TOP_K = 10
+NUM_QUERIES = 5
+
+# The 1M case needs a few GB of RAM and several minutes for the UDF baseline
+ARCHIVE_SIZES = [10_000, 100_000]
+if os.getenv("LETTA_BENCH_LARGE"):
+    ARCHIVE_SIZES.append(1_000_000)
+
+
+def _build_archive(num_passages: int) -> sqlite3.Connection:
+    """Create an in-memory archival_passages table filled with random float32 embeddings."""
+    conn = sqlite3.connect(":memory:")
+    conn.create_function("cosine_distance", 2, partial(cosine_distance, expected_dim=DIM))
+    conn.execute("CREATE TABLE archival_passages (id TEXT PRIMARY KEY, archive_id TEXT, created_at INTEGER, embedding BLOB)")
+
+    rng = np.random.default_rng(42)
+    batch_size = 10_000
+    for start in range(0, num_passages, batch_size):
+        batch = rng.standard_normal((min(batch_size, num_passages - start), DIM)).astype(np.float32)
+        conn.executemany(
+            "INSERT INTO archival_passages VALUES (?, 'archive-1', ?, ?)",
+            ((f"passage-{start + i}", start + i, row.tobytes()) for i, row in enumerate(batch)),
+        )
+    conn.commit()
+    return conn
+
+
+def _udf_search(conn: sqlite3.Connection, query: np.ndarray) -> list:
+    rows = conn.execute(
+        "SELECT id FROM archival_passages WHERE archive_id = 'archive-1' "
+        "ORDER BY cosine_distance(embedding, ?) ASC, created_at ASC, id ASC LIMIT ?",
+        (query.tobytes(), TOP_K),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def _load_matrix(conn: sqlite3.Connection) -> ArchiveVectorMatrix:
+    rows = conn.execute("SELECT id, embedding FROM archival_passages WHERE archive_id = 'archive-1' ORDER BY created_at, id").fetchall()
+    embeddings = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float32).reshape(len(rows), DIM)
+    return ArchiveVectorMatrix(dim=DIM, ids=[row[0] for row in rows], embeddings=embeddings)
+
+
+@pytest.mark.parametrize("num_passages", ARCHIVE_SIZES)
+def test_sqlite_vector_search_vs_udf(num_passages):
+    conn = _build_archive(num_passages)
+    queries = np.random.default_rng(7).standard_normal((NUM_QUERIES, DIM)).astype(np.float32)
+
+    t0 = time.perf_counter()
+    matrix = _load_matrix(conn)
+    load_s = time.perf_counter() - t0
+
+    udf_times, index_times = [], []
+    for query in queries:
+        t0 = time.perf_counter()
+        udf_ids = _udf_search(conn, query)
+        udf_times.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        index_ids = [passage_id for passage_id, _ in matrix.search(query, TOP_K)]
+        index_times.append(time.perf_counter() - t0)
+
+        assert index_ids == udf_ids
+
+    udf_ms = np.mean(udf_times) * 1000
+    index_ms = np.mean(index_times) * 1000
+    print(
+        f"\n[{num_passages:>9,} passages, dim={DIM}] "
+        f"udf={udf_ms:9.2f} ms/query  index={index_ms:8.2f} ms/query  "
+        f"speedup={udf_ms / index_ms:7.1f}x  one-time load={load_s * 1000:.0f} ms"
+    )
+    conn.close()
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import pytest
+
+from letta.config import LettaConfig
+from letta.schemas.agent import CreateAgent
+from letta.schemas.embedding_config import EmbeddingConfig
+from letta.schemas.enums import StepStatus
+from letta.schemas.llm_config import LLMConfig
+from letta.schemas.openai.chat_completion_response import UsageStatistics
+from letta.schemas.provider_trace import ProviderTraceCreate
+from letta.server.server import SyncServer
+from letta.services.step_manager import StepManager, WriteBehindStepManager
+from letta.services.step_write_buffer import get_step_write_buffer, stop_step_write_buffers
+from letta.services.telemetry_manager import TelemetryManager, WriteBehindTelemetryManager
+
+# (concurrent requests, inner steps per request)
+SCENARIOS = [(1, 10), (20, 5)]
+RESPONSE_JSON = {"choices": [{"message": {"content": "lorem ipsum " * 50}}]}
+
+
+@pytest.fixture
+def server():
+    LettaConfig.load().save()
+    return SyncServer(init_with_default_org_and_user=False)
+
+
+@pytest.fixture
+async def agent_and_actor(server):
+    org = server.organization_manager.create_default_organization()
+    actor = server.user_manager.create_default_user(org_id=org.id)
+    agent = await server.agent_manager.create_agent_async(
+        agent_create=CreateAgent(
+            name="step_write_behind_benchmark",
+            memory_blocks=[],
+            llm_config=LLMConfig.default_config("gpt-4o-mini"),
+            embedding_config=EmbeddingConfig.default_config(provider="openai"),
+            include_base_tools=False,
+        ),
+        actor=actor,
+    )
+    yield agent, actor
+    await server.agent_manager.delete_agent_async(agent.id, actor=actor)
+
+
+async def _request(step_manager: StepManager, telemetry_manager: TelemetryManager, agent, actor, steps: int) -> float:
+    """Seconds a request spends on step bookkeeping, doing what the agent loop does per step."""
+    spent = 0.0
+    for _ in range(steps):
+        start = time.perf_counter()
+        step = await step_manager.log_step_async(
+            actor=actor,
+            agent_id=agent.id,
+            provider_name="openai",
+            provider_category="base",
+            model="gpt-4o-mini",
+            model_endpoint=None,
+            context_window_limit=8192,
+            usage=UsageStatistics(completion_tokens=0, prompt_tokens=0, total_tokens=0),
+            status=StepStatus.PENDING,
+        )
+        await step_manager.update_step_success_async(
+            actor, step.id, UsageStatistics(completion_tokens=10, prompt_tokens=20, total_tokens=30)
+        )
+        await telemetry_manager.create_provider_trace_async(
+            actor=actor,
+            provider_trace_create=ProviderTraceCreate(
+                request_json={"model": "gpt-4o-mini"}, response_json=RESPONSE_JSON, step_id=step.id, organization_id=actor.organization_id
+            ),
+        )
+        await step_manager.record_step_metrics_async(actor=actor, step_id=step.id, agent_id=agent.id, llm_request_ns=1, step_ns=2)
+        spent += time.perf_counter() - start
+        # the LLM call and tool execution of the step
+        await asyncio.sleep(0.05)
+    return spent
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("num_requests,steps_per_request", SCENARIOS)
+async def test_step_write_behind_benchmark(agent_and_actor, num_requests, steps_per_request):
+    agent, actor = agent_and_actor
+    managers = {
+        "inline": (StepManager(), TelemetryManager()),
+        "write-behind": (WriteBehindStepManager(), WriteBehindTelemetryManager()),
+    }
+
+    print(f"\n{num_requests:>3} requests x {steps_per_request:>2} steps (bookkeeping ms per step):")
+    for name, (step_manager, telemetry_manager) in managers.items():
+        spent = await asyncio.gather(
+            *(_request(step_manager, telemetry_manager, agent, actor, steps_per_request) for _ in range(num_requests))
+        )
+        if name == "write-behind":
+            buffer = get_step_write_buffer()
+            await stop_step_write_buffers()
+            assert buffer.dropped == 0
+        print(f"  {name:<13} {sum(spent) / (num_requests * steps_per_request) * 1000:7.2f}")
+
+    steps = await StepManager().list_steps_async(actor=actor, agent_id=agent.id, limit=None)
+    assert len(steps) == 2 * num_requests * steps_per_request
+    assert all(step.status == StepStatus.SUCCESS for step in steps)
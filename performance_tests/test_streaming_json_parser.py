@@ -0,0 +1,66 @@
+import json
+import time
+
+import pytest
+
+from letta.server.rest_api.json_parser import IncrementalJSONParser, OptimisticJSONParser, PydanticJSONParser
+
+# Tool call arguments arrive from providers in small fragments, a few tokens at a time
+FRAGMENT_SIZE = 16
+ARGUMENT_SIZES = [1_000, 10_000, 100_000]
+
+
+def _arguments(size: int) -> str:
+    sentence = 'The quick brown fox said "hi" and jumped over the lazy dog.\n'
+    message = (sentence * (size // len(sentence) + 1))[:size]
+    return json.dumps({"inner_thoughts": "Replying to the user.", "message": message})
+
+
+def _fragments(text: str) -> list[str]:
+    return [text[i : i + FRAGMENT_SIZE] for i in range(0, len(text), FRAGMENT_SIZE)]
+
+
+def _time_reparse(parser, fragments: list[str]) -> float:
+    """What the streaming interfaces used to do: re-parse everything received so far at every fragment."""
+    accumulated = ""
+    start = time.perf_counter()
+    for fragment in fragments:
+        accumulated += fragment
+        parser.parse(accumulated)
+    return time.perf_counter() - start
+
+
+def _time_incremental(fragments: list[str]) -> float:
+    parser = IncrementalJSONParser()
+    start = time.perf_counter()
+    for fragment in fragments:
+        parser.feed(fragment)
+    return time.perf_counter() - start
+
+
+@pytest.mark.parametrize("size", ARGUMENT_SIZES)
+def test_streaming_json_parser_benchmark(size):
+    text = _arguments(size)
+    fragments = _fragments(text)
+
+    optimistic = OptimisticJSONParser()
+    optimistic.on_extra_token = None
+    optimistic_s = _time_reparse(optimistic, fragments)
+    pydantic_s = _time_reparse(PydanticJSONParser(), fragments)
+    incremental_s = _time_incremental(fragments)
+
+    print(
+        f"\n{len(text):>7} bytes / {len(fragments):>5} fragments: "
+        f"optimistic re-parse {optimistic_s * 1000:9.1f} ms | "
+        f"pydantic re-parse {pydantic_s * 1000:9.1f} ms | "
+        f"incremental {incremental_s * 1000:7.1f} ms"
+    )
+
+    # the incremental parser must agree with a full parse
+    parser = IncrementalJSONParser()
+    for fragment in fragments:
+        parser.feed(fragment)
+    assert parser.snapshot() == json.loads(text)
+
+    if size >= 10_000:
+        assert incremental_s < pydantic_s
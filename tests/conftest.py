@@ -7,6 +7,8 @@ import pytest
 from anthropic.types.beta.messages import BetaMessageBatch, BetaMessageBatchRequestCounts
 
 from letta.server.db import db_registry
+from letta.services.embedding_cache import EmbeddingCache
+from letta.services.embedding_scheduler import EmbeddingScheduler
 from letta.services.organization_manager import OrganizationManager
 from letta.services.user_manager import UserManager
 from letta.settings import tool_settings
@@ -46,6 +48,14 @@ async def cleanup_db_connections():
         pass
 
 
+@pytest.fixture(autouse=True)
+def clear_embedding_cache():
+    """Tests mock embedding providers with different vectors for the same text, so don't share cached embeddings (or rate limit state)."""
+    yield
+    EmbeddingCache().clear()
+    EmbeddingScheduler().clear()
+
+
 @pytest.fixture
 def disable_e2b_api_key() -> Generator[None, None, None]:
     """
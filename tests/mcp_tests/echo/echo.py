@@ -0,0 +1,32 @@
+import argparse
+import os
+
+from mcp.server.fastmcp import FastMCP
+
+# Local stand-in MCP server for session pool tests and benchmarks
+mcp = FastMCP("echo")
+
+
+@mcp.tool()
+async def echo(text: str) -> str:
+    """Return the text unchanged.
+
+    Args:
+        text: The text to return
+    """
+    return text
+
+
+@mcp.tool()
+async def get_pid() -> str:
+    """Return the process id of the server."""
+    return str(os.getpid())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transport", default="stdio", choices=["stdio", "sse", "streamable-http"])
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    mcp.settings.port = args.port
+    mcp.run(transport=args.transport)
@@ -0,0 +1,194 @@
+import asyncio
+import os
+import signal
+import sys
+from pathlib import Path
+
+import anyio
+import pytest
+
+from letta.functions.mcp_client.types import StdioServerConfig
+from letta.services.mcp.session_pool import MCPSessionPool, get_mcp_session_pool, server_config_hash
+from letta.services.mcp.stdio_client import AsyncStdioMCPClient
+from letta.settings import tool_settings
+
+ECHO_SERVER = Path(__file__).parent / "echo" / "echo.py"
+
+
+@pytest.fixture
+def server_config():
+    return StdioServerConfig(server_name="echo", command=sys.executable, args=[str(ECHO_SERVER)])
+
+
+@pytest.fixture
+async def pool():
+    pool = MCPSessionPool()
+    yield pool
+    await pool.close()
+
+
+async def _call(pool: MCPSessionPool, server_config: StdioServerConfig, tool_name: str, tool_args=None, key=("echo",)) -> str:
+    async def connect():
+        return AsyncStdioMCPClient(server_config)
+
+    async with pool.session(key, server_config_hash(server_config), connect) as client:
+        result, success = await client.execute_tool(tool_name, tool_args or {})
+    assert success
+    return result
+
+
+@pytest.mark.asyncio
+async def test_session_reused_across_calls(pool, server_config):
+    pid = await _call(pool, server_config, "get_pid")
+    assert await _call(pool, server_config, "echo", {"text": "hello"}) == "hello"
+    results = await asyncio.gather(*(_call(pool, server_config, "echo", {"text": str(i)}) for i in range(10)))
+
+    assert results == [str(i) for i in range(10)]
+    assert await _call(pool, server_config, "get_pid") == pid
+    assert pool.connects == 1
+    assert pool.size == 1
+
+
+@pytest.mark.asyncio
+async def test_sessions_keyed_by_caller(pool, server_config):
+    first = await _call(pool, server_config, "get_pid", key=("echo", "agent-1"))
+    second = await _call(pool, server_config, "get_pid", key=("echo", "agent-2"))
+
+    assert first != second
+    assert pool.size == 2
+
+
+@pytest.mark.asyncio
+async def test_reconnects_after_server_died(pool, server_config):
+    pid = await _call(pool, server_config, "get_pid")
+    os.kill(int(pid), signal.SIGKILL)
+    await asyncio.sleep(0.5)
+
+    # the call on the dead session fails and evicts it
+    with pytest.raises(Exception):
+        await _call(pool, server_config, "get_pid")
+    assert pool.size == 0
+
+    assert await _call(pool, server_config, "get_pid") != pid
+    assert pool.connects == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_calls_keep_the_session(pool, server_config):
+    pid = await _call(pool, server_config, "get_pid")
+
+    async def connect():
+        return AsyncStdioMCPClient(server_config)
+
+    # a timed out or failing call says nothing about the session
+    with pytest.raises(asyncio.TimeoutError):
+        async with pool.session(("echo",), server_config_hash(server_config), connect):
+            await asyncio.wait_for(asyncio.sleep(10), timeout=0.01)
+    with pytest.raises(ValueError):
+        async with pool.session(("echo",), server_config_hash(server_config), connect):
+            raise ValueError("bad arguments")
+
+    assert await _call(pool, server_config, "get_pid") == pid
+    assert pool.connects == 1
+    # locks and limits only exist while calls use them
+    assert pool._connect_locks == {} and pool._server_limits == {}
+
+
+@pytest.mark.asyncio
+async def test_evicted_session_closed_after_its_last_call(pool, server_config):
+    async def connect():
+        return AsyncStdioMCPClient(server_config)
+
+    server_key = server_config_hash(server_config)
+    async with pool.session(("echo",), server_key, connect) as client:
+        pooled = pool._sessions[("echo",)]
+        with pytest.raises(anyio.ClosedResourceError):
+            async with pool.session(("echo",), server_key, connect):
+                raise anyio.ClosedResourceError
+
+        # dropped from the pool, but still usable by the call that has it
+        assert pool.size == 0
+        assert (await client.execute_tool("echo", {"text": "still open"}))[0] == "still open"
+        assert pooled.alive
+
+    assert not pooled.alive
+    await _call(pool, server_config, "get_pid")
+    assert pool.connects == 2
+
+
+@pytest.mark.asyncio
+async def test_health_check_replaces_dead_session(pool, server_config, monkeypatch):
+    monkeypatch.setattr(tool_settings, "mcp_session_health_check_interval", 0.0)
+    pid = await _call(pool, server_config, "get_pid")
+    os.kill(int(pid), signal.SIGKILL)
+    await asyncio.sleep(0.5)
+
+    # the failed ping is caught at checkout, so the call itself succeeds
+    assert await _call(pool, server_config, "get_pid") != pid
+    assert pool.connects == 2
+
+
+@pytest.mark.asyncio
+async def test_idle_sessions_closed(pool, server_config, monkeypatch):
+    monkeypatch.setattr(tool_settings, "mcp_session_idle_timeout", 0.2)
+    await _call(pool, server_config, "get_pid")
+    assert pool.size == 1
+
+    await asyncio.sleep(1.0)
+    assert pool.size == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_per_server_limited(pool, server_config, monkeypatch):
+    monkeypatch.setattr(tool_settings, "mcp_max_concurrent_calls_per_server", 2)
+    active = 0
+    peak = 0
+
+    async def connect():
+        return AsyncStdioMCPClient(server_config)
+
+    async def call(key):
+        nonlocal active, peak
+        async with pool.session(key, server_config_hash(server_config), connect):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.05)
+            active -= 1
+
+    # the limit is per server, not per session
+    await asyncio.gather(*(call(("echo", f"agent-{i % 3}")) for i in range(8)))
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_tool_list_cached(pool, monkeypatch):
+    calls = 0
+
+    async def list_tools():
+        nonlocal calls
+        calls += 1
+        return ["echo"]
+
+    assert await pool.list_tools(("echo",), list_tools) == ["echo"]
+    assert await pool.list_tools(("echo",), list_tools) == ["echo"]
+    assert calls == 1
+
+    pool.invalidate_tool_lists()
+    await pool.list_tools(("echo",), list_tools)
+    assert calls == 2
+
+    monkeypatch.setattr(tool_settings, "mcp_tool_list_cache_ttl", 0.0)
+    pool.invalidate_tool_lists()
+    await pool.list_tools(("echo",), list_tools)
+    await pool.list_tools(("echo",), list_tools)
+    assert calls == 4
+
+
+@pytest.mark.asyncio
+async def test_pool_per_event_loop():
+    assert get_mcp_session_pool() is get_mcp_session_pool()
+    assert get_mcp_session_pool() is not await asyncio.to_thread(lambda: asyncio.run(_current_pool()))
+
+
+async def _current_pool():
+    return get_mcp_session_pool()
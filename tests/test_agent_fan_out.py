@@ -0,0 +1,150 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from letta.errors import LLMError, LLMRateLimitError
+from letta.schemas.llm_config import LLMConfig
+from letta.services import agent_fan_out
+from letta.services.agent_fan_out import AgentFanOut, provider_key
+from letta.services.tool_executor.multi_agent_tool_executor import LettaMultiAgentToolExecutor
+from letta.settings import settings
+
+
+def _agent(index: int, provider: str = "openai"):
+    llm_config = LLMConfig(model="test-model", model_endpoint_type=provider, context_window=8192)
+    return SimpleNamespace(id=f"agent-{index}", llm_config=llm_config)
+
+
+class _Tracker:
+    """Step function recording how many agents (per provider) step at the same time."""
+
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        self.active = {}
+        self.peak = {}
+        self.peak_total = 0
+
+    async def __call__(self, agent):
+        provider = provider_key(agent)
+        self.active[provider] = self.active.get(provider, 0) + 1
+        self.peak[provider] = max(self.peak.get(provider, 0), self.active[provider])
+        self.peak_total = max(self.peak_total, sum(self.active.values()))
+        await asyncio.sleep(self.delay)
+        self.active[provider] -= 1
+        return agent.id
+
+
+@pytest.mark.asyncio
+async def test_fan_out_bounded():
+    agents = [_agent(i) for i in range(20)]
+    step = _Tracker()
+
+    results = await AgentFanOut(step, max_concurrency=4, max_concurrency_per_provider=10).run(agents)
+
+    assert [r.result for r in results] == [agent.id for agent in agents]
+    assert all(r.error is None for r in results)
+    assert step.peak_total == 4
+
+
+@pytest.mark.asyncio
+async def test_fan_out_limits_each_provider():
+    agents = [_agent(i, "openai") for i in range(10)] + [_agent(i, "anthropic") for i in range(10, 20)]
+    step = _Tracker()
+
+    await AgentFanOut(step, max_concurrency=10, max_concurrency_per_provider=2).run(agents)
+
+    # the second provider's agents are not queued behind the first one's
+    assert step.peak == {"openai": 2, "anthropic": 2}
+    assert step.peak_total == 4
+
+
+@pytest.mark.asyncio
+async def test_fan_out_streams_results_as_agents_finish():
+    agents = [_agent(0), _agent(1)]
+
+    async def step(agent):
+        await asyncio.sleep(0.2 if agent.id == "agent-0" else 0.0)
+        return agent.id
+
+    order = [result.agent_state.id async for result in AgentFanOut(step, max_concurrency=2).stream(agents)]
+    assert order == ["agent-1", "agent-0"]
+
+
+@pytest.mark.asyncio
+async def test_fan_out_retries_rate_limited_agents(monkeypatch):
+    monkeypatch.setattr(agent_fan_out, "uniform", lambda a, b: 0.01)
+    attempts = {}
+
+    async def step(agent):
+        attempts[agent.id] = attempts.get(agent.id, 0) + 1
+        if agent.id == "agent-0" and attempts[agent.id] < 3:
+            raise LLMRateLimitError("rate limited")
+        if agent.id == "agent-1":
+            raise ValueError("broken agent")
+        return agent.id
+
+    results = await AgentFanOut(step, max_concurrency=4, max_retries=3).run([_agent(0), _agent(1), _agent(2)])
+
+    assert results[0].result == "agent-0"
+    assert attempts["agent-0"] == 3
+    # other errors are not retried
+    assert isinstance(results[1].error, ValueError)
+    assert attempts["agent-1"] == 1
+    assert results[2].result == "agent-2"
+
+    attempts.clear()
+    results = await AgentFanOut(step, max_concurrency=4, max_retries=2).run([_agent(0)])
+    assert isinstance(results[0].error, LLMRateLimitError)
+    assert attempts["agent-0"] == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("persisted", [0, 2])
+async def test_rate_limit_is_only_retried_before_anything_was_persisted(monkeypatch, persisted):
+    """A rate limit on a later inner step (after messages were persisted) must not be retried: it would resend the message."""
+    from letta.agents import letta_agent
+
+    messages = SimpleNamespace(count=0)
+
+    async def size_async(actor, agent_id):
+        return messages.count
+
+    class RateLimitedAgent:
+        def __init__(self, **kwargs):
+            pass
+
+        async def step(self, input_messages):
+            messages.count += persisted
+            raise LLMRateLimitError("rate limited")
+
+    monkeypatch.setattr(letta_agent, "LettaAgent", RateLimitedAgent)
+    executor = LettaMultiAgentToolExecutor(
+        message_manager=SimpleNamespace(size_async=size_async),
+        agent_manager=None,
+        block_manager=None,
+        job_manager=None,
+        passage_manager=None,
+        actor=None,
+    )
+
+    with pytest.raises(LLMError) as exc_info:
+        await executor._step_agent(agent_id="agent-0", message="hello")
+    assert isinstance(exc_info.value, LLMRateLimitError) == (persisted == 0)
+
+
+def test_split_for_batch_api(monkeypatch):
+    agents = [_agent(i, "anthropic") for i in range(3)] + [_agent(3, "openai")]
+
+    monkeypatch.setattr(settings, "multi_agent_broadcast_batch_threshold", None)
+    assert LettaMultiAgentToolExecutor._split_for_batch_api(agents) == ([], agents)
+
+    monkeypatch.setattr(settings, "multi_agent_broadcast_batch_threshold", 3)
+    monkeypatch.setattr(settings, "enable_batch_job_polling", False)
+    assert LettaMultiAgentToolExecutor._split_for_batch_api(agents) == ([], agents)
+
+    monkeypatch.setattr(settings, "enable_batch_job_polling", True)
+    assert LettaMultiAgentToolExecutor._split_for_batch_api(agents) == (agents[:3], agents[3:])
+
+    monkeypatch.setattr(settings, "multi_agent_broadcast_batch_threshold", 4)
+    assert LettaMultiAgentToolExecutor._split_for_batch_api(agents) == ([], agents)
@@ -1,3 +1,4 @@
+import json
 from typing import List, Optional
 
 import pytest
@@ -20,8 +21,9 @@ from letta.schemas.block import Block, CreateBlock
 from letta.schemas.embedding_config import EmbeddingConfig
 from letta.schemas.enums import MessageRole
 from letta.schemas.group import ManagerType
+from letta.schemas.letta_message_content import TextContent
 from letta.schemas.llm_config import LLMConfig
-from letta.schemas.message import MessageCreate
+from letta.schemas.message import Message, MessageCreate
 from letta.schemas.organization import Organization
 from letta.schemas.source import Source
 from letta.schemas.user import User
@@ -1317,6 +1319,103 @@ class TestAgentFileRoundTrip:
             assert imported_agent.name == test_agent.name
 
 
+class TestAgentFileStream:
+    """Tests for streamed (newline-delimited) agent file export and import."""
+
+    async def test_stream_roundtrip(self, server, agent_serialization_manager, default_user, other_user, weather_tool):
+        """Test that a streamed export -> import keeps all messages, in order, and the in-context window."""
+        agent_state = await server.agent_manager.create_agent_async(
+            CreateAgent(
+                name="streamed_agent",
+                system="Agent with a long history",
+                llm_config=LLMConfig.default_config("gpt-4o-mini"),
+                embedding_config=EmbeddingConfig.default_config(provider="openai"),
+                tool_ids=[weather_tool.id],
+            ),
+            actor=default_user,
+        )
+        # more than the 50 messages a regular export includes
+        history = await server.message_manager.create_many_messages_async(
+            [
+                Message(
+                    role=MessageRole.user if i % 2 == 0 else MessageRole.assistant,
+                    content=[TextContent(text=f"message {i}")],
+                    agent_id=agent_state.id,
+                )
+                for i in range(60)
+            ],
+            actor=default_user,
+        )
+        in_context_ids = [agent_state.message_ids[0]] + [message.id for message in history[-5:]]
+        await server.agent_manager.update_message_ids_async(agent_id=agent_state.id, message_ids=in_context_ids, actor=default_user)
+        original_messages = await server.message_manager.list_messages_for_agent_async(agent_state.id, default_user, limit=None)
+
+        lines = [line async for line in agent_serialization_manager.export_stream([agent_state.id], default_user, message_batch_size=7)]
+        records = [json.loads(line) for line in lines]
+        assert all(line.endswith("\n") for line in lines)
+        assert records[0]["type"] == "header"
+        assert "revision_id" in records[0]["data"]["metadata"]
+        assert weather_tool.name in [record["data"]["name"] for record in records if record["type"] == "tool"]
+        (agent_record,) = [record["data"] for record in records if record["type"] == "agent"]
+        assert agent_record["messages"] == []
+        message_records = [record["data"] for record in records if record["type"] == "message"]
+        assert len(message_records) == len(original_messages) > 60
+        assert len({message["id"] for message in message_records}) == len(message_records)
+        assert set(agent_record["in_context_message_ids"]) <= {message["id"] for message in message_records}
+
+        async def read_lines():
+            for line in lines:
+                yield line.encode()
+
+        result = await agent_serialization_manager.import_file_stream(read_lines(), other_user, message_batch_size=10)
+        assert result.success
+
+        imported_agent_id = result.id_mappings["agent-0"]
+        imported_agent = await server.agent_manager.get_agent_by_id_async(imported_agent_id, other_user)
+        imported_messages = await server.message_manager.list_messages_for_agent_async(imported_agent_id, other_user, limit=None)
+        assert [(m.role, m.content) for m in imported_messages] == [(m.role, m.content) for m in original_messages]
+        assert all(m.agent_id == imported_agent_id for m in imported_messages)
+
+        imported_by_id = {m.id: m for m in imported_messages}
+        original_by_id = {m.id: m for m in original_messages}
+        assert [imported_by_id[message_id].content for message_id in imported_agent.message_ids] == [
+            original_by_id[message_id].content for message_id in in_context_ids
+        ]
+
+    async def test_failed_stream_import_deletes_the_imported_agents(self, server, agent_serialization_manager, default_user, other_user):
+        """Test that an import failing after the agents were created (here on a truncated last line) leaves nothing behind."""
+        agent_state = await server.agent_manager.create_agent_async(
+            CreateAgent(
+                name="truncated_agent",
+                system="Agent whose streamed export gets truncated",
+                llm_config=LLMConfig.default_config("gpt-4o-mini"),
+                embedding_config=EmbeddingConfig.default_config(provider="openai"),
+            ),
+            actor=default_user,
+        )
+        lines = [line async for line in agent_serialization_manager.export_stream([agent_state.id], default_user, message_batch_size=1)]
+        assert json.loads(lines[-1])["type"] == "message"
+
+        async def read_lines():
+            for line in lines[:-1]:
+                yield line
+            yield lines[-1][: len(lines[-1]) // 2]
+
+        with pytest.raises(AgentFileImportError):
+            await agent_serialization_manager.import_file_stream(read_lines(), other_user, message_batch_size=1)
+
+        assert await server.agent_manager.list_agents_async(actor=other_user, name="truncated_agent") == []
+
+    async def test_stream_import_requires_header(self, agent_serialization_manager, other_user):
+        """Test that a streamed import rejects records without a leading header."""
+
+        async def read_lines():
+            yield json.dumps({"type": "agent", "data": {"id": "agent-0", "name": "no_header"}})
+
+        with pytest.raises(AgentFileImportError):
+            await agent_serialization_manager.import_file_stream(read_lines(), other_user)
+
+
 class TestAgentFileEdgeCases:
     """Tests for edge cases and error conditions."""
 
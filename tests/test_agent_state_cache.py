@@ -0,0 +1,144 @@
+import time
+
+import pytest
+
+from letta.schemas.agent import AgentState, AgentType
+from letta.schemas.block import Block
+from letta.schemas.embedding_config import EmbeddingConfig
+from letta.schemas.llm_config import LLMConfig
+from letta.schemas.memory import Memory
+from letta.services.agent_state_cache import AgentStateCache, invalidates_agent_state, invalidates_agent_state_dependencies
+
+ORG_ID = "org-1"
+BLOCK_1 = Block(label="human", value="hello")
+BLOCK_2 = Block(label="human", value="hello")
+
+
+def _agent_state(agent_id: str, block: Block = BLOCK_1) -> AgentState:
+    return AgentState(
+        id=agent_id,
+        name=agent_id,
+        system="system",
+        agent_type=AgentType.memgpt_agent,
+        llm_config=LLMConfig.default_config("gpt-4o-mini"),
+        embedding_config=EmbeddingConfig.default_config(provider="openai"),
+        memory=Memory(blocks=[block]),
+        tools=[],
+        sources=[],
+        tags=[],
+    )
+
+
+@pytest.fixture
+def cache():
+    # bypass the singleton so each test gets its own instance
+    return AgentStateCache.__wrapped__(max_size=2, ttl_seconds=60)
+
+
+def test_get_returns_private_copy(cache):
+    cache.put(_agent_state("agent-1"), ORG_ID, None, cache.read_token())
+
+    first = cache.get("agent-1", ORG_ID)
+    first.memory.blocks[0].value = "mutated"
+
+    assert cache.get("agent-1", ORG_ID).memory.blocks[0].value == "hello"
+    assert cache.get("agent-1", "other-org") is None
+    assert cache.get("agent-1", ORG_ID, include_relationships=["memory"]) is None
+
+
+def test_read_racing_an_invalidation_is_not_stored(cache):
+    token = cache.read_token()
+    cache.invalidate("agent-1")
+    cache.put(_agent_state("agent-1"), ORG_ID, None, token)
+    assert cache.get("agent-1", ORG_ID) is None
+
+    # a dependency write during the read is caught even though the agent was not cached yet
+    token = cache.read_token()
+    cache.invalidate_dependencies(BLOCK_1.id)
+    cache.put(_agent_state("agent-1"), ORG_ID, None, token)
+    assert cache.get("agent-1", ORG_ID) is None
+
+    cache.put(_agent_state("agent-1"), ORG_ID, None, cache.read_token())
+    assert cache.get("agent-1", ORG_ID) is not None
+
+
+def test_dependency_invalidation_only_drops_referencing_agents(cache):
+    cache.put(_agent_state("agent-1", block=BLOCK_1), ORG_ID, None, cache.read_token())
+    cache.put(_agent_state("agent-2", block=BLOCK_2), ORG_ID, None, cache.read_token())
+
+    cache.invalidate_dependencies(BLOCK_1.id)
+
+    assert cache.get("agent-1", ORG_ID) is None
+    assert cache.get("agent-2", ORG_ID) is not None
+
+
+def test_lru_eviction_and_ttl(cache):
+    for agent_id in ("agent-1", "agent-2"):
+        cache.put(_agent_state(agent_id), ORG_ID, None, cache.read_token())
+    cache.get("agent-1", ORG_ID)  # agent-2 is now least recently used
+    cache.put(_agent_state("agent-3"), ORG_ID, None, cache.read_token())
+
+    assert cache.get("agent-2", ORG_ID) is None
+    assert cache.get("agent-1", ORG_ID) is not None
+
+    cache.ttl_seconds = 0.01
+    cache.put(_agent_state("agent-4"), ORG_ID, None, cache.read_token())
+    time.sleep(0.02)
+    assert cache.get("agent-4", ORG_ID) is None
+
+
+def test_clear_rejects_in_flight_reads(cache):
+    token = cache.read_token()
+    cache.clear(publish=False)
+    cache.put(_agent_state("agent-1"), ORG_ID, None, token)
+    assert cache.get("agent-1", ORG_ID) is None
+
+
+def test_remote_invalidation_ignores_own_messages(cache):
+    cache.put(_agent_state("agent-1"), ORG_ID, None, cache.read_token())
+
+    cache.apply_remote_invalidation(f'{{"origin": "{cache._origin}", "agent_ids": ["agent-1"]}}')
+    assert cache.get("agent-1", ORG_ID) is not None
+
+    cache.apply_remote_invalidation(f'{{"origin": "other-worker", "dependency_ids": ["{BLOCK_1.id}"]}}')
+    assert cache.get("agent-1", ORG_ID) is None
+
+
+@pytest.mark.asyncio
+async def test_decorators_invalidate_after_write():
+    cache = AgentStateCache()
+    cache.clear(publish=False)
+
+    class Manager:
+        @invalidates_agent_state
+        async def update(self, agent_id: str):
+            return agent_id
+
+        @invalidates_agent_state_dependencies("block_id")
+        def update_block(self, block_id: str):
+            raise ValueError("write failed")
+
+    cache.put(_agent_state("agent-1", block=BLOCK_1), ORG_ID, None, cache.read_token())
+    await Manager().update(agent_id="agent-1")
+    assert cache.get("agent-1", ORG_ID) is None
+
+    cache.put(_agent_state("agent-1", block=BLOCK_1), ORG_ID, None, cache.read_token())
+    with pytest.raises(ValueError):
+        Manager().update_block(BLOCK_1.id)
+    assert cache.get("agent-1", ORG_ID) is None
+
+
+def test_message_ids_are_written_through(cache):
+    cache.put(_agent_state("agent-1"), ORG_ID, None, cache.read_token())
+
+    token = cache.read_token()
+    cache.set_message_ids("agent-1", ["message-1", "message-2"], last_updated_by_id="user-1", publish=False)
+    assert cache.get("agent-1", ORG_ID).message_ids == ["message-1", "message-2"]
+    assert cache.get("agent-1", ORG_ID).last_updated_by_id == "user-1"
+
+    # a read that started before the write may hold the old ids
+    cache.put(_agent_state("agent-1"), ORG_ID, ["memory"], token)
+    assert cache.get("agent-1", ORG_ID, include_relationships=["memory"]) is None
+
+    cache.apply_remote_invalidation('{"origin": "other-worker", "message_ids": {"agent-1": {"message_ids": ["message-3"]}}}')
+    assert cache.get("agent-1", ORG_ID).message_ids == ["message-3"]
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from letta.schemas.embedding_config import EmbeddingConfig
+from letta.services.embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def cache():
+    return EmbeddingCache.__wrapped__(max_size=3)
+
+
+def _config(model: str = "text-embedding-3-small") -> EmbeddingConfig:
+    return EmbeddingConfig(
+        embedding_model=model,
+        embedding_endpoint_type="openai",
+        embedding_endpoint="https://api.openai.com/v1",
+        embedding_dim=4,
+    )
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 0.5, 0.25, 1.0] for text in texts]
+
+
+@pytest.mark.asyncio
+async def test_only_misses_are_embedded(cache):
+    embed = FakeEmbedder()
+
+    first = await cache.get_or_embed(["a", "bb", "a"], _config(), embed)
+    assert first == [[1.0, 0.5, 0.25, 1.0], [2.0, 0.5, 0.25, 1.0], [1.0, 0.5, 0.25, 1.0]]
+    # duplicates within a batch are embedded once
+    assert embed.calls == [["a", "bb"]]
+
+    second = await cache.get_or_embed(["bb", "ccc", "a"], _config(), embed)
+    assert embed.calls[1] == ["ccc"]
+    assert np.allclose(second, [[2.0, 0.5, 0.25, 1.0], [3.0, 0.5, 0.25, 1.0], [1.0, 0.5, 0.25, 1.0]])
+
+    # another embedding model never reuses these vectors
+    await cache.get_or_embed(["a"], _config("text-embedding-3-large"), embed)
+    assert embed.calls[2] == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_cache_is_bounded_and_can_be_disabled(cache, monkeypatch):
+    embed = FakeEmbedder()
+    await cache.get_or_embed(["a", "bb", "ccc", "dddd"], _config(), embed)
+    assert len(cache._entries) == 3
+
+    # "a" was evicted first
+    await cache.get_or_embed(["a", "dddd"], _config(), embed)
+    assert embed.calls[-1] == ["a"]
+
+    from letta.settings import settings
+
+    monkeypatch.setattr(settings, "embedding_cache_enabled", False)
+    await cache.get_or_embed(["a", "a"], _config(), embed)
+    assert embed.calls[-1] == ["a", "a"]
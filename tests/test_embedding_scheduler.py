@@ -0,0 +1,91 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from letta.schemas.embedding_config import EmbeddingConfig
+from letta.services.embedding_scheduler import EmbeddingScheduler
+from letta.settings import settings
+
+
+@pytest.fixture
+def scheduler():
+    return EmbeddingScheduler.__wrapped__()
+
+
+def _config(batch_size: int = 4) -> EmbeddingConfig:
+    return EmbeddingConfig(
+        embedding_model="text-embedding-3-small",
+        embedding_endpoint_type="openai",
+        embedding_endpoint="https://api.openai.com/v1",
+        embedding_dim=4,
+        batch_size=batch_size,
+    )
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after: str):
+        super().__init__("rate limited")
+        self.response = SimpleNamespace(headers={"retry-after": retry_after})
+
+
+def test_batches_are_sized_by_count_and_tokens(monkeypatch):
+    monkeypatch.setattr(settings, "embedding_max_tokens_per_request", 100)
+    texts = ["short"] * 6 + ["x" * 240, "y" * 240, "short"]
+
+    batches = EmbeddingScheduler.plan_batches(texts, _config(batch_size=4))
+
+    # batches hold at most 4 texts, and the two long ones (~81 tokens each) can't share a request
+    assert batches == [[0, 1, 2, 3], [4, 5, 6], [7, 8]]
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_requests_are_retried_with_less_concurrency(scheduler):
+    calls = []
+
+    async def request(texts):
+        calls.append(list(texts))
+        if len(calls) == 1:
+            raise RateLimited(retry_after="0.05")
+        return [[float(len(text))] for text in texts]
+
+    embeddings = await scheduler.embed(["a", "bb", "ccc"], _config(batch_size=2), request, organization_id="org-1")
+
+    assert embeddings == [[1.0], [2.0], [3.0]]
+    # the rate limited batch was retried after the other one went through
+    assert sorted(map(tuple, calls)) == [("a", "bb"), ("a", "bb"), ("ccc",)]
+    lane = scheduler._lanes[EmbeddingScheduler.lane_key(_config())]
+    assert lane.limit < 4
+    assert lane.active == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_errors_surface_after_the_retries(scheduler, monkeypatch):
+    monkeypatch.setattr(settings, "embedding_rate_limit_retries", 1)
+
+    async def request(texts):
+        raise RateLimited(retry_after="0")
+
+    with pytest.raises(RateLimited):
+        await scheduler.submit(["a"], _config(), request)
+
+
+@pytest.mark.asyncio
+async def test_organizations_are_served_round_robin(scheduler, monkeypatch):
+    monkeypatch.setattr(settings, "embedding_max_concurrency", 1)
+    order = []
+
+    async def request(texts):
+        order.append(texts[0])
+        await asyncio.sleep(0.01)
+        return [[0.0]]
+
+    busy_org = [asyncio.create_task(scheduler.submit([f"busy-{i}"], _config(), request, organization_id="busy")) for i in range(4)]
+    await asyncio.sleep(0)
+    other_org = asyncio.create_task(scheduler.submit(["other"], _config(), request, organization_id="other"))
+    await asyncio.gather(*busy_org, other_org)
+
+    # the other organization doesn't wait behind the whole backlog of the busy one
+    assert order.index("other") <= 2
@@ -0,0 +1,102 @@
+import re
+
+import pytest
+
+from letta.schemas.file import FileMetadata
+from letta.services.file_processor.chunker.line_chunker import LineChunker
+from letta.services.file_processor.line_index import FileLineIndex, FileLineIndexCache, required_trigrams
+
+CONTENT = """import os
+
+def load_config(path):
+    with open(path) as f:
+        return f.read()
+
+class ConfigError(Exception):
+    pass
+
+# TODO: support yaml configs
+DEFAULT_PATH = "/etc/app/config.json"
+KELVIN = "Kelvin"
+"""
+
+
+@pytest.fixture
+def file_metadata():
+    return FileMetadata(file_name="config.py", file_type="text/x-python", source_id="source-123", content=CONTENT)
+
+
+def _grep(lines, pattern):
+    regex = re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+    return [i for i, line in enumerate(lines) if regex.search(line.strip())]
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        "config",
+        "def load_config",
+        "CONFIGERROR",
+        r"^class\s+\w+Error",
+        r"open\(path\)",
+        "(yaml|json)",
+        r"TODO:?\s+support",
+        "(?:load_)+config",
+        r"\d+",
+        "kelvin",
+        "not present anywhere",
+    ],
+)
+def test_index_search_matches_a_full_scan(file_metadata, pattern):
+    index = FileLineIndex.build(file_metadata)
+    regex = re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+    assert index.search(regex, required_trigrams(pattern, re.IGNORECASE | re.MULTILINE)) == _grep(index.lines, pattern)
+
+
+def test_required_trigrams_prune_lines_and_files(file_metadata):
+    index = FileLineIndex.build(file_metadata)
+
+    trigrams = required_trigrams("def load_config", re.IGNORECASE)
+    assert {"def", "loa", "fig"} <= trigrams
+    assert list(index.candidate_lines(trigrams)) == [1]
+
+    # alternations and optional parts are not required, so they don't prune
+    assert required_trigrams("(yaml|json)") == set()
+    assert required_trigrams("conf?ig") == {"con"}
+
+    assert not index.might_match(required_trigrams("xml"))
+    assert index.candidate_lines(required_trigrams("xml")) == []
+
+
+def test_index_round_trips_and_formats_like_line_chunker(file_metadata):
+    index = FileLineIndex.build(file_metadata)
+    restored = FileLineIndex.from_bytes(index.to_bytes())
+
+    assert restored.lines == index.lines
+    assert restored.content_size == len(CONTENT.encode("utf-8"))
+    for pattern in ["config", "return f.read", "pass"]:
+        trigrams = required_trigrams(pattern)
+        assert list(restored.candidate_lines(trigrams)) == list(index.candidate_lines(trigrams))
+
+    chunker = LineChunker()
+    assert restored.format_lines(file_metadata.file_name) == chunker.chunk_text(file_metadata)
+    assert restored.format_lines(file_metadata.file_name, start=2, end=5, validate_range=True) == chunker.chunk_text(
+        file_metadata, start=2, end=5, validate_range=True
+    )
+    with pytest.raises(ValueError):
+        restored.format_lines(file_metadata.file_name, start=100)
+
+
+def test_line_index_cache_checks_versions_and_budget(file_metadata):
+    index = FileLineIndex.build(file_metadata)
+    cache = FileLineIndexCache.__wrapped__(max_bytes=2 * index.size_bytes)
+
+    cache.put("file-1", 1, index)
+    assert cache.get("file-1", 1) is index
+    # content rewritten since the index was cached
+    assert cache.get("file-1", 2) is None
+
+    cache.put("file-2", 1, index)
+    cache.put("file-3", 1, index)
+    assert cache.get("file-1", 1) is None
+    assert cache.get("file-3", 1) is index
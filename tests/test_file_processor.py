@@ -1,3 +1,4 @@
+import asyncio
 from unittest.mock import AsyncMock, Mock, patch
 
 import openai
@@ -5,7 +6,11 @@ import pytest
 
 from letta.errors import ErrorCode, LLMBadRequestError
 from letta.schemas.embedding_config import EmbeddingConfig
+from letta.schemas.file import FileMetadata
+from letta.schemas.passage import Passage
+from letta.services.file_processor.embedder.base_embedder import BaseEmbedder
 from letta.services.file_processor.embedder.openai_embedder import OpenAIEmbedder
+from letta.services.file_processor.ingestion_pipeline import IngestionPipeline
 
 
 class TestOpenAIEmbedder:
@@ -291,3 +296,203 @@ class TestFileProcessorWithPinecone:
                         assert call_args.kwargs["file_id"] == mock_file.id
                         assert call_args.kwargs["source_id"] == mock_file.source_id
                         assert len(call_args.kwargs["chunks"]) > 0
+
+    @pytest.mark.asyncio
+    async def test_failed_attempt_deletes_pinecone_records_before_retry(self):
+        """Records upserted by a failed chunking attempt are deleted before the default chunker retries"""
+        from letta.services.file_processor.file_processor import FileProcessor
+
+        embedder = Mock(embedding_config=EmbeddingConfig.default_config(provider="openai"))
+        file_processor = FileProcessor(file_parser=Mock(), embedder=embedder, actor=Mock(organization_id="org"), using_pinecone=True)
+        file_metadata = FileMetadata(file_name="test.txt", file_type="text/plain", source_id="source-87654321")
+        events = []
+
+        def create_pipeline(file_metadata, source_id, chunk):
+            attempt = len([event for event in events if event == "run"])
+
+            async def run(pages):
+                events.append("run")
+                if attempt == 0:
+                    raise RuntimeError("chunker failed")
+                return []
+
+            return Mock(run=run, passages=[], total_chunks=0)
+
+        async def delete_records(file_id, actor):
+            events.append(("delete", file_id))
+
+        with patch.object(file_processor, "_create_pipeline", new=create_pipeline):
+            with patch("letta.services.file_processor.file_processor.delete_file_records_from_pinecone_index", new=delete_records):
+                await file_processor._ingest_with_fallback(file_metadata, Mock(pages=["page"]), source_id=file_metadata.source_id)
+
+        assert events == ["run", ("delete", file_metadata.id), "run"]
+
+    @pytest.mark.asyncio
+    async def test_process_waits_for_content_and_drops_passages_when_it_fails(self):
+        """A failed content write is not orphaned, and the passages ingested alongside it are deleted"""
+        from letta.schemas.enums import FileProcessingStatus
+        from letta.services.file_processor.file_processor import FileProcessor
+
+        embedder = Mock(embedding_config=EmbeddingConfig.default_config(provider="openai"))
+        file_processor = FileProcessor(file_parser=Mock(), embedder=embedder, actor=Mock(organization_id="org"), using_pinecone=False)
+        file_metadata = FileMetadata(file_name="test.txt", file_type="text/plain", source_id="source-87654321")
+        file_processor.file_parser.extract_text = AsyncMock(return_value=Mock(pages=[Mock(markdown="text")]))
+        passages = [
+            Passage(
+                text="text",
+                file_id=file_metadata.id,
+                source_id=file_metadata.source_id,
+                embedding=None,
+                embedding_config=None,
+                organization_id="org",
+            )
+        ]
+        statuses = []
+
+        async def update_file_status(**kwargs):
+            statuses.append(kwargs.get("processing_status"))
+            return file_metadata
+
+        with (
+            patch.object(file_processor.file_manager, "create_file", new=AsyncMock(return_value=file_metadata)),
+            patch.object(file_processor.file_manager, "update_file_status", new=update_file_status),
+            patch.object(file_processor, "_ingest_with_fallback", new=AsyncMock(return_value=passages)),
+            patch.object(file_processor, "_store_file_content", new=AsyncMock(side_effect=RuntimeError("db down"))),
+            patch.object(file_processor.passage_manager, "delete_source_passages_async", new=AsyncMock()) as delete_passages,
+        ):
+            assert await file_processor.process([], file_metadata.source_id, b"text", file_metadata) == []
+
+        delete_passages.assert_awaited_once()
+        assert delete_passages.call_args.kwargs["passages"] == passages
+        assert statuses[-1] == FileProcessingStatus.ERROR
+
+
+class TestIngestionPipeline:
+    """Test suite for the chunk -> embed -> write ingestion pipeline"""
+
+    class SlowEmbedder(BaseEmbedder):
+        """Embeds later batches faster than earlier ones so they finish out of order"""
+
+        def __init__(self, embedding_config):
+            self.embedding_config = embedding_config
+            self.active = 0
+            self.max_active = 0
+
+        async def generate_embedded_passages(self, file_id, source_id, chunks, actor):
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            await asyncio.sleep(0.01 / int(chunks[0].split()[-1]))
+            self.active -= 1
+            return [
+                Passage(text=chunk, file_id=file_id, source_id=source_id, embedding=[0.1], embedding_config=None, organization_id="org")
+                for chunk in chunks
+            ]
+
+    @pytest.fixture
+    def pipeline_parts(self):
+        embedding_config = EmbeddingConfig(
+            embedding_model="text-embedding-3-small",
+            embedding_endpoint_type="openai",
+            embedding_dim=3,
+            batch_size=2,
+        )
+        file_metadata = FileMetadata(file_name="test.txt", source_id="source-12345678")
+        file_manager = Mock()
+        file_manager.update_file_status = AsyncMock()
+        passage_manager = Mock()
+        written = []
+
+        async def create_many_source_passages_async(passages, file_metadata, actor):
+            written.append([p.text for p in passages])
+            return passages
+
+        passage_manager.create_many_source_passages_async = create_many_source_passages_async
+        return file_metadata, self.SlowEmbedder(embedding_config), file_manager, passage_manager, written
+
+    @pytest.mark.asyncio
+    async def test_passages_are_written_in_chunk_order(self, pipeline_parts):
+        file_metadata, embedder, file_manager, passage_manager, written = pipeline_parts
+        pages = ["1 2 3", "4 5 6 7", "8 9 10"]
+
+        pipeline = IngestionPipeline(
+            file_metadata=file_metadata,
+            source_id="source-12345678",
+            chunk=lambda page: [f"chunk {n}" for n in page.split()],
+            embedder=embedder,
+            actor=Mock(organization_id="org"),
+            file_manager=file_manager,
+            passage_manager=passage_manager,
+            embed_concurrency=3,
+            max_batches_in_flight=3,
+        )
+        passages = await pipeline.run(pages)
+
+        assert [p.text for p in passages] == [f"chunk {n}" for n in range(1, 11)]
+        assert written == [
+            ["chunk 1", "chunk 2"],
+            ["chunk 3", "chunk 4"],
+            ["chunk 5", "chunk 6"],
+            ["chunk 7", "chunk 8"],
+            ["chunk 9", "chunk 10"],
+        ]
+        assert embedder.max_active > 1
+        # embeddings are dropped once written
+        assert all(p.embedding is None for p in passages)
+
+        last_progress = file_manager.update_file_status.call_args_list[-1].kwargs
+        assert last_progress["total_chunks"] == 10
+        assert last_progress["chunks_embedded"] == 10
+
+    @pytest.mark.asyncio
+    async def test_in_flight_batches_are_bounded(self, pipeline_parts):
+        file_metadata, embedder, file_manager, passage_manager, written = pipeline_parts
+        chunked = []
+
+        def chunk(page):
+            chunked.append(page)
+            return [f"chunk {n}" for n in page.split()]
+
+        async def stalled_write(passages, file_metadata, actor):
+            await asyncio.sleep(3600)
+
+        passage_manager.create_many_source_passages_async = stalled_write
+        pipeline = IngestionPipeline(
+            file_metadata=file_metadata,
+            source_id="source-12345678",
+            chunk=chunk,
+            embedder=embedder,
+            actor=Mock(organization_id="org"),
+            file_manager=file_manager,
+            passage_manager=passage_manager,
+            embed_concurrency=2,
+            max_batches_in_flight=2,
+        )
+        task = asyncio.create_task(pipeline.run([f"{2 * i + 1} {2 * i + 2}" for i in range(20)]))
+        await asyncio.sleep(0.2)
+
+        # the writer is stuck on the first batch, so the chunker stopped after filling the in-flight slots
+        assert len(chunked) <= 3
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    @pytest.mark.asyncio
+    async def test_stage_failure_stops_the_pipeline(self, pipeline_parts):
+        file_metadata, embedder, file_manager, passage_manager, written = pipeline_parts
+
+        def chunk(page):
+            if page == "bad":
+                return []
+            return [f"chunk {n}" for n in page.split()]
+
+        pipeline = IngestionPipeline(
+            file_metadata=file_metadata,
+            source_id="source-12345678",
+            chunk=chunk,
+            embedder=embedder,
+            actor=Mock(organization_id="org"),
+            file_manager=file_manager,
+            passage_manager=passage_manager,
+        )
+        with pytest.raises(ValueError, match="No chunks created"):
+            await pipeline.run(["1 2", "bad", "3 4"])
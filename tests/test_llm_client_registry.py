@@ -0,0 +1,124 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from openai import AsyncOpenAI, OpenAI
+
+from letta.llm_api import client_registry
+from letta.llm_api.client_registry import LLMClientRegistry
+from letta.settings import settings
+
+
+@pytest.fixture
+def registry():
+    return LLMClientRegistry.__wrapped__()
+
+
+def test_sync_clients_are_reused_per_credentials(registry):
+    client = registry.get_sync_client(OpenAI, "openai", api_key="key-a", base_url="http://localhost:1/v1")
+    assert registry.get_sync_client(OpenAI, "openai", api_key="key-a", base_url="http://localhost:1/v1") is client
+
+    # different credentials, endpoints or providers never share a client
+    assert registry.get_sync_client(OpenAI, "openai", api_key="key-b", base_url="http://localhost:1/v1") is not client
+    assert registry.get_sync_client(OpenAI, "openai", api_key="key-a", base_url="http://localhost:2/v1") is not client
+    assert registry.get_sync_client(OpenAI, "groq", api_key="key-a", base_url="http://localhost:1/v1") is not client
+
+
+def test_async_clients_are_cached_per_event_loop(registry):
+    async def get():
+        return registry.get_async_client(AsyncOpenAI, "openai", api_key="key", base_url="http://localhost:1/v1")
+
+    async def get_twice():
+        return await get(), await get()
+
+    first, second = asyncio.run(get_twice())
+    assert first is second
+    # the pooled connections of a client belong to the loop it was used on
+    assert asyncio.run(get()) is not first
+
+
+@pytest.mark.asyncio
+async def test_client_cache_is_bounded(registry, monkeypatch):
+    monkeypatch.setattr(settings, "llm_client_cache_size", 2)
+
+    first = registry.get_async_client(AsyncOpenAI, "openai", api_key="key-1")
+    registry.get_async_client(AsyncOpenAI, "openai", api_key="key-2")
+    registry.get_async_client(AsyncOpenAI, "openai", api_key="key-1")
+    registry.get_async_client(AsyncOpenAI, "openai", api_key="key-3")
+
+    # key-2 was the least recently used
+    assert registry.get_async_client(AsyncOpenAI, "openai", api_key="key-1") is first
+    assert len(registry._clients[asyncio.get_running_loop()]) == 2
+
+    http_client = registry.get_http_client("openai")
+    await registry.aclose()
+    assert http_client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_evicted_clients_are_closed(registry, monkeypatch):
+    monkeypatch.setattr(settings, "llm_client_cache_size", 1)
+    monkeypatch.setattr(client_registry, "EVICTED_CLIENT_CLOSE_DELAY_SECONDS", 0.01)
+
+    http_client = registry.get_http_client("openai")
+    registry.get_http_client("anthropic")
+    # requests still using the evicted client get a grace period
+    assert not http_client.is_closed
+    await asyncio.sleep(0.1)
+    assert http_client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_aclose_closes_clients_of_every_loop(registry):
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever, daemon=True)
+    thread.start()
+
+    async def get():
+        return registry.get_http_client("openai")
+
+    try:
+        other_client = asyncio.run_coroutine_threadsafe(get(), other_loop).result()
+        own_client = await get()
+        await registry.aclose()
+        assert own_client.is_closed
+        assert other_client.is_closed
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join()
+        other_loop.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_connections_are_summed_per_provider(registry):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep the connection alive
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        http_client = registry.get_http_client("openai")
+        await http_client.get(f"http://127.0.0.1:{server.server_port}/")
+        registry.get_sync_client(OpenAI, "groq", api_key="key", base_url="http://localhost:1/v1")
+
+        # the finished request left its connection idle in the pool, the unused sync client has none
+        assert registry._pool_connections() == {
+            ("openai", "active"): 0,
+            ("openai", "idle"): 1,
+            ("groq", "active"): 0,
+            ("groq", "idle"): 0,
+        }
+    finally:
+        await registry.aclose()
+        server.shutdown()
+        thread.join()
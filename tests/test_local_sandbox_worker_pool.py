@@ -0,0 +1,99 @@
+import os
+import sys
+
+import pytest
+
+from letta.services.tool_sandbox.local_worker_pool import LocalSandboxWorkerPool
+from letta.settings import tool_settings
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="the local sandbox worker pool is POSIX only")
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = LocalSandboxWorkerPool(python_executable=sys.executable, env=dict(os.environ), cwd=str(tmp_path))
+    yield pool
+    pool.close()
+
+
+def _script(tmp_path, name: str, code: str) -> str:
+    path = tmp_path / name
+    path.write_text(code)
+    return str(path)
+
+
+def test_worker_pool_runs_each_call_like_a_fresh_script(pool, tmp_path):
+    script = _script(
+        tmp_path,
+        "tool.py",
+        "import os, sys\n"
+        "COUNTER = globals().get('COUNTER', 0) + 1\n"
+        "print(os.environ.get('TOOL_VAR'), os.getcwd(), __name__, COUNTER)\n"
+        "print('warning', file=sys.stderr)\n",
+    )
+    workdir = tmp_path / "work"
+    workdir.mkdir()
+
+    for value in ["a", "b"]:
+        exit_code, stdout, stderr = pool.run(script, env={"TOOL_VAR": value}, cwd=str(workdir), timeout=30)
+        assert exit_code == 0
+        # per-call environment and working directory, fresh module globals every time
+        assert stdout.decode() == f"{value} {workdir} __main__ 1\n"
+        assert stderr.decode() == "warning\n"
+
+    # the same worker served both calls
+    assert [worker.calls for worker in pool._idle if worker.calls] == [2]
+
+
+def test_worker_pool_exit_codes_and_errors(pool, tmp_path):
+    exit_code, _, stderr = pool.run(_script(tmp_path, "raise.py", "raise ValueError('bad')\n"), env={}, cwd=str(tmp_path), timeout=30)
+    assert exit_code == 1
+    assert "ValueError: bad" in stderr.decode()
+
+    exit_code, _, _ = pool.run(_script(tmp_path, "exit.py", "import sys\nsys.exit(4)\n"), env={}, cwd=str(tmp_path), timeout=30)
+    assert exit_code == 4
+
+    # a tool that takes down the interpreter only costs its worker
+    exit_code, stdout, _ = pool.run(
+        _script(tmp_path, "crash.py", "import os\nprint('partial', flush=True)\nos._exit(3)\n"), env={}, cwd=str(tmp_path), timeout=30
+    )
+    assert (exit_code, stdout) == (3, b"partial\n")
+
+    exit_code, stdout, _ = pool.run(_script(tmp_path, "ok.py", "print('ok')\n"), env={}, cwd=str(tmp_path), timeout=30)
+    assert (exit_code, stdout) == (0, b"ok\n")
+
+
+def test_worker_pool_timeout_kills_worker(pool, tmp_path):
+    with pytest.raises(TimeoutError):
+        pool.run(_script(tmp_path, "slow.py", "import time\ntime.sleep(30)\n"), env={}, cwd=str(tmp_path), timeout=0.5)
+    assert all(worker.alive for worker in pool._idle)
+
+    exit_code, stdout, _ = pool.run(_script(tmp_path, "ok.py", "print('ok')\n"), env={}, cwd=str(tmp_path), timeout=30)
+    assert (exit_code, stdout) == (0, b"ok\n")
+
+
+def test_worker_pool_recycles_workers(pool, tmp_path, monkeypatch):
+    monkeypatch.setattr(tool_settings, "tool_sandbox_worker_max_calls", 2)
+    script = _script(tmp_path, "pid.py", "import os\nprint(os.getpid())\n")
+
+    pids = [pool.run(script, env={}, cwd=str(tmp_path), timeout=30)[1] for _ in range(4)]
+    assert pids[0] == pids[1]
+    assert pids[1] != pids[2]
+    assert pids[2] == pids[3]
+
+
+def test_worker_pool_retires_workers_that_leave_threads_running(pool, tmp_path):
+    script = _script(
+        tmp_path,
+        "thread.py",
+        "import os, threading, time\nthreading.Thread(target=time.sleep, args=(30,), daemon=True).start()\nprint(os.getpid())\n",
+    )
+    first = pool.run(script, env={}, cwd=str(tmp_path), timeout=30)[1]
+    second = pool.run(script, env={}, cwd=str(tmp_path), timeout=30)[1]
+    assert first != second
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_run_async(pool, tmp_path):
+    exit_code, stdout, _ = await pool.run_async(_script(tmp_path, "ok.py", "print('ok')\n"), env={}, cwd=str(tmp_path), timeout=30)
+    assert (exit_code, stdout) == (0, b"ok\n")
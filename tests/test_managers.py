@@ -12,12 +12,13 @@ from typing import List
 from unittest.mock import AsyncMock, Mock, patch
 
 # tests/test_file_content_flow.py
+import numpy as np
 import pytest
 from _pytest.python_api import approx
 from anthropic.types.beta import BetaMessage
 from anthropic.types.beta.messages import BetaMessageBatchIndividualResponse, BetaMessageBatchSucceededResult
 from openai.types.chat.chat_completion_message_tool_call import ChatCompletionMessageToolCall as OpenAIToolCall, Function as OpenAIFunction
-from sqlalchemy import func, select
+from sqlalchemy import func, select, update
 from sqlalchemy.exc import IntegrityError, InvalidRequestError
 from sqlalchemy.orm.exc import StaleDataError
 
@@ -35,6 +36,7 @@ from letta.constants import (
     LETTA_TOOL_EXECUTION_DIR,
     LETTA_TOOL_SET,
     LOCAL_ONLY_MULTI_AGENT_TOOLS,
+    MAX_EMBEDDING_DIM,
     MCP_TOOL_TAG_NAME_PREFIX,
     MULTI_AGENT_TOOLS,
 )
@@ -78,6 +80,7 @@ from letta.schemas.openai.chat_completion_response import UsageStatistics
 from letta.schemas.organization import Organization, Organization as PydanticOrganization, OrganizationUpdate
 from letta.schemas.passage import Passage as PydanticPassage
 from letta.schemas.pip_requirement import PipRequirement
+from letta.schemas.provider_trace import ProviderTraceCreate
 from letta.schemas.run import Run as PydanticRun
 from letta.schemas.sandbox_config import E2BSandboxConfig, LocalSandboxConfig, SandboxConfigCreate, SandboxConfigUpdate
 from letta.schemas.source import Source as PydanticSource, SourceUpdate
@@ -86,7 +89,9 @@ from letta.schemas.tool_rule import InitToolRule
 from letta.schemas.user import User as PydanticUser, UserUpdate
 from letta.server.db import db_registry
 from letta.server.server import SyncServer
+from letta.services.actor_cache import ActorCache
 from letta.services.block_manager import BlockManager
+from letta.services.file_processor.line_index import FileLineIndexCache
 from letta.services.helpers.agent_manager_helper import calculate_base_tools, calculate_multi_agent_tools, validate_agent_exists_async
 from letta.services.step_manager import FeedbackType
 from letta.settings import settings, tool_settings
@@ -126,6 +131,8 @@ async def _clear_tables(async_session):
             continue
         await async_session.execute(table.delete())  # Truncate table
     await async_session.commit()
+    # the actors cached by earlier tests were deleted behind the managers' backs
+    ActorCache().clear()
 
     # Re-enable foreign key constraints for SQLite only
     if engine_name == "sqlite":
@@ -2612,6 +2619,125 @@ async def test_modify_letta_message(server: SyncServer, sarah_agent, default_use
     # TODO: tool calls/responses
 
 
+def test_plan_context_update_only_touches_changed_rows():
+    from letta.orm.agent_context_message import plan_context_update
+
+    current = [(0, "sys"), (1, "a"), (2, "b"), (3, "c"), (4, "d")]
+
+    # append
+    assert plan_context_update(current, ["sys", "a", "b", "c", "d", "e"]) == ([], [{"position": 5, "message_id": "e"}])
+    # summarize: the summary replaces a and b, the system message moves in front of it
+    assert plan_context_update(current, ["sys", "summary", "c", "d"]) == (
+        [0, 1, 2],
+        [{"position": 1, "message_id": "sys"}, {"position": 2, "message_id": "summary"}],
+    )
+    # new system message
+    assert plan_context_update(current, ["sys2", "a", "b", "c", "d"]) == ([0], [{"position": 0, "message_id": "sys2"}])
+    # nothing in common
+    assert plan_context_update(current[:2], ["x"]) == ([0, 1], [{"position": 0, "message_id": "x"}])
+
+
+@pytest.mark.asyncio
+async def test_in_context_messages_are_kept_in_order(server: SyncServer, sarah_agent, default_user):
+    from letta.orm import AgentContextMessage
+
+    agent_manager = server.agent_manager
+    system_id = sarah_agent.message_ids[0]
+    messages = await server.message_manager.create_many_messages_async(
+        [PydanticMessage(agent_id=sarah_agent.id, role=MessageRole.user, content=[TextContent(text=f"message {i}")]) for i in range(4)],
+        actor=default_user,
+    )
+    ids = [m.id for m in messages]
+
+    # summarize away the initial messages, then keep appending and trimming
+    await agent_manager.update_message_ids_async(agent_id=sarah_agent.id, message_ids=[system_id, ids[0], ids[1]], actor=default_user)
+    await agent_manager.update_message_ids_async(
+        agent_id=sarah_agent.id, message_ids=[system_id, ids[0], ids[1], ids[2]], actor=default_user
+    )
+    await agent_manager.update_message_ids_async(
+        agent_id=sarah_agent.id, message_ids=[system_id, ids[3], ids[1], ids[2]], actor=default_user
+    )
+
+    agent_state = await agent_manager.get_agent_by_id_async(agent_id=sarah_agent.id, actor=default_user)
+    assert agent_state.message_ids == [system_id, ids[3], ids[1], ids[2]]
+    in_context = await agent_manager.get_in_context_messages_async(agent_id=sarah_agent.id, actor=default_user)
+    assert [m.id for m in in_context] == agent_state.message_ids
+
+    # appends go after the last position
+    appended = await agent_manager.append_to_in_context_messages_async(
+        [PydanticMessage(agent_id=sarah_agent.id, role=MessageRole.user, content=[TextContent(text="appended")])],
+        agent_id=sarah_agent.id,
+        actor=default_user,
+    )
+    assert appended.message_ids[:-1] == [system_id, ids[3], ids[1], ids[2]]
+    assert [
+        m.id for m in await agent_manager.get_in_context_messages_async(agent_id=sarah_agent.id, actor=default_user)
+    ] == appended.message_ids
+
+    async with db_registry.async_session() as session:
+        rows = await session.execute(
+            select(AgentContextMessage.position, AgentContextMessage.message_id)
+            .where(AgentContextMessage.agent_id == sarah_agent.id)
+            .order_by(AgentContextMessage.position)
+        )
+        positions = rows.all()
+    # rows for ids[1] and ids[2] were never rewritten
+    assert [message_id for _, message_id in positions] == appended.message_ids
+    assert dict((m, p) for p, m in positions)[ids[1]] == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(USING_SQLITE, reason="attaching an archive fails on SQLite, archives_agents.created_at defaults to the string 'now()'")
+async def test_load_step_context_matches_separate_reads(server: SyncServer, sarah_agent, default_user):
+    include_relationships = ["tools", "memory", "tool_exec_environment_variables", "sources"]
+    await server.message_manager.create_many_messages_async(
+        [PydanticMessage(agent_id=sarah_agent.id, role=MessageRole.user, content=[TextContent(text=f"message {i}")]) for i in range(3)],
+        actor=default_user,
+    )
+
+    # no archive yet
+    step_context = await server.agent_manager.load_step_context_async(
+        agent_id=sarah_agent.id, actor=default_user, include_relationships=include_relationships
+    )
+    assert step_context.archive_tags is None
+    assert step_context.num_archival_memories == 0
+
+    archive = await server.archive_manager.get_or_create_default_archive_for_agent_async(
+        agent_id=sarah_agent.id, agent_name=sarah_agent.name, actor=default_user
+    )
+    for text, tags in [("first", ["b", "a"]), ("second", ["a"])]:
+        await server.passage_manager.create_agent_passage_async(
+            PydanticPassage(
+                text=text,
+                organization_id=default_user.organization_id,
+                archive_id=archive.id,
+                embedding_config=DEFAULT_EMBEDDING_CONFIG,
+                embedding=[0.1] * 4,
+                tags=tags,
+            ),
+            default_user,
+        )
+
+    step_context = await server.agent_manager.load_step_context_async(
+        agent_id=sarah_agent.id, actor=default_user, include_relationships=include_relationships
+    )
+    agent_state = await server.agent_manager.get_agent_by_id_async(
+        agent_id=sarah_agent.id, actor=default_user, include_relationships=include_relationships
+    )
+    assert step_context.agent_state.id == agent_state.id
+    assert [b.id for b in step_context.agent_state.memory.blocks] == [b.id for b in agent_state.memory.blocks]
+    assert [m.id for m in step_context.in_context_messages] == [
+        m.id for m in await server.message_manager.get_in_context_messages_async(agent_id=sarah_agent.id, actor=default_user)
+    ]
+    assert step_context.num_messages == await server.message_manager.size_async(actor=default_user, agent_id=sarah_agent.id)
+    assert step_context.num_archival_memories == 2
+    assert step_context.archive_tags == ["a", "b"]
+    assert step_context.memory_is_current
+
+    with pytest.raises(NoResultFound):
+        await server.agent_manager.load_step_context_async(agent_id="agent-00000000-0000-4000-8000-000000000000", actor=default_user)
+
+
 # ======================================================================================================================
 # AgentManager Tests - Blocks Relationship
 # ======================================================================================================================
@@ -2717,6 +2843,29 @@ def test_get_block_with_label(server: SyncServer, sarah_agent, default_block, de
     assert block.label == default_block.label
 
 
+@pytest.mark.asyncio
+async def test_agent_state_cache_survives_steps(server: SyncServer, sarah_agent, default_user, monkeypatch):
+    """Writing the in-context message ids (every step) and dry-run prompt rebuilds must not evict the cached agent."""
+    from letta.services.agent_state_cache import AgentStateCache
+
+    monkeypatch.setattr(settings, "agent_state_cache_enabled", True)
+    cache = AgentStateCache()
+    cache.clear(publish=False)
+
+    agent_state = await server.agent_manager.get_agent_by_id_async(agent_id=sarah_agent.id, actor=default_user)
+    message_ids = agent_state.message_ids[:1]
+    await server.agent_manager.update_message_ids_async(agent_id=sarah_agent.id, message_ids=message_ids, actor=default_user)
+    cached = cache.get(sarah_agent.id, default_user.organization_id)
+    assert cached is not None and cached.message_ids == message_ids
+
+    await server.agent_manager.rebuild_system_prompt_async(agent_id=sarah_agent.id, actor=default_user, force=True, dry_run=True)
+    assert cache.get(sarah_agent.id, default_user.organization_id) is not None
+
+    await server.agent_manager.rebuild_system_prompt_async(agent_id=sarah_agent.id, actor=default_user, force=True)
+    assert cache.get(sarah_agent.id, default_user.organization_id) is None
+    cache.clear(publish=False)
+
+
 @pytest.mark.asyncio
 async def test_refresh_memory_async(server: SyncServer, default_user):
     block = server.block_manager.create_or_update_block(
@@ -2993,6 +3142,67 @@ async def test_list_source_passages_only(server: SyncServer, default_user, defau
     assert all(p.archive_id is None for p in source_passages)
 
 
+@pytest.mark.asyncio
+async def test_sqlite_vector_index_sees_writes_that_keep_the_row_count(server: SyncServer, default_user, default_archive):
+    """The vector index must pick up new passages, in-place embedding updates and delete-plus-insert that keeps the row count."""
+    from letta.helpers.sqlite_vector_index import SQLiteVectorIndex
+    from letta.orm.passage import ArchivalPassage
+
+    passages = []
+    for text, embedding in [("x", [1.0, 0.0, 0.0]), ("y", [0.5, 1.0, 0.0])]:
+        passages.append(
+            await server.passage_manager.create_agent_passage_async(
+                PydanticPassage(
+                    organization_id=default_user.organization_id,
+                    archive_id=default_archive.id,
+                    text=text,
+                    embedding=embedding,
+                    embedding_config=DEFAULT_EMBEDDING_CONFIG,
+                ),
+                actor=default_user,
+            )
+        )
+
+    async def nearest(query):
+        async with db_registry.async_session() as session:
+            ranked = await SQLiteVectorIndex().search_async(
+                session=session,
+                organization_id=default_user.organization_id,
+                archive_ids=[default_archive.id],
+                query_embedding=query,
+                dim=3,
+                limit=1,
+            )
+        return ranked[0][0]
+
+    assert await nearest([1.0, 0.0, 0.0]) == passages[0].id
+
+    # update the embedding in place, bypassing the passage manager
+    async with db_registry.async_session() as session:
+        passage = await session.get(ArchivalPassage, passages[0].id)
+        passage.embedding = np.pad(np.array([0.0, 0.0, 1.0]), (0, MAX_EMBEDDING_DIM - 3))
+        await passage.update_async(session, actor=default_user)
+    assert await nearest([0.0, 0.0, 1.0]) == passages[0].id
+    assert await nearest([1.0, 0.0, 0.0]) != passages[0].id
+
+    # delete one passage and insert another, the row count stays the same
+    async with db_registry.async_session() as session:
+        await session.delete(await session.get(ArchivalPassage, passages[1].id))
+        await session.commit()
+    replacement = await server.passage_manager.create_agent_passage_async(
+        PydanticPassage(
+            organization_id=default_user.organization_id,
+            archive_id=default_archive.id,
+            text="z",
+            embedding=[1.0, 0.0, 0.0],
+            embedding_config=DEFAULT_EMBEDDING_CONFIG,
+        ),
+        actor=default_user,
+    )
+    assert await nearest([1.0, 0.0, 0.0]) == replacement.id
+    assert await nearest([0.0, 1.0, 0.0]) != passages[1].id
+
+
 # ======================================================================================================================
 # Organization Manager Tests
 # ======================================================================================================================
@@ -3569,6 +3779,59 @@ def test_agent_passage_size(server: SyncServer, default_user, sarah_agent):
     assert final_size == initial_size + 3
 
 
+@pytest.mark.asyncio
+async def test_cached_message_and_passage_counts(disable_turbopuffer, server: SyncServer, default_user, sarah_agent):
+    """Cached counters used by the memory header track creates and deletes and match the exact counts."""
+    from letta.orm import Agent as AgentModel
+    from letta.orm.agent_counters import reconcile_counters_async
+
+    async def assert_counts_match():
+        assert await server.message_manager.agent_message_count_async(
+            agent_id=sarah_agent.id, actor=default_user
+        ) == await server.message_manager.size_async(agent_id=sarah_agent.id, actor=default_user)
+        assert await server.passage_manager.agent_passage_count_async(
+            agent_id=sarah_agent.id, actor=default_user
+        ) == await server.passage_manager.agent_passage_size_async(agent_id=sarah_agent.id, actor=default_user)
+
+    # first read initializes the counters from a real count
+    await assert_counts_match()
+
+    archive = await server.archive_manager.get_or_create_default_archive_for_agent_async(
+        agent_id=sarah_agent.id, agent_name=sarah_agent.name, actor=default_user
+    )
+    passages = [
+        await server.passage_manager.create_agent_passage_async(
+            PydanticPassage(
+                text=f"counted passage {i}",
+                archive_id=archive.id,
+                organization_id=default_user.organization_id,
+                embedding=[0.1],
+                embedding_config=DEFAULT_EMBEDDING_CONFIG,
+            ),
+            actor=default_user,
+        )
+        for i in range(3)
+    ]
+    messages = await server.message_manager.create_many_messages_async(
+        [PydanticMessage(agent_id=sarah_agent.id, role="user", content=[TextContent(text=f"message {i}")]) for i in range(4)],
+        actor=default_user,
+    )
+    await assert_counts_match()
+
+    await server.passage_manager.delete_agent_passage_by_id_async(passage_id=passages[0].id, actor=default_user)
+    await server.passage_manager.delete_agent_passages_async(passages=passages[1:], actor=default_user)
+    await server.message_manager.delete_message_by_id_async(message_id=messages[0].id, actor=default_user)
+    await server.message_manager.delete_messages_by_ids_async(message_ids=[m.id for m in messages[1:3]], actor=default_user)
+    await assert_counts_match()
+
+    # drifted counters are repaired by the reconciliation sweep
+    async with db_registry.async_session() as session:
+        await session.execute(update(AgentModel).where(AgentModel.id == sarah_agent.id).values(message_count=999))
+        await session.commit()
+        await reconcile_counters_async(session, batch_size=1000)
+    await assert_counts_match()
+
+
 def test_deprecated_methods_show_warnings(server: SyncServer, default_user, sarah_agent):
     """Test that deprecated methods show deprecation warnings."""
     import warnings
@@ -3674,6 +3937,46 @@ async def test_passage_tags_functionality(disable_turbopuffer, server: SyncServe
         assert len(expected_matches) >= 1
 
 
+@pytest.mark.asyncio
+async def test_passage_tag_filter_fills_limit(disable_turbopuffer, server: SyncServer, default_user, sarah_agent):
+    """Tag filters run in SQL, so sparse tags still return a full page of `limit` results."""
+    from letta.schemas.enums import TagMatchMode
+
+    archive = await server.archive_manager.get_or_create_default_archive_for_agent_async(
+        agent_id=sarah_agent.id, agent_name=sarah_agent.name, actor=default_user
+    )
+
+    # Untagged passages are created first so they would fill an unfiltered page
+    for i in range(10):
+        tags = ["rare", "other"] if i >= 7 else None
+        await server.passage_manager.create_agent_passage_async(
+            PydanticPassage(
+                text=f"passage {i}",
+                archive_id=archive.id,
+                organization_id=default_user.organization_id,
+                embedding=[0.1, 0.2, 0.3],
+                embedding_config=DEFAULT_EMBEDDING_CONFIG,
+                tags=tags,
+            ),
+            actor=default_user,
+        )
+
+    any_results = await server.agent_manager.query_agent_passages_async(
+        actor=default_user, agent_id=sarah_agent.id, limit=2, tags=["rare", "missing"], tag_match_mode=TagMatchMode.ANY
+    )
+    assert [p.text for p in any_results] == ["passage 7", "passage 8"]
+
+    all_results = await server.agent_manager.query_agent_passages_async(
+        actor=default_user, agent_id=sarah_agent.id, limit=5, tags=["rare", "other"], tag_match_mode=TagMatchMode.ALL
+    )
+    assert [p.text for p in all_results] == ["passage 7", "passage 8", "passage 9"]
+
+    no_results = await server.agent_manager.query_agent_passages_async(
+        actor=default_user, agent_id=sarah_agent.id, limit=5, tags=["rare", "missing"], tag_match_mode=TagMatchMode.ALL
+    )
+    assert no_results == []
+
+
 @pytest.mark.asyncio
 async def test_comprehensive_tag_functionality(disable_turbopuffer, server: SyncServer, sarah_agent, default_user):
     """Comprehensive test for tag functionality including dual storage and junction table."""
@@ -4188,12 +4491,14 @@ async def test_update_user(server: SyncServer):
     assert user.organization_id == test_org.id
 
 
-async def test_user_caching(server: SyncServer, default_user, performance_pct=0.4):
+async def test_user_caching(server: SyncServer, default_user, monkeypatch, performance_pct=0.4):
     if isinstance(await get_redis_client(), NoopAsyncRedisClient):
         pytest.skip("redis not available")
+    # Only exercise the Redis tier
+    monkeypatch.setattr(settings, "actor_cache_enabled", False)
     # Invalidate previous cache behavior.
     await server.user_manager._invalidate_actor_cache(default_user.id)
-    before_stats = server.user_manager.get_actor_by_id_async.cache_stats
+    before_stats = server.user_manager._read_actor_by_id_async.cache_stats
     before_cache_misses = before_stats.misses
     before_cache_hits = before_stats.hits
 
@@ -4215,7 +4520,7 @@ async def test_user_caching(server: SyncServer, default_user, performance_pct=0.
         assert actor_cached == actor
     for d in durations:
         assert d < duration_first * performance_pct
-    stats = server.user_manager.get_actor_by_id_async.cache_stats
+    stats = server.user_manager._read_actor_by_id_async.cache_stats
 
     print(f"Before calls: {before_stats}")
     print(f"After calls: {stats}")
@@ -4224,6 +4529,69 @@ async def test_user_caching(server: SyncServer, default_user, performance_pct=0.
     assert stats.hits - before_cache_hits == cached_hits
 
 
+async def test_actor_cache(server: SyncServer, default_organization):
+    user = await server.user_manager.create_actor_async(PydanticUser(name="cached", organization_id=default_organization.id))
+    actor = await server.user_manager.get_actor_or_default_async(actor_id=user.id)
+    assert actor.name == "cached"
+
+    # served from the cache, no database read
+    with patch.object(server.user_manager, "_read_actor_by_id_async", new=AsyncMock(side_effect=AssertionError)):
+        cached = await server.user_manager.get_actor_or_default_async(actor_id=user.id)
+    assert cached == actor
+    # callers get copies
+    cached.name = "changed"
+    assert (await server.user_manager.get_actor_by_id_async(user.id)).name == "cached"
+
+    await server.user_manager.update_actor_async(UserUpdate(id=user.id, name="renamed"))
+    assert (await server.user_manager.get_actor_by_id_async(user.id)).name == "renamed"
+
+    await server.user_manager.delete_actor_by_id_async(user.id)
+    with pytest.raises(NoResultFound):
+        await server.user_manager.get_actor_by_id_async(user.id)
+
+
+async def test_actor_cache_organization_delete(server: SyncServer):
+    org = await server.organization_manager.create_organization_async(PydanticOrganization(name="cached-org"))
+    user = await server.user_manager.create_actor_async(PydanticUser(name="cached", organization_id=org.id))
+    await server.user_manager.get_actor_by_id_async(user.id)
+
+    await server.organization_manager.delete_organization_by_id_async(org.id)
+    with pytest.raises(NoResultFound):
+        await server.user_manager.get_actor_by_id_async(user.id)
+
+
+async def test_actor_cache_expiry_and_races(monkeypatch):
+    cache = ActorCache()
+    loads = []
+
+    async def load(actor_id):
+        loads.append(actor_id)
+        return PydanticUser(id=actor_id, name=f"user {len(loads)}")
+
+    actor_id = "user-00000000-0000-4000-8000-00000000cafe"
+    await cache.get_or_load(actor_id, load)
+    await cache.get_or_load(actor_id, load)
+    assert len(loads) == 1
+
+    monkeypatch.setattr(settings, "actor_cache_ttl_seconds", 0.0)
+    cache.invalidate_local(actor_id)
+    await cache.get_or_load(actor_id, load)
+    await cache.get_or_load(actor_id, load)
+    assert len(loads) == 3
+
+    # an actor loaded while it was invalidated is not cached
+    monkeypatch.setattr(settings, "actor_cache_ttl_seconds", 30.0)
+
+    async def load_racing_update(actor_id):
+        cache.invalidate_local(actor_id)
+        return await load(actor_id)
+
+    await cache.get_or_load(actor_id, load_racing_update)
+    await cache.get_or_load(actor_id, load)
+    assert len(loads) == 5
+    cache.clear()
+
+
 # ======================================================================================================================
 # ToolManager Tests
 # ======================================================================================================================
@@ -5552,6 +5920,21 @@ def test_message_delete(server: SyncServer, hello_world_message_fixture, default
     assert retrieved is None
 
 
+async def test_message_exists_by_otid(server: SyncServer, default_user, sarah_agent, charles_agent):
+    """Test looking up a message by offline threading ID, ignoring errored copies"""
+    otid = PydanticMessage.generate_otid()
+    assert not await server.message_manager.message_exists_by_otid_async(agent_id=sarah_agent.id, otid=otid, actor=default_user)
+
+    errored = PydanticMessage(agent_id=sarah_agent.id, role="user", content=[TextContent(text="errored")], otid=otid, is_err=True)
+    await server.message_manager.create_many_messages_async([errored], actor=default_user)
+    assert not await server.message_manager.message_exists_by_otid_async(agent_id=sarah_agent.id, otid=otid, actor=default_user)
+
+    message = PydanticMessage(agent_id=sarah_agent.id, role="user", content=[TextContent(text="delivered")], otid=otid)
+    await server.message_manager.create_many_messages_async([message], actor=default_user)
+    assert await server.message_manager.message_exists_by_otid_async(agent_id=sarah_agent.id, otid=otid, actor=default_user)
+    assert not await server.message_manager.message_exists_by_otid_async(agent_id=charles_agent.id, otid=otid, actor=default_user)
+
+
 def test_message_size(server: SyncServer, hello_world_message_fixture, default_user):
     """Test counting messages with filters"""
     base_message = hello_world_message_fixture
@@ -8234,6 +8617,40 @@ async def test_upsert_file_content_basic(server: SyncServer, default_user, defau
     assert orm_file.updated_at >= orm_file.created_at
 
 
+async def test_get_file_line_indexes(server: SyncServer, default_user, default_source, async_session):
+    """Line indexes are stored with the content, rebuilt for legacy rows and refreshed when the content changes."""
+    meta = PydanticFileMetadata(file_name="index_me.txt", file_type="text/plain", source_id=default_source.id)
+    created = await server.file_manager.create_file(file_metadata=meta, actor=default_user, text="alpha line\n\nbeta line\n")
+    without_content = await server.file_manager.create_file(
+        file_metadata=PydanticFileMetadata(file_name="empty.txt", file_type="text/plain", source_id=default_source.id), actor=default_user
+    )
+
+    indexes = await server.file_manager.get_file_line_indexes([created.id, without_content.id], actor=default_user)
+    assert list(indexes) == [created.id]
+    assert indexes[created.id].lines == ["alpha line", "beta line"]
+
+    # rows written before indexes existed are indexed on first use, and the index is saved
+    await async_session.execute(update(FileContentModel).where(FileContentModel.file_id == created.id).values(line_index=None))
+    await async_session.commit()
+    FileLineIndexCache().clear()
+    indexes = await server.file_manager.get_file_line_indexes([created.id], actor=default_user)
+    assert indexes[created.id].lines == ["alpha line", "beta line"]
+    content_row = (await async_session.execute(select(FileContentModel).where(FileContentModel.file_id == created.id))).scalar_one()
+    await async_session.refresh(content_row)
+    assert content_row.line_index is not None
+    old_index = indexes[created.id]
+
+    await server.file_manager.upsert_file_content(file_id=created.id, text="gamma line", actor=default_user)
+    indexes = await server.file_manager.get_file_line_indexes([created.id], actor=default_user)
+    assert indexes[created.id].lines == ["gamma line"]
+
+    # an index built from the old text (by a lookup that raced the update) doesn't overwrite the new one
+    await server.file_manager._save_line_indexes({created.id: ("alpha line\n\nbeta line\n", old_index)})
+    FileLineIndexCache().clear()
+    indexes = await server.file_manager.get_file_line_indexes([created.id], actor=default_user)
+    assert indexes[created.id].lines == ["gamma line"]
+
+
 async def test_get_organization_sources_metadata(server, default_user):
     """Test getting organization sources metadata with aggregated file information."""
     # Create test sources
@@ -9704,6 +10121,121 @@ async def test_step_manager_record_metrics_nonexistent_step(server: SyncServer,
         )
 
 
+async def test_write_behind_step_manager(server: SyncServer, sarah_agent, default_job, default_user):
+    """Test that buffered step writes are batched, merged and visible to reads."""
+    from letta.services.step_manager import WriteBehindStepManager
+    from letta.services.step_write_buffer import get_step_write_buffer, stop_step_write_buffers
+    from letta.services.telemetry_manager import WriteBehindTelemetryManager
+
+    step_manager = WriteBehindStepManager()
+    buffer = get_step_write_buffer()
+    buffer.flush_interval = 60  # only flush when something depends on the records
+
+    async def log_step():
+        return await step_manager.log_step_async(
+            agent_id=sarah_agent.id,
+            provider_name="openai",
+            provider_category="base",
+            model="gpt-4o-mini",
+            model_endpoint="https://api.openai.com/v1",
+            context_window_limit=8192,
+            job_id=default_job.id,
+            usage=UsageStatistics(completion_tokens=0, prompt_tokens=0, total_tokens=0),
+            actor=default_user,
+            status=StepStatus.PENDING,
+        )
+
+    try:
+        # updates of a step that is still buffered are merged into it
+        step = await log_step()
+        updated = await step_manager.update_step_success_async(
+            default_user, step.id, UsageStatistics(completion_tokens=10, prompt_tokens=20, total_tokens=30)
+        )
+        assert updated.status == StepStatus.SUCCESS
+        assert buffer.pending == 1
+
+        await step_manager.record_step_metrics_async(actor=default_user, step_id=step.id, llm_request_ns=1000, step_ns=2000)
+        await WriteBehindTelemetryManager().create_provider_trace_async(
+            actor=default_user,
+            provider_trace_create=ProviderTraceCreate(
+                request_json={"model": "gpt-4o-mini"},
+                response_json={"choices": []},
+                step_id=step.id,
+                organization_id=default_user.organization_id,
+            ),
+        )
+        assert buffer.pending == 3
+
+        # reads wait for the buffered records
+        written = await step_manager.get_step_async(step_id=step.id, actor=default_user)
+        assert buffer.pending == 0
+        assert written.status == StepStatus.SUCCESS
+        assert written.total_tokens == 30
+        metrics = await step_manager.get_step_metrics_async(step_id=step.id, actor=default_user)
+        assert metrics.step_ns == 2000
+        # taken from the step when not given
+        assert metrics.agent_id == sarah_agent.id
+        assert metrics.job_id == default_job.id
+        trace = await WriteBehindTelemetryManager().get_provider_trace_by_step_id_async(step_id=step.id, actor=default_user)
+        assert trace.request_json == {"model": "gpt-4o-mini"}
+
+        # updates of written steps are buffered too
+        assert await step_manager.update_step_stop_reason(default_user, step.id, StopReasonType.end_turn) is None
+        assert buffer.pending == 1
+        steps = await step_manager.list_steps_async(actor=default_user, agent_id=sarah_agent.id)
+        assert [s.stop_reason for s in steps if s.id == step.id] == [StopReasonType.end_turn]
+
+        # messages reference their step, so writing them writes the step first
+        step = await log_step()
+        await server.message_manager.create_many_messages_async(
+            [PydanticMessage(agent_id=sarah_agent.id, step_id=step.id, role=MessageRole.user, content=[TextContent(text="hello")])],
+            actor=default_user,
+        )
+        assert buffer.pending == 0
+
+        # a record that can't be written is dropped without losing the rest of the batch
+        dropped = buffer.dropped
+        await step_manager.record_step_metrics_async(actor=default_user, step_id=step.id, step_ns=1)
+        await step_manager.log_step_async(
+            agent_id=sarah_agent.id,
+            provider_name="openai",
+            provider_category="base",
+            model="gpt-4o-mini",
+            model_endpoint=None,
+            context_window_limit=8192,
+            job_id="job-00000000-0000-4000-8000-000000000000",
+            usage=UsageStatistics(completion_tokens=0, prompt_tokens=0, total_tokens=0),
+            actor=default_user,
+        )
+        await buffer.flush()
+        assert buffer.dropped == dropped + 1
+        assert (await step_manager.get_step_metrics_async(step_id=step.id, actor=default_user)).step_ns == 1
+    finally:
+        await stop_step_write_buffers()
+
+
+def test_step_write_buffer_is_flushed_when_its_event_loop_goes_away(monkeypatch):
+    """A buffer left running is written out when asyncio.run cancels its flush task, and not kept for the closed loop."""
+    from letta.services import step_write_buffer
+
+    written = []
+
+    async def write(batch):
+        written.extend(batch.traces)
+
+    monkeypatch.setattr(step_write_buffer.StepWriteBuffer, "_write", staticmethod(write))
+
+    async def add_trace():
+        buffer = step_write_buffer.get_step_write_buffer()
+        buffer.flush_interval = 60
+        await buffer.add_trace({"id": "trace-1", "step_id": "step-1"})
+        return asyncio.get_running_loop()
+
+    loop = asyncio.run(add_trace())
+    assert written == [{"id": "trace-1", "step_id": "step-1"}]
+    assert loop not in step_write_buffer._buffers
+
+
 def test_job_usage_stats_get_nonexistent_job(server: SyncServer, default_user):
     """Test getting usage statistics for a nonexistent job."""
     job_manager = server.job_manager
@@ -10715,6 +11247,37 @@ async def test_mcp_server_delete_removes_all_sessions_for_url_and_user(server, d
     assert await server.mcp_manager.get_oauth_session_by_id(orphaned.id, actor=default_user) is None
 
 
+@pytest.mark.asyncio
+async def test_mcp_server_update_and_delete_invalidate_cached_tool_lists(server, default_user, default_organization):
+    from letta.schemas.mcp import MCPServer as PydanticMCPServer, MCPServerType, UpdateSSEMCPServer
+    from letta.services.mcp.session_pool import get_mcp_session_pool
+
+    created_server = await server.mcp_manager.create_mcp_server(
+        PydanticMCPServer(
+            server_name=f"test_mcp_server_{uuid.uuid4().hex[:8]}",
+            server_type=MCPServerType.SSE,
+            server_url="https://tools.example.com/sse",
+            organization_id=default_organization.id,
+        ),
+        actor=default_user,
+    )
+    pool = get_mcp_session_pool()
+    key = server.mcp_manager._session_key(created_server.to_config(), default_user, None)
+
+    async def list_tools():
+        return []
+
+    await pool.list_tools(key, list_tools)
+    await server.mcp_manager.update_mcp_server_by_id(
+        created_server.id, UpdateSSEMCPServer(server_url="https://tools.example.com/v2/sse"), actor=default_user
+    )
+    assert key not in pool._tool_lists
+
+    await pool.list_tools(key, list_tools)
+    await server.mcp_manager.delete_mcp_server_by_id(created_server.id, actor=default_user)
+    assert key not in pool._tool_lists
+
+
 # ======================================================================================================================
 # FileAgent Tests
 # ======================================================================================================================
@@ -56,3 +56,26 @@ def test_memory_jinja2_set_template(sample_memory: Memory):
     )
     with pytest.raises(ValueError):
         sample_memory.set_prompt_template(prompt_template=template_bad_memory_structure)
+
+
+def test_memory_compile_is_memoized(sample_memory: Memory):
+    """Unchanged memory should return the cached render, and any block edit should re-render"""
+    first = sample_memory.compile()
+    assert sample_memory.compile() is first
+    assert sample_memory.model_copy(deep=True).compile() is first
+
+    sample_memory.update_block_value(label="human", value="User likes tea")
+    updated = sample_memory.compile()
+    assert "User likes tea" in updated
+    assert updated != first
+
+    sample_memory.get_block("human").read_only = True
+    assert sample_memory.compile() != updated
+
+
+@pytest.mark.asyncio
+async def test_memory_compile_in_thread_matches_compile(sample_memory: Memory):
+    sample_memory.update_block_value(label="persona", value="Async Agent")
+    compiled = await sample_memory.compile_in_thread_async()
+    assert compiled == sample_memory.compile()
+    assert "Async Agent" in compiled
@@ -0,0 +1,158 @@
+import asyncio
+
+import pytest
+
+from letta.schemas.embedding_config import EmbeddingConfig
+from letta.schemas.enums import ProviderCategory, ProviderType
+from letta.schemas.llm_config import LLMConfig
+from letta.schemas.providers import Provider
+from letta.services import model_catalog
+from letta.services.model_catalog import ModelCatalog, invalidate_provider_models
+from letta.settings import settings
+
+
+class _Upstream:
+    """What the fake provider API returns: the models, or raises `error`, after `delay` seconds."""
+
+    def __init__(self):
+        self.models = ["model-a"]
+        self.error = None
+        self.delay = 0.0
+        self.calls = 0
+
+
+upstream = _Upstream()
+
+
+class FakeProvider(Provider):
+    async def list_llm_models_async(self):
+        upstream.calls += 1
+        await asyncio.sleep(upstream.delay)
+        if upstream.error is not None:
+            raise upstream.error
+        return [
+            LLMConfig(model=model, model_endpoint_type="openai", context_window=8192, handle=f"{self.name}/{model}")
+            for model in upstream.models
+        ]
+
+    async def list_embedding_models_async(self):
+        upstream.calls += 1
+        return [EmbeddingConfig(embedding_model="embed", embedding_endpoint_type="openai", embedding_dim=8, handle=f"{self.name}/embed")]
+
+
+def _provider(api_key: str = "key") -> FakeProvider:
+    return FakeProvider(
+        id="provider-catalog-test",
+        name="fake",
+        provider_type=ProviderType.openai,
+        provider_category=ProviderCategory.byok,
+        api_key=api_key,
+    )
+
+
+def _names(models):
+    return [model.model for model in models]
+
+
+@pytest.fixture(autouse=True)
+def _reset(monkeypatch):
+    global upstream
+    upstream = _Upstream()
+    ModelCatalog().invalidate()
+    monkeypatch.setattr(settings, "model_catalog_enabled", True)
+    monkeypatch.setattr(settings, "model_catalog_ttl_seconds", 300.0)
+    yield
+    ModelCatalog().invalidate()
+
+
+@pytest.mark.asyncio
+async def test_catalog_caches_model_lists():
+    catalog = ModelCatalog()
+    assert _names(await catalog.list_llm_models(_provider())) == ["model-a"]
+    upstream.models = ["model-b"]
+    assert _names(await catalog.list_llm_models(_provider())) == ["model-a"]
+    assert upstream.calls == 1
+
+    # llm and embedding lists are cached separately
+    assert len(await catalog.list_embedding_models(_provider())) == 1
+    assert upstream.calls == 2
+
+    # callers get copies
+    models = await catalog.list_llm_models(_provider())
+    models[0].model = "changed"
+    assert _names(await catalog.list_llm_models(_provider())) == ["model-a"]
+
+
+@pytest.mark.asyncio
+async def test_catalog_serves_stale_list_while_refreshing(monkeypatch):
+    catalog = ModelCatalog()
+    await catalog.list_llm_models(_provider())
+    monkeypatch.setattr(settings, "model_catalog_ttl_seconds", 0.0)
+    upstream.models = ["model-b"]
+    upstream.delay = 0.05
+
+    # the stale list is returned right away, concurrent callers share one refresh
+    lists = await asyncio.gather(*(catalog.list_llm_models(_provider()) for _ in range(5)))
+    assert all(_names(models) == ["model-a"] for models in lists)
+    await asyncio.sleep(0.1)
+    assert upstream.calls == 2
+
+    monkeypatch.setattr(settings, "model_catalog_ttl_seconds", 300.0)
+    assert _names(await catalog.list_llm_models(_provider())) == ["model-b"]
+
+
+@pytest.mark.asyncio
+async def test_catalog_keeps_last_list_when_refresh_fails(monkeypatch):
+    catalog = ModelCatalog()
+    await catalog.list_llm_models(_provider())
+    monkeypatch.setattr(settings, "model_catalog_ttl_seconds", 0.05)
+    await asyncio.sleep(0.05)
+    upstream.error = RuntimeError("provider is down")
+
+    assert _names(await catalog.list_llm_models(_provider())) == ["model-a"]
+    await asyncio.sleep(0.01)
+    assert upstream.calls == 2
+
+    # the failed refresh counts as fresh, so the provider isn't hit on every request
+    assert _names(await catalog.list_llm_models(_provider())) == ["model-a"]
+    assert upstream.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_catalog_cold_miss(monkeypatch):
+    catalog = ModelCatalog()
+    upstream.error = RuntimeError("provider is down")
+    assert await catalog.list_llm_models(_provider()) == []
+    with pytest.raises(RuntimeError):
+        await catalog.list_llm_models(_provider(), raise_errors=True)
+
+    # a slow provider is given up on, but its list is cached once it arrives
+    monkeypatch.setattr(model_catalog, "GET_PROVIDERS_TIMEOUT_SECONDS", 0.01)
+    upstream.error = None
+    upstream.delay = 0.05
+    assert await catalog.list_llm_models(_provider()) == []
+    await asyncio.sleep(0.1)
+    assert _names(await catalog.list_llm_models(_provider())) == ["model-a"]
+
+
+@pytest.mark.asyncio
+async def test_catalog_invalidation():
+    catalog = ModelCatalog()
+    await catalog.list_llm_models(_provider())
+    upstream.models = ["model-b"]
+
+    # a changed configuration (e.g. a new api key) is never served the old list
+    assert _names(await catalog.list_llm_models(_provider(api_key="other"))) == ["model-b"]
+
+    upstream.models = ["model-c"]
+    invalidate_provider_models("provider-catalog-test")
+    assert _names(await catalog.list_llm_models(_provider(api_key="other"))) == ["model-c"]
+
+
+@pytest.mark.asyncio
+async def test_catalog_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "model_catalog_enabled", False)
+    catalog = ModelCatalog()
+    await catalog.list_llm_models(_provider())
+    await catalog.list_llm_models(_provider())
+    assert upstream.calls == 2
@@ -3,7 +3,7 @@ from unittest.mock import patch
 
 import pytest
 
-from letta.server.rest_api.json_parser import OptimisticJSONParser
+from letta.server.rest_api.json_parser import IncrementalJSONParser, OptimisticJSONParser
 
 
 @pytest.fixture
@@ -278,3 +278,52 @@ def test_unescaped_control_characters_strict(strict_parser):
 
     with pytest.raises(json.JSONDecodeError, match="Invalid control character"):
         strict_parser.parse(input_str)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64])
+def test_incremental_parser_streams_deltas(chunk_size):
+    """
+    Test that feeding a document in fragments yields decoded string deltas and completed values that add up to json.loads.
+    """
+    document = {
+        "inner_thoughts": 'Quotes "inside", a backslash \\, a newline\n and unicode \u00e9 \U0001f600',
+        "message": "x" * 100,
+        "count": -12.5e3,
+        "flag": True,
+        "nothing": None,
+        "nested": {"list": [1, "}]", {"a": "b"}]},
+    }
+    text = json.dumps(document)
+    parser = IncrementalJSONParser()
+
+    accumulated = {}
+    for start in range(0, len(text), chunk_size):
+        for key, delta in parser.feed(text[start : start + chunk_size]).items():
+            accumulated[key] = accumulated.get(key, "") + delta if isinstance(delta, str) else delta
+
+    assert accumulated == document
+    assert parser.snapshot() == document
+    assert parser.done
+
+
+def test_incremental_parser_partial_state():
+    """
+    Test the partial view of a document that is still streaming.
+    """
+    parser = IncrementalJSONParser()
+
+    assert parser.feed('{"inner_thoughts": "thinking') == {"inner_thoughts": "thinking"}
+    assert parser.keys() == ["inner_thoughts"]
+
+    # an incomplete key or escape sequence is held back until it completes
+    assert parser.feed(" \\u00") == {"inner_thoughts": " "}
+    assert parser.feed('e9", "mess') == {"inner_thoughts": "\u00e9"}
+    assert parser.keys() == ["inner_thoughts"]
+
+    assert parser.feed('age": "hi", "items": [1, 2') == {"message": "hi"}
+    assert parser.snapshot() == {"inner_thoughts": "thinking \u00e9", "message": "hi", "items": [1, 2]}
+    assert parser.feed("]}") == {"items": [1, 2]}
+    assert parser.done
+
+    # parse() is stateless
+    assert parser.parse('{"a": "b"') == {"a": "b"}
@@ -0,0 +1,109 @@
+import asyncio
+import threading
+
+import pytest
+
+from letta.errors import AgentLockTimeoutError
+from letta.services.per_agent_lock_manager import PerAgentLockManager
+
+
+@pytest.fixture
+def lock_manager():
+    # a fresh instance per test instead of the process-wide singleton
+    return PerAgentLockManager.__wrapped__()
+
+
+@pytest.mark.asyncio
+async def test_lock_is_fifo_and_cleaned_up(lock_manager):
+    order = []
+    release_first = asyncio.Event()
+
+    async def worker(index: int):
+        async with lock_manager.lock("agent-1"):
+            order.append(index)
+            if index == 0:
+                await release_first.wait()
+
+    tasks = [asyncio.create_task(worker(0))]
+    await asyncio.sleep(0)
+    for i in range(1, 5):
+        tasks.append(asyncio.create_task(worker(i)))
+        await asyncio.sleep(0)
+
+    assert lock_manager.locked("agent-1")
+    release_first.set()
+    await asyncio.gather(*tasks)
+
+    assert order == [0, 1, 2, 3, 4]
+    assert not lock_manager.locked("agent-1")
+    assert lock_manager.active_lock_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_lock_timeout_and_other_agents_unblocked(lock_manager):
+    async with lock_manager.lock("agent-1"):
+        with pytest.raises(AgentLockTimeoutError):
+            async with lock_manager.lock("agent-1", timeout=0.05):
+                pass
+
+        # a different agent is not affected by agent-1 being busy
+        async with lock_manager.lock("agent-2", timeout=0.05):
+            assert lock_manager.locked("agent-2")
+
+    # the timed out waiter left no trace behind
+    assert lock_manager.active_lock_count() == 0
+    async with lock_manager.lock("agent-1", timeout=0.05):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_lock_hands_off_across_event_loops(lock_manager):
+    acquired_in_thread = threading.Event()
+
+    async def hold_in_other_loop():
+        async with lock_manager.lock("agent-1"):
+            acquired_in_thread.set()
+            await asyncio.sleep(0.1)
+
+    thread = threading.Thread(target=lambda: asyncio.run(hold_in_other_loop()))
+    thread.start()
+    await asyncio.to_thread(acquired_in_thread.wait)
+
+    # waits on this loop for a lock held by a task on the thread's loop, without blocking this loop
+    heartbeat = asyncio.create_task(asyncio.sleep(0.01))
+    async with lock_manager.lock("agent-1", timeout=5):
+        assert heartbeat.done()
+
+    await asyncio.to_thread(thread.join)
+    assert lock_manager.active_lock_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_serialize_agent_stream_locks_before_streaming(monkeypatch):
+    from letta.services import per_agent_lock_manager
+    from letta.settings import settings
+
+    lock_manager = PerAgentLockManager.__wrapped__()
+    monkeypatch.setattr(per_agent_lock_manager, "PerAgentLockManager", lambda: lock_manager)
+    monkeypatch.setattr(settings, "serialize_agent_messages", True)
+    monkeypatch.setattr(settings, "agent_lock_timeout_seconds", 0.05)
+
+    async def chunks():
+        yield "a"
+        yield "b"
+
+    # the lock is held as soon as the stream is returned, before any chunk is read
+    stream = await per_agent_lock_manager.serialize_agent_stream("agent-1", chunks())
+    assert lock_manager.locked("agent-1")
+
+    # a second stream for the busy agent fails up front, so the request can be answered with a 409
+    with pytest.raises(AgentLockTimeoutError):
+        await per_agent_lock_manager.serialize_agent_stream("agent-1", chunks())
+
+    assert [chunk async for chunk in stream] == ["a", "b"]
+    assert lock_manager.active_lock_count() == 0
+
+    # closing a stream without reading it releases the lock too
+    stream = await per_agent_lock_manager.serialize_agent_stream("agent-1", chunks())
+    await stream.aclose()
+    assert lock_manager.active_lock_count() == 0
@@ -0,0 +1,152 @@
+import asyncio
+import uuid
+from collections import defaultdict
+
+import pytest
+from redis.exceptions import ResponseError
+
+from letta.data_sources.redis_client import NoopAsyncRedisClient, get_redis_client
+from letta.server.rest_api import redis_stream_manager
+from letta.server.rest_api.redis_stream_manager import RedisSSEStreamWriter, redis_sse_stream_generator, sse_stream_key
+
+
+@pytest.fixture
+async def redis_client():
+    client = await get_redis_client()
+    if isinstance(client, NoopAsyncRedisClient):
+        pytest.skip("Redis is not available")
+    return client
+
+
+async def _read(redis_client, run_id, starting_after=None):
+    return [chunk async for chunk in redis_sse_stream_generator(redis_client, run_id, starting_after=starting_after)]
+
+
+@pytest.mark.asyncio
+async def test_runs_are_flushed_together_and_tailed(redis_client):
+    writer = RedisSSEStreamWriter(redis_client, flush_size=5)
+    run_ids = [f"run-{uuid.uuid4()}" for _ in range(3)]
+    readers = [asyncio.create_task(_read(redis_client, run_id)) for run_id in run_ids for _ in range(2)]
+
+    try:
+        for i in range(12):
+            for run_id in run_ids:
+                await writer.write_chunk(run_id, f'data: {{"i": {i}, "run_id":null}}\n\n')
+        for run_id in run_ids:
+            await writer.mark_complete(run_id)
+
+        results = await asyncio.wait_for(asyncio.gather(*readers), timeout=10)
+        for run_id, result in zip([run_id for run_id in run_ids for _ in range(2)], results):
+            assert result == [f'data: {{"i": {i}, "run_id":"{run_id}"}}\n\n' for i in range(12)] + ["data: [DONE]\n\n"]
+
+        # a client reconnecting with a cursor only gets what it missed
+        resumed = await asyncio.wait_for(_read(redis_client, run_ids[0], starting_after=10), timeout=10)
+        assert len(resumed) == 3
+        assert writer.buffer == {}
+        assert writer.buffered_bytes == 0
+    finally:
+        await writer.stop()
+        await redis_client.delete(*[sse_stream_key(run_id) for run_id in run_ids])
+
+
+@pytest.mark.asyncio
+async def test_buffers_are_bounded(redis_client):
+    writer = RedisSSEStreamWriter(redis_client, flush_interval=60, flush_size=1000, max_run_buffer_bytes=100)
+    run_id = f"run-{uuid.uuid4()}"
+
+    try:
+        for i in range(50):
+            await writer.write_chunk(run_id, f"data: {i:020d}\n\n")
+            # the producer waited for a flush whenever the run's buffer went over the limit
+            assert writer.buffered_bytes <= 100 + 30
+        await writer.mark_complete(run_id)
+
+        assert len(await redis_client.xrange(sse_stream_key(run_id))) == 51
+    finally:
+        await writer.stop()
+        await redis_client.delete(sse_stream_key(run_id))
+
+
+class _RejectingRedis:
+    """Pipelines that apply every command except XADDs to `rejected_keys`, which fail like a key of the wrong type."""
+
+    def __init__(self, rejected_keys):
+        self.rejected_keys = set(rejected_keys)
+        self.streams = defaultdict(list)
+        self.rejected_flushes = 0
+
+    async def get_client(self):
+        return self
+
+    def pipeline(self, transaction):
+        return _Pipeline(self)
+
+
+class _Pipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    def execute_command(self, *args):
+        self.commands.append(args)
+
+    def expire(self, key, ttl):
+        self.commands.append(("EXPIRE", key, ttl))
+
+    async def execute(self, raise_on_error=True):
+        assert not raise_on_error
+        results = []
+        if any(command[0] == "XADD" and command[1] in self.redis.rejected_keys for command in self.commands):
+            self.redis.rejected_flushes += 1
+        for command in self.commands:
+            if command[0] == "XADD" and command[1] in self.redis.rejected_keys:
+                results.append(ResponseError("WRONGTYPE Operation against a key holding the wrong kind of value"))
+                continue
+            if command[0] == "XADD":
+                self.redis.streams[command[1]].append(command[command.index("seq_id") + 1])
+            results.append(True)
+        return results
+
+
+@pytest.mark.asyncio
+async def test_rejected_run_does_not_hold_back_other_runs():
+    redis = _RejectingRedis(rejected_keys={sse_stream_key("bad")})
+    writer = RedisSSEStreamWriter(redis, flush_interval=0.01)
+
+    try:
+        await writer.write_chunk("good", "data: 1\n\n")
+        await writer.write_chunk("bad", "data: 1\n\n")
+        await writer.mark_complete("good")
+        # flushed once, although its flush round failed for the other run
+        assert redis.streams[sse_stream_key("good")] == [1, 2]
+
+        with pytest.raises(ResponseError):
+            await writer.mark_complete("bad")
+    finally:
+        await writer.stop()
+
+    # the rejected run was retried on its own, then dropped
+    assert redis.rejected_flushes == redis_stream_manager.MAX_RUN_FLUSH_ATTEMPTS
+    assert redis.streams[sse_stream_key("good")] == [1, 2]
+    assert writer.buffer == {}
+    assert writer.buffered_bytes == 0
+
+
+def test_writer_is_flushed_when_its_event_loop_goes_away():
+    redis = _RejectingRedis(rejected_keys=())
+
+    async def write():
+        writer = redis_stream_manager.get_sse_stream_writer(redis)
+        writer.flush_interval = 60
+        await writer.write_chunk("run", "data: 1\n\n")
+        return asyncio.get_running_loop()
+
+    loop = asyncio.run(write())
+    assert redis.streams[sse_stream_key("run")] == [1]
+    assert redis not in redis_stream_manager._writers.get(loop, {})
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from letta.helpers.sqlite_vector_index import ArchiveVectorMatrix
+from letta.orm.sqlite_functions import cosine_distance
+
+DIM = 8
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((50, DIM)).astype(np.float32)
+
+
+@pytest.fixture
+def matrix(vectors):
+    return ArchiveVectorMatrix(dim=DIM, ids=[f"passage-{i}" for i in range(len(vectors))], embeddings=vectors)
+
+
+def test_search_matches_udf_ordering(matrix, vectors):
+    """Top-k from the matrix should match ranking every row with the cosine_distance UDF."""
+    query = vectors[7] + 0.1
+    expected = sorted(
+        ((f"passage-{i}", cosine_distance(v, query, expected_dim=DIM)) for i, v in enumerate(vectors)),
+        key=lambda pair: pair[1],
+    )[:5]
+
+    results = matrix.search(query, k=5)
+
+    assert [passage_id for passage_id, _ in results] == [passage_id for passage_id, _ in expected]
+    assert np.allclose([d for _, d in results], [d for _, d in expected], atol=1e-5)
+
+
+def test_search_handles_padded_query(matrix, vectors):
+    padded = np.pad(vectors[3], (0, 32))
+    assert matrix.search(padded, k=1)[0][0] == "passage-3"
+
+
+def test_search_restricted_to_candidates(matrix, vectors):
+    results = matrix.search(vectors[3], k=3, candidate_ids={"passage-10", "passage-20", "missing"})
+    assert {passage_id for passage_id, _ in results} == {"passage-10", "passage-20"}
+
+
+def test_search_without_limit_returns_everything(matrix):
+    assert len(matrix.search(np.ones(DIM), k=None)) == len(matrix)
+
+
+def test_add_update_and_remove(matrix, vectors):
+    new_vector = np.full(DIM, 5.0, dtype=np.float32)
+    matrix.add(["passage-new", "passage-0"], [new_vector, new_vector])  # existing ids are ignored
+    assert len(matrix) == len(vectors) + 1
+    assert matrix.search(new_vector, k=1)[0][0] == "passage-new"
+
+    matrix.update("passage-1", -new_vector)
+    assert matrix.search(-new_vector, k=1)[0][0] == "passage-1"
+
+    assert matrix.remove(["passage-new", "passage-unknown"]) == 1
+    assert "passage-new" not in matrix.id_to_row
+    assert matrix.search(new_vector, k=1)[0][0] != "passage-new"
+    # row lookup stays consistent after compaction
+    assert matrix.ids[matrix.id_to_row["passage-49"]] == "passage-49"
+
+
+def test_zero_and_missing_embeddings_rank_last():
+    matrix = ArchiveVectorMatrix(dim=2)
+    matrix.add(["zero", "none", "match"], [[0.0, 0.0], None, [1.0, 0.0]])
+
+    results = matrix.search([1.0, 0.0], k=3)
+
+    assert results[0] == ("match", pytest.approx(0.0, abs=1e-6))
+    assert [d for _, d in results[1:]] == [pytest.approx(1.0), pytest.approx(1.0)]
+
+
+def test_empty_matrix():
+    assert ArchiveVectorMatrix(dim=DIM).search(np.ones(DIM), k=5) == []
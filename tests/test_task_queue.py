@@ -0,0 +1,161 @@
+import asyncio
+import uuid
+
+import pytest
+
+from letta.data_sources.redis_client import NoopAsyncRedisClient, get_redis_client
+from letta.services import task_queue
+from letta.services.task_queue import InMemoryTaskBackend, RedisTaskBackend, Task, TaskPriority, TaskQueue, task_handler
+from letta.settings import settings
+
+
+@pytest.fixture(params=["memory", "redis"])
+async def backend(request):
+    if request.param == "memory":
+        return InMemoryTaskBackend()
+    redis_client = await get_redis_client()
+    if isinstance(redis_client, NoopAsyncRedisClient):
+        pytest.skip("Redis is not available")
+    return RedisTaskBackend(redis_client, prefix=f"letta:test_task_queue:{uuid.uuid4()}")
+
+
+def _task(priority=TaskPriority.default, serialize_key=None, **payload) -> Task:
+    return Task(name="test", actor_id="user-test", payload=payload, priority=priority, serialize_key=serialize_key)
+
+
+@pytest.mark.asyncio
+async def test_claim_order(backend):
+    tasks = [
+        _task(TaskPriority.sleeptime, i=0),
+        _task(TaskPriority.default, i=1),
+        _task(TaskPriority.foreground, i=2),
+        _task(TaskPriority.default, i=3),
+    ]
+    for task in tasks:
+        await backend.enqueue(task)
+        # distinct enqueue times for the millisecond ordering of the Redis backend
+        await asyncio.sleep(0.002)
+
+    claimed = [await backend.claim(60) for _ in range(4)]
+    assert [task.payload["i"] for task in claimed] == [2, 1, 3, 0]
+    assert all(task.attempts == 1 for task in claimed)
+    assert await backend.claim(60) is None
+
+    for task in claimed:
+        await backend.complete(task)
+    assert await backend.requeue_expired() == 0
+
+
+@pytest.mark.asyncio
+async def test_tasks_with_same_key_run_one_at_a_time(backend):
+    first, second, other = _task(serialize_key="agent-1", i=0), _task(serialize_key="agent-1", i=1), _task(serialize_key="agent-2", i=2)
+    for task in (first, second, other):
+        await backend.enqueue(task)
+        await asyncio.sleep(0.002)
+
+    assert (await backend.claim(60)).id == first.id
+    assert (await backend.claim(60)).id == other.id
+    assert await backend.claim(60) is None
+
+    await backend.complete(first)
+    assert (await backend.claim(60)).id == second.id
+
+
+@pytest.mark.asyncio
+async def test_retry_after_backoff(backend):
+    await backend.enqueue(_task(serialize_key="agent-1"))
+    task = await backend.claim(60)
+    await backend.retry(task, 0.3)
+
+    assert await backend.claim(60) is None
+    await asyncio.sleep(0.35)
+    task = await backend.claim(60)
+    assert task.attempts == 2
+    await backend.complete(task)
+    assert not await backend.extend(task, 60)
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_requeued(backend):
+    await backend.enqueue(_task(serialize_key="agent-1"))
+    task = await backend.claim(0.05)
+    assert await backend.extend(task, 0.05)
+
+    await asyncio.sleep(0.1)
+    assert await backend.requeue_expired() == 1
+    # the key is free again
+    task = await backend.claim(60)
+    assert task.attempts == 2
+    await backend.complete(task)
+
+
+@pytest.fixture
+def worker_settings(monkeypatch):
+    monkeypatch.setattr(settings, "task_queue_workers", 4)
+    monkeypatch.setattr(settings, "task_queue_poll_interval_seconds", 0.05)
+    monkeypatch.setattr(task_queue, "uniform", lambda a, b: 0.01)
+
+
+async def _wait_until(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_queue_runs_retries_and_gives_up(default_user, worker_settings):
+    attempts = {}
+    failures = []
+
+    async def on_failure(actor, payload, error):
+        failures.append((actor.id, payload["i"], error))
+
+    @task_handler("test_flaky", on_failure=on_failure)
+    async def flaky(actor, payload):
+        attempts[payload["i"]] = attempts.get(payload["i"], 0) + 1
+        if attempts[payload["i"]] < payload["fail_times"] + 1:
+            raise ValueError(f"attempt {attempts[payload['i']]} failed")
+
+    queue = TaskQueue(InMemoryTaskBackend())
+    try:
+        await queue.enqueue("test_flaky", default_user, {"i": 0, "fail_times": 0})
+        await queue.enqueue("test_flaky", default_user, {"i": 1, "fail_times": 2})
+        await queue.enqueue("test_flaky", default_user, {"i": 2, "fail_times": 5})
+
+        await _wait_until(lambda: queue.backend.size == 0)
+    finally:
+        await queue.stop()
+
+    assert attempts == {0: 1, 1: 3, 2: settings.task_queue_max_attempts}
+    assert failures == [(default_user.id, 2, "attempt 3 failed")]
+    assert queue.failed == 1
+
+
+@pytest.mark.asyncio
+async def test_queue_serializes_tasks_per_key(default_user, worker_settings):
+    running = {}
+    peak = {}
+    done = []
+
+    @task_handler("test_serialized")
+    async def serialized(actor, payload):
+        key = payload["agent_id"]
+        running[key] = running.get(key, 0) + 1
+        peak[key] = max(peak.get(key, 0), running[key])
+        await asyncio.sleep(0.02)
+        running[key] -= 1
+        done.append(payload["i"])
+
+    queue = TaskQueue(InMemoryTaskBackend())
+    try:
+        for i in range(8):
+            agent_id = f"agent-{i % 2}"
+            await queue.enqueue("test_serialized", default_user, {"agent_id": agent_id, "i": i}, serialize_key=agent_id)
+        await _wait_until(lambda: len(done) == 8)
+    finally:
+        await queue.stop()
+
+    assert peak == {"agent-0": 1, "agent-1": 1}
+    # tasks of one key run in the order they were queued
+    assert [i for i in done if i % 2 == 0] == [0, 2, 4, 6]
@@ -0,0 +1,70 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from letta.local_llm.utils import num_tokens_from_messages
+from letta.schemas.letta_message_content import TextContent
+from letta.schemas.message import Message
+from letta.services.context_window_calculator.token_counter import AnthropicTokenCounter, TiktokenCounter, local_token_cache
+
+
+def _message(index: int, text: str) -> Message:
+    return Message(
+        id=f"message-00000000-0000-4000-8000-{index:012d}",
+        role="user" if index % 2 == 0 else "assistant",
+        content=[TextContent(text=text)],
+        updated_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+class FakeAnthropicClient:
+    """Stands in for the remote count API: counts 10 tokens per message and records each call."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def count_tokens(self, model=None, messages=None, tools=None):
+        self.calls.append(messages)
+        return 10 * len(messages)
+
+
+@pytest.fixture(autouse=True)
+def clear_local_token_cache():
+    local_token_cache.clear()
+    yield
+    local_token_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_tiktoken_context_count_matches_full_count():
+    counter = TiktokenCounter("gpt-4o-mini")
+    messages = [_message(i, f"message number {i} " * (i + 1)) for i in range(6)]
+
+    expected = num_tokens_from_messages(Message.to_openai_dicts_from_list(messages), model="gpt-4o-mini")
+    assert await counter.count_context_message_tokens(messages, context_id="agent-1") == expected
+
+    # an edited message (new updated_at) is recounted, unchanged ones come from the cache
+    edited = messages[2].model_copy(update={"content": [TextContent(text="short")], "updated_at": datetime.now(timezone.utc)})
+    messages[2] = edited
+    expected = num_tokens_from_messages(Message.to_openai_dicts_from_list(messages), model="gpt-4o-mini")
+    assert await counter.count_context_message_tokens(messages, context_id="agent-1") == expected
+
+
+@pytest.mark.asyncio
+async def test_anthropic_context_count_extends_anchor_locally():
+    client = FakeAnthropicClient()
+    counter = AnthropicTokenCounter(client, "claude-sonnet")
+    messages = [_message(i, f"message {i}") for i in range(4)]
+
+    assert await counter.count_context_message_tokens(messages, context_id="agent-1") == 40
+    assert len(client.calls) == 1
+
+    # appended messages are estimated locally on top of the exact anchor
+    grown = messages + [_message(4, "a new message")]
+    count = await counter.count_context_message_tokens(grown, context_id="agent-1")
+    assert count > 40
+    assert len(client.calls) == 1
+
+    # dropping earlier messages (e.g. summarization) re-anchors with an exact count
+    assert await counter.count_context_message_tokens(grown[2:], context_id="agent-1") == 30
+    assert len(client.calls) == 2